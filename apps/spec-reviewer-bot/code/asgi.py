@@ -0,0 +1,114 @@
+"""
+This module contains the ASGI entry point for the application.
+
+The Flask app is served from a pool of worker threads while all of its async views
+run on one process-wide event loop, so their I/O interleaves across requests and the
+database and Azure OpenAI clients, such as the PostgreSQL chat history pool, live for
+the whole process. Set SHARED_EVENT_LOOP_ENABLED=false to run each async view on its
+own loop instead. Run it with any ASGI server, for example uvicorn from the optional
+asgi dependency group (poetry install --with asgi):
+
+    uvicorn asgi:app --host 0.0.0.0 --port 80
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgiInstance
+
+# The shared loop must be enabled before the Flask app is created
+os.environ.setdefault("SHARED_EVENT_LOOP_ENABLED", "true")
+
+# pylint: disable=wrong-import-position
+from app import app as flask_app  # noqa: E402
+from backend.batch.utilities.helpers.async_runtime import AsyncRuntime  # noqa: E402
+from backend.batch.utilities.helpers.env_helper import EnvHelper  # noqa: E402
+
+
+class ThreadPoolWsgiToAsgiInstance(WsgiToAsgiInstance):
+    """Runs the WSGI app on the given thread pool instead of one shared thread."""
+
+    def __init__(self, wsgi_application, executor: ThreadPoolExecutor):
+        super().__init__(wsgi_application)
+        self.executor = executor
+
+    async def run_wsgi_app(self, body):
+        await sync_to_async(
+            self.run_wsgi_app_in_thread, thread_sensitive=False, executor=self.executor
+        )(body)
+
+    def run_wsgi_app_in_thread(self, body):
+        """
+        Mirrors the synchronous body of asgiref's run_wsgi_app, so start_response is
+        called in the same worker thread as the WSGI app.
+        """
+        try:
+            environ = self.build_environ(self.scope, body)
+        except ValueError:
+            self.sync_send(
+                {
+                    "type": "http.response.start",
+                    "status": 400,
+                    "headers": [(b"content-type", b"text/plain")],
+                }
+            )
+            self.sync_send(
+                {
+                    "type": "http.response.body",
+                    "body": b"Bad Request: Too many duplicate headers",
+                }
+            )
+            return
+        bytes_sent = 0
+        for output in self.wsgi_application(environ, self.start_response):
+            if not self.response_started:
+                self.response_started = True
+                self.sync_send(self.response_start)
+            if self.response_content_length is not None:
+                bytes_allowed = self.response_content_length - bytes_sent
+                if len(output) > bytes_allowed:
+                    output = output[:bytes_allowed]
+            self.sync_send(
+                {"type": "http.response.body", "body": output, "more_body": True}
+            )
+            bytes_sent += len(output)
+            if bytes_sent == self.response_content_length:
+                break
+        if not self.response_started:
+            self.response_started = True
+            self.sync_send(self.response_start)
+        self.sync_send({"type": "http.response.body"})
+
+
+class FlaskAsgiApp:
+    def __init__(self, wsgi_application, worker_threads: int):
+        self.wsgi_application = wsgi_application
+        self.executor = ThreadPoolExecutor(
+            max_workers=worker_threads, thread_name_prefix="asgi-worker"
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+            return
+        await ThreadPoolWsgiToAsgiInstance(self.wsgi_application, self.executor)(
+            scope, receive, send
+        )
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                runtime = AsyncRuntime.current()
+                if runtime:
+                    await asyncio.to_thread(runtime.shutdown)
+                self.executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+app = FlaskAsgiApp(flask_app, EnvHelper().ASGI_WORKER_THREADS)
@@ -1,22 +1,29 @@
 import os
 import logging
-from uuid import uuid4
 from dotenv import load_dotenv
 from flask import request, jsonify, Blueprint
-from openai import AsyncAzureOpenAI
 from backend.batch.utilities.chat_history.auth_utils import (
     get_authenticated_user_details,
 )
 from backend.batch.utilities.helpers.config.config_helper import ConfigHelper
-from backend.batch.utilities.helpers.env_helper import EnvHelper
 from backend.batch.utilities.chat_history.database_factory import DatabaseFactory
+from backend.batch.utilities.chat_history.database_client_base import (
+    InvalidCursorError,
+)
+from backend.batch.utilities.chat_history.conversation_summarizer import (
+    ConversationSummarizer,
+)
+from backend.batch.utilities.chat_history.conversation_titler import (
+    ConversationTitler,
+    provisional_title,
+)
 
 load_dotenv()
 bp_chat_history_response = Blueprint("chat_history", __name__)
 logger = logging.getLogger(__name__)
 logger.setLevel(level=os.environ.get("LOGLEVEL", "INFO").upper())
 
-env_helper: EnvHelper = EnvHelper()
+HISTORY_PAGE_SIZE = 25
 
 
 def init_database_client():
@@ -28,26 +35,6 @@ def init_database_client():
         raise e
 
 
-def init_openai_client():
-    try:
-        if env_helper.is_auth_type_keys():
-            azure_openai_client = AsyncAzureOpenAI(
-                azure_endpoint=env_helper.AZURE_OPENAI_ENDPOINT,
-                api_version=env_helper.AZURE_OPENAI_API_VERSION,
-                api_key=env_helper.AZURE_OPENAI_API_KEY,
-            )
-        else:
-            azure_openai_client = AsyncAzureOpenAI(
-                azure_endpoint=env_helper.AZURE_OPENAI_ENDPOINT,
-                api_version=env_helper.AZURE_OPENAI_API_VERSION,
-                azure_ad_token_provider=env_helper.AZURE_TOKEN_PROVIDER,
-            )
-        return azure_openai_client
-    except Exception as e:
-        logging.exception("Exception in Azure OpenAI initialization: %s", e)
-        raise e
-
-
 @bp_chat_history_response.route("/history/list", methods=["GET"])
 async def list_conversations():
     config = ConfigHelper.get_active_config_or_default()
@@ -55,7 +42,14 @@ async def list_conversations():
         return jsonify({"error": "Chat history is not available"}), 400
 
     try:
-        offset = request.args.get("offset", 0)
+        cursor = request.args.get("cursor") or None
+        try:
+            offset = int(request.args.get("offset", 0))
+        except ValueError:
+            return jsonify({"error": "offset must be a non-negative integer"}), 400
+        if offset < 0:
+            return jsonify({"error": "offset must be a non-negative integer"}), 400
+
         authenticated_user = get_authenticated_user_details(
             request_headers=request.headers
         )
@@ -66,16 +60,31 @@ async def list_conversations():
 
         await conversation_client.connect()
         try:
-            conversations = await conversation_client.get_conversations(
-                user_id, offset=offset, limit=25
-            )
+            next_cursor = None
+            if offset and not cursor:
+                # Kept for clients paging by offset, which reads all the previous pages
+                conversations = await conversation_client.get_conversations(
+                    user_id, offset=offset, limit=HISTORY_PAGE_SIZE
+                )
+            else:
+                conversations, next_cursor = (
+                    await conversation_client.get_conversations_page(
+                        user_id, limit=HISTORY_PAGE_SIZE, cursor=cursor
+                    )
+                )
             if not isinstance(conversations, list):
                 return (
                     jsonify({"error": f"No conversations for {user_id} were found"}),
                     404,
                 )
 
-            return jsonify(conversations), 200
+            response = jsonify(conversations)
+            # The body stays a list, the cursor of the next page is only sent while there is one
+            if next_cursor:
+                response.headers["X-Next-Cursor"] = next_cursor
+            return response, 200
+        except InvalidCursorError:
+            return jsonify({"error": "Invalid cursor"}), 400
         except Exception as e:
             logger.exception(f"Error fetching conversations: {e}")
             raise
@@ -131,8 +140,9 @@ async def rename_conversation():
                     400,
                 )
 
-            # Update the title and save changes
+            # Update the title and save changes, the generated title no longer replaces it
             conversation["title"] = title
+            conversation["titlePending"] = False
             updated_conversation = await conversation_client.upsert_conversation(
                 conversation
             )
@@ -253,10 +263,14 @@ async def delete_conversation():
 
         await conversation_client.connect()
         try:
-            # Delete conversation messages from database
-            await conversation_client.delete_messages(conversation_id, user_id)
+            # Delete the conversation summary first, a failure then leaves the
+            # conversation whole
+            await conversation_client.delete_conversation_summary(
+                user_id, conversation_id
+            )
 
-            # Delete the conversation itself
+            # Delete conversation messages and the conversation itself
+            await conversation_client.delete_messages(conversation_id, user_id)
             await conversation_client.delete_conversation(user_id, conversation_id)
 
             return (
@@ -315,12 +329,16 @@ async def delete_all_conversations():
             # Delete each conversation and its associated messages
             for conversation in conversations:
                 try:
-                    # Delete messages associated with the conversation
+                    # Delete the conversation summary first, a failure then
+                    # leaves the conversation whole
+                    await conversation_client.delete_conversation_summary(
+                        user_id, conversation["id"]
+                    )
+
+                    # Delete the messages and the conversation itself
                     await conversation_client.delete_messages(
                         conversation["id"], user_id
                     )
-
-                    # Delete the conversation itself
                     await conversation_client.delete_conversation(
                         user_id, conversation["id"]
                     )
@@ -379,53 +397,40 @@ async def update_conversation():
             return jsonify({"error": "Database not available"}), 500
         await conversation_client.connect()
         try:
-            # Get or create the conversation
-            conversation = await conversation_client.get_conversation(
-                user_id, conversation_id
-            )
-            if not conversation:
-                title = await generate_title(messages)
-                conversation = await conversation_client.create_conversation(
-                    user_id=user_id, conversation_id=conversation_id, title=title
-                )
-
-            # Process and save user and assistant messages
-            # Process user message
+            # Collect the messages of the turn: the last user message, then the tool
+            # message if there is one, then the assistant message
+            turn_messages = []
             if messages[0]["role"] == "user":
                 user_message = next(
                     (msg for msg in reversed(messages) if msg["role"] == "user"), None
                 )
                 if not user_message:
                     return jsonify({"error": "User message not found"}), 400
+                turn_messages.append(user_message)
 
-                created_message = await conversation_client.create_message(
-                    uuid=str(uuid4()),
-                    conversation_id=conversation_id,
-                    user_id=user_id,
-                    input_message=user_message,
-                )
-                if created_message == "Conversation not found":
-                    return jsonify({"error": "Conversation not found"}), 400
-
-            # Process assistant and tool messages if available
-            if messages[-1]["role"] == "assistant":
-                if len(messages) > 1 and messages[-2].get("role") == "tool":
-                    # Write the tool message first if it exists
-                    await conversation_client.create_message(
-                        uuid=str(uuid4()),
-                        conversation_id=conversation_id,
-                        user_id=user_id,
-                        input_message=messages[-2],
-                    )
-                # Write the assistant message
-                await conversation_client.create_message(
-                    uuid=str(uuid4()),
-                    conversation_id=conversation_id,
-                    user_id=user_id,
-                    input_message=messages[-1],
-                )
-            else:
+            if messages[-1]["role"] != "assistant":
                 return jsonify({"error": "No assistant message found"}), 400
+            if len(messages) > 1 and messages[-2].get("role") == "tool":
+                turn_messages.append(messages[-2])
+            turn_messages.append(messages[-1])
+
+            # Creates or touches the conversation and writes the messages at once, a
+            # new conversation is titled after its first message until then
+            title = provisional_title(messages)
+            conversation = await conversation_client.save_turn(
+                user_id, conversation_id, turn_messages, title
+            )
+            if not conversation:
+                return jsonify({"error": "Conversation not found"}), 400
+
+            # Generate the title in the background, again on a later turn if it failed
+            if conversation.get("titlePending"):
+                ConversationTitler().schedule(
+                    user_id, conversation_id, messages, conversation["title"]
+                )
+
+            # Fold older turns into the conversation summary in the background
+            ConversationSummarizer().schedule(user_id, conversation_id)
 
             return (
                 jsonify(
@@ -473,38 +478,3 @@ def get_frontend_settings():
     except Exception as e:
         logger.exception(f"Exception in /history/frontend_settings: {e}")
         return jsonify({"error": "Error while getting frontend settings"}), 500
-
-
-async def generate_title(conversation_messages):
-    title_prompt = "Summarize the conversation so far into a 4-word or less title. Do not use any quotation marks or punctuation. Do not include any other commentary or description."
-
-    # Filter only the user messages, but consider including system or assistant context if necessary
-    messages = [
-        {"role": msg["role"], "content": msg["content"]}
-        for msg in conversation_messages
-        if msg["role"] == "user"
-    ]
-    messages.append({"role": "user", "content": title_prompt})
-
-    try:
-        azure_openai_client = init_openai_client()
-
-        # Create a chat completion with the Azure OpenAI client
-        response = await azure_openai_client.chat.completions.create(
-            model=env_helper.AZURE_OPENAI_MODEL,
-            messages=messages,
-            temperature=1,
-            max_tokens=64,
-        )
-
-        # Ensure response contains valid choices and content
-        if response and response.choices and len(response.choices) > 0:
-            title = response.choices[0].message.content.strip()
-            return title
-        else:
-            raise ValueError("No valid choices in response")
-
-    except Exception as e:
-        logger.exception(f"Error generating title: {str(e)}")
-        # Fallback: return the content of the second to last message if something goes wrong
-        return messages[-2]["content"] if len(messages) > 1 else "Untitled"
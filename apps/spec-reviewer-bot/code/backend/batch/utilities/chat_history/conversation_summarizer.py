@@ -0,0 +1,188 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from ..helpers.async_runtime import AsyncRuntime
+from ..helpers.config.config_helper import ConfigHelper
+from ..helpers.config.llm_call_site import LLMCallSite
+from ..helpers.env_helper import EnvHelper
+from ..helpers.llm_helper import LLMHelper
+from ..helpers.token_counter import count_message_tokens
+from .database_factory import DatabaseFactory
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_SYSTEM_PROMPT = """You maintain the running summary of a conversation between a user and an assistant that reviews specifications.
+Update the existing summary with the new messages. Keep the facts, decisions, reviewed excerpts, scores and open questions that later turns may refer to, and drop greetings and repetitions.
+Reply with the updated summary only, in the language of the conversation."""
+
+
+class ConversationSummarizer:
+    """
+    Keeps a rolling summary of the older turns of long conversations.
+
+    Once the stored user/assistant messages that are older than the most recent
+    ones and not yet summarized exceed the token threshold, a background job folds
+    them into the stored summary. Requests then send the summary plus the turns
+    that follow it instead of the full transcript.
+    """
+
+    _executor = ThreadPoolExecutor(
+        max_workers=2, thread_name_prefix="conversation-summarizer"
+    )
+    _in_flight: set[tuple[str, str]] = set()
+    _lock = threading.Lock()
+
+    def __init__(self) -> None:
+        self.env_helper = EnvHelper()
+        self.token_threshold = self.env_helper.CHAT_HISTORY_SUMMARY_TOKEN_THRESHOLD
+        self.recent_messages = self.env_helper.CHAT_HISTORY_SUMMARY_RECENT_MESSAGES
+
+    def is_enabled(self) -> bool:
+        config = ConfigHelper.get_active_config_or_default()
+        return (
+            self.token_threshold > 0
+            and str(config.enable_chat_history).lower() == "true"
+        )
+
+    @staticmethod
+    def apply_summary(
+        summary: Optional[dict], chat_history: List[dict]
+    ) -> List[dict]:
+        if not summary:
+            return chat_history
+
+        summarized_message_count = summary["summarized_message_count"]
+        if summarized_message_count > len(chat_history):
+            # The client sent a different history than the stored one
+            return chat_history
+
+        return [
+            {
+                "role": "system",
+                "content": f"Summary of the earlier conversation:\n{summary['summary']}",
+            },
+            *chat_history[summarized_message_count:],
+        ]
+
+    async def compact_chat_history(
+        self, user_id: str, conversation_id: str, chat_history: List[dict]
+    ) -> List[dict]:
+        """Replaces the summarized turns of the chat history with the stored summary."""
+        if not conversation_id or not chat_history or not self.is_enabled():
+            return chat_history
+
+        # A summary is only stored once the turns it covers exceed the threshold, so
+        # a shorter history cannot have one and needs no database round trip
+        history_tokens = sum(
+            count_message_tokens(message, self.env_helper.AZURE_OPENAI_MODEL_NAME)
+            for message in chat_history
+        )
+        if history_tokens < self.token_threshold:
+            return chat_history
+
+        try:
+            conversation_client = DatabaseFactory.get_conversation_client()
+            await conversation_client.connect()
+            try:
+                summary = await conversation_client.get_conversation_summary(
+                    user_id, conversation_id
+                )
+            finally:
+                await conversation_client.close()
+        except Exception:
+            logger.exception(
+                f"Failed to read the summary of conversation {conversation_id}, using the full history"
+            )
+            return chat_history
+
+        return self.apply_summary(summary, chat_history)
+
+    def schedule(self, user_id: str, conversation_id: str) -> None:
+        """Updates the conversation summary in the background, off the request path."""
+        if not conversation_id or not self.is_enabled():
+            return
+
+        key = (user_id, conversation_id)
+        with self._lock:
+            if key in self._in_flight:
+                return
+            self._in_flight.add(key)
+
+        self._executor.submit(self._run, user_id, conversation_id)
+
+    def _run(self, user_id: str, conversation_id: str) -> None:
+        try:
+            runtime = AsyncRuntime.current()
+            if runtime:
+                # The database clients of the shared loop are bound to it
+                runtime.run(self.summarize(user_id, conversation_id))
+            else:
+                asyncio.run(self.summarize(user_id, conversation_id))
+        except Exception:
+            logger.exception(f"Failed to summarize conversation {conversation_id}")
+        finally:
+            with self._lock:
+                self._in_flight.discard((user_id, conversation_id))
+
+    async def summarize(self, user_id: str, conversation_id: str) -> bool:
+        conversation_client = DatabaseFactory.get_conversation_client()
+        await conversation_client.connect()
+        try:
+            messages = [
+                message
+                for message in await conversation_client.get_messages(
+                    user_id, conversation_id
+                )
+                if message["role"] in ("user", "assistant")
+            ]
+            summary = await conversation_client.get_conversation_summary(
+                user_id, conversation_id
+            )
+            summarized_message_count = (
+                summary["summarized_message_count"] if summary else 0
+            )
+
+            end = len(messages) - self.recent_messages
+            pending_messages = messages[summarized_message_count:end]
+            pending_tokens = sum(
+                count_message_tokens(message, self.env_helper.AZURE_OPENAI_MODEL_NAME)
+                for message in pending_messages
+            )
+            if not pending_messages or pending_tokens < self.token_threshold:
+                return False
+
+            # The completion is synchronous, keep it off the loop
+            new_summary = await asyncio.to_thread(
+                self._generate_summary,
+                summary["summary"] if summary else "",
+                pending_messages,
+            )
+            await conversation_client.upsert_conversation_summary(
+                user_id, conversation_id, new_summary, end
+            )
+            logger.info(
+                f"Summarized {len(pending_messages)} messages ({pending_tokens} tokens) of conversation {conversation_id}"
+            )
+            return True
+        finally:
+            await conversation_client.close()
+
+    def _generate_summary(self, previous_summary: str, messages: List[dict]) -> str:
+        transcript = "\n".join(
+            f"{message['role']}: {message['content']}" for message in messages
+        )
+        response = LLMHelper().get_chat_completion(
+            [
+                {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+                {
+                    "role": "user",
+                    "content": f"Existing summary:\n{previous_summary or '(none)'}\n\nNew messages:\n{transcript}",
+                },
+            ],
+            call_site=LLMCallSite.SUMMARY,
+            temperature=0,
+        )
+        return response.choices[0].message.content.strip()
@@ -0,0 +1,152 @@
+import asyncio
+import json
+import logging
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+from ..helpers.async_runtime import AsyncRuntime
+from ..helpers.config.llm_call_site import LLMCallSite
+from ..helpers.env_helper import EnvHelper
+from ..helpers.llm_helper import LLMHelper
+from .database_factory import DatabaseFactory
+
+logger = logging.getLogger(__name__)
+
+PROVISIONAL_TITLE_LENGTH = 50
+# The start of the user messages is enough to title a conversation
+TITLE_CONTEXT_LENGTH = 1000
+
+TITLE_SYSTEM_PROMPT = """You give titles to conversations between a user and an assistant that reviews specifications.
+Summarize each of the following conversations into a title of 4 words or less, in the language of the conversation. Do not use any quotation marks or punctuation.
+Reply with a JSON array holding the titles as strings, in the order of the conversations, and nothing else."""
+
+
+def provisional_title(messages: List[dict]) -> str:
+    """The first user message, truncated, until the generated title replaces it."""
+    user_message = next(
+        (message for message in messages if message["role"] == "user"), None
+    )
+    text = " ".join(str(user_message["content"]).split()) if user_message else ""
+    if not text:
+        return "Untitled"
+    if len(text) <= PROVISIONAL_TITLE_LENGTH:
+        return text
+    return text[: PROVISIONAL_TITLE_LENGTH - 1].rstrip() + "…"
+
+
+class ConversationTitler:
+    """
+    Generates the titles of new conversations off the request path.
+
+    A conversation is saved with its provisional title and queued here. While a
+    title completion runs, the conversations created meanwhile wait, and the next
+    completion titles them all at once, so a burst of new conversations costs a few
+    completions instead of one each. A title replaces the provisional one unless
+    the user renamed the conversation in the meantime.
+    """
+
+    _executor = ThreadPoolExecutor(
+        max_workers=1, thread_name_prefix="conversation-titler"
+    )
+    # (user_id, conversation_id) -> (provisional title, user messages)
+    _pending: Dict[Tuple[str, str], Tuple[str, str]] = {}
+    _draining = threading.Event()
+    _lock = threading.Lock()
+
+    def __init__(self) -> None:
+        self.env_helper = EnvHelper()
+        self.batch_size = max(1, self.env_helper.CHAT_HISTORY_TITLE_BATCH_SIZE)
+
+    def schedule(
+        self,
+        user_id: str,
+        conversation_id: str,
+        messages: List[dict],
+        title: str,
+    ) -> None:
+        """Queues the conversation, saved with the provisional title, for a title."""
+        content = "\n".join(
+            str(message["content"])
+            for message in messages
+            if message["role"] == "user"
+        )[:TITLE_CONTEXT_LENGTH]
+        with self._lock:
+            self._pending[(user_id, conversation_id)] = (title, content)
+            if self._draining.is_set():
+                return
+            self._draining.set()
+
+        self._executor.submit(self._drain)
+
+    def _drain(self) -> None:
+        while True:
+            with self._lock:
+                batch = list(self._pending.items())[: self.batch_size]
+                if not batch:
+                    self._draining.clear()
+                    return
+                for key, _ in batch:
+                    del self._pending[key]
+            try:
+                self._run(batch)
+            except Exception:
+                logger.exception(f"Failed to title {len(batch)} conversations")
+
+    def _run(self, batch: List[Tuple[Tuple[str, str], Tuple[str, str]]]) -> None:
+        titles = self.generate_titles([content for _, (_, content) in batch])
+        updates = []
+        for ((user_id, conversation_id), (previous_title, _)), title in zip(
+            batch, titles
+        ):
+            # An empty title keeps the provisional one, which is no longer pending
+            updates.append(
+                (user_id, conversation_id, title or previous_title, previous_title)
+            )
+        runtime = AsyncRuntime.current()
+        if runtime:
+            # The database clients of the shared loop are bound to it
+            runtime.run(self.save_titles(updates))
+        else:
+            asyncio.run(self.save_titles(updates))
+
+    def generate_titles(self, conversations: List[str]) -> List[str]:
+        """Titles the conversations, given by their user messages, in one completion."""
+        numbered = "\n\n".join(
+            f"Conversation {position}:\n{content}"
+            for position, content in enumerate(conversations, 1)
+        )
+        response = LLMHelper().get_chat_completion(
+            [
+                {"role": "system", "content": TITLE_SYSTEM_PROMPT},
+                {"role": "user", "content": numbered},
+            ],
+            call_site=LLMCallSite.TITLE,
+            temperature=0,
+        )
+        # Tolerates a Markdown code block around the array
+        match = re.search(r"\[.*\]", response.choices[0].message.content, re.DOTALL)
+        titles = json.loads(match.group(0)) if match else None
+        if (
+            not isinstance(titles, list)
+            or len(titles) != len(conversations)
+            or not all(isinstance(title, str) for title in titles)
+        ):
+            raise ValueError(f"Expected {len(conversations)} titles")
+        return [title.strip() for title in titles]
+
+    async def save_titles(self, updates: List[Tuple[str, str, str, str]]) -> int:
+        conversation_client = DatabaseFactory.get_conversation_client()
+        await conversation_client.connect()
+        try:
+            updated = 0
+            for user_id, conversation_id, title, previous_title in updates:
+                if await conversation_client.update_conversation_title(
+                    user_id, conversation_id, title, previous_title
+                ):
+                    updated += 1
+            logger.info(f"Titled {updated} of {len(updates)} conversations")
+            return updated
+        finally:
+            await conversation_client.close()
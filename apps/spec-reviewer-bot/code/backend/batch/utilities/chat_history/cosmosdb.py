@@ -1,8 +1,16 @@
-from datetime import datetime
+import json
+from datetime import datetime, timedelta
+from uuid import uuid4
 from azure.cosmos.aio import CosmosClient
 from azure.cosmos import exceptions
 
-from .database_client_base import DatabaseClientBase
+from ..helpers.async_runtime import AsyncRuntime
+from .database_client_base import (
+    DatabaseClientBase,
+    InvalidCursorError,
+    decode_cursor,
+    encode_cursor,
+)
 
 
 class CosmosConversationClient(DatabaseClientBase):
@@ -21,9 +29,18 @@ class CosmosConversationClient(DatabaseClientBase):
         self.container_name = container_name
         self.enable_message_feedback = enable_message_feedback
         try:
-            self.cosmosdb_client = CosmosClient(
-                self.cosmosdb_endpoint, credential=credential
-            )
+            runtime = AsyncRuntime.current_in_loop()
+            if runtime:
+                # One client, and its connection pool, per process on the shared loop
+                self.cosmosdb_client = runtime.resource(
+                    f"cosmosdb_client:{self.cosmosdb_endpoint}",
+                    lambda: CosmosClient(self.cosmosdb_endpoint, credential=credential),
+                    close=lambda client: client.close(),
+                )
+            else:
+                self.cosmosdb_client = CosmosClient(
+                    self.cosmosdb_endpoint, credential=credential
+                )
         except exceptions.CosmosHttpResponseError as e:
             if e.status_code == 401:
                 raise ValueError("Invalid credentials") from e
@@ -96,6 +113,28 @@ class CosmosConversationClient(DatabaseClientBase):
         else:
             return False
 
+    async def update_conversation_title(
+        self, user_id, conversation_id, title, previous_title
+    ):
+        # A JSON string is a valid string literal of the query language
+        still_previous_title = f"FROM c WHERE c.title = {json.dumps(previous_title)}"
+        try:
+            await self.container_client.patch_item(
+                item=conversation_id,
+                partition_key=user_id,
+                patch_operations=[
+                    {"op": "set", "path": "/title", "value": title},
+                    {"op": "set", "path": "/titlePending", "value": False},
+                ],
+                filter_predicate=still_previous_title,
+            )
+        except (
+            exceptions.CosmosResourceNotFoundError,
+            exceptions.CosmosAccessConditionFailedError,
+        ):
+            return False
+        return True
+
     async def delete_conversation(self, user_id, conversation_id):
         conversation = await self.container_client.read_item(
             item=conversation_id, partition_key=user_id
@@ -134,6 +173,32 @@ class CosmosConversationClient(DatabaseClientBase):
 
         return conversations
 
+    async def get_conversations_page(self, user_id, limit, cursor=None):
+        continuation_token = None
+        if cursor:
+            continuation_token = decode_cursor(cursor).get("continuation")
+            if not isinstance(continuation_token, str):
+                raise InvalidCursorError("Invalid cursor")
+        parameters = [{"name": "@userId", "value": user_id}]
+        query = "SELECT * FROM c WHERE c.userId = @userId AND c.type='conversation' ORDER BY c.updatedAt DESC"
+        # Within the user's partition, a continuation token resumes where the page stopped
+        pages = self.container_client.query_items(
+            query=query,
+            parameters=parameters,
+            partition_key=user_id,
+            max_item_count=int(limit),
+        ).by_page(continuation_token)
+
+        conversations = []
+        async for page in pages:
+            async for item in page:
+                conversations.append(item)
+            break
+
+        next_token = pages.continuation_token
+        next_cursor = encode_cursor({"continuation": next_token}) if next_token else None
+        return conversations, next_cursor
+
     async def get_conversation(self, user_id, conversation_id):
         parameters = [
             {"name": "@conversationId", "value": conversation_id},
@@ -179,6 +244,59 @@ class CosmosConversationClient(DatabaseClientBase):
         else:
             return False
 
+    async def save_turn(self, user_id, conversation_id, messages, title=""):
+        createdAt = datetime.utcnow()
+        # A millisecond apart, so that the messages keep the order of the turn
+        timestamps = [
+            (createdAt + timedelta(milliseconds=i)).isoformat()
+            for i in range(len(messages))
+        ]
+        updatedAt = timestamps[-1] if timestamps else createdAt.isoformat()
+        message_operations = []
+        for message, timestamp in zip(messages, timestamps):
+            item = {
+                "id": str(uuid4()),
+                "type": "message",
+                "userId": user_id,
+                "createdAt": timestamp,
+                "updatedAt": timestamp,
+                "conversationId": conversation_id,
+                "role": message["role"],
+                "content": message["content"],
+            }
+            if self.enable_message_feedback:
+                item["feedback"] = ""
+            message_operations.append(("create", (item,)))
+
+        # The conversation and its messages share the user's partition, so a
+        # transactional batch writes them all or none of them in one request
+        patch_operations = [{"op": "set", "path": "/updatedAt", "value": updatedAt}]
+        touch_conversation = ("patch", (conversation_id, patch_operations))
+        try:
+            results = await self.container_client.execute_item_batch(
+                batch_operations=[touch_conversation, *message_operations],
+                partition_key=user_id,
+            )
+        except exceptions.CosmosBatchOperationError as e:
+            if e.error_index != 0 or e.operation_responses[0].get("statusCode") != 404:
+                raise
+            # First turn of the conversation
+            conversation = {
+                "id": conversation_id,
+                "type": "conversation",
+                "createdAt": createdAt.isoformat(),
+                "updatedAt": updatedAt,
+                "userId": user_id,
+                "title": title,
+                "titlePending": True,
+                "conversationId": conversation_id,
+            }
+            results = await self.container_client.execute_item_batch(
+                batch_operations=[("create", (conversation,)), *message_operations],
+                partition_key=user_id,
+            )
+        return results[0]["resourceBody"]
+
     async def update_message_feedback(self, user_id, message_id, feedback):
         message = await self.container_client.read_item(
             item=message_id, partition_key=user_id
@@ -203,3 +321,42 @@ class CosmosConversationClient(DatabaseClientBase):
             messages.append(item)
 
         return messages
+
+    @staticmethod
+    def _summary_id(conversation_id):
+        return f"{conversation_id}-summary"
+
+    async def get_conversation_summary(self, user_id, conversation_id):
+        try:
+            return await self.container_client.read_item(
+                item=self._summary_id(conversation_id), partition_key=user_id
+            )
+        except exceptions.CosmosResourceNotFoundError:
+            return None
+
+    async def upsert_conversation_summary(
+        self, user_id, conversation_id, summary, summarized_message_count
+    ):
+        conversation_summary = {
+            "id": self._summary_id(conversation_id),
+            "type": "summary",
+            "userId": user_id,
+            "conversationId": conversation_id,
+            "updatedAt": datetime.utcnow().isoformat(),
+            "summary": summary,
+            "summarized_message_count": summarized_message_count,
+        }
+        resp = await self.container_client.upsert_item(conversation_summary)
+        if resp:
+            return resp
+        else:
+            return False
+
+    async def delete_conversation_summary(self, user_id, conversation_id):
+        try:
+            await self.container_client.delete_item(
+                item=self._summary_id(conversation_id), partition_key=user_id
+            )
+        except exceptions.CosmosResourceNotFoundError:
+            pass
+        return True
@@ -1,5 +1,29 @@
+import base64
+import json
 from abc import ABC, abstractmethod
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def encode_cursor(position: Dict[str, Any]) -> str:
+    """Encode the position where the next page starts into an opaque cursor."""
+    data = json.dumps(position, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """Decode a cursor returned by encode_cursor."""
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        position = json.loads(data)
+    except ValueError as e:
+        raise InvalidCursorError("Invalid cursor") from e
+    if not isinstance(position, dict):
+        raise InvalidCursorError("Invalid cursor")
+    return position
 
 
 class DatabaseClientBase(ABC):
@@ -30,6 +54,16 @@ class DatabaseClientBase(ABC):
         """Update or insert a conversation entry."""
         pass
 
+    @abstractmethod
+    async def update_conversation_title(
+        self, user_id: str, conversation_id: str, title: str, previous_title: str
+    ) -> bool:
+        """
+        Replace the title of a conversation, only if it is still previous_title, and
+        clear its titlePending flag. Returns whether the title was replaced.
+        """
+        pass
+
     @abstractmethod
     async def delete_conversation(self, user_id: str, conversation_id: str) -> bool:
         """Delete a specific conversation."""
@@ -49,6 +83,16 @@ class DatabaseClientBase(ABC):
         """Retrieve a list of conversations for a user."""
         pass
 
+    @abstractmethod
+    async def get_conversations_page(
+        self, user_id: str, limit: int, cursor: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Retrieve a page of a user's conversations, most recently updated first, and
+        the cursor of the next page, None after the last page.
+        """
+        pass
+
     @abstractmethod
     async def get_conversation(
         self, user_id: str, conversation_id: str
@@ -67,6 +111,22 @@ class DatabaseClientBase(ABC):
         """Create a new message within a conversation."""
         pass
 
+    @abstractmethod
+    async def save_turn(
+        self,
+        user_id: str,
+        conversation_id: str,
+        messages: List[Dict[str, Any]],
+        title: str = "",
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Write the messages of a turn, in order, and create the conversation with the
+        given title or move its updatedAt to the last message, in a single transaction.
+        A created conversation has titlePending set until its title is generated.
+        Returns the conversation, None if it belongs to another user.
+        """
+        pass
+
     @abstractmethod
     async def update_message_feedback(
         self, user_id: str, message_id: str, feedback: str
@@ -80,3 +140,28 @@ class DatabaseClientBase(ABC):
     ) -> List[Dict[str, Any]]:
         """Retrieve all messages within a conversation."""
         pass
+
+    @abstractmethod
+    async def get_conversation_summary(
+        self, user_id: str, conversation_id: str
+    ) -> Optional[Dict[str, Any]]:
+        """Retrieve the rolling summary of a conversation, if one was stored."""
+        pass
+
+    @abstractmethod
+    async def upsert_conversation_summary(
+        self,
+        user_id: str,
+        conversation_id: str,
+        summary: str,
+        summarized_message_count: int,
+    ) -> bool:
+        """Store the rolling summary covering the first messages of a conversation."""
+        pass
+
+    @abstractmethod
+    async def delete_conversation_summary(
+        self, user_id: str, conversation_id: str
+    ) -> bool:
+        """Delete the rolling summary of a conversation."""
+        pass
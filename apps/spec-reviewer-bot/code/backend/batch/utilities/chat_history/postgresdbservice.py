@@ -1,16 +1,91 @@
+import asyncio
 import logging
 import asyncpg
-from datetime import datetime, timezone
-from ..helpers.azure_credential_utils import get_azure_credential
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+from ..helpers.async_runtime import AsyncRuntime
 from ..helpers.env_helper import EnvHelper
+from ..helpers.postgres_pool import PostgresTokenProvider
 
-from .database_client_base import DatabaseClientBase
+from .database_client_base import (
+    DatabaseClientBase,
+    InvalidCursorError,
+    decode_cursor,
+    encode_cursor,
+)
 
 logger = logging.getLogger(__name__)
 
+# asyncpg prepares each query text once per connection and keeps it in its statement
+# cache, so the pooled connections reuse the plans of these hot queries
+GET_MESSAGES_QUERY = 'SELECT * FROM messages WHERE conversation_id = $1 AND user_id = $2 ORDER BY "createdAt" ASC'
+CREATE_MESSAGE_QUERY = """
+    INSERT INTO messages (id, type, "createdAt", "updatedAt", user_id, conversation_id, role, content, feedback)
+    VALUES ($1, 'message', $2, $2, $3, $4, $5, $6, $7)
+    RETURNING *
+"""
+TOUCH_CONVERSATION_QUERY = 'UPDATE conversations SET "updatedAt" = $1 WHERE id = $2 AND user_id = $3 RETURNING *'
+
+# One statement, so one round trip and one transaction, for a whole turn. The messages
+# are only written when the conversation was created or belongs to the user. A created
+# conversation waits for its generated title.
+SAVE_TURN_QUERY = """
+    WITH conversation AS (
+        INSERT INTO conversations (id, conversation_id, type, "createdAt", "updatedAt", user_id, title, "titlePending")
+        VALUES ($1, $1, 'conversation', $2, $3, $4, $5, TRUE)
+        ON CONFLICT (id) DO UPDATE SET "updatedAt" = EXCLUDED."updatedAt"
+        WHERE conversations.user_id = EXCLUDED.user_id
+        RETURNING *
+    ), inserted AS (
+        INSERT INTO messages (id, type, "createdAt", "updatedAt", user_id, conversation_id, role, content, feedback)
+        SELECT message.id, 'message', message."createdAt", message."createdAt", conversation.user_id, conversation.id, message.role, message.content, $10
+        FROM conversation,
+            unnest($6::text[], $7::timestamptz[], $8::text[], $9::text[]) AS message (id, "createdAt", role, content)
+    )
+    SELECT * FROM conversation
+"""
+
+# Keyset pagination on the (user_id, "updatedAt", id) index, id breaks the ties
+GET_CONVERSATIONS_FIRST_PAGE_QUERY = """
+    SELECT * FROM conversations
+    WHERE user_id = $1 AND type = 'conversation'
+    ORDER BY "updatedAt" DESC, id DESC
+    LIMIT $2
+"""
+GET_CONVERSATIONS_NEXT_PAGE_QUERY = """
+    SELECT * FROM conversations
+    WHERE user_id = $1 AND type = 'conversation' AND ("updatedAt", id) < ($2, $3)
+    ORDER BY "updatedAt" DESC, id DESC
+    LIMIT $4
+"""
+
+
+def _utc_now() -> datetime:
+    # Millisecond precision, so that the timestamps round-trip through the API format
+    now = datetime.now(timezone.utc)
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+
+def _parse_timestamp(value):
+    """Reads the timestamps of a conversation sent back by the API."""
+    if isinstance(value, str):
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return value
 
-class PostgresConversationClient(DatabaseClientBase):
 
+def _format_timestamp(value: datetime) -> str:
+    return value.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+
+def _to_dict(record) -> dict:
+    # The timestamptz columns are returned in the ISO 8601 format the API has always used
+    return {
+        key: _format_timestamp(value) if isinstance(value, datetime) else value
+        for key, value in dict(record).items()
+    }
+
+
+class PostgresConversationClient(DatabaseClientBase):
     def __init__(
         self, user: str, host: str, database: str, enable_message_feedback: bool = False
     ):
@@ -20,28 +95,73 @@ class PostgresConversationClient(DatabaseClientBase):
         self.database = database
         self.enable_message_feedback = enable_message_feedback
         self.conn = None
+        self.pool = None
 
     async def connect(self):
         try:
-            credential = get_azure_credential(self.env_helper.MANAGED_IDENTITY_CLIENT_ID)
-            token = credential.get_token(
-                "https://ossrdbms-aad.database.windows.net/.default"
-            ).token
+            runtime = AsyncRuntime.current_in_loop()
+            if runtime:
+                self.pool = await runtime.async_resource(
+                    f"postgres_pool:{self.host}/{self.database}",
+                    self._create_pool,
+                    close=lambda pool: pool.close(),
+                )
+                self.conn = await self.pool.acquire()
+                return
+
             self.conn = await asyncpg.connect(
                 user=self.user,
                 host=self.host,
                 database=self.database,
-                password=token,
+                password=await self._get_token(),
                 port=5432,
                 ssl=True,
+                **self._connection_options(),
             )
         except Exception as e:
             logger.error("Failed to connect to PostgreSQL: %s", e)
             raise
 
+    async def _create_pool(self) -> asyncpg.Pool:
+        return await asyncpg.create_pool(
+            user=self.user,
+            host=self.host,
+            database=self.database,
+            # Called for every new connection, so pooled connections never use an expired token
+            password=self._get_token,
+            port=5432,
+            ssl=True,
+            min_size=min(
+                self.env_helper.POSTGRESQL_POOL_MIN_SIZE,
+                self.env_helper.POSTGRESQL_POOL_MAX_SIZE,
+            ),
+            max_size=max(1, self.env_helper.POSTGRESQL_POOL_MAX_SIZE),
+            **self._connection_options(),
+        )
+
+    async def _get_token(self) -> str:
+        token_provider = PostgresTokenProvider.shared(
+            self.env_helper.MANAGED_IDENTITY_CLIENT_ID
+        )
+        return await asyncio.to_thread(token_provider.get_token)
+
+    def _connection_options(self) -> dict:
+        timeout = self.env_helper.POSTGRESQL_STATEMENT_TIMEOUT_SECONDS
+        if timeout <= 0:
+            return {}
+        return {
+            "command_timeout": timeout,
+            # Also stop the statement on the server, not only the wait for it
+            "server_settings": {"statement_timeout": str(int(timeout * 1000))},
+        }
+
     async def close(self):
         if self.conn:
-            await self.conn.close()
+            if self.pool:
+                await self.pool.release(self.conn)
+            else:
+                await self.conn.close()
+            self.conn = None
 
     async def ensure(self):
         if not self.conn:
@@ -49,8 +169,7 @@ class PostgresConversationClient(DatabaseClientBase):
         return True, "PostgreSQL client initialized successfully"
 
     async def create_conversation(self, conversation_id, user_id, title=""):
-        utc_now = datetime.now(timezone.utc)
-        createdAt = utc_now.strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+        createdAt = _utc_now()
         query = """
             INSERT INTO conversations (id, conversation_id, type, "createdAt", "updatedAt", user_id, title)
             VALUES ($1, $2, 'conversation', $3, $3, $4, $5)
@@ -59,15 +178,16 @@ class PostgresConversationClient(DatabaseClientBase):
         conversation = await self.conn.fetchrow(
             query, conversation_id, conversation_id, createdAt, user_id, title
         )
-        return dict(conversation) if conversation else False
+        return _to_dict(conversation) if conversation else False
 
     async def upsert_conversation(self, conversation):
         query = """
-            INSERT INTO conversations (id, conversation_id, type, "createdAt", "updatedAt", user_id, title)
-            VALUES ($1, $2, $3, $4, $5, $6, $7)
+            INSERT INTO conversations (id, conversation_id, type, "createdAt", "updatedAt", user_id, title, "titlePending")
+            VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
             ON CONFLICT (id) DO UPDATE SET
                 "updatedAt" = EXCLUDED."updatedAt",
-                title = EXCLUDED.title
+                title = EXCLUDED.title,
+                "titlePending" = EXCLUDED."titlePending"
             RETURNING *
         """
         updated_conversation = await self.conn.fetchrow(
@@ -75,12 +195,22 @@ class PostgresConversationClient(DatabaseClientBase):
             conversation["id"],
             conversation["conversation_id"],
             conversation["type"],
-            conversation["createdAt"],
-            conversation["updatedAt"],
+            _parse_timestamp(conversation["createdAt"]),
+            _parse_timestamp(conversation["updatedAt"]),
             conversation["user_id"],
             conversation["title"],
+            conversation.get("titlePending", False),
         )
-        return dict(updated_conversation) if updated_conversation else False
+        return _to_dict(updated_conversation) if updated_conversation else False
+
+    async def update_conversation_title(
+        self, user_id, conversation_id, title, previous_title
+    ):
+        query = 'UPDATE conversations SET title = $1, "titlePending" = FALSE WHERE id = $2 AND user_id = $3 AND title = $4 RETURNING id'
+        updated = await self.conn.fetchval(
+            query, title, conversation_id, user_id, previous_title
+        )
+        return updated is not None
 
     async def delete_conversation(self, user_id, conversation_id):
         query = "DELETE FROM conversations WHERE conversation_id = $1 AND user_id = $2"
@@ -90,18 +220,19 @@ class PostgresConversationClient(DatabaseClientBase):
     async def delete_messages(self, conversation_id, user_id):
         query = "DELETE FROM messages WHERE conversation_id = $1 AND user_id = $2 RETURNING *"
         messages = await self.conn.fetch(query, conversation_id, user_id)
-        return [dict(message) for message in messages]
+        return [_to_dict(message) for message in messages]
 
     async def get_conversations(self, user_id, limit=None, sort_order="DESC", offset=0):
         try:
             offset = int(offset)  # Ensure offset is an integer
         except ValueError:
             raise ValueError("Offset must be an integer.")
+        sort_order = "ASC" if str(sort_order).upper() == "ASC" else "DESC"
         # Base query without LIMIT and OFFSET
         query = f"""
             SELECT * FROM conversations
             WHERE user_id = $1 AND type = 'conversation'
-            ORDER BY "updatedAt" {sort_order}
+            ORDER BY "updatedAt" {sort_order}, id {sort_order}
         """
         # Append LIMIT and OFFSET to the query if limit is specified
         if limit is not None:
@@ -109,31 +240,58 @@ class PostgresConversationClient(DatabaseClientBase):
                 limit = int(limit)  # Ensure limit is an integer
                 query += " LIMIT $2 OFFSET $3"
                 # Fetch records with LIMIT and OFFSET
-                conversations = await self.conn.fetch(query, user_id, limit, offset)
+                conversations = await self.conn.fetch(
+                    query, user_id, limit, offset
+                )
             except ValueError:
                 raise ValueError("Limit must be an integer.")
         else:
             # Fetch records without LIMIT and OFFSET
             conversations = await self.conn.fetch(query, user_id)
-        return [dict(conversation) for conversation in conversations]
+        return [_to_dict(conversation) for conversation in conversations]
+
+    async def get_conversations_page(self, user_id, limit, cursor=None):
+        limit = int(limit)
+        # One more row tells whether there is a next page
+        if cursor:
+            position = decode_cursor(cursor)
+            try:
+                updated_at = datetime.fromisoformat(position["updatedAt"])
+                conversation_id = str(position["id"])
+            except (KeyError, TypeError, ValueError) as e:
+                raise InvalidCursorError("Invalid cursor") from e
+            conversations = await self.conn.fetch(
+                GET_CONVERSATIONS_NEXT_PAGE_QUERY,
+                user_id,
+                updated_at,
+                conversation_id,
+                limit + 1,
+            )
+        else:
+            conversations = await self.conn.fetch(
+                GET_CONVERSATIONS_FIRST_PAGE_QUERY, user_id, limit + 1
+            )
+
+        next_cursor = None
+        if len(conversations) > limit:
+            conversations = conversations[:limit]
+            last = conversations[-1]
+            next_cursor = encode_cursor(
+                {"updatedAt": last["updatedAt"].isoformat(), "id": last["id"]}
+            )
+        return [_to_dict(conversation) for conversation in conversations], next_cursor
 
     async def get_conversation(self, user_id, conversation_id):
         query = "SELECT * FROM conversations WHERE id = $1 AND user_id = $2 AND type = 'conversation'"
         conversation = await self.conn.fetchrow(query, conversation_id, user_id)
-        return dict(conversation) if conversation else None
+        return _to_dict(conversation) if conversation else None
 
     async def create_message(self, uuid, conversation_id, user_id, input_message: dict):
         message_id = uuid
-        utc_now = datetime.now(timezone.utc)
-        createdAt = utc_now.strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
-        query = """
-            INSERT INTO messages (id, type, "createdAt", "updatedAt", user_id, conversation_id, role, content, feedback)
-            VALUES ($1, 'message', $2, $2, $3, $4, $5, $6, $7)
-            RETURNING *
-        """
+        createdAt = _utc_now()
         feedback = "" if self.enable_message_feedback else None
         message = await self.conn.fetchrow(
-            query,
+            CREATE_MESSAGE_QUERY,
             message_id,
             createdAt,
             user_id,
@@ -144,18 +302,67 @@ class PostgresConversationClient(DatabaseClientBase):
         )
 
         if message:
-            update_query = 'UPDATE conversations SET "updatedAt" = $1 WHERE id = $2 AND user_id = $3 RETURNING *'
-            await self.conn.execute(update_query, createdAt, conversation_id, user_id)
-            return dict(message)
+            await self.conn.execute(
+                TOUCH_CONVERSATION_QUERY, createdAt, conversation_id, user_id
+            )
+            return _to_dict(message)
         else:
             return False
 
+    async def save_turn(self, user_id, conversation_id, messages, title=""):
+        createdAt = _utc_now()
+        # A millisecond apart, so that the messages are read back in the order of the turn
+        timestamps = [
+            createdAt + timedelta(milliseconds=i) for i in range(len(messages))
+        ]
+        conversation = await self.conn.fetchrow(
+            SAVE_TURN_QUERY,
+            conversation_id,
+            createdAt,
+            timestamps[-1] if timestamps else createdAt,
+            user_id,
+            title,
+            [str(uuid4()) for _ in messages],
+            timestamps,
+            [message["role"] for message in messages],
+            [message["content"] for message in messages],
+            "" if self.enable_message_feedback else None,
+        )
+        return _to_dict(conversation) if conversation else None
+
     async def update_message_feedback(self, user_id, message_id, feedback):
         query = "UPDATE messages SET feedback = $1 WHERE id = $2 AND user_id = $3 RETURNING *"
         message = await self.conn.fetchrow(query, feedback, message_id, user_id)
-        return dict(message) if message else False
+        return _to_dict(message) if message else False
 
     async def get_messages(self, user_id, conversation_id):
-        query = 'SELECT * FROM messages WHERE conversation_id = $1 AND user_id = $2 ORDER BY "createdAt" ASC'
-        messages = await self.conn.fetch(query, conversation_id, user_id)
-        return [dict(message) for message in messages]
+        messages = await self.conn.fetch(GET_MESSAGES_QUERY, conversation_id, user_id)
+        return [_to_dict(message) for message in messages]
+
+    async def get_conversation_summary(self, user_id, conversation_id):
+        query = "SELECT * FROM conversation_summaries WHERE conversation_id = $1 AND user_id = $2"
+        summary = await self.conn.fetchrow(query, conversation_id, user_id)
+        return _to_dict(summary) if summary else None
+
+    async def upsert_conversation_summary(
+        self, user_id, conversation_id, summary, summarized_message_count
+    ):
+        updatedAt = _utc_now()
+        query = """
+            INSERT INTO conversation_summaries (conversation_id, user_id, summary, summarized_message_count, "updatedAt")
+            VALUES ($1, $2, $3, $4, $5)
+            ON CONFLICT (conversation_id) DO UPDATE SET
+                summary = EXCLUDED.summary,
+                summarized_message_count = EXCLUDED.summarized_message_count,
+                "updatedAt" = EXCLUDED."updatedAt"
+            RETURNING *
+        """
+        conversation_summary = await self.conn.fetchrow(
+            query, conversation_id, user_id, summary, summarized_message_count, updatedAt
+        )
+        return _to_dict(conversation_summary) if conversation_summary else False
+
+    async def delete_conversation_summary(self, user_id, conversation_id):
+        query = "DELETE FROM conversation_summaries WHERE conversation_id = $1 AND user_id = $2"
+        await self.conn.execute(query, conversation_id, user_id)
+        return True
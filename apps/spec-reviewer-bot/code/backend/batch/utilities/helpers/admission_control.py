@@ -0,0 +1,224 @@
+import json
+import logging
+import math
+import threading
+import time
+from typing import Iterable, NamedTuple, Optional
+
+from werkzeug.datastructures import EnvironHeaders
+from werkzeug.wsgi import ClosingIterator
+
+from ..chat_history.auth_utils import get_authenticated_user_details
+from .env_helper import EnvHelper
+
+logger = logging.getLogger(__name__)
+
+
+class Admission(NamedTuple):
+    admitted: bool
+    reason: str
+    retry_after: int = 0
+    wait_seconds: float = 0.0
+
+
+class AdmissionController:
+    """
+    Decides whether a request may start, before it uses any Azure OpenAI quota.
+
+    Every user has a token bucket refilled with ADMISSION_USER_REQUESTS_PER_MINUTE
+    and holding up to ADMISSION_USER_BURST requests; a user whose bucket is empty is
+    rejected straight away. At most ADMISSION_MAX_IN_FLIGHT admitted requests run at
+    once, up to ADMISSION_QUEUE_SIZE more wait for a slot for at most
+    ADMISSION_QUEUE_TIMEOUT_SECONDS, and requests arriving when the queue is full are
+    rejected without waiting. Rejections tell the client when to retry.
+    """
+
+    _MAX_TRACKED_USERS = 10000
+
+    def __init__(self, env_helper: EnvHelper):
+        self.max_in_flight = env_helper.ADMISSION_MAX_IN_FLIGHT
+        self.queue_size = env_helper.ADMISSION_QUEUE_SIZE
+        self.queue_timeout = env_helper.ADMISSION_QUEUE_TIMEOUT_SECONDS
+        self.user_rate = env_helper.ADMISSION_USER_REQUESTS_PER_MINUTE / 60
+        self.user_burst = max(1, env_helper.ADMISSION_USER_BURST)
+        self.metrics = {
+            "admitted": 0,
+            "queued": 0,
+            "rejected_user_rate": 0,
+            "rejected_queue_full": 0,
+            "rejected_timeout": 0,
+        }
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._waiting = 0
+        # Running average of how long an admitted request holds its slot
+        self._average_duration = 1.0
+        self._buckets: dict[str, tuple[float, float]] = {}
+        self._buckets_lock = threading.Lock()
+
+    @property
+    def queue_depth(self) -> int:
+        return self._waiting
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def admit(self, user_id: Optional[str]) -> Admission:
+        """Admits the request or rejects it; an admitted request must be released when done."""
+        retry_after = self._take_user_token(user_id or "")
+        if retry_after:
+            return self._reject("rejected_user_rate", retry_after)
+        return self._acquire_slot()
+
+    def release(self, duration: float) -> None:
+        with self._condition:
+            self._in_flight -= 1
+            self._average_duration += 0.1 * (duration - self._average_duration)
+            self._condition.notify()
+
+    def _take_user_token(self, user_id: str) -> int:
+        if self.user_rate <= 0:
+            return 0
+
+        now = time.monotonic()
+        with self._buckets_lock:
+            tokens, updated_at = self._buckets.get(user_id, (self.user_burst, now))
+            tokens = min(self.user_burst, tokens + (now - updated_at) * self.user_rate)
+            if tokens < 1:
+                self._buckets[user_id] = (tokens, now)
+                return math.ceil((1 - tokens) / self.user_rate)
+            self._buckets[user_id] = (tokens - 1, now)
+            if len(self._buckets) > self._MAX_TRACKED_USERS:
+                self._forget_full_buckets(now)
+        return 0
+
+    def _forget_full_buckets(self, now: float) -> None:
+        # A full bucket is the state of a user seen for the first time
+        refill_time = self.user_burst / self.user_rate
+        self._buckets = {
+            user_id: bucket
+            for user_id, bucket in self._buckets.items()
+            if now - bucket[1] < refill_time
+        }
+
+    def _acquire_slot(self) -> Admission:
+        if self.max_in_flight <= 0:
+            self._count("admitted")
+            return Admission(True, "admitted")
+
+        started_at = time.monotonic()
+        with self._condition:
+            if self._in_flight < self.max_in_flight and not self._waiting:
+                self._in_flight += 1
+                self.metrics["admitted"] += 1
+                return Admission(True, "admitted")
+            if self._waiting >= self.queue_size:
+                return self._reject("rejected_queue_full", self._estimated_wait())
+
+            self._waiting += 1
+            self.metrics["queued"] += 1
+            deadline = started_at + self.queue_timeout
+            try:
+                while self._in_flight >= self.max_in_flight:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return self._reject(
+                            "rejected_timeout",
+                            self._estimated_wait(),
+                            time.monotonic() - started_at,
+                        )
+                    self._condition.wait(remaining)
+                self._in_flight += 1
+                self.metrics["admitted"] += 1
+            finally:
+                self._waiting -= 1
+
+        admission = Admission(True, "admitted", wait_seconds=time.monotonic() - started_at)
+        self._log(admission)
+        return admission
+
+    def _estimated_wait(self) -> int:
+        return max(
+            1,
+            math.ceil(
+                self._average_duration * (self._waiting + 1) / max(1, self.max_in_flight)
+            ),
+        )
+
+    def _reject(
+        self, reason: str, retry_after: int, wait_seconds: float = 0.0
+    ) -> Admission:
+        self._count(reason)
+        admission = Admission(False, reason, retry_after, wait_seconds)
+        self._log(admission)
+        return admission
+
+    def _count(self, metric: str) -> None:
+        # The condition's lock is reentrant, so this also works while holding it
+        with self._condition:
+            self.metrics[metric] += 1
+
+    def _log(self, admission: Admission) -> None:
+        custom_dimensions = {
+            "outcome": admission.reason,
+            "wait_ms": round(admission.wait_seconds * 1000),
+            "queue_depth": self._waiting,
+            "in_flight": self._in_flight,
+            **self.metrics,
+        }
+        logger.info("Admission Control", extra=custom_dimensions)
+
+
+class AdmissionMiddleware:
+    """
+    WSGI middleware applying an AdmissionController to the requests under the given
+    path prefixes. The slot of a streamed response is held until the stream ends.
+    """
+
+    def __init__(
+        self,
+        wsgi_app,
+        controller: AdmissionController,
+        path_prefixes: Iterable[str],
+        rejection_message: str,
+    ):
+        self.wsgi_app = wsgi_app
+        self.controller = controller
+        self.path_prefixes = tuple(path_prefixes)
+        self.rejection_message = rejection_message
+
+    def __call__(self, environ, start_response):
+        if not environ.get("PATH_INFO", "").startswith(self.path_prefixes):
+            return self.wsgi_app(environ, start_response)
+
+        user_id = get_authenticated_user_details(
+            request_headers=EnvironHeaders(environ)
+        )["user_principal_id"]
+        admission = self.controller.admit(user_id)
+        if not admission.admitted:
+            return self._reject(admission, start_response)
+
+        started_at = time.monotonic()
+
+        def release():
+            self.controller.release(time.monotonic() - started_at)
+
+        try:
+            response = self.wsgi_app(environ, start_response)
+        except BaseException:
+            release()
+            raise
+        return ClosingIterator(response, release)
+
+    def _reject(self, admission: Admission, start_response):
+        body = json.dumps({"error": self.rejection_message}).encode()
+        start_response(
+            "429 Too Many Requests",
+            [
+                ("Content-Type", "application/json"),
+                ("Content-Length", str(len(body))),
+                ("Retry-After", str(admission.retry_after)),
+            ],
+        )
+        return [body]
@@ -0,0 +1,131 @@
+import asyncio
+import atexit
+import inspect
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Coroutine, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncRuntime:
+    """
+    A process-wide event loop running in a background thread.
+
+    Flask runs every async view in a new event loop, so clients holding connections
+    (asyncpg pools, the Cosmos aio client, AsyncAzureOpenAI) cannot outlive a request.
+    When the runtime is started, the async views of all request threads run on this
+    one loop instead: their I/O interleaves and the clients it owns live for the
+    whole process. Clients are created on first use and closed on shutdown.
+    """
+
+    _instance: Optional["AsyncRuntime"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self) -> None:
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._run_loop, name="async-runtime", daemon=True
+        )
+        self._resources: dict[str, Any] = {}
+        self._closers: list[tuple[str, Callable[[Any], Any]]] = []
+        self._resources_lock = threading.Lock()
+        self._async_resources_lock: Optional[asyncio.Lock] = None
+        self._stopped = False
+        self._thread.start()
+
+    @classmethod
+    def start(cls) -> "AsyncRuntime":
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+                atexit.register(cls._instance.shutdown)
+                logger.info("Started the shared event loop")
+            return cls._instance
+
+    @classmethod
+    def current(cls) -> Optional["AsyncRuntime"]:
+        return cls._instance
+
+    @classmethod
+    def current_in_loop(cls) -> Optional["AsyncRuntime"]:
+        """Returns the runtime when called from code running on its loop, None otherwise."""
+        runtime = cls._instance
+        if runtime is None:
+            return None
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return None
+        return runtime if running_loop is runtime.loop else None
+
+    def _run_loop(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def run(self, coroutine: Coroutine, timeout: Optional[float] = None) -> Any:
+        """Runs the coroutine on the shared loop and blocks the calling thread for its result."""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(timeout)
+
+    def resource(
+        self,
+        name: str,
+        factory: Callable[[], Any],
+        close: Optional[Callable[[Any], Any]] = None,
+    ) -> Any:
+        """Returns the client registered under the name, creating it once with the factory."""
+        with self._resources_lock:
+            if name not in self._resources:
+                self._resources[name] = factory()
+                if close:
+                    self._closers.append((name, close))
+            return self._resources[name]
+
+    async def async_resource(
+        self,
+        name: str,
+        factory: Callable[[], Awaitable[Any]],
+        close: Optional[Callable[[Any], Any]] = None,
+    ) -> Any:
+        """Like resource, for clients that are created by awaiting the factory on the loop."""
+        if name in self._resources:
+            return self._resources[name]
+        if self._async_resources_lock is None:
+            self._async_resources_lock = asyncio.Lock()
+        async with self._async_resources_lock:
+            if name not in self._resources:
+                client = await factory()
+                with self._resources_lock:
+                    self._resources[name] = client
+                    if close:
+                        self._closers.append((name, close))
+        return self._resources[name]
+
+    def shutdown(self, timeout: float = 10) -> None:
+        """Closes the clients in reverse creation order and stops the loop."""
+        with self._instance_lock:
+            if self._stopped:
+                return
+            self._stopped = True
+            if AsyncRuntime._instance is self:
+                AsyncRuntime._instance = None
+
+        async def close_resources():
+            for name, close in reversed(self._closers):
+                try:
+                    result = close(self._resources[name])
+                    if inspect.isawaitable(result):
+                        await result
+                except Exception:
+                    logger.exception(f"Failed to close {name}")
+
+        try:
+            self.run(close_resources(), timeout)
+        finally:
+            self._resources.clear()
+            self._closers.clear()
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout)
+            if not self._thread.is_alive():
+                self.loop.close()
+            logger.info("Stopped the shared event loop")
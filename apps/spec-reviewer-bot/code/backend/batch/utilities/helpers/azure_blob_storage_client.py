@@ -9,6 +9,7 @@ from azure.storage.blob import (
     UserDelegationKey,
 )
 from azure.core.credentials import AzureNamedKeyCredential
+from azure.core.exceptions import ResourceExistsError
 from azure.storage.queue import QueueClient, BinaryBase64EncodePolicy
 import chardet
 from .env_helper import EnvHelper
@@ -84,6 +85,13 @@ class AzureBlobStorageClient:
         )
         return user_delegation_key
 
+    def ensure_container(self) -> None:
+        """Creates the container of the client if it does not exist yet."""
+        try:
+            self.blob_service_client.create_container(self.container_name)
+        except ResourceExistsError:
+            pass
+
     def file_exists(self, file_name):
         blob_client = self.blob_service_client.get_blob_client(
             container=self.container_name, blob=file_name
@@ -239,6 +247,12 @@ class AzureBlobStorageClient:
         # Add metadata to the blob
         blob_client.set_blob_metadata(metadata=blob_metadata)
 
+    def get_blob_etag(self, file_name):
+        blob_client = self.blob_service_client.get_blob_client(
+            container=self.container_name, blob=file_name
+        )
+        return blob_client.get_blob_properties().etag
+
     def get_container_sas(self):
         # Generate a SAS URL to the container and return it
         return "?" + generate_container_sas(
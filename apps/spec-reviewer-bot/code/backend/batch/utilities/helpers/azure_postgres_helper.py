@@ -1,275 +1,540 @@
+import hashlib
 import logging
+import struct
+from typing import Iterable, Iterator, Optional
 import psycopg2
-from psycopg2.extras import execute_values, RealDictCursor
-from .azure_credential_utils import get_azure_credential
+from psycopg2.extras import RealDictCursor
 from .llm_helper import LLMHelper
 from .env_helper import EnvHelper
+from .odata_filter import odata_to_sql
+from .postgres_pool import PostgresConnectionPool
 
 logger = logging.getLogger(__name__)
 
+# Must match the text search configuration of the content_tsv column of vector_store
+TEXT_SEARCH_CONFIG = "english"
+
+ITERATIVE_SCAN_MODES = ("relaxed_order", "strict_order")
+
+# Largest hnsw.ef_search pgvector accepts
+MAX_EF_SEARCH = 1000
+
+# Dimensions of content_vector, which the quantized index expressions cast to
+EMBEDDING_DIMENSIONS = 1536
+
+# Distance of the HNSW index of each vector storage, which must match the index expression
+INDEX_DISTANCES = {
+    "vector": "content_vector <=> %s::vector",
+    "halfvec": f"content_vector::halfvec({EMBEDDING_DIMENSIONS}) <=> %s::vector::halfvec({EMBEDDING_DIMENSIONS})",
+    "binary": f"binary_quantize(content_vector)::bit({EMBEDDING_DIMENSIONS}) <~> binary_quantize(%s::vector)",
+}
+
+# The nearest chunks by the distance of the index, re-ranked by the exact distance
+VECTOR_CANDIDATES = """
+        SELECT id, title, chunk, "offset", page_number, content, source, content_vector
+        FROM vector_store
+        WHERE {filter}
+        ORDER BY {distance}
+        LIMIT %s
+"""
+
+VECTOR_SEARCH_QUERY = """
+    SELECT id, title, chunk, "offset", page_number, content, source
+    FROM ({candidates}) AS candidates
+    ORDER BY content_vector <=> %s::vector
+    LIMIT %s
+"""
+
+# Any of the question's words may match, plainto_tsquery alone would require all of them
+HYBRID_SEARCH_QUERY = """
+    WITH keywords AS (
+        SELECT replace(plainto_tsquery(%s::regconfig, %s)::text, ' & ', ' | ')::tsquery AS query
+    ),
+    vector_matches AS (
+        SELECT id, RANK() OVER (ORDER BY content_vector <=> %s::vector) AS rank
+        FROM ({candidates}) AS candidates
+        ORDER BY content_vector <=> %s::vector
+        LIMIT %s
+    ),
+    text_matches AS (
+        SELECT id, RANK() OVER (ORDER BY ts_rank(content_tsv, keywords.query) DESC) AS rank
+        FROM vector_store, keywords
+        WHERE content_tsv @@ keywords.query AND {filter}
+        ORDER BY ts_rank(content_tsv, keywords.query) DESC
+        LIMIT %s
+    ),
+    fused AS (
+        SELECT
+            COALESCE(vector_matches.id, text_matches.id) AS id,
+            COALESCE(1.0 / (%s + vector_matches.rank), 0.0)
+                + COALESCE(1.0 / (%s + text_matches.rank), 0.0) AS score
+        FROM vector_matches
+        FULL OUTER JOIN text_matches ON vector_matches.id = text_matches.id
+    )
+    SELECT vector_store.id, title, chunk, "offset", page_number, content, source
+    FROM fused
+    JOIN vector_store ON vector_store.id = fused.id
+    ORDER BY fused.score DESC
+    LIMIT %s
+"""
+
+SAS_TOKEN_PLACEHOLDER = "_SAS_TOKEN_PLACEHOLDER_"
+
+# Columns written by create_vector_store, content_tsv is generated from them
+VECTOR_STORE_COLUMNS = (
+    "id",
+    "document_id",
+    "title",
+    "chunk",
+    "chunk_id",
+    "offset",
+    "page_number",
+    "content",
+    "source",
+    "metadata",
+    "content_vector",
+)
+
+# PostgreSQL type of each column, as sent in the binary COPY format
+VECTOR_STORE_COPY_TYPES = (
+    "text",
+    "text",
+    "text",
+    "integer",
+    "text",
+    "integer",
+    "integer",
+    "text",
+    "text",
+    "text",
+    "vector",
+)
+
+_COLUMN_LIST = ", ".join(f'"{column}"' for column in VECTOR_STORE_COLUMNS)
+
+CREATE_STAGING_TABLE_QUERY = f"""
+    CREATE TEMPORARY TABLE vector_store_staging (
+        {", ".join(f'"{column}" {type_}' for column, type_ in zip(VECTOR_STORE_COLUMNS, VECTOR_STORE_COPY_TYPES))}
+    ) ON COMMIT DROP
+"""
+
+COPY_STAGING_QUERY = (
+    f"COPY vector_store_staging ({_COLUMN_LIST}) FROM STDIN WITH (FORMAT binary)"
+)
+
+# A chunk id uploaded twice in the same batch keeps its last row
+MERGE_STAGING_QUERY = f"""
+    INSERT INTO vector_store ({_COLUMN_LIST})
+    SELECT DISTINCT ON (id) {_COLUMN_LIST}
+    FROM (SELECT *, ctid AS row_position FROM vector_store_staging) AS staging
+    ORDER BY id, row_position DESC
+    ON CONFLICT (id) DO UPDATE SET
+        {", ".join(f'"{column}" = EXCLUDED."{column}"' for column in VECTOR_STORE_COLUMNS[1:])}
+"""
+
+# The catalog row of each uploaded file, which its chunks reference
+UPSERT_DOCUMENT_QUERY = """
+    INSERT INTO documents (id, source, title, etag, chunk_count, ingested_at)
+    VALUES (%s, %s, %s, %s, %s, now())
+    ON CONFLICT (id) DO UPDATE SET
+        source = EXCLUDED.source,
+        title = EXCLUDED.title,
+        etag = EXCLUDED.etag,
+        chunk_count = EXCLUDED.chunk_count,
+        ingested_at = EXCLUDED.ingested_at
+"""
+
+# Chunks of the re-ingested files that their new version no longer has
+DELETE_STALE_CHUNKS_QUERY = """
+    DELETE FROM vector_store
+    WHERE document_id = ANY(%s)
+    AND NOT EXISTS (
+        SELECT 1 FROM vector_store_staging WHERE vector_store_staging.id = vector_store.id
+    )
+"""
+
+
+def catalog_source(source: str) -> str:
+    """
+    Returns the URL of a file, as stored in the documents catalog, from the source of
+    its chunks.
+    """
+    return source.replace(SAS_TOKEN_PLACEHOLDER, "")
+
+
+def document_id(source: str) -> str:
+    """
+    Returns the id of a file in the documents catalog, from the source of its chunks.
+    """
+    return hashlib.sha1(catalog_source(source).encode("utf-8")).hexdigest()
+
+
+_COPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack("!ii", 0, 0)
+_COPY_TRAILER = struct.pack("!h", -1)
+
+
+def _encode_copy_field(value, type_: str) -> bytes:
+    if value is None:
+        return struct.pack("!i", -1)
+    if type_ == "integer":
+        data = struct.pack("!i", value)
+    elif type_ == "vector":
+        # pgvector's binary format: dimensions, an unused int16 and float4 values
+        data = struct.pack(f"!hh{len(value)}f", len(value), 0, *value)
+    else:
+        data = str(value).encode("utf-8")
+    return struct.pack("!i", len(data)) + data
+
+
+def _encode_copy_rows(documents: Iterable[dict]) -> Iterator[bytes]:
+    yield _COPY_HEADER
+    field_count = struct.pack("!h", len(VECTOR_STORE_COLUMNS))
+    for document in documents:
+        yield field_count + b"".join(
+            _encode_copy_field(document[column], type_)
+            for column, type_ in zip(VECTOR_STORE_COLUMNS, VECTOR_STORE_COPY_TYPES)
+        )
+    yield _COPY_TRAILER
+
+
+class _CopyStream:
+    """
+    A file-like object encoding the rows as copy_expert reads them, so that a large
+    file is never held in memory as a whole.
+    """
+
+    def __init__(self, chunks: Iterator[bytes]):
+        self._chunks = chunks
+        self._buffer = bytearray()
+
+    def read(self, size: int = -1) -> bytes:
+        while size < 0 or len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+        if size < 0:
+            size = len(self._buffer)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
 
 class AzurePostgresHelper:
     def __init__(self):
         self.llm_helper = LLMHelper()
         self.env_helper = EnvHelper()
-        self.conn = None
 
-    def _create_search_client(self):
+    def get_search_client(self) -> PostgresConnectionPool:
         """
-        Establishes a connection to Azure PostgreSQL using AAD authentication.
+        Provides the process-wide connection pool of the configured database.
         """
-        try:
-            user = self.env_helper.POSTGRESQL_USER
-            host = self.env_helper.POSTGRESQL_HOST
-            dbname = self.env_helper.POSTGRESQL_DATABASE
-
-            # Acquire the access token
-            credential = get_azure_credential(self.env_helper.MANAGED_IDENTITY_CLIENT_ID)
-            access_token = credential.get_token(
-                "https://ossrdbms-aad.database.windows.net/.default"
-            )
+        return PostgresConnectionPool.shared(
+            self.env_helper.POSTGRESQL_HOST,
+            self.env_helper.POSTGRESQL_USER,
+            self.env_helper.POSTGRESQL_DATABASE,
+        )
 
-            # Use the token in the connection string
-            conn_string = (
-                f"host={host} user={user} dbname={dbname} password={access_token.token} sslmode=require"
-            )
-            self.conn = psycopg2.connect(conn_string)
-            logger.info("Connected to Azure PostgreSQL successfully.")
-            return self.conn
-        except Exception as e:
-            logger.error(f"Error establishing a connection to PostgreSQL: {e}")
-            raise
-
-    def get_search_client(self):
+    def get_vector_store(self, embedding_array, question: Optional[str] = None):
         """
-        Provides a reusable database connection.
+        Fetches search indexes from PostgreSQL based on an embedding vector.
+
+        When AZURE_POSTGRES_HYBRID_SEARCH is enabled and the question is given, the
+        nearest chunks and the chunks best matching the question's keywords are fused
+        by reciprocal rank. AZURE_SEARCH_FILTER applies to both searches.
+
+        With a quantized AZURE_POSTGRES_VECTOR_STORAGE, the index preselects
+        AZURE_POSTGRES_RERANK_FACTOR times more chunks by their quantized distance,
+        which are then ordered by their exact distance.
         """
-        if self.conn is None or self.conn.closed != 0:  # Ensure the connection is open
-            self.conn = self._create_search_client()
-        return self.conn
+        filter_condition, filter_params = odata_to_sql(
+            self.env_helper.AZURE_SEARCH_FILTER
+        )
+        top_k = self.env_helper.AZURE_POSTGRES_SEARCH_TOP_K
+        hybrid = bool(question) and self.env_helper.AZURE_POSTGRES_HYBRID_SEARCH
+        candidates = (
+            max(top_k, self.env_helper.AZURE_POSTGRES_HYBRID_CANDIDATES)
+            if hybrid
+            else top_k
+        )
+
+        storage = self.env_helper.AZURE_POSTGRES_VECTOR_STORAGE
+        if storage not in INDEX_DISTANCES:
+            raise ValueError(f"Unsupported AZURE_POSTGRES_VECTOR_STORAGE: {storage}")
+        index_candidates = candidates
+        if storage != "vector":
+            # The quantized distances only preselect the chunks that are re-ranked
+            index_candidates = candidates * max(
+                1, self.env_helper.AZURE_POSTGRES_RERANK_FACTOR
+            )
+        vector_candidates = VECTOR_CANDIDATES.format(
+            filter=filter_condition, distance=INDEX_DISTANCES[storage]
+        )
+        candidates_params = (*filter_params, embedding_array, index_candidates)
 
-    def get_vector_store(self, embedding_array):
+        if hybrid:
+            rrf_k = self.env_helper.AZURE_POSTGRES_RRF_K
+            query = HYBRID_SEARCH_QUERY.format(
+                candidates=vector_candidates, filter=filter_condition
+            )
+            params = (
+                TEXT_SEARCH_CONFIG,
+                question,
+                embedding_array,
+                *candidates_params,
+                embedding_array,
+                candidates,
+                *filter_params,
+                candidates,
+                rrf_k,
+                rrf_k,
+                top_k,
+            )
+        else:
+            query = VECTOR_SEARCH_QUERY.format(candidates=vector_candidates)
+            params = (*candidates_params, embedding_array, top_k)
+
+        # The settings are local to the transaction, which ends when the connection returns to the pool
+        settings, settings_params = self._hnsw_settings(
+            index_candidates, filtered=filter_condition != "TRUE"
+        )
+        query = settings + query
+        params = (*settings_params, *params)
+
+        with self.get_search_client().connection() as conn:
+            try:
+                with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                    cur.execute(query, params)
+                    search_results = cur.fetchall()
+                    logger.info(f"Retrieved {len(search_results)} search results.")
+                    return search_results
+            except Exception as e:
+                logger.error(f"Error executing search query: {e}")
+                raise
+
+    def _hnsw_settings(self, candidates: int, filtered: bool) -> tuple[str, tuple]:
         """
-        Fetches search indexes from PostgreSQL based on an embedding vector.
+        Returns the statement setting the HNSW search parameters of the query.
+
+        hnsw.ef_search bounds the number of rows an HNSW scan returns, so it is raised
+        to the number of candidates the query asks for, up to the pgvector maximum of
+        1000. Filtered queries use iterative index scans when
+        AZURE_POSTGRES_HNSW_ITERATIVE_SCAN enables them (pgvector 0.8 and later),
+        otherwise the filter can leave fewer rows than asked.
         """
-        conn = self.get_search_client()
-        try:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                cur.execute(
-                    """
-                    SELECT id, title, chunk, "offset", page_number, content, source
-                    FROM vector_store
-                    ORDER BY content_vector <=> %s::vector
-                    LIMIT %s
-                    """,
-                    (
-                        embedding_array,
-                        self.env_helper.AZURE_POSTGRES_SEARCH_TOP_K,
-                    ),
-                )
-                search_results = cur.fetchall()
-                logger.info(f"Retrieved {len(search_results)} search results.")
-                return search_results
-        except Exception as e:
-            logger.error(f"Error executing search query: {e}")
-            raise
-        finally:
-            conn.close()
-
-    def create_vector_store(self, documents_to_upload):
+        ef_search = max(candidates, self.env_helper.AZURE_POSTGRES_HNSW_EF_SEARCH)
+        if ef_search > MAX_EF_SEARCH:
+            logger.warning(
+                f"Capping hnsw.ef_search at {MAX_EF_SEARCH}, the HNSW scan returns "
+                f"at most {MAX_EF_SEARCH} of the {ef_search} rows asked for."
+            )
+            ef_search = MAX_EF_SEARCH
+        settings = ["set_config('hnsw.ef_search', %s, true)"]
+        params = [str(ef_search)]
+        iterative_scan = self.env_helper.AZURE_POSTGRES_HNSW_ITERATIVE_SCAN.lower()
+        if filtered and iterative_scan in ITERATIVE_SCAN_MODES:
+            settings.append("set_config('hnsw.iterative_scan', %s, true)")
+            params.append(iterative_scan)
+        return f"SELECT {', '.join(settings)};", tuple(params)
+
+    def create_vector_store(self, documents_to_upload, etag: Optional[str] = None):
         """
-        Inserts documents into the `vector_store` table in batch mode.
+        Upserts the chunks of one or more files into the `vector_store` table, and the
+        files into the `documents` catalog with the given blob etag.
+
+        The chunks are streamed into a temporary staging table with a binary COPY, then
+        merged into `vector_store` on their id. Chunks of the same files that are no
+        longer uploaded are deleted, so documents_to_upload must hold all the chunks of
+        each of their files. Nothing is changed if any step fails.
         """
-        conn = self.get_search_client()
-        try:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                data_to_insert = [
-                    (
-                        d["id"],
-                        d["title"],
-                        d["chunk"],
-                        d["chunk_id"],
-                        d["offset"],
-                        d["page_number"],
-                        d["content"],
-                        d["source"],
-                        d["metadata"],
-                        d["content_vector"],
+        files = {}
+        for d in documents_to_upload:
+            file = files.setdefault(
+                document_id(d["source"]),
+                {
+                    "source": catalog_source(d["source"]),
+                    "title": d["title"],
+                    "ids": set(),
+                },
+            )
+            file["ids"].add(d["id"])
+        rows = (
+            {**d, "document_id": document_id(d["source"])} for d in documents_to_upload
+        )
+        with self.get_search_client().connection() as conn:
+            try:
+                with conn.cursor() as cur:
+                    cur.executemany(
+                        UPSERT_DOCUMENT_QUERY,
+                        [
+                            (
+                                file_id,
+                                file["source"],
+                                file["title"],
+                                etag,
+                                len(file["ids"]),
+                            )
+                            for file_id, file in files.items()
+                        ],
+                    )
+                    cur.execute(CREATE_STAGING_TABLE_QUERY)
+                    cur.copy_expert(
+                        COPY_STAGING_QUERY, _CopyStream(_encode_copy_rows(rows))
                     )
-                    for d in documents_to_upload
-                ]
-
-                # Batch insert using execute_values for efficiency
-                query = """
-                    INSERT INTO vector_store (
-                        id, title, chunk, chunk_id, "offset", page_number,
-                        content, source, metadata, content_vector
-                    ) VALUES %s
-                """
-                execute_values(cur, query, data_to_insert)
+                    cur.execute(MERGE_STAGING_QUERY)
+                    upserted = cur.rowcount
+                    cur.execute(DELETE_STALE_CHUNKS_QUERY, (sorted(files),))
+                    deleted = cur.rowcount
+                conn.commit()  # Commit the transaction, which drops the staging table
                 logger.info(
-                    f"Inserted {len(documents_to_upload)} documents successfully."
+                    f"Upserted {upserted} documents and deleted {deleted} stale documents successfully."
                 )
-
-            conn.commit()  # Commit the transaction
-        except Exception as e:
-            logger.error(f"Error during index creation: {e}")
-            conn.rollback()  # Roll back transaction on error
-            raise
-        finally:
-            conn.close()
+            except Exception as e:
+                logger.error(f"Error during index creation: {e}")
+                conn.rollback()  # Roll back transaction on error
+                raise
 
     def get_files(self):
         """
-        Fetches distinct titles from the PostgreSQL database.
+        Fetches the files of the documents catalog, ordered by title.
 
         Returns:
-            list[dict] or None: A list of dictionaries (each with a single key 'title')
-            or None if no titles are found or an error occurs.
+            list[dict] or None: A list of dictionaries with the 'id' and 'title' of
+            each file, or None if no files are found.
         """
-        conn = self.get_search_client()
-        try:
-            # Using a cursor to execute the query
-            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-                query = """
-                    SELECT id, title
-                    FROM vector_store
-                    WHERE title IS NOT NULL
-                    ORDER BY title;
-                """
-                cursor.execute(query)
-                # Fetch all results
-                results = cursor.fetchall()
-                # Return results or None if empty
-                return results if results else None
-        except psycopg2.Error as db_err:
-            logger.error(f"Database error while fetching titles: {db_err}")
-            raise
-        except Exception as e:
-            logger.error(f"Unexpected error while fetching titles: {e}")
-            raise
-        finally:
-            conn.close()
+        with self.get_search_client().connection() as conn:
+            try:
+                # Using a cursor to execute the query
+                with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                    query = """
+                        SELECT id, title
+                        FROM documents
+                        ORDER BY title;
+                    """
+                    cursor.execute(query)
+                    # Fetch all results
+                    results = cursor.fetchall()
+                    # Return results or None if empty
+                    return results if results else None
+            except psycopg2.Error as db_err:
+                logger.error(f"Database error while fetching titles: {db_err}")
+                raise
+            except Exception as e:
+                logger.error(f"Unexpected error while fetching titles: {e}")
+                raise
 
     def delete_documents(self, ids_to_delete):
         """
-        Deletes documents from the PostgreSQL database based on the provided ids.
+        Deletes files from the documents catalog based on the provided ids, their
+        chunks are deleted from `vector_store` by the cascading foreign key.
 
         Args:
-            ids_to_delete (list): A list of document IDs to delete.
+            ids_to_delete (list): A list of dictionaries with the 'id' of each file.
 
         Returns:
             int: The number of deleted rows.
         """
-        conn = self.get_search_client()
-        try:
-            if not ids_to_delete:
-                logger.warning("No IDs provided for deletion.")
-                return 0
-
-            # Using a cursor to execute the query
-            with conn.cursor() as cursor:
-                # Construct the DELETE query with the list of ids_to_delete
-                query = """
-                    DELETE FROM vector_store
-                    WHERE id = ANY(%s)
-                """
-                # Extract the 'id' values from the list of dictionaries (ids_to_delete)
-                ids_to_delete_values = [item["id"] for item in ids_to_delete]
-
-                # Execute the query, passing the list of IDs as a parameter
-                cursor.execute(query, (ids_to_delete_values,))
-
-                # Commit the transaction
-                conn.commit()
-
-                # Return the number of deleted rows
-                deleted_rows = cursor.rowcount
-                logger.info(f"Deleted {deleted_rows} documents.")
-                return deleted_rows
-        except psycopg2.Error as db_err:
-            logger.error(f"Database error while deleting documents: {db_err}")
-            conn.rollback()
-            raise
-        except Exception as e:
-            logger.error(f"Unexpected error while deleting documents: {e}")
-            conn.rollback()
-            raise
-        finally:
-            conn.close()
+        with self.get_search_client().connection() as conn:
+            try:
+                if not ids_to_delete:
+                    logger.warning("No IDs provided for deletion.")
+                    return 0
+
+                # Using a cursor to execute the query
+                with conn.cursor() as cursor:
+                    # Construct the DELETE query with the list of ids_to_delete
+                    query = """
+                        DELETE FROM documents
+                        WHERE id = ANY(%s)
+                    """
+                    # Extract the 'id' values from the list of dictionaries (ids_to_delete)
+                    ids_to_delete_values = [item["id"] for item in ids_to_delete]
+
+                    # Execute the query, passing the list of IDs as a parameter
+                    cursor.execute(query, (ids_to_delete_values,))
+
+                    # Commit the transaction
+                    conn.commit()
+
+                    # Return the number of deleted rows
+                    deleted_rows = cursor.rowcount
+                    logger.info(f"Deleted {deleted_rows} documents.")
+                    return deleted_rows
+            except psycopg2.Error as db_err:
+                logger.error(f"Database error while deleting documents: {db_err}")
+                conn.rollback()
+                raise
+            except Exception as e:
+                logger.error(f"Unexpected error while deleting documents: {e}")
+                conn.rollback()
+                raise
 
     def perform_search(self, title):
         """
         Fetches search results from PostgreSQL based on the title.
         """
-        # Establish connection to PostgreSQL
-        conn = self.get_search_client()
-        try:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                # Execute query to fetch title, content, and metadata
-                cur.execute(
-                    """
-                    SELECT title, content, metadata
-                    FROM vector_store
-                    WHERE title = %s
-                    """,
-                    (title,),
-                )
-                results = cur.fetchall()  # Fetch all matching results
-                logger.info(f"Retrieved {len(results)} search result(s).")
-                return results
-        except Exception as e:
-            logger.error(f"Error executing search query: {e}")
-            raise
-        finally:
-            conn.close()
+        with self.get_search_client().connection() as conn:
+            try:
+                with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                    # Execute query to fetch title, content, and metadata
+                    cur.execute(
+                        """
+                        SELECT vector_store.title, content, metadata
+                        FROM documents
+                        JOIN vector_store ON vector_store.document_id = documents.id
+                        WHERE documents.title = %s
+                        ORDER BY vector_store.chunk
+                        """,
+                        (title,),
+                    )
+                    results = cur.fetchall()  # Fetch all matching results
+                    logger.info(f"Retrieved {len(results)} search result(s).")
+                    return results
+            except Exception as e:
+                logger.error(f"Error executing search query: {e}")
+                raise
 
     def get_unique_files(self):
         """
-        Fetches unique titles from PostgreSQL.
+        Fetches the titles of the files of the documents catalog.
         """
-        # Establish connection to PostgreSQL
-        conn = self.get_search_client()
-        try:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                # Execute query to fetch distinct titles
-                cur.execute(
-                    """
-                    SELECT DISTINCT title
-                    FROM vector_store
-                    """
-                )
-                results = cur.fetchall()  # Fetch all results as RealDictRow objects
-                logger.info(f"Retrieved {len(results)} unique title(s).")
-                return results
-        except Exception as e:
-            logger.error(f"Error executing search query: {e}")
-            raise
-        finally:
-            conn.close()
+        with self.get_search_client().connection() as conn:
+            try:
+                with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                    # Execute query to fetch distinct titles
+                    cur.execute(
+                        """
+                        SELECT DISTINCT title
+                        FROM documents
+                        ORDER BY title
+                        """
+                    )
+                    results = cur.fetchall()  # Fetch all results as RealDictRow objects
+                    logger.info(f"Retrieved {len(results)} unique title(s).")
+                    return results
+            except Exception as e:
+                logger.error(f"Error executing search query: {e}")
+                raise
 
     def search_by_blob_url(self, blob_url):
         """
-        Fetches unique titles from PostgreSQL based on a given blob URL.
+        Fetches the file of the documents catalog stored at a given blob URL.
         """
-        # Establish connection to PostgreSQL
-        conn = self.get_search_client()
-        try:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                # Execute parameterized query to fetch results
-                cur.execute(
-                    """
-                    SELECT id, title
-                    FROM vector_store
-                    WHERE source = %s
-                    """,
-                    (f"{blob_url}_SAS_TOKEN_PLACEHOLDER_",),
-                )
-                results = cur.fetchall()  # Fetch all results as RealDictRow objects
-                logger.info(f"Retrieved {len(results)} unique title(s).")
-                return results
-        except Exception as e:
-            logger.error(f"Error executing search query: {e}")
-            raise
-        finally:
-            conn.close()
+        with self.get_search_client().connection() as conn:
+            try:
+                with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                    # Execute parameterized query to fetch results
+                    cur.execute(
+                        """
+                        SELECT id, title
+                        FROM documents
+                        WHERE source = %s
+                        """,
+                        (catalog_source(blob_url),),
+                    )
+                    results = cur.fetchall()  # Fetch all results as RealDictRow objects
+                    logger.info(f"Retrieved {len(results)} unique title(s).")
+                    return results
+            except Exception as e:
+                logger.error(f"Error executing search query: {e}")
+                raise
@@ -0,0 +1,66 @@
+import logging
+from typing import List, Optional
+
+from .env_helper import EnvHelper
+from .token_counter import count_message_tokens, truncate_to_tokens
+
+logger = logging.getLogger(__name__)
+
+
+class ChatHistoryBudget:
+    """
+    Keeps the chat history sent to the model within a token budget.
+
+    The latest turns are kept whole; the newest turn that does not fit is
+    truncated when enough budget is left, and everything older is dropped.
+    System prompts are added by the callers and are not part of the budget.
+    """
+
+    _MIN_TRUNCATED_TOKENS = 50
+
+    def __init__(self, env_helper: EnvHelper, model_name: Optional[str] = None):
+        self.token_budget = env_helper.CHAT_HISTORY_TOKEN_BUDGET
+        self.model_name = model_name or env_helper.AZURE_OPENAI_MODEL_NAME
+
+    def fit(self, chat_history: List[dict]) -> List[dict]:
+        if self.token_budget <= 0 or not chat_history:
+            return chat_history
+
+        message_tokens = [
+            count_message_tokens(message, self.model_name) for message in chat_history
+        ]
+        total_tokens = sum(message_tokens)
+        if total_tokens <= self.token_budget:
+            return chat_history
+
+        kept: List[dict] = []
+        kept_tokens = 0
+        for message, tokens in zip(reversed(chat_history), reversed(message_tokens)):
+            remaining = self.token_budget - kept_tokens
+            if tokens <= remaining:
+                kept.append(message)
+                kept_tokens += tokens
+                continue
+
+            if remaining >= self._MIN_TRUNCATED_TOKENS and isinstance(
+                message.get("content"), str
+            ):
+                overhead = count_message_tokens(
+                    {"role": message.get("role", "")}, self.model_name
+                )
+                truncated = {
+                    **message,
+                    "content": truncate_to_tokens(
+                        message["content"], remaining - overhead, self.model_name
+                    ),
+                }
+                kept.append(truncated)
+                kept_tokens += count_message_tokens(truncated, self.model_name)
+            break
+
+        kept.reverse()
+        logger.info(
+            f"Trimmed chat history from {len(chat_history)} to {len(kept)} messages, "
+            f"saving {total_tokens - kept_tokens} tokens (budget {self.token_budget})"
+        )
+        return kept
@@ -2,6 +2,7 @@ import os
 import json
 import logging
 import functools
+import time
 from string import Template
 
 from ..azure_blob_storage_client import AzureBlobStorageClient
@@ -14,6 +15,7 @@ from ..env_helper import EnvHelper
 from .assistant_strategy import AssistantStrategy
 from .conversation_flow import ConversationFlow
 from .database_type import DatabaseType
+from .llm_call_site import LLMCallSite
 
 CONFIG_CONTAINER_NAME = "config"
 CONFIG_FILE_NAME = "active.json"
@@ -55,6 +57,7 @@ class Config:
         self.conversational_flow = config.get(
             "conversational_flow", self.env_helper.CONVERSATION_FLOW
         )
+        self.model_routing = ModelRouting(config.get("model_routing", {}))
 
     def get_available_document_types(self) -> list[str]:
         document_types = {
@@ -128,6 +131,19 @@ class Logging:
         self.log_tokens = str(logging["log_tokens"]).lower() == "true"
 
 
+class ModelRouting:
+    """Maps each LLM call site to a deployment; empty entries use the default deployment."""
+
+    def __init__(self, model_routing: dict):
+        self.deployments = {
+            call_site.value: model_routing.get(call_site.value, "")
+            for call_site in LLMCallSite
+        }
+
+    def get_deployment(self, call_site: LLMCallSite) -> str | None:
+        return self.deployments.get(LLMCallSite(call_site).value) or None
+
+
 class IntegratedVectorizationConfig:
     def __init__(self, integrated_vectorization_config: dict):
         self.max_page_length = integrated_vectorization_config["max_page_length"]
@@ -138,6 +154,8 @@ class IntegratedVectorizationConfig:
 
 class ConfigHelper:
     _default_config = None
+    # When get_active_config_or_default last loaded the active configuration
+    _active_config_loaded_at = 0.0
 
     @staticmethod
     def _set_new_config_properties(config: dict, default_config: dict):
@@ -188,10 +206,17 @@ class ConfigHelper:
         if config.get("enable_chat_history") is None:
             config["enable_chat_history"] = default_config["enable_chat_history"]
 
+    @staticmethod
+    def expire_active_config(max_age: float) -> None:
+        """Clears the cached active configuration once it is older than max_age seconds."""
+        if time.monotonic() - ConfigHelper._active_config_loaded_at >= max_age:
+            ConfigHelper.get_active_config_or_default.cache_clear()
+
     @staticmethod
     @functools.cache
     def get_active_config_or_default():
         logger.info("Method get_active_config_or_default started")
+        ConfigHelper._active_config_loaded_at = time.monotonic()
         env_helper = EnvHelper()
         config = ConfigHelper.get_default_config()
 
@@ -0,0 +1,12 @@
+from enum import Enum
+
+
+class LLMCallSite(Enum):
+    DETECTION = "detection"
+    ROUTING = "routing"
+    ANSWER = "answer"
+    POST_VALIDATION = "post_validation"
+    TITLE = "title"
+    CAPTION = "caption"
+    SUMMARY = "summary"
+    REVIEW = "review"
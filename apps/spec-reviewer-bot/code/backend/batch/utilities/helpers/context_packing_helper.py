@@ -0,0 +1,161 @@
+import copy
+import logging
+import re
+from typing import List
+
+from ..common.source_document import SourceDocument
+from .env_helper import EnvHelper
+from .token_counter import count_tokens, truncate_to_tokens
+
+logger = logging.getLogger(__name__)
+
+
+class ContextPacking:
+    """
+    Packs retrieved chunks into the prompt context: merges adjacent chunks of the
+    same source, drops near-duplicates and keeps the highest ranked chunks that
+    fit in the token budget.
+
+    The packed list replaces the retrieved one everywhere downstream, so the
+    [docN] indices in the prompt line up with the citations built by the
+    OutputParserTool.
+    """
+
+    _SHINGLE_SIZE = 5
+    _MIN_OVERLAP_LENGTH = 16
+
+    def __init__(self, env_helper: EnvHelper) -> None:
+        self.token_budget = env_helper.CONTEXT_PACKING_TOKEN_BUDGET
+        self.similarity_threshold = env_helper.CONTEXT_PACKING_SIMILARITY_THRESHOLD
+        self.model_name = env_helper.AZURE_OPENAI_MODEL_NAME
+
+    def pack(self, source_documents: List[SourceDocument]) -> List[SourceDocument]:
+        if not source_documents:
+            return source_documents
+
+        merged_documents = self._merge_adjacent_chunks(source_documents)
+        unique_documents = self._remove_near_duplicates(merged_documents)
+        packed_documents, packed_tokens = self._fit_token_budget(unique_documents)
+
+        logger.info(
+            f"Packed {len(source_documents)} retrieved chunks into {len(packed_documents)} sources "
+            f"({packed_tokens} tokens, budget {self.token_budget})"
+        )
+        return packed_documents
+
+    def _merge_adjacent_chunks(
+        self, source_documents: List[SourceDocument]
+    ) -> List[SourceDocument]:
+        # Each group keeps the retrieval rank of its best chunk and its chunks in document order
+        groups: list[list[SourceDocument]] = []
+        for document in source_documents:
+            for group in groups:
+                position = self._adjacent_position(group, document)
+                if position == "duplicate":
+                    break
+                if position is not None:
+                    group.insert(0 if position == "before" else len(group), document)
+                    break
+            else:
+                groups.append([document])
+
+        return [self._merge_group(group) for group in groups]
+
+    @staticmethod
+    def _adjacent_position(group: list[SourceDocument], document: SourceDocument):
+        first, last = group[0], group[-1]
+        if (
+            document.chunk is None
+            or first.chunk is None
+            or document.source != first.source
+        ):
+            return None
+        if first.chunk <= document.chunk <= last.chunk:
+            return "duplicate"
+        if document.chunk == last.chunk + 1:
+            return "after"
+        if document.chunk == first.chunk - 1:
+            return "before"
+        return None
+
+    def _merge_group(self, group: list[SourceDocument]) -> SourceDocument:
+        first = group[0]
+        if len(group) == 1:
+            return first
+
+        content = first.content
+        for document in group[1:]:
+            content = self._join_overlapping(content, document.content)
+
+        return SourceDocument(
+            id=first.id,
+            content=content,
+            source=first.source,
+            title=first.title,
+            chunk=first.chunk,
+            offset=first.offset,
+            page_number=first.page_number,
+            chunk_id=first.chunk_id,
+        )
+
+    def _join_overlapping(self, left: str, right: str) -> str:
+        """Joins two consecutive chunks, removing the text they share at the boundary."""
+        probe = right[: self._MIN_OVERLAP_LENGTH]
+        if len(probe) == self._MIN_OVERLAP_LENGTH:
+            index = left.find(probe)
+            while index != -1:
+                if right.startswith(left[index:]):
+                    return left[:index] + right
+                index = left.find(probe, index + 1)
+        return f"{left}\n{right}"
+
+    def _remove_near_duplicates(
+        self, source_documents: List[SourceDocument]
+    ) -> List[SourceDocument]:
+        kept: list[tuple[SourceDocument, set]] = []
+        for document in source_documents:
+            shingles = self._shingles(document.content)
+            if any(
+                self._jaccard(shingles, kept_shingles) >= self.similarity_threshold
+                for _, kept_shingles in kept
+            ):
+                logger.debug(f"Dropping near-duplicate source document {document.id}")
+                continue
+            kept.append((document, shingles))
+        return [document for document, _ in kept]
+
+    def _shingles(self, text: str) -> set:
+        words = re.findall(r"\w+", (text or "").lower())
+        if len(words) < self._SHINGLE_SIZE:
+            return {tuple(words)} if words else set()
+        return {
+            tuple(words[i : i + self._SHINGLE_SIZE])
+            for i in range(len(words) - self._SHINGLE_SIZE + 1)
+        }
+
+    @staticmethod
+    def _jaccard(first: set, second: set) -> float:
+        if not first or not second:
+            return 0.0
+        return len(first & second) / len(first | second)
+
+    def _fit_token_budget(
+        self, source_documents: List[SourceDocument]
+    ) -> tuple[List[SourceDocument], int]:
+        packed: List[SourceDocument] = []
+        total_tokens = 0
+        for document in source_documents:
+            tokens = count_tokens(document.content, self.model_name)
+            if self.token_budget <= 0 or total_tokens + tokens <= self.token_budget:
+                packed.append(document)
+                total_tokens += tokens
+            elif not packed:
+                # Always keep the best match, truncated to the budget. The caller
+                # still holds the retrieved document, so a copy is truncated
+                truncated = copy.copy(document)
+                truncated.content = truncate_to_tokens(
+                    document.content, self.token_budget, self.model_name
+                )
+                packed.append(truncated)
+                total_tokens += self.token_budget
+        return packed, total_tokens
@@ -1,6 +1,6 @@
 import json
 import logging
-from typing import List
+from typing import List, Optional
 
 from ...helpers.llm_helper import LLMHelper
 from ...helpers.env_helper import EnvHelper
@@ -10,7 +10,7 @@ from ..config.embedding_config import EmbeddingConfig
 from ..config.config_helper import ConfigHelper
 
 from .embedder_base import EmbedderBase
-from ..azure_postgres_helper import AzurePostgresHelper
+from ..azure_postgres_helper import EMBEDDING_DIMENSIONS, AzurePostgresHelper
 from ..document_loading_helper import DocumentLoading
 from ..document_chunking_helper import DocumentChunking
 from ...common.source_document import SourceDocument
@@ -37,10 +37,15 @@ class PostgresEmbedder(EmbedderBase):
         logger.info(f"Embedding file: {file_name} from source: {source_url}")
         file_extension = file_name.split(".")[-1].lower()
         embedding_config = self.embedding_configs.get(file_extension)
+        # Recorded in the documents catalog, to tell which version of the blob was ingested
+        etag = (
+            self.blob_client.get_blob_etag(file_name) if file_extension != "url" else None
+        )
         self.__embed(
             source_url=source_url,
             file_extension=file_extension,
             embedding_config=embedding_config,
+            etag=etag,
         )
         if file_extension != "url":
             self.blob_client.upsert_blob_metadata(
@@ -48,7 +53,11 @@ class PostgresEmbedder(EmbedderBase):
             )
 
     def __embed(
-        self, source_url: str, file_extension: str, embedding_config: EmbeddingConfig
+        self,
+        source_url: str,
+        file_extension: str,
+        embedding_config: EmbeddingConfig,
+        etag: Optional[str] = None,
     ):
         logger.info(f"Starting embedding process for source: {source_url}")
         documents_to_upload: List[SourceDocument] = []
@@ -80,13 +89,22 @@ class PostgresEmbedder(EmbedderBase):
             logger.info(
                 f"Uploading {len(documents_to_upload)} documents to vector store."
             )
-            self.azure_postgres_helper.create_vector_store(documents_to_upload)
+            self.azure_postgres_helper.create_vector_store(documents_to_upload, etag)
         else:
             logger.warning("No documents to upload.")
 
     def __convert_to_search_document(self, document: SourceDocument):
         logger.info(f"Generating embeddings for document ID: {document.id}")
         embedded_content = self.llm_helper.generate_embeddings(document.content)
+        if (
+            self.env_helper.AZURE_POSTGRES_VECTOR_STORAGE in ("halfvec", "binary")
+            and len(embedded_content) != EMBEDDING_DIMENSIONS
+        ):
+            # The quantized index casts the vectors to a fixed number of dimensions
+            raise ValueError(
+                f"The {self.env_helper.AZURE_POSTGRES_VECTOR_STORAGE} vector storage needs "
+                f"embeddings of {EMBEDDING_DIMENSIONS} dimensions, got {len(embedded_content)}."
+            )
         metadata = {
             "id": document.id,
             "source": document.source,
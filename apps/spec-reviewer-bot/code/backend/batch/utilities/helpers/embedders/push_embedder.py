@@ -12,6 +12,7 @@ from ..azure_blob_storage_client import AzureBlobStorageClient
 
 from ..config.embedding_config import EmbeddingConfig
 from ..config.config_helper import ConfigHelper
+from ..config.llm_call_site import LLMCallSite
 
 from .embedder_base import EmbedderBase
 from ..azure_search_helper import AzureSearchHelper
@@ -126,7 +127,11 @@ class PushEmbedder(EmbedderBase):
 
     def __generate_image_caption(self, source_url):
         logger.info(f"Generating image caption for URL: {source_url}")
-        model = self.env_helper.AZURE_OPENAI_VISION_MODEL
+        # A deployment routed for captions must also accept images
+        model = (
+            self.llm_helper.get_routed_model(LLMCallSite.CAPTION)
+            or self.env_helper.AZURE_OPENAI_VISION_MODEL
+        )
         caption_system_message = """You are an assistant that generates rich descriptions of images.
 You need to be accurate in the information you extract and detailed in the descriptons you generate.
 Do not abbreviate anything and do not shorten sentances. Explain the image completely.
@@ -147,7 +152,9 @@ If the image is mostly text, use OCR to extract the text as it is displayed in t
             },
         ]
 
-        response = self.llm_helper.get_chat_completion(messages, model)
+        response = self.llm_helper.get_chat_completion(
+            messages, model, call_site=LLMCallSite.CAPTION
+        )
         caption = response.choices[0].message.content
         logger.info("Caption generation completed")
         return caption
@@ -94,6 +94,115 @@ class EnvHelper:
         self.AZURE_SEARCH_DOC_UPLOAD_BATCH_SIZE = os.getenv(
             "AZURE_SEARCH_DOC_UPLOAD_BATCH_SIZE", 100
         )
+        # Query vector cache, shared by all requests in the process
+        self.QUERY_VECTOR_CACHE_MAX_SIZE = self.get_env_var_int(
+            "QUERY_VECTOR_CACHE_MAX_SIZE", 1024
+        )
+        self.QUERY_VECTOR_CACHE_TTL_SECONDS = self.get_env_var_float(
+            "QUERY_VECTOR_CACHE_TTL_SECONDS", 3600
+        )
+        # Packing of retrieved chunks into the answering prompt
+        self.CONTEXT_PACKING_ENABLED = self.get_env_var_bool(
+            "CONTEXT_PACKING_ENABLED", "True"
+        )
+        self.CONTEXT_PACKING_TOKEN_BUDGET = self.get_env_var_int(
+            "CONTEXT_PACKING_TOKEN_BUDGET", 3000
+        )
+        self.CONTEXT_PACKING_SIMILARITY_THRESHOLD = self.get_env_var_float(
+            "CONTEXT_PACKING_SIMILARITY_THRESHOLD", 0.8
+        )
+        # Token budget for the previous turns forwarded to the model
+        self.CHAT_HISTORY_TOKEN_BUDGET = self.get_env_var_int(
+            "CHAT_HISTORY_TOKEN_BUDGET", 4000
+        )
+        # Rolling summary of the older turns of stored conversations
+        self.CHAT_HISTORY_SUMMARY_TOKEN_THRESHOLD = self.get_env_var_int(
+            "CHAT_HISTORY_SUMMARY_TOKEN_THRESHOLD", 2000
+        )
+        self.CHAT_HISTORY_SUMMARY_RECENT_MESSAGES = self.get_env_var_int(
+            "CHAT_HISTORY_SUMMARY_RECENT_MESSAGES", 6
+        )
+        # Titles of new conversations generated in the background
+        self.CHAT_HISTORY_TITLE_BATCH_SIZE = self.get_env_var_int(
+            "CHAT_HISTORY_TITLE_BATCH_SIZE", 8
+        )
+        # Run the async views on one process-wide event loop
+        self.SHARED_EVENT_LOOP_ENABLED = self.get_env_var_bool(
+            "SHARED_EVENT_LOOP_ENABLED", "False"
+        )
+        self.ASGI_WORKER_THREADS = self.get_env_var_int("ASGI_WORKER_THREADS", 32)
+        # Streaming of the custom conversation flow
+        self.CUSTOM_FLOW_STREAMING_ENABLED = self.get_env_var_bool(
+            "CUSTOM_FLOW_STREAMING_ENABLED", "False"
+        )
+        self.STREAMING_SAFETY_WINDOW_CHARACTERS = self.get_env_var_int(
+            "STREAMING_SAFETY_WINDOW_CHARACTERS", 400
+        )
+        # Content safety screening
+        self.CONTENT_SAFETY_MAX_SEGMENT_CHARACTERS = self.get_env_var_int(
+            "CONTENT_SAFETY_MAX_SEGMENT_CHARACTERS", 10000
+        )
+        self.CONTENT_SAFETY_CACHE_TTL_SECONDS = self.get_env_var_int(
+            "CONTENT_SAFETY_CACHE_TTL_SECONDS", 3600
+        )
+        # Background logging of the user interactions
+        self.CONVERSATION_LOG_BATCH_SIZE = self.get_env_var_int(
+            "CONVERSATION_LOG_BATCH_SIZE", 16
+        )
+        self.CONVERSATION_LOG_FLUSH_INTERVAL_SECONDS = self.get_env_var_float(
+            "CONVERSATION_LOG_FLUSH_INTERVAL_SECONDS", 2.0
+        )
+        self.CONVERSATION_LOG_QUEUE_SIZE = self.get_env_var_int(
+            "CONVERSATION_LOG_QUEUE_SIZE", 1000
+        )
+        # Post answering validation
+        self.POST_ANSWERING_SOURCE_TOKENS = self.get_env_var_int(
+            "POST_ANSWERING_SOURCE_TOKENS", 0
+        )
+        self.POST_ANSWERING_CONCURRENT = self.get_env_var_bool(
+            "POST_ANSWERING_CONCURRENT", "False"
+        )
+        # Whole specification reviews
+        self.SPEC_REVIEW_CONTAINER_NAME = os.getenv(
+            "SPEC_REVIEW_CONTAINER_NAME", "spec-reviews"
+        )
+        self.SPEC_REVIEW_MAX_SECTIONS = self.get_env_var_int(
+            "SPEC_REVIEW_MAX_SECTIONS", 300
+        )
+        self.SPEC_REVIEW_MAX_CONCURRENCY = self.get_env_var_int(
+            "SPEC_REVIEW_MAX_CONCURRENCY", 8
+        )
+        self.SPEC_REVIEW_REQUESTS_PER_MINUTE = self.get_env_var_int(
+            "SPEC_REVIEW_REQUESTS_PER_MINUTE", 120
+        )
+        # Admission control of the conversation, history and review endpoints
+        self.ADMISSION_CONTROL_ENABLED = self.get_env_var_bool(
+            "ADMISSION_CONTROL_ENABLED", "False"
+        )
+        self.ADMISSION_MAX_IN_FLIGHT = self.get_env_var_int(
+            "ADMISSION_MAX_IN_FLIGHT", 24
+        )
+        self.ADMISSION_QUEUE_SIZE = self.get_env_var_int("ADMISSION_QUEUE_SIZE", 8)
+        self.ADMISSION_QUEUE_TIMEOUT_SECONDS = self.get_env_var_float(
+            "ADMISSION_QUEUE_TIMEOUT_SECONDS", 10.0
+        )
+        self.ADMISSION_USER_REQUESTS_PER_MINUTE = self.get_env_var_int(
+            "ADMISSION_USER_REQUESTS_PER_MINUTE", 30
+        )
+        self.ADMISSION_USER_BURST = self.get_env_var_int("ADMISSION_USER_BURST", 10)
+        # PostgreSQL connection pool
+        self.POSTGRESQL_POOL_MIN_SIZE = self.get_env_var_int(
+            "POSTGRESQL_POOL_MIN_SIZE", 1
+        )
+        self.POSTGRESQL_POOL_MAX_SIZE = self.get_env_var_int(
+            "POSTGRESQL_POOL_MAX_SIZE", 10
+        )
+        self.POSTGRESQL_POOL_HEALTH_CHECK_SECONDS = self.get_env_var_float(
+            "POSTGRESQL_POOL_HEALTH_CHECK_SECONDS", 30.0
+        )
+        self.POSTGRESQL_STATEMENT_TIMEOUT_SECONDS = self.get_env_var_float(
+            "POSTGRESQL_STATEMENT_TIMEOUT_SECONDS", 10.0
+        )
         # Integrated Vectorization
         self.AZURE_SEARCH_DATASOURCE_NAME = os.getenv(
             "AZURE_SEARCH_DATASOURCE_NAME", ""
@@ -148,6 +257,29 @@ class EnvHelper:
             self.AZURE_POSTGRES_SEARCH_TOP_K = self.get_env_var_int(
                 "AZURE_POSTGRES_SEARCH_TOP_K", 5
             )
+            self.AZURE_POSTGRES_HYBRID_SEARCH = self.get_env_var_bool(
+                "AZURE_POSTGRES_HYBRID_SEARCH", "False"
+            )
+            self.AZURE_POSTGRES_HYBRID_CANDIDATES = self.get_env_var_int(
+                "AZURE_POSTGRES_HYBRID_CANDIDATES", 50
+            )
+            self.AZURE_POSTGRES_RRF_K = self.get_env_var_int("AZURE_POSTGRES_RRF_K", 60)
+            self.AZURE_POSTGRES_HNSW_M = self.get_env_var_int("AZURE_POSTGRES_HNSW_M", 16)
+            self.AZURE_POSTGRES_HNSW_EF_CONSTRUCTION = self.get_env_var_int(
+                "AZURE_POSTGRES_HNSW_EF_CONSTRUCTION", 64
+            )
+            self.AZURE_POSTGRES_HNSW_EF_SEARCH = self.get_env_var_int(
+                "AZURE_POSTGRES_HNSW_EF_SEARCH", 40
+            )
+            self.AZURE_POSTGRES_HNSW_ITERATIVE_SCAN = os.getenv(
+                "AZURE_POSTGRES_HNSW_ITERATIVE_SCAN", "off"
+            )
+            self.AZURE_POSTGRES_VECTOR_STORAGE = os.getenv(
+                "AZURE_POSTGRES_VECTOR_STORAGE", "vector"
+            ).lower()
+            self.AZURE_POSTGRES_RERANK_FACTOR = self.get_env_var_int(
+                "AZURE_POSTGRES_RERANK_FACTOR", 4
+            )
             azure_postgresql_info = self.get_info_from_env("AZURE_POSTGRESQL_INFO", "")
             if azure_postgresql_info:
                 self.POSTGRESQL_USER = azure_postgresql_info.get("user", "")
@@ -355,6 +487,9 @@ class EnvHelper:
         self.LOAD_CONFIG_FROM_BLOB_STORAGE = self.get_env_var_bool(
             "LOAD_CONFIG_FROM_BLOB_STORAGE"
         )
+        self.CONFIG_CACHE_TTL_SECONDS = self.get_env_var_float(
+            "CONFIG_CACHE_TTL_SECONDS", 60
+        )
 
         self.AZURE_ML_WORKSPACE_NAME = os.getenv("AZURE_ML_WORKSPACE_NAME", "")
 
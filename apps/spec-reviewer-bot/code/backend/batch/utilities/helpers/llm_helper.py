@@ -1,6 +1,7 @@
 import logging
-from openai import AzureOpenAI
-from typing import List, Union, cast
+import time
+from openai import DEFAULT_MAX_RETRIES, AzureOpenAI
+from typing import List, Optional, Union, cast
 from langchain_openai import AzureChatOpenAI, AzureOpenAIEmbeddings
 from langchain.callbacks.streaming_stdout import StreamingStdOutCallbackHandler
 from semantic_kernel.connectors.ai.open_ai import AzureChatCompletion
@@ -9,13 +10,15 @@ from semantic_kernel.connectors.ai.open_ai.prompt_execution_settings.azure_chat_
 )
 from azure.ai.ml import MLClient
 from .azure_credential_utils import get_azure_credential
+from .config.config_helper import ConfigHelper
+from .config.llm_call_site import LLMCallSite
 from .env_helper import EnvHelper
 
 logger = logging.getLogger(__name__)
 
 
 class LLMHelper:
-    def __init__(self):
+    def __init__(self, max_retries: int = DEFAULT_MAX_RETRIES):
         logger.info("Initializing LLMHelper")
         self.env_helper: EnvHelper = EnvHelper()
         self.auth_type_keys = self.env_helper.is_auth_type_keys()
@@ -26,12 +29,14 @@ class LLMHelper:
                 azure_endpoint=self.env_helper.AZURE_OPENAI_ENDPOINT,
                 api_version=self.env_helper.AZURE_OPENAI_API_VERSION,
                 api_key=self.env_helper.OPENAI_API_KEY,
+                max_retries=max_retries,
             )
         else:
             self.openai_client = AzureOpenAI(
                 azure_endpoint=self.env_helper.AZURE_OPENAI_ENDPOINT,
                 api_version=self.env_helper.AZURE_OPENAI_API_VERSION,
                 azure_ad_token_provider=self.token_provider,
+                max_retries=max_retries,
             )
 
         self.llm_model = self.env_helper.AZURE_OPENAI_MODEL
@@ -115,31 +120,74 @@ class LLMHelper:
             .embedding
         )
 
+    def get_routed_model(self, call_site: Optional[LLMCallSite]) -> str | None:
+        """Returns the deployment configured for the call site in the model routing table, if any."""
+        if call_site is None:
+            return None
+        return ConfigHelper.get_active_config_or_default().model_routing.get_deployment(
+            call_site
+        )
+
+    @staticmethod
+    def log_call_metrics(
+        call_site: Optional[LLMCallSite], model: str, started_at: float, response
+    ):
+        usage = getattr(response, "usage", None)
+        custom_dimensions = {
+            "call_site": call_site.value if call_site else "default",
+            "model": model,
+            "latency_ms": round((time.perf_counter() - started_at) * 1000),
+            "prompt_tokens": getattr(usage, "prompt_tokens", None),
+            "completion_tokens": getattr(usage, "completion_tokens", None),
+        }
+        logger.info("LLM Call", extra=custom_dimensions)
+
     def get_chat_completion_with_functions(
-        self, messages: list[dict], functions: list[dict], function_call: str = "auto"
+        self,
+        messages: list[dict],
+        functions: list[dict],
+        function_call: str = "auto",
+        call_site: Optional[LLMCallSite] = None,
     ):
-        return self.openai_client.chat.completions.create(
-            model=self.llm_model,
+        model = self.get_routed_model(call_site) or self.llm_model
+        started_at = time.perf_counter()
+        response = self.openai_client.chat.completions.create(
+            model=model,
             messages=messages,
             functions=functions,
             function_call=function_call,
         )
+        self.log_call_metrics(call_site, model, started_at, response)
+        return response
 
     def get_chat_completion(
-        self, messages: list[dict], model: str | None = None, **kwargs
+        self,
+        messages: list[dict],
+        model: str | None = None,
+        call_site: Optional[LLMCallSite] = None,
+        **kwargs
     ):
-        return self.openai_client.chat.completions.create(
-            model=model or self.llm_model,
+        # A model the caller needs, such as the vision model for images, takes
+        # precedence over the deployment routed for the call site
+        model = model or self.get_routed_model(call_site) or self.llm_model
+        started_at = time.perf_counter()
+        response = self.openai_client.chat.completions.create(
+            model=model,
             messages=messages,
             max_tokens=self.llm_max_tokens,
             **kwargs
         )
+        self.log_call_metrics(call_site, model, started_at, response)
+        return response
 
-    def get_sk_chat_completion_service(self, service_id: str):
+    def get_sk_chat_completion_service(
+        self, service_id: str, call_site: Optional[LLMCallSite] = None
+    ):
+        deployment_name = self.get_routed_model(call_site) or self.llm_model
         if self.auth_type_keys:
             return AzureChatCompletion(
                 service_id=service_id,
-                deployment_name=self.llm_model,
+                deployment_name=deployment_name,
                 endpoint=self.env_helper.AZURE_OPENAI_ENDPOINT,
                 api_version=self.env_helper.AZURE_OPENAI_API_VERSION,
                 api_key=self.env_helper.OPENAI_API_KEY,
@@ -147,7 +195,7 @@ class LLMHelper:
         else:
             return AzureChatCompletion(
                 service_id=service_id,
-                deployment_name=self.llm_model,
+                deployment_name=deployment_name,
                 endpoint=self.env_helper.AZURE_OPENAI_ENDPOINT,
                 api_version=self.env_helper.AZURE_OPENAI_API_VERSION,
                 ad_token_provider=self.token_provider,
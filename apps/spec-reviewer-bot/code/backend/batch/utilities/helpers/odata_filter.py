@@ -0,0 +1,187 @@
+import re
+from typing import Any, List, Tuple
+
+# The vector_store columns a filter can refer to, any other field is looked up in the metadata
+VECTOR_STORE_COLUMNS = {
+    "id": "id",
+    "title": "title",
+    "chunk": "chunk",
+    "chunk_id": "chunk_id",
+    "offset": '"offset"',
+    "page_number": "page_number",
+    "content": "content",
+    "source": "source",
+}
+
+COMPARISON_OPERATORS = {
+    "eq": "=",
+    "ne": "<>",
+    "gt": ">",
+    "ge": ">=",
+    "lt": "<",
+    "le": "<=",
+}
+
+_TOKEN = re.compile(
+    r"\s*(?:(?P<string>'(?:[^']|'')*')|(?P<number>-?\d+(?:\.\d+)?)|(?P<name>[A-Za-z_][\w./]*)|(?P<punctuation>[(),]))"
+)
+
+
+class ODataFilterError(ValueError):
+    pass
+
+
+def odata_to_sql(filter_expression: str) -> Tuple[str, List[Any]]:
+    """
+    Translates an Azure AI Search OData filter, as set in AZURE_SEARCH_FILTER, into a
+    condition on the vector_store table and its parameters.
+
+    Supports the comparison operators, and, or, not, parentheses, null and the
+    search.in function. Fields other than the vector_store columns are read from the
+    metadata JSON, with / separating the keys of nested fields.
+    """
+    if not filter_expression or not filter_expression.strip():
+        return "TRUE", []
+    return _Parser(_tokenize(filter_expression)).parse()
+
+
+def _tokenize(filter_expression: str) -> List[Tuple[str, str]]:
+    tokens = []
+    position = 0
+    filter_expression = filter_expression.rstrip()
+    while position < len(filter_expression):
+        match = _TOKEN.match(filter_expression, position)
+        if not match:
+            raise ODataFilterError(
+                f"Unsupported filter syntax at: {filter_expression[position:]}"
+            )
+        kind = match.lastgroup
+        tokens.append((kind, match.group(kind)))
+        position = match.end()
+    return tokens
+
+
+class _Parser:
+    def __init__(self, tokens: List[Tuple[str, str]]):
+        self.tokens = tokens
+        self.position = 0
+        self.params: List[Any] = []
+
+    def parse(self) -> Tuple[str, List[Any]]:
+        condition = self._or()
+        if self.position != len(self.tokens):
+            raise ODataFilterError(f"Unexpected '{self.tokens[self.position][1]}'")
+        return condition, self.params
+
+    def _peek(self, offset: int = 0) -> Tuple[str, str]:
+        if self.position + offset < len(self.tokens):
+            return self.tokens[self.position + offset]
+        return ("end", "")
+
+    def _next(self) -> Tuple[str, str]:
+        token = self._peek()
+        if token[0] == "end":
+            raise ODataFilterError("Unexpected end of filter")
+        self.position += 1
+        return token
+
+    def _expect(self, value: str) -> None:
+        token = self._next()
+        if token[1] != value:
+            raise ODataFilterError(f"Expected '{value}' instead of '{token[1]}'")
+
+    def _is_keyword(self, keyword: str) -> bool:
+        kind, value = self._peek()
+        return kind == "name" and value.lower() == keyword
+
+    def _or(self) -> str:
+        conditions = [self._and()]
+        while self._is_keyword("or"):
+            self.position += 1
+            conditions.append(self._and())
+        return conditions[0] if len(conditions) == 1 else f"({' OR '.join(conditions)})"
+
+    def _and(self) -> str:
+        conditions = [self._unary()]
+        while self._is_keyword("and"):
+            self.position += 1
+            conditions.append(self._unary())
+        return conditions[0] if len(conditions) == 1 else f"({' AND '.join(conditions)})"
+
+    def _unary(self) -> str:
+        if self._is_keyword("not"):
+            self.position += 1
+            return f"(NOT {self._unary()})"
+        if self._peek()[1] == "(":
+            self.position += 1
+            condition = self._or()
+            self._expect(")")
+            return condition
+        if self._is_keyword("search.in"):
+            return self._search_in()
+        return self._comparison()
+
+    def _search_in(self) -> str:
+        self.position += 1
+        self._expect("(")
+        field = self._field()
+        self._expect(",")
+        values = self._string()
+        delimiters = " ,"
+        if self._peek()[1] == ",":
+            self.position += 1
+            delimiters = self._string()
+        self._expect(")")
+        split = "|".join(re.escape(delimiter) for delimiter in delimiters)
+        self.params.append([value for value in re.split(split, values) if value])
+        return f"{field} = ANY(%s)"
+
+    def _comparison(self) -> str:
+        field_name = self._next()
+        if field_name[0] != "name":
+            raise ODataFilterError(f"Expected a field instead of '{field_name[1]}'")
+        operator = self._next()[1].lower()
+        if operator not in COMPARISON_OPERATORS:
+            raise ODataFilterError(f"Unsupported operator '{operator}'")
+
+        kind, value = self._next()
+        if kind == "name" and value.lower() == "null":
+            column = self._column(field_name[1])
+            if operator == "eq":
+                return f"{column} IS NULL"
+            if operator == "ne":
+                return f"{column} IS NOT NULL"
+            raise ODataFilterError(f"Cannot compare with null using '{operator}'")
+
+        if kind == "string":
+            column = self._column(field_name[1])
+            literal: Any = value[1:-1].replace("''", "'")
+        elif kind == "number":
+            column = self._column(field_name[1], numeric=True)
+            literal = float(value) if "." in value else int(value)
+        elif kind == "name" and value.lower() in ("true", "false"):
+            column = self._column(field_name[1])
+            literal = value.lower()
+        else:
+            raise ODataFilterError(f"Unsupported value '{value}'")
+        self.params.append(literal)
+        return f"{column} {COMPARISON_OPERATORS[operator]} %s"
+
+    def _field(self) -> str:
+        kind, value = self._next()
+        if kind != "name":
+            raise ODataFilterError(f"Expected a field instead of '{value}'")
+        return self._column(value)
+
+    def _string(self) -> str:
+        kind, value = self._next()
+        if kind != "string":
+            raise ODataFilterError(f"Expected a string instead of '{value}'")
+        return value[1:-1].replace("''", "'")
+
+    def _column(self, field: str, numeric: bool = False) -> str:
+        if field in VECTOR_STORE_COLUMNS:
+            return VECTOR_STORE_COLUMNS[field]
+        self.params.append(field.split("/"))
+        column = "(metadata::jsonb #>> %s)"
+        return f"{column}::numeric" if numeric else column
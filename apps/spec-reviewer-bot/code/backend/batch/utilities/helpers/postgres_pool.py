@@ -0,0 +1,227 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+import psycopg2
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+from psycopg2.pool import ThreadedConnectionPool
+
+from .azure_credential_utils import get_azure_credential
+from .env_helper import EnvHelper
+
+logger = logging.getLogger(__name__)
+
+POSTGRES_TOKEN_SCOPE = "https://ossrdbms-aad.database.windows.net/.default"
+
+
+class PostgresTokenProvider:
+    """
+    Provides the Entra ID token used as the PostgreSQL password.
+
+    The token is cached and refreshed TOKEN_REFRESH_MARGIN_SECONDS before it
+    expires, so that opening a connection does not pay for a token acquisition.
+    Connections already open are not affected by the expiry of their token.
+    """
+
+    TOKEN_REFRESH_MARGIN_SECONDS = 300
+
+    _instances: dict[Optional[str], "PostgresTokenProvider"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, managed_identity_client_id: Optional[str]):
+        self.managed_identity_client_id = managed_identity_client_id
+        self._credential = None
+        self._token = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, managed_identity_client_id: Optional[str]) -> "PostgresTokenProvider":
+        with cls._instances_lock:
+            if managed_identity_client_id not in cls._instances:
+                cls._instances[managed_identity_client_id] = cls(
+                    managed_identity_client_id
+                )
+            return cls._instances[managed_identity_client_id]
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._instances_lock:
+            cls._instances.clear()
+
+    def get_token(self) -> str:
+        with self._lock:
+            if (
+                self._token is None
+                or self._token.expires_on - time.time()
+                < self.TOKEN_REFRESH_MARGIN_SECONDS
+            ):
+                if self._credential is None:
+                    self._credential = get_azure_credential(
+                        self.managed_identity_client_id
+                    )
+                self._token = self._credential.get_token(POSTGRES_TOKEN_SCOPE)
+                logger.info("Acquired a new PostgreSQL access token")
+            return self._token.token
+
+
+class PostgresConnectionPool(ThreadedConnectionPool):
+    """
+    A process-wide pool of psycopg2 connections to Azure PostgreSQL.
+
+    New connections log in with the token of the PostgresTokenProvider. connection()
+    waits while all POSTGRESQL_POOL_MAX_SIZE connections are in use. A connection
+    idle for longer than POSTGRESQL_POOL_HEALTH_CHECK_SECONDS is checked with a round
+    trip before it is handed out, and broken connections are discarded. Connections
+    are rolled back when they are returned, so that none stays idle in a transaction.
+    """
+
+    _instances: dict[tuple[str, str, str], "PostgresConnectionPool"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(
+        self,
+        host: str,
+        user: str,
+        dbname: str,
+        token_provider: PostgresTokenProvider,
+        min_size: int,
+        max_size: int,
+        health_check_after: float,
+    ):
+        self.host = host
+        self.user = user
+        self.dbname = dbname
+        self.token_provider = token_provider
+        self.health_check_after = health_check_after
+        self.metrics = {
+            "opened": 0,
+            "discarded": 0,
+            "checkouts": 0,
+            "health_checks": 0,
+            "wait_ms": 0,
+            "max_wait_ms": 0,
+        }
+        # The pool's own lock is held while it opens connections, so the metrics have their own
+        self._metrics_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._idle_since: dict[int, float] = {}
+        super().__init__(min(min_size, max_size), max_size)
+        # psycopg2 closes the connections returned while minconn are idle, keep them all instead
+        self.minconn = max_size
+
+    @classmethod
+    def shared(cls, host: str, user: str, dbname: str) -> "PostgresConnectionPool":
+        key = (host, user, dbname)
+        with cls._instances_lock:
+            if key not in cls._instances:
+                env_helper = EnvHelper()
+                cls._instances[key] = cls(
+                    host,
+                    user,
+                    dbname,
+                    PostgresTokenProvider.shared(
+                        env_helper.MANAGED_IDENTITY_CLIENT_ID
+                    ),
+                    env_helper.POSTGRESQL_POOL_MIN_SIZE,
+                    max(1, env_helper.POSTGRESQL_POOL_MAX_SIZE),
+                    env_helper.POSTGRESQL_POOL_HEALTH_CHECK_SECONDS,
+                )
+            return cls._instances[key]
+
+    @classmethod
+    def close_all(cls) -> None:
+        with cls._instances_lock:
+            for pool in cls._instances.values():
+                pool.closeall()
+            cls._instances.clear()
+
+    def _connect(self, key=None):
+        # Called for every new connection, so pooled connections never log in with an expired token
+        self._args = (
+            f"host={self.host} user={self.user} dbname={self.dbname} password={self.token_provider.get_token()} sslmode=require",
+        )
+        self._kwargs = {}
+        connection = super()._connect(key)
+        self._count("opened")
+        self._log("opened")
+        return connection
+
+    @contextmanager
+    def connection(self) -> Iterator:
+        started_at = time.monotonic()
+        self._slots.acquire()
+        try:
+            connection = self._checkout()
+            self._record_wait(time.monotonic() - started_at)
+            try:
+                yield connection
+            finally:
+                self._return(connection)
+        finally:
+            self._slots.release()
+
+    def stats(self) -> dict:
+        with self._metrics_lock:
+            return {
+                **self.metrics,
+                "in_use": len(self._used),
+                "idle": len(self._pool),
+            }
+
+    def _checkout(self):
+        while True:
+            connection = self.getconn()
+            idle_since = self._idle_since.pop(id(connection), None)
+            if connection.closed != 0:
+                self._discard(connection)
+                continue
+            if (
+                idle_since is not None
+                and time.monotonic() - idle_since > self.health_check_after
+            ):
+                self._count("health_checks")
+                try:
+                    with connection.cursor() as cursor:
+                        cursor.execute("SELECT 1")
+                    connection.rollback()
+                except psycopg2.Error:
+                    logger.warning("Discarding a broken PostgreSQL connection")
+                    self._discard(connection)
+                    continue
+            self._count("checkouts")
+            return connection
+
+    def _return(self, connection) -> None:
+        if connection.closed == 0:
+            try:
+                if connection.info.transaction_status != TRANSACTION_STATUS_IDLE:
+                    connection.rollback()
+            except psycopg2.Error:
+                self._discard(connection)
+                return
+            self._idle_since[id(connection)] = time.monotonic()
+            self.putconn(connection)
+        else:
+            self._discard(connection)
+
+    def _discard(self, connection) -> None:
+        self._idle_since.pop(id(connection), None)
+        self.putconn(connection, close=True)
+        self._count("discarded")
+        self._log("discarded")
+
+    def _record_wait(self, wait_seconds: float) -> None:
+        wait_ms = round(wait_seconds * 1000)
+        with self._metrics_lock:
+            self.metrics["wait_ms"] += wait_ms
+            self.metrics["max_wait_ms"] = max(self.metrics["max_wait_ms"], wait_ms)
+
+    def _count(self, metric: str) -> None:
+        with self._metrics_lock:
+            self.metrics[metric] += 1
+
+    def _log(self, event: str) -> None:
+        custom_dimensions = {"event": event, "host": self.host, **self.stats()}
+        logger.info("PostgreSQL Pool", extra=custom_dimensions)
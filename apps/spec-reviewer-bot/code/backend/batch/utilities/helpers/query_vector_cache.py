@@ -0,0 +1,86 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from .env_helper import EnvHelper
+
+logger = logging.getLogger(__name__)
+
+
+class QueryVectorCache:
+    """
+    Process-wide, thread-safe LRU cache with a TTL for query vectors.
+
+    Entries are keyed by the vectorization model and the whitespace-normalized
+    query text, so repeated and follow-up questions can skip the embedding call.
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __init__(self, max_size: int, ttl_seconds: float) -> None:
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[tuple[str, str], tuple[float, list[float]]] = (
+            OrderedDict()
+        )
+        self._entries_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls) -> "QueryVectorCache":
+        with cls._lock:
+            if cls._instance is None:
+                env_helper = EnvHelper()
+                cls._instance = cls(
+                    max_size=env_helper.QUERY_VECTOR_CACHE_MAX_SIZE,
+                    ttl_seconds=env_helper.QUERY_VECTOR_CACHE_TTL_SECONDS,
+                )
+            return cls._instance
+
+    @classmethod
+    def clear_instance(cls):
+        if cls._instance is not None:
+            cls._instance = None
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return " ".join(text.split())
+
+    def get(self, model: str, text: str) -> Optional[list[float]]:
+        if self.max_size <= 0:
+            return None
+
+        key = (str(model), self.normalize(text))
+        with self._entries_lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, vector = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return vector
+
+    def put(self, model: str, text: str, vector: list[float]) -> None:
+        if self.max_size <= 0:
+            return
+
+        key = (str(model), self.normalize(text))
+        with self._entries_lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, vector)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._entries_lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._entries_lock:
+            return len(self._entries)
@@ -0,0 +1,81 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from openai import RateLimitError
+
+logger = logging.getLogger(__name__)
+
+
+class RateGovernor:
+    """
+    Paces the Azure OpenAI calls of bulk jobs so that they stay within the quota.
+
+    At most max_concurrency calls run at once and at most requests_per_minute start
+    every minute. A call rejected with 429 is retried after the delay the service
+    asks for, and the other callers of the governor hold off for that delay too
+    instead of piling more rejected calls onto the deployment.
+    """
+
+    _instances: dict[str, "RateGovernor"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(
+        self, max_concurrency: int, requests_per_minute: int, max_retries: int = 3
+    ):
+        self.max_retries = max_retries
+        self._slots = threading.BoundedSemaphore(max(1, max_concurrency))
+        self._interval = 60 / requests_per_minute if requests_per_minute > 0 else 0.0
+        self._next_start = 0.0
+        self._resume_at = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(
+        cls, name: str, max_concurrency: int, requests_per_minute: int
+    ) -> "RateGovernor":
+        """Returns the governor registered under the name, so that its limits apply process-wide."""
+        with cls._instances_lock:
+            if name not in cls._instances:
+                cls._instances[name] = cls(max_concurrency, requests_per_minute)
+            return cls._instances[name]
+
+    def call(self, function: Callable[..., Any], *args, **kwargs) -> Any:
+        for attempt in range(self.max_retries + 1):
+            with self._slots:
+                self._wait_turn()
+                try:
+                    return function(*args, **kwargs)
+                except RateLimitError as e:
+                    if attempt == self.max_retries:
+                        raise
+                    delay = self._retry_after(e, attempt)
+                    logger.warning(
+                        f"Rate limited, holding off for {delay:.1f}s (attempt {attempt + 1})"
+                    )
+                    with self._lock:
+                        self._resume_at = max(
+                            self._resume_at, time.monotonic() + delay
+                        )
+
+    def _wait_turn(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start, self._resume_at)
+            self._next_start = start + self._interval
+        if start > now:
+            time.sleep(start - now)
+
+    @staticmethod
+    def _retry_after(error: RateLimitError, attempt: int) -> float:
+        headers = getattr(getattr(error, "response", None), "headers", None) or {}
+        retry_after: Optional[float] = None
+        try:
+            if "retry-after-ms" in headers:
+                retry_after = float(headers["retry-after-ms"]) / 1000
+            elif "retry-after" in headers:
+                retry_after = float(headers["retry-after"])
+        except ValueError:
+            pass
+        return retry_after if retry_after is not None else float(2**attempt)
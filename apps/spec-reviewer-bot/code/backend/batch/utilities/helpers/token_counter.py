@@ -0,0 +1,49 @@
+import functools
+import logging
+from typing import Optional
+
+import tiktoken
+
+DEFAULT_ENCODING_NAME = "cl100k_base"
+TOKENS_PER_MESSAGE = 3
+logger = logging.getLogger(__name__)
+
+
+@functools.cache
+def get_encoding(model_name: Optional[str] = None) -> tiktoken.Encoding:
+    """
+    Returns the tiktoken encoding for the given model, falling back to
+    cl100k_base when the model is unknown to tiktoken.
+    """
+    if model_name:
+        try:
+            return tiktoken.encoding_for_model(model_name)
+        except KeyError:
+            logger.debug(
+                f"No tiktoken encoding registered for model {model_name}, using {DEFAULT_ENCODING_NAME}"
+            )
+    return tiktoken.get_encoding(DEFAULT_ENCODING_NAME)
+
+
+def count_tokens(text: str, model_name: Optional[str] = None) -> int:
+    return len(get_encoding(model_name).encode(text or ""))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model_name: Optional[str] = None):
+    encoding = get_encoding(model_name)
+    tokens = encoding.encode(text or "")
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
+
+
+def count_message_tokens(message: dict, model_name: Optional[str] = None) -> int:
+    # Every message carries a few tokens of framing on top of its role and content
+    content = message.get("content") or ""
+    if not isinstance(content, str):
+        content = str(content)
+    return (
+        TOKENS_PER_MESSAGE
+        + count_tokens(message.get("role", ""), model_name)
+        + count_tokens(content, model_name)
+    )
@@ -1,11 +1,44 @@
-from ..helpers.azure_search_helper import AzureSearchHelper
+import atexit
+import logging
+import queue
+import threading
+import time
 from datetime import datetime
 import json
 
+from ..helpers.azure_search_helper import AzureSearchHelper
+from ..helpers.env_helper import EnvHelper
+
+logger = logging.getLogger(__name__)
+
 
 class ConversationLogger:
+    """
+    Logs the user interactions to the conversation index off the request path.
+
+    log only queues the messages. A worker thread embeds and indexes them in
+    batches of CONVERSATION_LOG_BATCH_SIZE, or every
+    CONVERSATION_LOG_FLUSH_INTERVAL_SECONDS when fewer are waiting. When the queue
+    is full the messages are dropped and counted instead of slowing down the
+    answers. The queued messages are written when the process exits.
+    """
+
     def __init__(self):
-        self.logger = AzureSearchHelper().get_conversation_logger()
+        env_helper = EnvHelper()
+        self.batch_size = max(1, env_helper.CONVERSATION_LOG_BATCH_SIZE)
+        self.flush_interval = env_helper.CONVERSATION_LOG_FLUSH_INTERVAL_SECONDS
+        self.metrics = {"queued": 0, "indexed": 0, "dropped": 0, "failed": 0}
+        self._metrics_lock = threading.Lock()
+        self._queue: queue.Queue = queue.Queue(
+            maxsize=env_helper.CONVERSATION_LOG_QUEUE_SIZE
+        )
+        self._vector_store = None
+        self._stopped = False
+        self._worker = threading.Thread(
+            target=self._run, name="conversation-logger", daemon=True
+        )
+        self._worker.start()
+        atexit.register(self.close)
 
     def log(self, messages: list):
         self.log_user_message(messages)
@@ -21,7 +54,7 @@ class ConversationLogger:
                 metadata["created_at"] = datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ")
                 metadata["updated_at"] = datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ")
                 text = message["content"]
-        self.logger.add_texts(texts=[text], metadatas=[metadata])
+        self._enqueue(text, metadata)
 
     def log_assistant_message(self, messages: dict):
         text = ""
@@ -43,4 +76,90 @@ class ConversationLogger:
                     source["id"]
                     for source in json.loads(message["content"]).get("citations", [])
                 ]
-        self.logger.add_texts(texts=[text], metadatas=[metadata])
+        self._enqueue(text, metadata)
+
+    def flush(self, timeout: float = 10) -> bool:
+        """Waits until the messages queued so far are written, returns False on timeout."""
+        flushed = threading.Event()
+        try:
+            self._queue.put(flushed, timeout=timeout)
+        except queue.Full:
+            return False
+        return flushed.wait(timeout)
+
+    def close(self, timeout: float = 10) -> None:
+        if self._stopped:
+            return
+        self._stopped = True
+        if not self.flush(timeout):
+            logger.warning(
+                f"Conversation logger closed with {self._queue.qsize()} messages not written"
+            )
+        self._worker.join(timeout)
+
+    def _enqueue(self, text: str, metadata: dict) -> None:
+        if self._stopped:
+            self._count("dropped")
+            return
+        try:
+            self._queue.put_nowait((text, metadata))
+            self._count("queued")
+        except queue.Full:
+            self._count("dropped")
+            logger.warning("Conversation logger queue is full, dropping the message")
+
+    def _count(self, metric: str, value: int = 1) -> None:
+        with self._metrics_lock:
+            self.metrics[metric] += value
+
+    def _run(self) -> None:
+        batch: list[tuple[str, dict]] = []
+        deadline = 0.0
+        while True:
+            timeout = max(0.0, deadline - time.monotonic()) if batch else None
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if isinstance(item, threading.Event):
+                self._write(batch)
+                batch = []
+                item.set()
+                if self._stopped:
+                    return
+                continue
+
+            if item is not None:
+                if not batch:
+                    deadline = time.monotonic() + self.flush_interval
+                batch.append(item)
+
+            if len(batch) >= self.batch_size or (
+                batch and time.monotonic() >= deadline
+            ):
+                self._write(batch)
+                batch = []
+
+    def _write(self, batch: list[tuple[str, dict]]) -> None:
+        if not batch:
+            return
+
+        texts = [text for text, _ in batch]
+        metadatas = [metadata for _, metadata in batch]
+        try:
+            if self._vector_store is None:
+                self._vector_store = AzureSearchHelper().get_conversation_logger()
+            self._vector_store.add_texts(texts=texts, metadatas=metadatas)
+            self._count("indexed", len(batch))
+        except Exception:
+            logger.exception(f"Failed to log {len(batch)} conversation messages")
+            self._count("failed", len(batch))
+
+        with self._metrics_lock:
+            custom_dimensions = {
+                **self.metrics,
+                "batch_size": len(batch),
+                "queue_depth": self._queue.qsize(),
+            }
+        logger.info("Conversation Logger", extra=custom_dimensions)
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from typing import List
 from langchain.agents import Tool
@@ -21,7 +22,8 @@ class LangChainAgent(OrchestratorBase):
         super().__init__()
         self.question_answer_tool = QuestionAnswerTool()
         self.text_processing_tool = TextProcessingTool()
-        self.llm_helper = LLMHelper()
+        self.llm_helper: LLMHelper = self.shared_resource("llm_helper", LLMHelper)
+        self.llm = self.shared_resource("langchain_llm", self.llm_helper.get_llm)
 
         self.tools = [
             Tool(
@@ -55,7 +57,10 @@ class LangChainAgent(OrchestratorBase):
     async def orchestrate(
         self, user_message: str, chat_history: List[dict], **kwargs: dict
     ) -> list[dict]:
+        # The agent and its tools call the services synchronously, off the event loop
+        return await asyncio.to_thread(self._orchestrate, user_message, chat_history)
 
+    def _orchestrate(self, user_message: str, chat_history: List[dict]) -> list[dict]:
         logger.info("Method orchestrate of lang_chain_agent started")
         # Call Content Safety tool
         if self.config.prompts.enable_content_safety:
@@ -85,7 +90,7 @@ class LangChainAgent(OrchestratorBase):
             elif message["role"] == "assistant":
                 memory.chat_memory.add_ai_message(message["content"])
         # Define Agent and Agent Chain
-        llm_chain = LLMChain(llm=self.llm_helper.get_llm(), prompt=prompt)
+        llm_chain = LLMChain(llm=self.llm, prompt=prompt)
         agent = ZeroShotAgent(llm_chain=llm_chain, tools=self.tools, verbose=True)
         agent_chain = AgentExecutor.from_agent_and_tools(
             agent=agent, tools=self.tools, verbose=True, memory=memory
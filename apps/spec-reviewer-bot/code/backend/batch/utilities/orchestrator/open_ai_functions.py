@@ -1,8 +1,11 @@
+import asyncio
 import logging
-from typing import List
+from typing import AsyncIterator, List
 import json
 
 from .orchestrator_base import OrchestratorBase
+from ..helpers.chat_history_budget_helper import ChatHistoryBudget
+from ..helpers.config.llm_call_site import LLMCallSite
 from ..helpers.llm_helper import LLMHelper
 from ..helpers.env_helper import EnvHelper
 from ..tools.post_prompt_tool import PostPromptTool
@@ -13,57 +16,134 @@ from ..common.answer import Answer
 logger = logging.getLogger(__name__)
 
 
-class OpenAIFunctionsOrchestrator(OrchestratorBase):
-    def __init__(self) -> None:
-        super().__init__()
-        self.functions = [
-            {
-                "name": "search_documents",
-                "description": "Provide answers to any fact question coming from users.",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "question": {
-                            "type": "string",
-                            "description": "A standalone question, converted from the chat history",
-                        },
-                    },
-                    "required": ["question"],
+FUNCTIONS = [
+    {
+        "name": "search_documents",
+        "description": "Provide answers to any fact question coming from users.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "question": {
+                    "type": "string",
+                    "description": "A standalone question, converted from the chat history",
                 },
             },
-            {
-                "name": "text_processing",
-                "description": "Useful when you want to apply a transformation on the text, like translate, summarize, rephrase and so on.",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "text": {
-                            "type": "string",
-                            "description": "The text to be processed",
-                        },
-                        "operation": {
-                            "type": "string",
-                            "description": "The operation to be performed on the text. Like Translate to Italian, Summarize, Paraphrase, etc. If a language is specified, return that as part of the operation. Preserve the operation name in the user language.",
-                        },
-                    },
-                    "required": ["text", "operation"],
+            "required": ["question"],
+        },
+    },
+    {
+        "name": "text_processing",
+        "description": "Useful when you want to apply a transformation on the text, like translate, summarize, rephrase and so on.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "text": {
+                    "type": "string",
+                    "description": "The text to be processed",
+                },
+                "operation": {
+                    "type": "string",
+                    "description": "The operation to be performed on the text. Like Translate to Italian, Summarize, Paraphrase, etc. If a language is specified, return that as part of the operation. Preserve the operation name in the user language.",
                 },
             },
-        ]
+            "required": ["text", "operation"],
+        },
+    },
+]
+
+
+class OpenAIFunctionsOrchestrator(OrchestratorBase):
+    def __init__(self) -> None:
+        super().__init__()
+        self.functions = FUNCTIONS
+        self.chat_history_budget = ChatHistoryBudget(EnvHelper())
 
     async def orchestrate(
         self, user_message: str, chat_history: List[dict], **kwargs: dict
     ) -> list[dict]:
         logger.info("Method orchestrate of open_ai_functions started")
-        # Call Content Safety tool
-        if self.config.prompts.enable_content_safety:
-            logger.info("Content Safety enabled. Checking input message...")
-            if response := self.call_content_safety_input(user_message):
-                logger.info("Content Safety check returned a response. Exiting method.")
-                return response
+        chat_history = self.chat_history_budget.fit(chat_history)
+
+        # Call Content Safety tool while the function to call is detected
+        response, result = await self.screen_input_while(
+            user_message, asyncio.to_thread(self._route, user_message, chat_history)
+        )
+        if response:
+            logger.info("Content Safety check returned a response. Exiting method.")
+            return response
+
+        # TODO: call content safety if needed
+
+        if self._called_function(result) == "search_documents":
+            logger.info("search_documents function detected")
+            question = json.loads(result.choices[0].message.function_call.arguments)[
+                "question"
+            ]
+            # run answering chain, off the loop as it calls the services synchronously
+            answering_tool = QuestionAnswerTool()
+            answer = await asyncio.to_thread(
+                answering_tool.answer_question, question, chat_history
+            )
+
+            self.log_tokens(
+                prompt_tokens=answer.prompt_tokens,
+                completion_tokens=answer.completion_tokens,
+            )
+
+            # Run post prompt if needed
+            if self.config.prompts.enable_post_answering_prompt:
+                logger.debug("Running post answering prompt")
+                post_prompt_tool = PostPromptTool()
+                answer = await asyncio.to_thread(
+                    post_prompt_tool.validate_answer, answer
+                )
+                self.log_tokens(
+                    prompt_tokens=answer.prompt_tokens,
+                    completion_tokens=answer.completion_tokens,
+                )
+        else:
+            answer = await asyncio.to_thread(
+                self._answer_without_search, user_message, chat_history, result
+            )
+
+        messages = await asyncio.to_thread(self._format_answer, user_message, answer)
+        logger.info("Method orchestrate of open_ai_functions ended")
+        return messages
+
+    async def orchestrate_stream(
+        self, user_message: str, chat_history: List[dict], **kwargs: dict
+    ) -> AsyncIterator[list[dict]]:
+        logger.info("Method orchestrate_stream of open_ai_functions started")
+        chat_history = self.chat_history_budget.fit(chat_history)
+        response, result = await self.screen_input_while(
+            user_message, asyncio.to_thread(self._route, user_message, chat_history)
+        )
+        if response:
+            yield response
+            return
+
+        if self._called_function(result) == "search_documents":
+            logger.info("search_documents function detected, streaming the answer")
+            question = json.loads(result.choices[0].message.function_call.arguments)[
+                "question"
+            ]
+            source_documents, deltas = await asyncio.to_thread(
+                QuestionAnswerTool().stream_answer_question, question, chat_history
+            )
+            async for messages in self.stream_answer(
+                user_message, question, source_documents, deltas
+            ):
+                yield messages
+        else:
+            answer = await asyncio.to_thread(
+                self._answer_without_search, user_message, chat_history, result
+            )
+            yield await asyncio.to_thread(self._format_answer, user_message, answer)
+        logger.info("Method orchestrate_stream of open_ai_functions ended")
 
+    def _route(self, user_message: str, chat_history: List[dict]):
         # Call function to determine route
-        llm_helper = LLMHelper()
+        llm_helper: LLMHelper = self.shared_resource("llm_helper", LLMHelper)
         env_helper = EnvHelper()
 
         system_message = env_helper.OPEN_AI_FUNCTIONS_SYSTEM_PROMPT
@@ -86,65 +166,53 @@ class OpenAIFunctionsOrchestrator(OrchestratorBase):
         messages.append({"role": "user", "content": user_message})
 
         result = llm_helper.get_chat_completion_with_functions(
-            messages, self.functions, function_call="auto"
+            messages,
+            self.functions,
+            function_call="auto",
+            call_site=LLMCallSite.ROUTING,
         )
         self.log_tokens(
             prompt_tokens=result.usage.prompt_tokens,
             completion_tokens=result.usage.completion_tokens,
         )
+        return result
 
-        # TODO: call content safety if needed
-
-        if result.choices[0].finish_reason == "function_call":
-            logger.info("Function call detected")
-            if result.choices[0].message.function_call.name == "search_documents":
-                logger.info("search_documents function detected")
-                question = json.loads(
-                    result.choices[0].message.function_call.arguments
-                )["question"]
-                # run answering chain
-                answering_tool = QuestionAnswerTool()
-                answer = answering_tool.answer_question(question, chat_history)
+    @staticmethod
+    def _called_function(result) -> str | None:
+        if result.choices[0].finish_reason != "function_call":
+            return None
+        return result.choices[0].message.function_call.name
 
-                self.log_tokens(
-                    prompt_tokens=answer.prompt_tokens,
-                    completion_tokens=answer.completion_tokens,
-                )
+    def _answer_without_search(
+        self, user_message: str, chat_history: List[dict], result
+    ) -> Answer:
+        function_name = self._called_function(result)
+        if function_name == "text_processing":
+            logger.info("text_processing function detected")
+            text = json.loads(result.choices[0].message.function_call.arguments)[
+                "text"
+            ]
+            operation = json.loads(result.choices[0].message.function_call.arguments)[
+                "operation"
+            ]
+            text_processing_tool = TextProcessingTool()
+            answer = text_processing_tool.answer_question(
+                user_message, chat_history, text=text, operation=operation
+            )
+            self.log_tokens(
+                prompt_tokens=answer.prompt_tokens,
+                completion_tokens=answer.completion_tokens,
+            )
+            return answer
 
-                # Run post prompt if needed
-                if self.config.prompts.enable_post_answering_prompt:
-                    logger.debug("Running post answering prompt")
-                    post_prompt_tool = PostPromptTool()
-                    answer = post_prompt_tool.validate_answer(answer)
-                    self.log_tokens(
-                        prompt_tokens=answer.prompt_tokens,
-                        completion_tokens=answer.completion_tokens,
-                    )
-            elif result.choices[0].message.function_call.name == "text_processing":
-                logger.info("text_processing function detected")
-                text = json.loads(result.choices[0].message.function_call.arguments)[
-                    "text"
-                ]
-                operation = json.loads(
-                    result.choices[0].message.function_call.arguments
-                )["operation"]
-                text_processing_tool = TextProcessingTool()
-                answer = text_processing_tool.answer_question(
-                    user_message, chat_history, text=text, operation=operation
-                )
-                self.log_tokens(
-                    prompt_tokens=answer.prompt_tokens,
-                    completion_tokens=answer.completion_tokens,
-                )
-            else:
-                logger.info("Unknown function call detected")
-                text = result.choices[0].message.content
-                answer = Answer(question=user_message, answer=text)
-        else:
+        if function_name is None:
             logger.info("No function call detected")
-            text = result.choices[0].message.content
-            answer = Answer(question=user_message, answer=text)
+        else:
+            logger.info("Unknown function call detected")
+        text = result.choices[0].message.content
+        return Answer(question=user_message, answer=text)
 
+    def _format_answer(self, user_message: str, answer: Answer) -> list[dict]:
         if answer.answer is None:
             logger.info("Answer is None")
             answer.answer = "The requested information is not available in the retrieved data. Please try another query or topic."
@@ -155,10 +223,8 @@ class OpenAIFunctionsOrchestrator(OrchestratorBase):
                 return response
 
         # Format the output for the UI
-        messages = self.output_parser.parse(
+        return self.output_parser.parse(
             question=answer.question,
             answer=answer.answer,
             source_documents=answer.source_documents,
         )
-        logger.info("Method orchestrate of open_ai_functions ended")
-        return messages
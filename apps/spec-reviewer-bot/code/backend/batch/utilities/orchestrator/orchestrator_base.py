@@ -1,16 +1,47 @@
+import asyncio
 import logging
+import threading
 from uuid import uuid4
-from typing import List, Optional
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterator,
+    List,
+    Optional,
+    TypeVar,
+)
 from abc import ABC, abstractmethod
+from ..common.answer import Answer
+from ..common.source_document import SourceDocument
 from ..loggers.conversation_logger import ConversationLogger
 from ..helpers.config.config_helper import ConfigHelper
+from ..helpers.env_helper import EnvHelper
+from ..helpers.token_counter import count_tokens
 from ..parser.output_parser_tool import OutputParserTool
 from ..tools.content_safety_checker import ContentSafetyChecker
+from ..tools.post_prompt_tool import PostPromptTool
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 
 class OrchestratorBase(ABC):
+    """
+    An orchestrator is created for every message and only holds the state of that
+    message: the active configuration, the message id and the token counts.
+
+    The clients, kernels and tools it works with are thread-safe and expensive to
+    build, so they are created once per process with shared_resource and reused by
+    all the orchestrators. They are rebuilt when the environment is reloaded.
+    """
+
+    _shared_resources: dict[str, Any] = {}
+    _shared_resources_env: Optional[EnvHelper] = None
+    _shared_resources_lock = threading.Lock()
+
     def __init__(self) -> None:
         super().__init__()
         self.config = ConfigHelper.get_active_config_or_default()
@@ -18,9 +49,65 @@ class OrchestratorBase(ABC):
         self.tokens = {"prompt": 0, "completion": 0, "total": 0}
         logger.debug(f"New message id: {self.message_id} with tokens {self.tokens}")
         if str(self.config.logging.log_user_interactions).lower() == "true":
-            self.conversation_logger: ConversationLogger = ConversationLogger()
-        self.content_safety_checker = ContentSafetyChecker()
-        self.output_parser = OutputParserTool()
+            self.conversation_logger: ConversationLogger = self.shared_resource(
+                "conversation_logger", ConversationLogger
+            )
+        self.content_safety_checker: ContentSafetyChecker = self.shared_resource(
+            "content_safety_checker", ContentSafetyChecker
+        )
+        self.output_parser: OutputParserTool = self.shared_resource(
+            "output_parser", OutputParserTool
+        )
+
+    @classmethod
+    def shared_resource(cls, name: str, factory: Callable[[], T]) -> T:
+        """Returns the resource registered under the name, creating it once with the factory."""
+        env_helper = EnvHelper()
+        resources = OrchestratorBase._shared_resources
+        if OrchestratorBase._shared_resources_env is env_helper and name in resources:
+            return resources[name]
+
+        replaced: list[Any] = []
+        with OrchestratorBase._shared_resources_lock:
+            if OrchestratorBase._shared_resources_env is not env_helper:
+                replaced = list(resources.values())
+                resources.clear()
+                OrchestratorBase._shared_resources_env = env_helper
+            if name not in resources:
+                logger.info(f"Creating shared orchestrator resource {name}")
+                resources[name] = factory()
+            resource = resources[name]
+
+        if replaced:
+            # Closing flushes the conversation logger, which the message that
+            # triggered the reload does not wait for
+            threading.Thread(
+                target=cls._close_resources,
+                args=(replaced,),
+                name="shared-resources-close",
+                daemon=True,
+            ).start()
+        return resource
+
+    @classmethod
+    def clear_shared_resources(cls) -> None:
+        with OrchestratorBase._shared_resources_lock:
+            replaced = list(OrchestratorBase._shared_resources.values())
+            OrchestratorBase._shared_resources.clear()
+            OrchestratorBase._shared_resources_env = None
+        cls._close_resources(replaced)
+
+    @staticmethod
+    def _close_resources(resources: list[Any]) -> None:
+        """Closes the resources that can be closed, such as the conversation logger."""
+        for resource in resources:
+            close = getattr(resource, "close", None)
+            if not callable(close):
+                continue
+            try:
+                close()
+            except Exception:
+                logger.exception(f"Failed to close shared resource {resource}")
 
     def log_tokens(self, prompt_tokens, completion_tokens):
         self.tokens["prompt"] += prompt_tokens
@@ -33,6 +120,153 @@ class OrchestratorBase(ABC):
     ) -> list[dict]:
         pass
 
+    async def orchestrate_stream(
+        self, user_message: str, chat_history: List[dict], **kwargs: dict
+    ) -> AsyncIterator[list[dict]]:
+        """
+        Yields the UI messages of the answer as it is generated, each item replacing
+        the previous one. Orchestrators that cannot stream yield the final answer once.
+        """
+        yield await self.orchestrate(user_message, chat_history, **kwargs)
+
+    async def stream_answer(
+        self,
+        user_message: str,
+        question: str,
+        source_documents: List[SourceDocument],
+        deltas: Iterator[str],
+    ) -> AsyncIterator[list[dict]]:
+        """
+        Streams an answer of the QuestionAnswerTool: the citations first, then the text.
+
+        With content safety enabled the answer is screened while it is generated, in
+        sentence-aligned windows of at least STREAMING_SAFETY_WINDOW_CHARACTERS, and
+        text is released once its window passed the output check. When a window
+        fails the generation stops and the answer is replaced, with a retraction
+        when a part of it was already shown. The post answering prompt needs the
+        whole answer, so it runs on the final message. With POST_ANSWERING_CONCURRENT
+        it starts as soon as the answer is generated, while the end of the answer is
+        screened and sent, and only the final message waits for its verdict.
+        """
+        yield self.output_parser.parse_sources(question, source_documents)
+
+        screener = (
+            self.content_safety_checker.stream_screener(
+                EnvHelper().STREAMING_SAFETY_WINDOW_CHARACTERS
+            )
+            if self.config.prompts.enable_content_safety
+            else None
+        )
+        answer_text = ""
+        released = ""
+        # The deltas are read off the loop, so that other requests are served meanwhile
+        while (delta := await asyncio.to_thread(next, deltas, None)) is not None:
+            answer_text += delta
+            if screener:
+                screener.feed(delta)
+                text = screener.release()
+                if screener.flagged:
+                    break
+            else:
+                text = answer_text
+            if text != released:
+                released = text
+                yield self.output_parser.parse(
+                    question=question,
+                    answer=released,
+                    source_documents=source_documents,
+                    end_turn=False,
+                )
+
+        # The service does not report usage on streamed completions with the configured API version
+        self.log_tokens(
+            prompt_tokens=0,
+            completion_tokens=count_tokens(
+                answer_text, EnvHelper().AZURE_OPENAI_MODEL_NAME
+            ),
+        )
+
+        answer = Answer(
+            question=question, answer=answer_text, source_documents=source_documents
+        )
+        validation = None
+        if (
+            self.config.prompts.enable_post_answering_prompt
+            and EnvHelper().POST_ANSWERING_CONCURRENT
+            and not (screener and screener.flagged)
+        ):
+            logger.debug("Running post answering prompt while the answer is sent")
+            validation = asyncio.ensure_future(
+                asyncio.to_thread(PostPromptTool().validate_answer, answer)
+            )
+
+        if screener:
+            screener.close()
+            await asyncio.to_thread(screener.wait)
+            if screener.flagged:
+                if close := getattr(deltas, "close", None):
+                    # Stops the generation of an answer that will not be shown
+                    close()
+                if validation:
+                    await asyncio.gather(validation, return_exceptions=True)
+                yield self.output_parser.parse(
+                    question=user_message, answer=screener.replacement
+                )
+                return
+
+        if validation:
+            if released != answer_text:
+                yield self.output_parser.parse(
+                    question=question,
+                    answer=answer_text,
+                    source_documents=source_documents,
+                    end_turn=False,
+                )
+            answer = await validation
+        elif self.config.prompts.enable_post_answering_prompt:
+            logger.debug("Running post answering prompt on the streamed answer")
+            answer = await asyncio.to_thread(PostPromptTool().validate_answer, answer)
+        if self.config.prompts.enable_post_answering_prompt:
+            self.log_tokens(
+                prompt_tokens=answer.prompt_tokens,
+                completion_tokens=answer.completion_tokens,
+            )
+
+        yield self.output_parser.parse(
+            question=answer.question,
+            answer=answer.answer,
+            source_documents=answer.source_documents,
+        )
+
+    async def screen_input_while(
+        self, user_message: str, work: Awaitable[T]
+    ) -> tuple[Optional[list[dict]], Optional[T]]:
+        """
+        Runs the input content safety check concurrently with work that does not
+        need its verdict, like detecting the intent of the message.
+
+        Returns the content safety response when the message is flagged, in which
+        case the result of the work is discarded and nothing that depends on it
+        runs, and the result of the work otherwise.
+        """
+        if not self.config.prompts.enable_content_safety:
+            return None, await work
+
+        task = asyncio.ensure_future(work)
+        try:
+            response = await asyncio.to_thread(
+                self.call_content_safety_input, user_message
+            )
+        except BaseException:
+            await asyncio.gather(task, return_exceptions=True)
+            raise
+        if response:
+            # The request of the work is already sent and paid for, aborting it would
+            # only leave its connection half-open
+            await asyncio.gather(task, return_exceptions=True)
+            return response, None
+        return None, await task
+
     def call_content_safety_input(self, user_message: str):
         logger.debug("Calling content safety with question")
         filtered_user_message = (
@@ -71,6 +305,26 @@ class OrchestratorBase(ABC):
         **kwargs: Optional[dict],
     ) -> dict:
         result = await self.orchestrate(user_message, chat_history, **kwargs)
+        self._log_interaction(user_message, conversation_id, result)
+        return result
+
+    async def handle_message_stream(
+        self,
+        user_message: str,
+        chat_history: List[dict],
+        conversation_id: Optional[str],
+        **kwargs: Optional[dict],
+    ) -> AsyncIterator[list[dict]]:
+        result = []
+        async for result in self.orchestrate_stream(
+            user_message, chat_history, **kwargs
+        ):
+            yield result
+        self._log_interaction(user_message, conversation_id, result)
+
+    def _log_interaction(
+        self, user_message: str, conversation_id: Optional[str], result: list[dict]
+    ) -> None:
         if str(self.config.logging.log_tokens).lower() == "true":
             custom_dimensions = {
                 "conversation_id": conversation_id,
@@ -91,4 +345,3 @@ class OrchestratorBase(ABC):
                 ]
                 + result
             )
-        return result
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from typing import List
 import json
@@ -15,11 +16,13 @@ logger = logging.getLogger(__name__)
 class PromptFlowOrchestrator(OrchestratorBase):
     def __init__(self) -> None:
         super().__init__()
-        self.llm_helper = LLMHelper()
+        self.llm_helper: LLMHelper = self.shared_resource("llm_helper", LLMHelper)
         self.env_helper = EnvHelper()
 
         # Get the ML client, endpoint and deployment names
-        self.ml_client = self.llm_helper.get_ml_client()
+        self.ml_client = self.shared_resource(
+            "prompt_flow_ml_client", self.llm_helper.get_ml_client
+        )
         self.enpoint_name = self.env_helper.PROMPT_FLOW_ENDPOINT_NAME
         self.deployment_name = self.env_helper.PROMPT_FLOW_DEPLOYMENT_NAME
 
@@ -28,6 +31,10 @@ class PromptFlowOrchestrator(OrchestratorBase):
     async def orchestrate(
         self, user_message: str, chat_history: List[dict], **kwargs: dict
     ) -> list[dict]:
+        # The endpoint and the content safety are called synchronously, off the event loop
+        return await asyncio.to_thread(self._orchestrate, user_message, chat_history)
+
+    def _orchestrate(self, user_message: str, chat_history: List[dict]) -> list[dict]:
         logger.info("Orchestration started.")
         # Call Content Safety tool on question
         if self.config.prompts.enable_content_safety:
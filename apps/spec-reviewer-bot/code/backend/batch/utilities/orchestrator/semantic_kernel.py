@@ -1,5 +1,7 @@
+import asyncio
 import json
 import logging
+from typing import AsyncIterator
 
 from semantic_kernel import Kernel
 from semantic_kernel.connectors.ai.function_choice_behavior import FunctionChoiceBehavior
@@ -8,10 +10,14 @@ from semantic_kernel.contents.chat_message_content import ChatMessageContent
 from semantic_kernel.contents.utils.finish_reason import FinishReason
 
 from ..common.answer import Answer
+from ..helpers.async_runtime import AsyncRuntime
+from ..helpers.chat_history_budget_helper import ChatHistoryBudget
+from ..helpers.config.llm_call_site import LLMCallSite
 from ..helpers.llm_helper import LLMHelper
 from ..helpers.env_helper import EnvHelper
 from ..plugins.chat_plugin import ChatPlugin
 from ..plugins.post_answering_plugin import PostAnsweringPlugin
+from ..tools.question_answer_tool import QuestionAnswerTool
 from .orchestrator_base import OrchestratorBase
 
 logger = logging.getLogger(__name__)
@@ -20,76 +26,62 @@ logger = logging.getLogger(__name__)
 class SemanticKernelOrchestrator(OrchestratorBase):
     def __init__(self) -> None:
         super().__init__()
-        self.kernel = Kernel()
-        self.llm_helper = LLMHelper()
+        self.llm_helper: LLMHelper = self.shared_resource("llm_helper", LLMHelper)
         self.env_helper = EnvHelper()
+        self.chat_history_budget = ChatHistoryBudget(self.env_helper)
+
+        # The chat service of the kernel holds an async client, bound to the event
+        # loop it is first used on. The kernel can only be shared by the messages
+        # routed to the same deployment when they all run on the shared loop.
+        if AsyncRuntime.current_in_loop():
+            deployment_name = (
+                self.llm_helper.get_routed_model(LLMCallSite.ROUTING)
+                or self.llm_helper.llm_model
+            )
+            self.kernel: Kernel = self.shared_resource(
+                f"semantic_kernel:{deployment_name}", self._create_kernel
+            )
+        else:
+            self.kernel = self._create_kernel()
+        self.chat_service = self.kernel.get_service()
+        self.orchestrate_function = self.kernel.get_function("Main", "orchestrate")
 
-        # Add the Azure OpenAI service to the kernel
-        self.chat_service = self.llm_helper.get_sk_chat_completion_service("cwyd")
-        self.kernel.add_service(self.chat_service)
+    def _create_kernel(self) -> Kernel:
+        kernel = Kernel()
 
-        self.kernel.add_plugin(
-            plugin=PostAnsweringPlugin(), plugin_name="PostAnswering"
+        # Add the Azure OpenAI service to the kernel
+        chat_service = self.llm_helper.get_sk_chat_completion_service(
+            "cwyd", call_site=LLMCallSite.ROUTING
         )
+        kernel.add_service(chat_service)
 
-    async def orchestrate(
-        self, user_message: str, chat_history: list[dict], **kwargs: dict
-    ) -> list[dict]:
-        logger.info("Method orchestrate of semantic_kernel started")
-        # Call Content Safety tool
-        if self.config.prompts.enable_content_safety:
-            if response := self.call_content_safety_input(user_message):
-                return response
-
-        system_message = self.env_helper.SEMANTIC_KERNEL_SYSTEM_PROMPT
-        if not system_message:
-            system_message = """You help employees to navigate only private information sources.
-You must prioritize the function call over your general knowledge for any question by calling the search_documents function.
-Call the text_processing function when the user request an operation on the current context, such as translate, summarize, or paraphrase. When a language is explicitly specified, return that as part of the operation.
-When directly replying to the user, always reply in the language the user is speaking.
-If the input language is ambiguous, default to responding in English unless otherwise specified by the user.
-You **must not** respond if asked to List all documents in your repository.
-"""
-
-        self.kernel.add_plugin(
-            plugin=ChatPlugin(question=user_message, chat_history=chat_history),
-            plugin_name="Chat",
-        )
+        kernel.add_plugin(plugin=PostAnsweringPlugin(), plugin_name="PostAnswering")
+        kernel.add_plugin(plugin=ChatPlugin(), plugin_name="Chat")
 
-        settings = self.llm_helper.get_sk_service_settings(self.chat_service)
+        settings = self.llm_helper.get_sk_service_settings(chat_service)
         settings.function_choice_behavior = FunctionChoiceBehavior.Auto(
-            auto_invoke=False,
-            filters={"included_plugins": ["Chat"]}
+            auto_invoke=False, filters={"included_plugins": ["Chat"]}
         )
-
-        orchestrate_function = self.kernel.add_function(
+        kernel.add_function(
             plugin_name="Main",
             function_name="orchestrate",
             prompt="{{$chat_history}}{{$user_message}}",
             prompt_execution_settings=settings,
         )
+        return kernel
 
-        history = ChatHistory(system_message=system_message)
-
-        for message in chat_history.copy():
-            history.add_message(message)
-
-        chat_history_str = ""
-        for message in history.messages:
-            chat_history_str += f"{message.role}: {message.content}\n"
-
-        result: ChatMessageContent = (
-            await self.kernel.invoke(
-                function=orchestrate_function,
-                chat_history=chat_history_str,
-                user_message=user_message,
-            )
-        ).value[0]
+    async def orchestrate(
+        self, user_message: str, chat_history: list[dict], **kwargs: dict
+    ) -> list[dict]:
+        logger.info("Method orchestrate of semantic_kernel started")
+        chat_history = self.chat_history_budget.fit(chat_history)
 
-        self.log_tokens(
-            prompt_tokens=result.metadata["usage"].prompt_tokens,
-            completion_tokens=result.metadata["usage"].completion_tokens,
+        # Call Content Safety tool while the function to call is detected
+        response, result = await self.screen_input_while(
+            user_message, self._route(user_message, chat_history)
         )
+        if response:
+            return response
 
         if result.finish_reason == FinishReason.TOOL_CALLS:
             logger.info("Semantic Kernel function call detected")
@@ -103,7 +95,12 @@ You **must not** respond if asked to List all documents in your repository.
             arguments = json.loads(result.items[0].arguments)
 
             answer: Answer = (
-                await self.kernel.invoke(function=function, **arguments)
+                await self.kernel.invoke(
+                    function=function,
+                    user_question=user_message,
+                    chat_history=chat_history,
+                    **arguments,
+                )
             ).value
 
             self.log_tokens(
@@ -130,24 +127,120 @@ You **must not** respond if asked to List all documents in your repository.
                     completion_tokens=answer.completion_tokens,
                 )
         else:
-            logger.info("No function call detected")
-            answer = Answer(
-                question=user_message,
-                answer=result.content,
-                prompt_tokens=result.metadata["usage"].prompt_tokens,
-                completion_tokens=result.metadata["usage"].completion_tokens,
+            answer = self._answer_without_function(user_message, result)
+
+        messages = await asyncio.to_thread(self._format_answer, user_message, answer)
+        logger.info("Method orchestrate of semantic_kernel ended")
+        return messages
+
+    async def orchestrate_stream(
+        self, user_message: str, chat_history: list[dict], **kwargs: dict
+    ) -> AsyncIterator[list[dict]]:
+        logger.info("Method orchestrate_stream of semantic_kernel started")
+        chat_history = self.chat_history_budget.fit(chat_history)
+        response, result = await self.screen_input_while(
+            user_message, self._route(user_message, chat_history)
+        )
+        if response:
+            yield response
+            return
+
+        if (
+            result.finish_reason == FinishReason.TOOL_CALLS
+            and "search_documents" in result.items[0].name
+        ):
+            logger.info("search_documents function detected, streaming the answer")
+            # Called directly instead of through the kernel, which only returns whole answers
+            question = json.loads(result.items[0].arguments)["question"]
+            source_documents, deltas = await asyncio.to_thread(
+                QuestionAnswerTool().stream_answer_question, question, chat_history
+            )
+            async for messages in self.stream_answer(
+                user_message, question, source_documents, deltas
+            ):
+                yield messages
+        elif result.finish_reason == FinishReason.TOOL_CALLS:
+            function = self.kernel.get_function_from_fully_qualified_function_name(
+                result.items[0].name
+            )
+            answer: Answer = (
+                await self.kernel.invoke(
+                    function=function,
+                    user_question=user_message,
+                    chat_history=chat_history,
+                    **json.loads(result.items[0].arguments),
+                )
+            ).value
+            self.log_tokens(
+                prompt_tokens=answer.prompt_tokens,
+                completion_tokens=answer.completion_tokens,
+            )
+            yield await asyncio.to_thread(self._format_answer, user_message, answer)
+        else:
+            yield await asyncio.to_thread(
+                self._format_answer,
+                user_message,
+                self._answer_without_function(user_message, result),
             )
+        logger.info("Method orchestrate_stream of semantic_kernel ended")
 
+    async def _route(
+        self, user_message: str, chat_history: list[dict]
+    ) -> ChatMessageContent:
+        system_message = self.env_helper.SEMANTIC_KERNEL_SYSTEM_PROMPT
+        if not system_message:
+            system_message = """You help employees to navigate only private information sources.
+You must prioritize the function call over your general knowledge for any question by calling the search_documents function.
+Call the text_processing function when the user request an operation on the current context, such as translate, summarize, or paraphrase. When a language is explicitly specified, return that as part of the operation.
+When directly replying to the user, always reply in the language the user is speaking.
+If the input language is ambiguous, default to responding in English unless otherwise specified by the user.
+You **must not** respond if asked to List all documents in your repository.
+"""
+
+        history = ChatHistory(system_message=system_message)
+
+        for message in chat_history.copy():
+            history.add_message(message)
+
+        chat_history_str = ""
+        for message in history.messages:
+            chat_history_str += f"{message.role}: {message.content}\n"
+
+        result: ChatMessageContent = (
+            await self.kernel.invoke(
+                function=self.orchestrate_function,
+                chat_history=chat_history_str,
+                user_message=user_message,
+            )
+        ).value[0]
+
+        self.log_tokens(
+            prompt_tokens=result.metadata["usage"].prompt_tokens,
+            completion_tokens=result.metadata["usage"].completion_tokens,
+        )
+        return result
+
+    @staticmethod
+    def _answer_without_function(
+        user_message: str, result: ChatMessageContent
+    ) -> Answer:
+        logger.info("No function call detected")
+        return Answer(
+            question=user_message,
+            answer=result.content,
+            prompt_tokens=result.metadata["usage"].prompt_tokens,
+            completion_tokens=result.metadata["usage"].completion_tokens,
+        )
+
+    def _format_answer(self, user_message: str, answer: Answer) -> list[dict]:
         # Call Content Safety tool
         if self.config.prompts.enable_content_safety:
             if response := self.call_content_safety_output(user_message, answer.answer):
                 return response
 
         # Format the output for the UI
-        messages = self.output_parser.parse(
+        return self.output_parser.parse(
             question=answer.question,
             answer=answer.answer,
             source_documents=answer.source_documents,
         )
-        logger.info("Method orchestrate of semantic_kernel ended")
-        return messages
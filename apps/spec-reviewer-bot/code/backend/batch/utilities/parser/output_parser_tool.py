@@ -35,6 +35,7 @@ class OutputParserTool(ParserBase):
         question: str,
         answer: str,
         source_documents: List[SourceDocument] = [],
+        end_turn: bool = True,
         **kwargs: dict,
     ) -> List[dict]:
         logger.info("Method parse of output_parser_tool started")
@@ -61,35 +62,59 @@ class OutputParserTool(ParserBase):
             doc = source_documents[idx]
             logger.debug(f"doc{idx}: {doc}")
 
-            # Then update the citation object in the response, it needs to have filepath and chunk_id to render in the UI as a file
-            messages[0]["content"]["citations"].append(
-                {
-                    "content": doc.get_markdown_url() + "\n\n\n" + doc.content,
-                    "id": doc.id,
-                    "chunk_id": (
-                        re.findall(r"\d+", doc.chunk_id)[-1]
-                        if doc.chunk_id is not None
-                        else doc.chunk
-                    ),
-                    "title": doc.title,
-                    "filepath": doc.get_filename(include_path=True),
-                    "url": doc.get_markdown_url(),
-                    "metadata": {
-                        "offset": doc.offset,
-                        "source": doc.source,
-                        "markdown_url": doc.get_markdown_url(),
-                        "title": doc.title,
-                        "original_url": doc.source,  # TODO: do we need this?
-                        "chunk": doc.chunk,
-                        "key": doc.id,
-                        "filename": doc.get_filename(),
-                    },
-                }
-            )
+            messages[0]["content"]["citations"].append(self._build_citation(doc))
         if messages[0]["content"]["citations"] == []:
             answer = re.sub(r"\[doc\d+\]", "", answer)
-        messages.append({"role": "assistant", "content": answer, "end_turn": True})
+        messages.append({"role": "assistant", "content": answer, "end_turn": end_turn})
         # everything in content needs to be stringified to work with Azure BYOD frontend
         messages[0]["content"] = json.dumps(messages[0]["content"])
         logger.info("Method parse of output_parser_tool ended")
         return messages
+
+    def parse_sources(
+        self, question: str, source_documents: List[SourceDocument]
+    ) -> List[dict]:
+        """
+        Formats the retrieved documents before the answer is generated: every source is
+        cited in retrieval order, so [docN] references streamed afterwards resolve.
+        """
+        return [
+            {
+                "role": "tool",
+                "content": json.dumps(
+                    {
+                        "citations": [
+                            self._build_citation(doc) for doc in source_documents
+                        ],
+                        "intent": question,
+                    }
+                ),
+                "end_turn": False,
+            },
+            {"role": "assistant", "content": "", "end_turn": False},
+        ]
+
+    def _build_citation(self, doc: SourceDocument) -> dict:
+        # The citation object needs to have filepath and chunk_id to render in the UI as a file
+        return {
+            "content": doc.get_markdown_url() + "\n\n\n" + doc.content,
+            "id": doc.id,
+            "chunk_id": (
+                re.findall(r"\d+", doc.chunk_id)[-1]
+                if doc.chunk_id is not None
+                else doc.chunk
+            ),
+            "title": doc.title,
+            "filepath": doc.get_filename(include_path=True),
+            "url": doc.get_markdown_url(),
+            "metadata": {
+                "offset": doc.offset,
+                "source": doc.source,
+                "markdown_url": doc.get_markdown_url(),
+                "title": doc.title,
+                "original_url": doc.source,  # TODO: do we need this?
+                "chunk": doc.chunk,
+                "key": doc.id,
+                "filename": doc.get_filename(),
+            },
+        }
@@ -1,3 +1,4 @@
+import asyncio
 from typing import Annotated
 
 from semantic_kernel.functions import kernel_function
@@ -6,39 +7,55 @@ from ..common.answer import Answer
 from ..tools.question_answer_tool import QuestionAnswerTool
 from ..tools.text_processing_tool import TextProcessingTool
 
+# Passed as kernel arguments on every invocation and hidden from the model, so a
+# single plugin instance serves all the conversations of the process
+UserQuestion = Annotated[
+    str,
+    "The message of the user",
+    {"include_in_function_choices": False},
+]
+ChatHistoryMessages = Annotated[
+    list[dict],
+    "The previous messages of the conversation",
+    {"include_in_function_choices": False},
+]
 
-class ChatPlugin:
-    def __init__(self, question: str, chat_history: list[dict]) -> None:
-        self.question = question
-        self.chat_history = chat_history
 
+class ChatPlugin:
     @kernel_function(
         description="Provide answers to any fact question coming from users."
     )
-    def search_documents(
+    async def search_documents(
         self,
         question: Annotated[
             str, "A standalone question, converted from the chat history"
         ],
+        chat_history: ChatHistoryMessages = (),
     ) -> Answer:
-        return QuestionAnswerTool().answer_question(
-            question=question, chat_history=self.chat_history
+        # The tools call the services synchronously, off the event loop
+        return await asyncio.to_thread(
+            QuestionAnswerTool().answer_question,
+            question=question,
+            chat_history=list(chat_history),
         )
 
     @kernel_function(
         description="Useful when you want to apply a transformation on the text, like translate, summarize, rephrase and so on."
     )
-    def text_processing(
+    async def text_processing(
         self,
         text: Annotated[str, "The text to be processed"],
         operation: Annotated[
             str,
             "The operation to be performed on the text. Like Translate to Italian, Summarize, Paraphrase, etc. If a language is specified, return that as part of the operation. Preserve the operation name in the user language.",
         ],
+        user_question: UserQuestion = "",
+        chat_history: ChatHistoryMessages = (),
     ) -> Answer:
-        return TextProcessingTool().answer_question(
-            question=self.question,
-            chat_history=self.chat_history,
+        return await asyncio.to_thread(
+            TextProcessingTool().answer_question,
+            question=user_question,
+            chat_history=list(chat_history),
             text=text,
             operation=operation,
         )
@@ -1,10 +1,12 @@
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
 
 from .search_handler_base import SearchHandlerBase
 from ..helpers.llm_helper import LLMHelper
 from ..helpers.azure_computer_vision_client import AzureComputerVisionClient
 from ..helpers.azure_search_helper import AzureSearchHelper
+from ..helpers.query_vector_cache import QueryVectorCache
 from ..common.source_document import SourceDocument
 import json
 from azure.search.documents.models import VectorizedQuery
@@ -20,6 +22,7 @@ class AzureSearchHandler(SearchHandlerBase):
         super().__init__(env_helper)
         self.llm_helper = LLMHelper()
         self.azure_computer_vision_client = AzureComputerVisionClient(env_helper)
+        self.query_vector_cache = QueryVectorCache.get_instance()
 
     def create_search_client(self):
         return AzureSearchHelper().get_search_client()
@@ -80,43 +83,79 @@ class AzureSearchHandler(SearchHandlerBase):
 
     def query_search(self, question) -> List[SourceDocument]:
         logger.info(f"Performing query search for question: {question}")
-        encoding = tiktoken.get_encoding(self._ENCODER_NAME)
-        tokenised_question = encoding.encode(question)
-
-        if self.env_helper.USE_ADVANCED_IMAGE_PROCESSING:
-            logger.info("Using advanced image processing for vectorization")
-            vectorized_question = self.azure_computer_vision_client.vectorize_text(
-                question
-            )
-        else:
-            logger.info("Skipping advanced image processing")
-            vectorized_question = None
+        embedded_question, vectorized_question = self._vectorize_question(question)
 
         if self.env_helper.AZURE_SEARCH_USE_SEMANTIC_SEARCH:
             logger.info("Performing semantic search")
             results = self._semantic_search(
-                question, tokenised_question, vectorized_question
+                question, embedded_question, vectorized_question
             )
         else:
             logger.info("Performing hybrid search")
             results = self._hybrid_search(
-                question, tokenised_question, vectorized_question
+                question, embedded_question, vectorized_question
             )
 
         logger.info("Converting search results to SourceDocument list")
         return self._convert_to_source_documents(results)
 
+    def _vectorize_question(
+        self, question: str
+    ) -> tuple[list[float], list[float] | None]:
+        """
+        Returns the text embedding and, when advanced image processing is on, the
+        Computer Vision text vector for the question. Cached vectors are reused and
+        the remaining calls are issued concurrently.
+        """
+        text_model = self.env_helper.AZURE_OPENAI_EMBEDDING_MODEL
+        image_model = f"computer-vision:{self.env_helper.AZURE_COMPUTER_VISION_VECTORIZE_IMAGE_MODEL_VERSION}"
+
+        vectorizers = {text_model: self._embed_question}
+        if self.env_helper.USE_ADVANCED_IMAGE_PROCESSING:
+            logger.info("Using advanced image processing for vectorization")
+            vectorizers[image_model] = self.azure_computer_vision_client.vectorize_text
+        else:
+            logger.info("Skipping advanced image processing")
+
+        vectors = {}
+        for model in vectorizers:
+            vectors[model] = self.query_vector_cache.get(model, question)
+            if vectors[model] is not None:
+                logger.info(f"Query vector cache hit for model {model}")
+
+        misses = [model for model, vector in vectors.items() if vector is None]
+        if len(misses) > 1:
+            with ThreadPoolExecutor(max_workers=len(misses)) as executor:
+                futures = {
+                    model: executor.submit(vectorizers[model], question)
+                    for model in misses
+                }
+                for model, future in futures.items():
+                    vectors[model] = future.result()
+        elif misses:
+            vectors[misses[0]] = vectorizers[misses[0]](question)
+
+        for model in misses:
+            self.query_vector_cache.put(model, question, vectors[model])
+
+        return vectors[text_model], vectors.get(image_model)
+
+    def _embed_question(self, question: str) -> list[float]:
+        encoding = tiktoken.get_encoding(self._ENCODER_NAME)
+        tokenised_question = encoding.encode(question)
+        return self.llm_helper.generate_embeddings(tokenised_question)
+
     def _semantic_search(
         self,
         question: str,
-        tokenised_question: list[int],
+        embedded_question: list[float],
         vectorized_question: list[float] | None,
     ):
         return self.search_client.search(
             search_text=question,
             vector_queries=[
                 VectorizedQuery(
-                    vector=self.llm_helper.generate_embeddings(tokenised_question),
+                    vector=embedded_question,
                     k_nearest_neighbors=self.env_helper.AZURE_SEARCH_TOP_K,
                     fields=self._VECTOR_FIELD,
                 ),
@@ -143,14 +182,14 @@ class AzureSearchHandler(SearchHandlerBase):
     def _hybrid_search(
         self,
         question: str,
-        tokenised_question: list[int],
+        embedded_question: list[float],
         vectorized_question: list[float] | None,
     ):
         return self.search_client.search(
             search_text=question,
             vector_queries=[
                 VectorizedQuery(
-                    vector=self.llm_helper.generate_embeddings(tokenised_question),
+                    vector=embedded_question,
                     k_nearest_neighbors=self.env_helper.AZURE_SEARCH_TOP_K,
                     filter=self.env_helper.AZURE_SEARCH_FILTER,
                     fields=self._VECTOR_FIELD,
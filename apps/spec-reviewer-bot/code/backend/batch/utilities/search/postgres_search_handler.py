@@ -21,7 +21,9 @@ class AzurePostgresHandler(SearchHandlerBase):
 
         embedding_array = np.array(query_embedding).tolist()
 
-        search_results = self.azure_postgres_helper.get_vector_store(embedding_array)
+        search_results = self.azure_postgres_helper.get_vector_store(
+            embedding_array, user_input
+        )
 
         return self._convert_to_source_documents(search_results)
 
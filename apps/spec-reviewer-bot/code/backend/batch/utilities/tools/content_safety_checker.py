@@ -1,4 +1,11 @@
+import hashlib
 import logging
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
 from azure.ai.contentsafety import ContentSafetyClient
 from azure.core.credentials import AzureKeyCredential
 from ..helpers.azure_credential_utils import get_azure_credential
@@ -10,10 +17,55 @@ from ..common.answer import Answer
 
 logger = logging.getLogger(__name__)
 
+INPUT_RESPONSE_TEMPLATE = "Unfortunately, I am not able to process your question, as I have detected sensitive content that I am not allowed to process. This might be a mistake, so please try rephrasing your question."
+OUTPUT_RESPONSE_TEMPLATE = "Unfortunately, I have detected sensitive content in my answer, which I am not allowed to show you. This might be a mistake, so please try again and maybe rephrase your question."
+# Replaces a streamed answer when sensitive content is detected after a part of it was shown
+RETRACTION_MESSAGE = "I have withdrawn my answer, as I detected sensitive content in it that I am not allowed to show you. This might be a mistake, so please try again and maybe rephrase your question."
+
+# Where a segment is cut, by order of preference: the end of a sentence, then any space
+SENTENCE_END = re.compile(r"(?<=[.!?;:])\s+|\n+")
+WHITESPACE = re.compile(r"\s+")
+
+
+def split_into_segments(text: str, max_characters: int) -> list[str]:
+    """Splits the text into segments of at most max_characters, cut between sentences when possible."""
+    segments = []
+    while len(text) > max_characters:
+        window = text[: max_characters + 1]
+        cut = None
+        for pattern in (SENTENCE_END, WHITESPACE):
+            boundaries = [match.end() for match in pattern.finditer(window)]
+            boundaries = [end for end in boundaries if 0 < end <= max_characters]
+            if boundaries:
+                cut = boundaries[-1]
+                break
+        if cut is None:
+            cut = max_characters
+        segments.append(text[:cut])
+        text = text[cut:]
+    segments.append(text)
+    return segments
+
 
 class ContentSafetyChecker(AnswerProcessingBase):
+    """
+    Screens texts with Azure AI Content Safety.
+
+    Texts longer than the service accepts in one call are split into segments that
+    are analyzed in parallel. The verdict of each segment is cached by the hash of
+    its text for CONTENT_SAFETY_CACHE_TTL_SECONDS, so repeated questions and
+    answers are not analyzed again.
+    """
+
+    _executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="content-safety")
+    _verdicts: dict[str, tuple[float, bool]] = {}
+    _verdicts_lock = threading.Lock()
+    _MAX_CACHED_VERDICTS = 10000
+
     def __init__(self):
         env_helper = EnvHelper()
+        self.max_segment_characters = env_helper.CONTENT_SAFETY_MAX_SEGMENT_CHARACTERS
+        self.cache_ttl = env_helper.CONTENT_SAFETY_CACHE_TTL_SECONDS
 
         if env_helper.AZURE_AUTH_TYPE == "rbac":
             logger.info("Initializing ContentSafetyClient with RBAC authentication.")
@@ -38,21 +90,47 @@ class ContentSafetyChecker(AnswerProcessingBase):
 
     def validate_input_and_replace_if_harmful(self, text):
         logger.info("Validating input text for harmful content")
-        response_template = f'{"Unfortunately, I am not able to process your question, as I have detected sensitive content that I am not allowed to process. This might be a mistake, so please try rephrasing your question."}'
         return self.process_answer(
             Answer(question="", answer=text, source_documents=[]),
-            response_template=response_template,
+            response_template=INPUT_RESPONSE_TEMPLATE,
         ).answer
 
     def validate_output_and_replace_if_harmful(self, text):
         logger.info("Validating output text for harmful content")
-        response_template = f'{"Unfortunately, I have detected sensitive content in my answer, which I am not allowed to show you. This might be a mistake, so please try again and maybe rephrase your question."}'
         return self.process_answer(
             Answer(question="", answer=text, source_documents=[]),
-            response_template=response_template,
+            response_template=OUTPUT_RESPONSE_TEMPLATE,
         ).answer
 
+    def stream_screener(self, window_characters: int) -> "StreamScreener":
+        return StreamScreener(self, window_characters)
+
     def _filter_text_and_replace(self, text, response_template):
+        if self.is_harmful(text):
+            logger.warning("Harmful content detected. Replacing text.")
+            return response_template
+        return text
+
+    def is_harmful(self, text: str) -> bool:
+        segments = split_into_segments(text, self.max_segment_characters)
+        if len(segments) == 1:
+            return self._is_segment_harmful(segments[0])
+
+        logger.info(f"Analyzing text in {len(segments)} segments")
+        return any(verdict.result() for verdict in self._submit_segments(segments))
+
+    def _submit_segments(self, segments: list[str]) -> list[Future]:
+        return [
+            self._executor.submit(self._is_segment_harmful, segment)
+            for segment in segments
+        ]
+
+    def _is_segment_harmful(self, text: str) -> bool:
+        key = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        if (harmful := self._get_cached_verdict(key)) is not None:
+            logger.debug("Using the cached content safety verdict")
+            return harmful
+
         logger.info("Analyzing text for harmful content")
         request = AnalyzeTextOptions(text=text)
         try:
@@ -66,15 +144,124 @@ class ContentSafetyChecker(AnswerProcessingBase):
             logger.exception("Analyze text failed.")
             raise
 
-        filtered_text = text
-
-        # if response.hate_result.severity > 0 or response.self_harm_result.severity > 0 or response.sexual_result.severity > 0 or response.violence_result.severity > 0:
-        #     filtered_text = response_template
+        harmful = False
         for result in response.categories_analysis:
             if result.severity > 0:
-                logger.warning(
-                    f"Harmful content detected: Severity: {result.severity}. Replacing text."
-                )
-                filtered_text = response_template
+                logger.warning(f"Harmful content detected: Severity: {result.severity}.")
+                harmful = True
+
+        self._cache_verdict(key, harmful)
+        return harmful
+
+    def _get_cached_verdict(self, key: str) -> Optional[bool]:
+        if self.cache_ttl <= 0:
+            return None
+        with self._verdicts_lock:
+            verdict = self._verdicts.get(key)
+            if verdict is None:
+                return None
+            expires_at, harmful = verdict
+            if expires_at <= time.monotonic():
+                del self._verdicts[key]
+                return None
+            return harmful
+
+    def _cache_verdict(self, key: str, harmful: bool) -> None:
+        if self.cache_ttl <= 0:
+            return
+        now = time.monotonic()
+        with self._verdicts_lock:
+            verdicts = ContentSafetyChecker._verdicts
+            if len(verdicts) >= self._MAX_CACHED_VERDICTS:
+                for expired in [k for k, (t, _) in verdicts.items() if t <= now]:
+                    del verdicts[expired]
+                # Then the oldest verdicts, dicts keep the insertion order
+                while len(verdicts) >= self._MAX_CACHED_VERDICTS:
+                    del verdicts[next(iter(verdicts))]
+            verdicts[key] = (now + self.cache_ttl, harmful)
+
+    @classmethod
+    def clear_cache(cls) -> None:
+        with cls._verdicts_lock:
+            cls._verdicts.clear()
+
+
+class StreamScreener:
+    """
+    Screens an answer while it is generated.
+
+    The answer is cut into windows of at least window_characters that end with a
+    sentence, and each window is analyzed in the background as soon as it is
+    complete. The text of a window is released once it and the windows before it
+    passed. When a window fails nothing more is released, and the answer must be
+    replaced with the replacement message: the output response when nothing was
+    released yet, RETRACTION_MESSAGE otherwise.
+    """
+
+    def __init__(self, checker: ContentSafetyChecker, window_characters: int):
+        self._checker = checker
+        self._window_characters = max(1, window_characters)
+        self._pending = ""
+        self._windows: deque[tuple[str, list[Future]]] = deque()
+        self.released_text = ""
+        self.flagged = False
+
+    @property
+    def replacement(self) -> str:
+        return RETRACTION_MESSAGE if self.released_text else OUTPUT_RESPONSE_TEMPLATE
+
+    def feed(self, delta: str) -> None:
+        self._pending += delta
+        while len(self._pending) >= self._window_characters:
+            end = self._window_end()
+            if end is None:
+                break
+            self._submit(self._pending[:end])
+            self._pending = self._pending[end:]
+
+    def close(self) -> None:
+        """Submits the end of the answer, which may be shorter than a window."""
+        if self._pending:
+            self._submit(self._pending)
+            self._pending = ""
+
+    def release(self) -> str:
+        """Returns the text released so far, without waiting for the pending windows."""
+        while (
+            self._windows
+            and not self.flagged
+            and all(verdict.done() for verdict in self._windows[0][1])
+        ):
+            self._release_next()
+        return self.released_text
+
+    def wait(self) -> str:
+        """Waits for the verdicts of all the submitted windows and returns the text released."""
+        while self._windows and not self.flagged:
+            self._release_next()
+        return self.released_text
+
+    def _window_end(self) -> Optional[int]:
+        for match in SENTENCE_END.finditer(self._pending):
+            if match.end() >= self._window_characters:
+                return match.end()
+        # Without the end of a sentence, cut between words once twice as long
+        segments = split_into_segments(self._pending, 2 * self._window_characters)
+        return len(segments[0]) if len(segments) > 1 else None
+
+    def _submit(self, window: str) -> None:
+        segments = split_into_segments(window, self._checker.max_segment_characters)
+        self._windows.append((window, self._checker._submit_segments(segments)))
+
+    def _release_next(self) -> None:
+        window, verdicts = self._windows.popleft()
+        if not any(verdict.result() for verdict in verdicts):
+            self.released_text += window
+            return
 
-        return filtered_text
+        logger.warning("Harmful content detected in the streamed answer")
+        self.flagged = True
+        for _, remaining in self._windows:
+            for verdict in remaining:
+                verdict.cancel()
+        self._windows.clear()
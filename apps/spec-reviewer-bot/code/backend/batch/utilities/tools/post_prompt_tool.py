@@ -1,22 +1,44 @@
+import re
+
 from ..common.answer import Answer
+from ..helpers.env_helper import EnvHelper
 from ..helpers.llm_helper import LLMHelper
 from ..helpers.config.config_helper import ConfigHelper
+from ..helpers.config.llm_call_site import LLMCallSite
+from ..helpers.token_counter import truncate_to_tokens
+
+CITATION = re.compile(r"\[doc(\d+)\]")
 
 
 class PostPromptTool:
     def __init__(self) -> None:
-        pass
+        env_helper = EnvHelper()
+        self.source_tokens = env_helper.POST_ANSWERING_SOURCE_TOKENS
+        self.model_name = env_helper.AZURE_OPENAI_MODEL_NAME
+
+    def format_sources(self, answer: Answer) -> str:
+        """
+        Lists the sources the answer is checked against, keeping their [docN] labels.
+
+        With POST_ANSWERING_SOURCE_TOKENS set, only the cited sources are kept, or all
+        of them when the answer cites none, each truncated to that many tokens.
+        """
+        sources = list(enumerate(answer.source_documents, start=1))
+        if self.source_tokens <= 0:
+            return "\n".join(f"[doc{i}]: {source.content}" for i, source in sources)
+
+        cited = {int(number) for number in CITATION.findall(answer.answer)}
+        return "\n".join(
+            f"[doc{i}]: {truncate_to_tokens(source.content, self.source_tokens, self.model_name)}"
+            for i, source in sources
+            if i in cited or not cited
+        )
 
     def validate_answer(self, answer: Answer) -> Answer:
         config = ConfigHelper.get_active_config_or_default()
         llm_helper = LLMHelper()
 
-        sources = "\n".join(
-            [
-                f"[doc{i+1}]: {source.content}"
-                for i, source in enumerate(answer.source_documents)
-            ]
-        )
+        sources = self.format_sources(answer)
 
         message = config.prompts.post_answering_prompt.format(
             question=answer.question,
@@ -30,7 +52,8 @@ class PostPromptTool:
                     "role": "user",
                     "content": message,
                 }
-            ]
+            ],
+            call_site=LLMCallSite.POST_VALIDATION,
         )
 
         result = response.choices[0].message.content
@@ -1,11 +1,15 @@
 import json
 import logging
 import warnings
+from typing import Iterator
 
 from ..common.answer import Answer
 from ..common.source_document import SourceDocument
 from ..helpers.azure_blob_storage_client import AzureBlobStorageClient
+from ..helpers.chat_history_budget_helper import ChatHistoryBudget
 from ..helpers.config.config_helper import ConfigHelper
+from ..helpers.config.llm_call_site import LLMCallSite
+from ..helpers.context_packing_helper import ContextPacking
 from ..helpers.env_helper import EnvHelper
 from ..helpers.llm_helper import LLMHelper
 from ..search.search import Search
@@ -21,6 +25,7 @@ class QuestionAnswerTool(AnsweringToolBase):
         self.env_helper = EnvHelper()
         self.llm_helper = LLMHelper()
         self.search_handler = Search.get_search_handler(env_helper=self.env_helper)
+        self.chat_history_budget = ChatHistoryBudget(self.env_helper)
         self.verbose = True
 
         self.config = ConfigHelper.get_active_config_or_default()
@@ -155,6 +160,57 @@ class QuestionAnswerTool(AnsweringToolBase):
 
     def answer_question(self, question: str, chat_history: list[dict], **kwargs):
         logger.info("Answering question")
+        messages, model, source_documents = self.prepare_answer_messages(
+            question, chat_history
+        )
+
+        response = self.llm_helper.get_chat_completion(
+            messages, model=model, call_site=LLMCallSite.ANSWER, temperature=0
+        )
+        clean_answer = self.format_answer_from_response(
+            response, question, source_documents
+        )
+
+        return clean_answer
+
+    def stream_answer_question(
+        self, question: str, chat_history: list[dict], **kwargs
+    ) -> tuple[list[SourceDocument], Iterator[str]]:
+        """
+        Runs detection and retrieval, then returns the source documents together with
+        an iterator over the content deltas of the answer, so that callers can send the
+        citations before the first token is generated.
+        """
+        logger.info("Streaming answer to question")
+        messages, model, source_documents = self.prepare_answer_messages(
+            question, chat_history
+        )
+
+        response = self.llm_helper.get_chat_completion(
+            messages,
+            model=model,
+            call_site=LLMCallSite.ANSWER,
+            temperature=0,
+            stream=True,
+        )
+        return source_documents, self._iterate_content_deltas(response)
+
+    @staticmethod
+    def _iterate_content_deltas(response) -> Iterator[str]:
+        try:
+            for chunk in response:
+                # Azure OpenAI sends a first chunk without choices holding the prompt filter results
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            # Closing the stream stops the generation when the answer is not read to the end
+            if close := getattr(response, "close", None):
+                close()
+
+    def prepare_answer_messages(
+        self, question: str, chat_history: list[dict]
+    ) -> tuple[list[dict], str | None, list[SourceDocument]]:
+        """Returns the answering messages, the model to use and the source documents they cite."""
         # First, ask the LLM to detect whether the input contains a spec excerpt
         # and to generate a concise search query to use against the vector store.
         spec_prompt = ConfigHelper.get_default_spec_assistant()
@@ -167,7 +223,9 @@ class QuestionAnswerTool(AnsweringToolBase):
         ]
 
         try:
-            detection_resp = llm.get_chat_completion(messages_for_detection, temperature=0)
+            detection_resp = llm.get_chat_completion(
+                messages_for_detection, call_site=LLMCallSite.DETECTION, temperature=0
+            )
             detection_text = detection_resp.choices[0].message.content
             try:
                 detection_json = json.loads(detection_text)
@@ -207,10 +265,11 @@ class QuestionAnswerTool(AnsweringToolBase):
                 {"role": "system", "content": system_message},
                 {"role": "user", "content": fallback_user},
             ]
+            return fallback_messages, None, []
 
-            response = llm.get_chat_completion(fallback_messages, temperature=0)
-            clean_answer = self.format_answer_from_response(response, question, [])
-            return clean_answer
+        if self.env_helper.CONTEXT_PACKING_ENABLED:
+            # The packed list is also used for the answer citations, keeping [docN] aligned
+            source_documents = ContextPacking(self.env_helper).pack(source_documents)
 
         if self.env_helper.USE_ADVANCED_IMAGE_PROCESSING:
             image_urls = self.create_image_url_list(source_documents)
@@ -224,7 +283,10 @@ class QuestionAnswerTool(AnsweringToolBase):
 
         if self.config.prompts.use_on_your_data_format:
             messages = self.generate_on_your_data_messages(
-                question, chat_history, source_documents, image_urls
+                question,
+                self.chat_history_budget.fit(chat_history),
+                source_documents,
+                image_urls,
             )
         else:
             warnings.warn(
@@ -232,14 +294,7 @@ class QuestionAnswerTool(AnsweringToolBase):
             )
             messages = self.generate_messages(question, source_documents)
 
-        llm_helper = LLMHelper()
-
-        response = llm_helper.get_chat_completion(messages, model=model, temperature=0)
-        clean_answer = self.format_answer_from_response(
-            response, question, source_documents
-        )
-
-        return clean_answer
+        return messages, model, source_documents
 
     def create_image_url_list(self, source_documents):
         image_types = self.config.get_advanced_image_processing_image_types()
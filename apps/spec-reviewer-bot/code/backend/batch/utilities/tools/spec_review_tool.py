@@ -0,0 +1,207 @@
+import json
+import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterator, List, Optional
+
+from ..common.source_document import SourceDocument
+from ..helpers.azure_blob_storage_client import AzureBlobStorageClient
+from ..helpers.config.config_helper import ConfigHelper
+from ..helpers.config.llm_call_site import LLMCallSite
+from ..helpers.document_chunking_helper import DocumentChunking
+from ..helpers.document_loading_helper import DocumentLoading
+from ..helpers.env_helper import EnvHelper
+from ..helpers.llm_helper import LLMHelper
+from ..helpers.rate_governor import RateGovernor
+from ..search.search import Search
+
+logger = logging.getLogger(__name__)
+
+REVIEW_SYSTEM_PROMPT = """You review one section of a specification against the reference documents retrieved for it.
+Report the requirements that are ambiguous, incomplete, untestable, inconsistent or in conflict with the reference documents, and how to fix them. Cite the reference documents you rely on as [docN].
+Reply with a JSON object only, with the fields:
+- "score": integer from 1 to 10 rating the quality of the section.
+- "findings": list of objects with "severity" ("high", "medium" or "low"), "issue" and "recommendation".
+Reply with an empty findings list when the section has no issue. Write in the language of the section."""
+
+SEVERITIES = ("high", "medium", "low")
+
+
+class SpecReviewTool:
+    """
+    Reviews a whole specification, section by section.
+
+    The uploaded file is split into sections with the loader and chunker configured
+    for its type in the document processors. Each section is reviewed against the
+    documents retrieved for it, concurrently, with the retrieval and review calls
+    paced by a process-wide RateGovernor. The reviews are returned as they complete,
+    followed by a summary aggregating the section scores.
+    """
+
+    # Whether the container of the specs under review was created, if needed
+    _container_ready = False
+
+    def __init__(self) -> None:
+        self.env_helper = EnvHelper()
+        # The governor retries the rate limited calls itself, for all its callers
+        self.llm_helper = LLMHelper(max_retries=0)
+        self.search_handler = Search.get_search_handler(env_helper=self.env_helper)
+        self.config = ConfigHelper.get_active_config_or_default()
+        self.max_sections = self.env_helper.SPEC_REVIEW_MAX_SECTIONS
+        self.max_concurrency = max(1, self.env_helper.SPEC_REVIEW_MAX_CONCURRENCY)
+        self.governor = RateGovernor.shared(
+            "spec-review",
+            self.max_concurrency,
+            self.env_helper.SPEC_REVIEW_REQUESTS_PER_MINUTE,
+        )
+        self.document_processors = {
+            processor.document_type.lower(): processor
+            for processor in self.config.document_processors
+        }
+
+    def supports(self, file_name: str) -> bool:
+        processor = self.document_processors.get(file_name.split(".")[-1].lower())
+        return processor is not None and not processor.use_advanced_image_processing
+
+    def review_document(self, file_name: str, content: bytes) -> Iterator[dict]:
+        """
+        Yields {"sections": count} once the file is split, then {"section": review}
+        for each section as its review completes, then {"summary": aggregate}.
+        """
+        blob_client = AzureBlobStorageClient(
+            container_name=self.env_helper.SPEC_REVIEW_CONTAINER_NAME
+        )
+        if not SpecReviewTool._container_ready:
+            # The container is not provisioned with the storage account
+            blob_client.ensure_container()
+            SpecReviewTool._container_ready = True
+        # The specs under review are kept out of the ingested documents container
+        blob_name = f"{uuid.uuid4()}/{file_name}"
+        source_url = blob_client.upload_file(content, blob_name)
+        try:
+            sections = self.load_sections(source_url, file_name)
+        finally:
+            blob_client.delete_file(blob_name)
+
+        yield {"sections": len(sections)}
+        reviews = []
+        for review in self.review_sections(sections):
+            reviews.append(review)
+            yield {"section": review}
+        yield {"summary": self.aggregate(reviews)}
+
+    def load_sections(self, source_url: str, file_name: str) -> List[SourceDocument]:
+        processor = self.document_processors[file_name.split(".")[-1].lower()]
+        documents = DocumentLoading().load(source_url, processor.loading)
+        sections = [
+            section
+            for section in DocumentChunking().chunk(documents, processor.chunking)
+            if section.content.strip()
+        ]
+        if len(sections) > self.max_sections:
+            logger.warning(
+                f"Reviewing the first {self.max_sections} of {len(sections)} sections of {file_name}"
+            )
+            sections = sections[: self.max_sections]
+        logger.info(f"Split {file_name} into {len(sections)} sections")
+        return sections
+
+    def review_sections(self, sections: List[SourceDocument]) -> Iterator[dict]:
+        with ThreadPoolExecutor(
+            max_workers=self.max_concurrency, thread_name_prefix="spec-review"
+        ) as executor:
+            futures = {
+                executor.submit(self.review_section, index, section): index
+                for index, section in enumerate(sections)
+            }
+            for future in as_completed(futures):
+                yield future.result()
+
+    def review_section(self, index: int, section: SourceDocument) -> dict:
+        review = {
+            "index": index,
+            "page_number": section.page_number,
+            "offset": section.offset,
+            "length": len(section.content),
+            "score": None,
+            "findings": [],
+            "sources": [],
+        }
+        try:
+            source_documents = self.governor.call(
+                Search.get_source_documents, self.search_handler, section.content
+            )
+            response = self.governor.call(
+                self.llm_helper.get_chat_completion,
+                self._review_messages(section, source_documents),
+                call_site=LLMCallSite.REVIEW,
+                temperature=0,
+            )
+            review.update(self._parse_review(response.choices[0].message.content))
+            review["sources"] = [
+                {"id": source.id, "title": source.title, "source": source.source}
+                for source in source_documents
+            ]
+        except Exception:
+            logger.exception(f"Failed to review section {index}")
+            review["error"] = "The review of this section failed."
+        return review
+
+    @staticmethod
+    def _review_messages(
+        section: SourceDocument, source_documents: List[SourceDocument]
+    ) -> list[dict]:
+        sources = "\n\n".join(
+            f"[doc{i+1}]: {source.content}" for i, source in enumerate(source_documents)
+        )
+        return [
+            {"role": "system", "content": REVIEW_SYSTEM_PROMPT},
+            {
+                "role": "user",
+                "content": f"Reference documents:\n{sources or '(none)'}\n\nSection to review:\n{section.content}",
+            },
+        ]
+
+    @staticmethod
+    def _parse_review(text: str) -> dict:
+        try:
+            result = json.loads(text)
+            score = result.get("score")
+            findings = result.get("findings") or []
+        except (AttributeError, TypeError, ValueError):
+            logger.warning("Section review JSON parse failed, keeping the text as a finding.")
+            return {"findings": [{"severity": "low", "issue": text, "recommendation": ""}]}
+
+        return {
+            "score": (
+                min(10, max(1, int(score)))
+                if isinstance(score, (int, float)) and not isinstance(score, bool)
+                else None
+            ),
+            "findings": [finding for finding in findings if isinstance(finding, dict)],
+        }
+
+    @staticmethod
+    def aggregate(reviews: List[dict]) -> dict:
+        """Averages the section scores weighted by section length, and counts the findings by severity."""
+        scored = [review for review in reviews if review.get("score") is not None]
+        total_length = sum(review["length"] for review in scored)
+        score: Optional[float] = None
+        if total_length:
+            score = round(
+                sum(review["score"] * review["length"] for review in scored)
+                / total_length,
+                1,
+            )
+        findings = {severity: 0 for severity in SEVERITIES}
+        for review in reviews:
+            for finding in review["findings"]:
+                severity = finding.get("severity")
+                if severity in findings:
+                    findings[severity] += 1
+        return {
+            "score": score,
+            "sections": len(reviews),
+            "failed_sections": sum(1 for review in reviews if "error" in review),
+            "findings": findings,
+        }
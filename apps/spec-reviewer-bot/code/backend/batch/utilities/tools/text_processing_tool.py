@@ -1,4 +1,5 @@
 from typing import List
+from ..helpers.config.llm_call_site import LLMCallSite
 from ..helpers.llm_helper import LLMHelper
 from .answering_tool_base import AnsweringToolBase
 from ..common.answer import Answer
@@ -24,7 +25,8 @@ class TextProcessingTool(AnsweringToolBase):
             [
                 {"role": "system", "content": system_message},
                 {"role": "user", "content": user_content},
-            ]
+            ],
+            call_site=LLMCallSite.ANSWER,
         )
 
         answer = Answer(
@@ -485,6 +485,7 @@ Use the Retrieved Documents to answer the question: {question}
                         else None
                     ),
                     "enable_chat_history": st.session_state["enable_chat_history"],
+                    "model_routing": config.model_routing.deployments,
                 }
                 ConfigHelper.save_config_as_active(current_config)
                 st.success(
@@ -2,6 +2,7 @@
 This module creates a Flask app that serves the web interface for the chatbot.
 """
 
+import asyncio
 import functools
 import json
 import logging
@@ -9,28 +10,47 @@ import mimetypes
 from os import path
 import sys
 import re
+from typing import AsyncIterator
 from urllib.parse import quote
 
 import requests
 from openai import AzureOpenAI, Stream, APIStatusError
 from openai.types.chat import ChatCompletionChunk
 from flask import Flask, Response, request, Request, jsonify
+from werkzeug.utils import secure_filename
 from dotenv import load_dotenv
+from backend.batch.utilities.helpers.admission_control import (
+    AdmissionController,
+    AdmissionMiddleware,
+)
+from backend.batch.utilities.helpers.async_runtime import AsyncRuntime
 from backend.batch.utilities.helpers.env_helper import EnvHelper
 from backend.batch.utilities.helpers.azure_search_helper import AzureSearchHelper
 from backend.batch.utilities.helpers.orchestrator_helper import Orchestrator
 from backend.batch.utilities.helpers.config.config_helper import ConfigHelper
 from backend.batch.utilities.helpers.config.conversation_flow import ConversationFlow
 from backend.api.chat_history import bp_chat_history_response
+from backend.batch.utilities.chat_history.auth_utils import (
+    get_authenticated_user_details,
+)
+from backend.batch.utilities.chat_history.conversation_summarizer import (
+    ConversationSummarizer,
+)
 from azure.mgmt.cognitiveservices import CognitiveServicesManagementClient
 from azure.core.exceptions import ClientAuthenticationError, ResourceNotFoundError, ServiceRequestError
 from backend.batch.utilities.helpers.azure_credential_utils import get_azure_credential
 from backend.batch.utilities.helpers.azure_blob_storage_client import (
     AzureBlobStorageClient,
 )
+from backend.batch.utilities.tools.spec_review_tool import SpecReviewTool
 
 ERROR_429_MESSAGE = "We're currently experiencing a high number of requests for the service you're trying to access. Please wait a moment and try again."
 ERROR_GENERIC_MESSAGE = "An error occurred. Please try again. If the problem persists, please contact the site administrator."
+STREAM_FORMAT_HEADER = "X-Stream-Format"
+STREAM_FORMAT_V1 = "v1"
+STREAM_FORMAT_V2 = "v2"
+# The endpoints using Azure OpenAI or the chat history database, subject to admission control
+ADMISSION_CONTROLLED_PATHS = ("/api/conversation", "/api/history/", "/api/review")
 logger = logging.getLogger(__name__)
 
 
@@ -91,8 +111,32 @@ def should_use_data(
     return False
 
 
-def stream_with_data(response: Stream[ChatCompletionChunk]):
-    """This function streams the response from Azure OpenAI with data."""
+def get_stream_format(conversation: Request) -> str:
+    """This function gets the stream format requested by the client, v1 unless v2 is asked for."""
+    requested = conversation.headers.get(STREAM_FORMAT_HEADER, "").strip().lower()
+    return STREAM_FORMAT_V2 if requested == STREAM_FORMAT_V2 else STREAM_FORMAT_V1
+
+
+def stream_response(generator, stream_format: str) -> Response:
+    """This function wraps a stream in a JSON lines response announcing its format."""
+    return Response(
+        generator,
+        mimetype="application/json-lines",
+        headers={STREAM_FORMAT_HEADER: stream_format},
+    )
+
+
+def stream_with_data(
+    response: Stream[ChatCompletionChunk], stream_format: str = STREAM_FORMAT_V1
+):
+    """
+    This function streams the response from Azure OpenAI with data.
+
+    In the v1 format every line is the whole response so far. In the v2 format the
+    first line is the whole response, including the citations, and the following lines
+    only carry what changed: {"delta": {"index": i, "content": text}} appends text to
+    the content of message i and {"end_turn": true} ends the assistant turn.
+    """
     response_obj = {
         "id": "",
         "model": "",
@@ -115,13 +159,18 @@ def stream_with_data(response: Stream[ChatCompletionChunk]):
             }
         ],
     }
+    send_deltas = stream_format == STREAM_FORMAT_V2
+    snapshot_sent = False
 
     for line in response:
         choice = line.choices[0]
 
         if choice.model_extra["end_turn"]:
             response_obj["choices"][0]["messages"][1]["end_turn"] = True
-            yield json.dumps(response_obj, ensure_ascii=False) + "\n"
+            if send_deltas and snapshot_sent:
+                yield json.dumps({"end_turn": True}) + "\n"
+            else:
+                yield json.dumps(response_obj, ensure_ascii=False) + "\n"
             return
 
         response_obj["id"] = line.id
@@ -140,7 +189,14 @@ def stream_with_data(response: Stream[ChatCompletionChunk]):
             )
         else:
             response_obj["choices"][0]["messages"][1]["content"] += delta.content
-
+            if send_deltas and snapshot_sent:
+                yield json.dumps(
+                    {"delta": {"index": 1, "content": delta.content}},
+                    ensure_ascii=False,
+                ) + "\n"
+                continue
+
+        snapshot_sent = True
         yield json.dumps(response_obj, ensure_ascii=False) + "\n"
 
 
@@ -277,11 +333,20 @@ def conversation_with_data(conversation: Request, env_helper: EnvHelper):
         return response_obj
 
     logger.info("Method conversation_with_data ended")
-    return Response(stream_with_data(response), mimetype="application/json-lines")
+    stream_format = get_stream_format(conversation)
+    return stream_response(stream_with_data(response, stream_format), stream_format)
 
 
-def stream_without_data(response: Stream[ChatCompletionChunk]):
-    """This function streams the response from Azure OpenAI without data."""
+def stream_without_data(
+    response: Stream[ChatCompletionChunk], stream_format: str = STREAM_FORMAT_V1
+):
+    """
+    This function streams the response from Azure OpenAI without data.
+
+    The v2 format sends the whole response once, then {"delta": {"index": 0, "content": text}}
+    lines appending text to the assistant message.
+    """
+    send_deltas = stream_format == STREAM_FORMAT_V2
     response_text = ""
     for line in response:
         if not line.choices:
@@ -292,6 +357,13 @@ def stream_without_data(response: Stream[ChatCompletionChunk]):
         if delta_text is None:
             return
 
+        if send_deltas and response_text:
+            response_text += delta_text
+            yield json.dumps(
+                {"delta": {"index": 0, "content": delta_text}}, ensure_ascii=False
+            ) + "\n"
+            continue
+
         response_text += delta_text
 
         response_obj = {
@@ -306,6 +378,55 @@ def stream_without_data(response: Stream[ChatCompletionChunk]):
         yield json.dumps(response_obj, ensure_ascii=False) + "\n"
 
 
+def stream_custom(messages_stream: AsyncIterator[list[dict]], model: str):
+    """This function streams the messages of the custom orchestrators."""
+    # Without the shared loop, the view's event loop is gone once the response starts
+    runtime = AsyncRuntime.current()
+    loop = None if runtime else asyncio.new_event_loop()
+    run = runtime.run if runtime else loop.run_until_complete
+    try:
+        while True:
+            try:
+                messages = run(anext(messages_stream))
+            except StopAsyncIteration:
+                return
+
+            response_obj = {
+                "id": "response.id",
+                "model": model,
+                "created": "response.created",
+                "object": "response.object",
+                "choices": [{"messages": messages}],
+            }
+            yield json.dumps(response_obj, ensure_ascii=False) + "\n"
+    except APIStatusError as e:
+        logger.exception("Exception in /api/conversation | %s", str(e))
+        response_json = e.response.json()
+        response_message = response_json.get("error", {}).get("message", "")
+        response_code = response_json.get("error", {}).get("code", "")
+        if response_code == "429" or "429" in response_message:
+            yield json.dumps({"error": ERROR_429_MESSAGE}) + "\n"
+        else:
+            yield json.dumps({"error": ERROR_GENERIC_MESSAGE}) + "\n"
+    except Exception as e:
+        logger.exception("Exception in /api/conversation | %s", str(e))
+        yield json.dumps({"error": ERROR_GENERIC_MESSAGE}) + "\n"
+    finally:
+        run(messages_stream.aclose())
+        if loop:
+            loop.close()
+
+
+def stream_review(spec_review_tool: SpecReviewTool, file_name: str, content: bytes):
+    """This function streams the events of a specification review as JSON lines."""
+    try:
+        for event in spec_review_tool.review_document(file_name, content):
+            yield json.dumps(event, ensure_ascii=False) + "\n"
+    except Exception as e:
+        logger.exception("Exception in /api/review | %s", str(e))
+        yield json.dumps({"error": ERROR_GENERIC_MESSAGE}) + "\n"
+
+
 def get_message_orchestrator():
     """This function gets the message orchestrator."""
     return Orchestrator()
@@ -372,7 +493,8 @@ def conversation_without_data(conversation: Request, env_helper: EnvHelper):
         }
         return jsonify(response_obj), 200
 
-    return Response(stream_without_data(response), mimetype="application/json-lines")
+    stream_format = get_stream_format(conversation)
+    return stream_response(stream_without_data(response, stream_format), stream_format)
 
 
 @functools.cache
@@ -393,6 +515,21 @@ def get_speech_key(env_helper: EnvHelper):
     return keys.key1
 
 
+class SharedLoopFlask(Flask):
+    """Runs the async views on the process-wide event loop once the AsyncRuntime is started."""
+
+    def async_to_sync(self, func):
+        runtime = AsyncRuntime.current()
+        if runtime is None:
+            return super().async_to_sync(func)
+
+        @functools.wraps(func)
+        def run(*args, **kwargs):
+            return runtime.run(func(*args, **kwargs))
+
+        return run
+
+
 def create_app():
     """This function creates the Flask app."""
     # Fixing MIME types for static files under Windows
@@ -405,8 +542,17 @@ def create_app():
         path.join(path.dirname(__file__), "..", "..", ".env")
     )  # Load environment variables from .env file
 
-    app = Flask(__name__)
+    app = SharedLoopFlask(__name__)
     env_helper: EnvHelper = EnvHelper()
+    if env_helper.SHARED_EVENT_LOOP_ENABLED:
+        AsyncRuntime.start()
+    if env_helper.ADMISSION_CONTROL_ENABLED:
+        app.wsgi_app = AdmissionMiddleware(
+            app.wsgi_app,
+            AdmissionController(env_helper),
+            ADMISSION_CONTROLLED_PATHS,
+            ERROR_429_MESSAGE,
+        )
     azure_search_helper: AzureSearchHelper = AzureSearchHelper()
 
     logger.debug("Starting web app")
@@ -546,6 +692,26 @@ def create_app():
                     request.json["messages"][0:-1],
                 )
             )
+            user_id = get_authenticated_user_details(request_headers=request.headers)[
+                "user_principal_id"
+            ]
+            user_assistant_messages = (
+                await ConversationSummarizer().compact_chat_history(
+                    user_id, conversation_id, user_assistant_messages
+                )
+            )
+
+            if env_helper.CUSTOM_FLOW_STREAMING_ENABLED:
+                messages_stream = message_orchestrator.handle_message_stream(
+                    user_message=user_message,
+                    chat_history=user_assistant_messages,
+                    conversation_id=conversation_id,
+                    orchestrator=get_orchestrator_config(),
+                )
+                return Response(
+                    stream_custom(messages_stream, env_helper.AZURE_OPENAI_MODEL),
+                    mimetype="application/json-lines",
+                )
 
             messages = await message_orchestrator.handle_message(
                 user_message=user_message,
@@ -582,13 +748,15 @@ def create_app():
 
     @app.route("/api/conversation", methods=["POST"])
     async def conversation():
-        ConfigHelper.get_active_config_or_default.cache_clear()
-        result = ConfigHelper.get_active_config_or_default()
+        # Picks up the configuration saved from the admin app, off the event loop
+        ConfigHelper.expire_active_config(env_helper.CONFIG_CACHE_TTL_SECONDS)
+        result = await asyncio.to_thread(ConfigHelper.get_active_config_or_default)
         conversation_flow = result.prompts.conversational_flow
         if conversation_flow == ConversationFlow.CUSTOM.value:
             return await conversation_custom()
         elif conversation_flow == ConversationFlow.BYOD.value:
-            return conversation_azure_byod()
+            # Calls Azure OpenAI synchronously
+            return await asyncio.to_thread(conversation_azure_byod)
         else:
             return (
                 jsonify(
@@ -599,6 +767,32 @@ def create_app():
                 500,
             )
 
+    @app.route("/api/review", methods=["POST"])
+    def review_spec():
+        """
+        Reviews a whole specification uploaded as the file field, section by section.
+
+        Streams JSON lines: the number of sections, then each section review as it
+        completes, then the summary with the overall score.
+        """
+        file = request.files.get("file")
+        if file is None or not file.filename:
+            return jsonify({"error": "A specification file is required"}), 400
+
+        file_name = secure_filename(file.filename)
+        try:
+            spec_review_tool = SpecReviewTool()
+        except Exception as e:
+            logger.exception("Exception in /api/review | %s", str(e))
+            return jsonify({"error": ERROR_GENERIC_MESSAGE}), 500
+        if not spec_review_tool.supports(file_name):
+            return jsonify({"error": "Unsupported file type"}), 400
+
+        return Response(
+            stream_review(spec_review_tool, file_name, file.read()),
+            mimetype="application/json-lines",
+        )
+
     @app.route("/api/speech", methods=["GET"])
     def speech_config():
         """Get the speech config for Azure Speech."""
@@ -632,7 +826,7 @@ def create_app():
 
     @app.route("/api/assistanttype", methods=["GET"])
     def assistanttype():
-        ConfigHelper.get_active_config_or_default.cache_clear()
+        ConfigHelper.expire_active_config(env_helper.CONFIG_CACHE_TTL_SECONDS)
         result = ConfigHelper.get_active_config_or_default()
         return jsonify({"ai_assistant_type": result.prompts.ai_assistant_type})
 
@@ -131,10 +131,17 @@ export const historyRead = async (convId: string): Promise<ChatMessage[]> => {
   return response;
 };
 
+// Cursor of the page starting at each offset, returned with the previous page
+const historyCursors = new Map<number, string>();
+
 export const historyList = async (
   offset = 0
 ): Promise<Conversation[] | null> => {
-  let response = await fetch(`/api/history/list?offset=${offset}`, {
+  const cursor = offset > 0 ? historyCursors.get(offset) : undefined;
+  const query = cursor
+    ? `cursor=${encodeURIComponent(cursor)}`
+    : `offset=${offset}`;
+  let response = await fetch(`/api/history/list?${query}`, {
     method: "GET",
   })
     .then(async (res) => {
@@ -143,6 +150,10 @@ export const historyList = async (
         console.error("There was an issue fetching your data.");
         return null;
       }
+      const nextCursor = res.headers?.get("X-Next-Cursor");
+      if (nextCursor) {
+        historyCursors.set(offset + payload.length, nextCursor);
+      }
       const conversations: Conversation[] = payload.map((conv: any) => {
         const conversation: Conversation = {
           id: conv.id,
@@ -0,0 +1,240 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from backend.batch.utilities.chat_history.conversation_summarizer import (
+    ConversationSummarizer,
+)
+
+
+@pytest.fixture(autouse=True)
+def env_helper_mock():
+    with patch(
+        "backend.batch.utilities.chat_history.conversation_summarizer.EnvHelper"
+    ) as mock:
+        env_helper = mock.return_value
+        env_helper.CHAT_HISTORY_SUMMARY_TOKEN_THRESHOLD = 10
+        env_helper.CHAT_HISTORY_SUMMARY_RECENT_MESSAGES = 2
+        env_helper.AZURE_OPENAI_MODEL_NAME = "gpt-4.1"
+        yield env_helper
+
+
+@pytest.fixture(autouse=True)
+def config_mock():
+    with patch(
+        "backend.batch.utilities.chat_history.conversation_summarizer.ConfigHelper"
+    ) as mock:
+        config = mock.get_active_config_or_default.return_value
+        config.enable_chat_history = True
+        yield config
+
+
+@pytest.fixture(autouse=True)
+def token_counter_mock():
+    with patch(
+        "backend.batch.utilities.chat_history.conversation_summarizer.count_message_tokens",
+        side_effect=lambda message, model_name=None: len(message["content"].split()),
+    ):
+        yield
+
+
+@pytest.fixture
+def conversation_client_mock():
+    with patch(
+        "backend.batch.utilities.chat_history.conversation_summarizer.DatabaseFactory"
+    ) as mock:
+        conversation_client = AsyncMock()
+        mock.get_conversation_client.return_value = conversation_client
+        yield conversation_client
+
+
+@pytest.fixture
+def llm_helper_mock():
+    with patch(
+        "backend.batch.utilities.chat_history.conversation_summarizer.LLMHelper"
+    ) as mock:
+        llm_helper = mock.return_value
+        llm_helper.get_chat_completion.return_value.choices = [
+            MagicMock(message=MagicMock(content=" new summary "))
+        ]
+        yield llm_helper
+
+
+def message(role, content):
+    return {"role": role, "content": content}
+
+
+def test_apply_summary_replaces_summarized_turns():
+    # given
+    chat_history = [
+        message("user", "first"),
+        message("assistant", "second"),
+        message("user", "third"),
+    ]
+    summary = {"summary": "mock summary", "summarized_message_count": 2}
+
+    # when
+    result = ConversationSummarizer.apply_summary(summary, chat_history)
+
+    # then
+    assert result == [
+        message("system", "Summary of the earlier conversation:\nmock summary"),
+        message("user", "third"),
+    ]
+
+
+def test_apply_summary_ignores_summary_longer_than_history():
+    # given
+    chat_history = [message("user", "first")]
+    summary = {"summary": "mock summary", "summarized_message_count": 4}
+
+    # when
+    result = ConversationSummarizer.apply_summary(summary, chat_history)
+
+    # then
+    assert result is chat_history
+
+
+@pytest.mark.asyncio
+async def test_compact_chat_history_uses_stored_summary(conversation_client_mock):
+    # given
+    conversation_client_mock.get_conversation_summary.return_value = {
+        "summary": "mock summary",
+        "summarized_message_count": 1,
+    }
+    chat_history = [message("user", "first"), message("assistant", "second")]
+    summarizer = ConversationSummarizer()
+    summarizer.token_threshold = 2
+
+    # when
+    result = await summarizer.compact_chat_history(
+        "user-id", "conversation-id", chat_history
+    )
+
+    # then
+    conversation_client_mock.get_conversation_summary.assert_awaited_once_with(
+        "user-id", "conversation-id"
+    )
+    conversation_client_mock.close.assert_awaited_once()
+    assert result[1:] == [message("assistant", "second")]
+
+
+@pytest.mark.asyncio
+async def test_compact_chat_history_skipped_when_chat_history_disabled(
+    config_mock, conversation_client_mock
+):
+    # given
+    config_mock.enable_chat_history = False
+    chat_history = [message("user", "first")]
+
+    # when
+    result = await ConversationSummarizer().compact_chat_history(
+        "user-id", "conversation-id", chat_history
+    )
+
+    # then
+    assert result is chat_history
+    conversation_client_mock.connect.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_compact_chat_history_skipped_below_threshold(conversation_client_mock):
+    # given
+    chat_history = [message("user", "first"), message("assistant", "second")]
+    summarizer = ConversationSummarizer()
+    summarizer.token_threshold = 3
+
+    # when
+    result = await summarizer.compact_chat_history(
+        "user-id", "conversation-id", chat_history
+    )
+
+    # then
+    assert result is chat_history
+    conversation_client_mock.connect.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_compact_chat_history_falls_back_on_error(conversation_client_mock):
+    # given
+    conversation_client_mock.connect.side_effect = Exception("connection error")
+    chat_history = [message("user", "first")]
+    summarizer = ConversationSummarizer()
+    summarizer.token_threshold = 1
+
+    # when
+    result = await summarizer.compact_chat_history(
+        "user-id", "conversation-id", chat_history
+    )
+
+    # then
+    assert result is chat_history
+
+
+@pytest.mark.asyncio
+async def test_summarize_folds_older_turns_into_summary(
+    conversation_client_mock, llm_helper_mock
+):
+    # given
+    conversation_client_mock.get_messages.return_value = [
+        message("user", "one two three four"),
+        message("tool", "citations"),
+        message("assistant", "five six seven eight"),
+        message("user", "nine ten eleven twelve"),
+        message("user", "recent question"),
+        message("assistant", "recent answer"),
+    ]
+    conversation_client_mock.get_conversation_summary.return_value = {
+        "summary": "previous summary",
+        "summarized_message_count": 1,
+    }
+    # The two pending messages hold 8 tokens
+    summarizer = ConversationSummarizer()
+    summarizer.token_threshold = 8
+
+    # when
+    result = await summarizer.summarize("user-id", "conversation-id")
+
+    # then
+    assert result is True
+    prompt = llm_helper_mock.get_chat_completion.call_args[0][0][1]["content"]
+    assert "previous summary" in prompt
+    assert "assistant: five six seven eight\nuser: nine ten eleven twelve" in prompt
+    assert "one two three four" not in prompt
+    conversation_client_mock.upsert_conversation_summary.assert_awaited_once_with(
+        "user-id", "conversation-id", "new summary", 3
+    )
+
+
+@pytest.mark.asyncio
+async def test_summarize_waits_for_threshold(conversation_client_mock, llm_helper_mock):
+    # given
+    conversation_client_mock.get_messages.return_value = [
+        message("user", "short question"),
+        message("assistant", "short answer"),
+        message("user", "recent question"),
+        message("assistant", "recent answer"),
+    ]
+    conversation_client_mock.get_conversation_summary.return_value = None
+
+    # when
+    result = await ConversationSummarizer().summarize("user-id", "conversation-id")
+
+    # then
+    assert result is False
+    llm_helper_mock.get_chat_completion.assert_not_called()
+    conversation_client_mock.upsert_conversation_summary.assert_not_called()
+
+
+def test_schedule_runs_summarization_in_background():
+    # given
+    summarizer = ConversationSummarizer()
+
+    with patch.object(ConversationSummarizer, "_executor") as executor_mock:
+        # when
+        summarizer.schedule("user-id", "conversation-id")
+        summarizer.schedule("user-id", "conversation-id")
+
+    # then
+    executor_mock.submit.assert_called_once_with(
+        summarizer._run, "user-id", "conversation-id"
+    )
+    ConversationSummarizer._in_flight.clear()
@@ -0,0 +1,153 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from backend.batch.utilities.chat_history.conversation_titler import (
+    ConversationTitler,
+    provisional_title,
+)
+from backend.batch.utilities.helpers.config.llm_call_site import LLMCallSite
+
+
+@pytest.fixture(autouse=True)
+def env_helper_mock():
+    with patch(
+        "backend.batch.utilities.chat_history.conversation_titler.EnvHelper"
+    ) as mock:
+        env_helper = mock.return_value
+        env_helper.CHAT_HISTORY_TITLE_BATCH_SIZE = 2
+        yield env_helper
+
+
+@pytest.fixture(autouse=True)
+def clear_pending():
+    yield
+    ConversationTitler._pending.clear()
+    ConversationTitler._draining.clear()
+
+
+@pytest.fixture
+def conversation_client_mock():
+    with patch(
+        "backend.batch.utilities.chat_history.conversation_titler.DatabaseFactory"
+    ) as mock:
+        conversation_client = AsyncMock()
+        mock.get_conversation_client.return_value = conversation_client
+        yield conversation_client
+
+
+@pytest.fixture
+def llm_helper_mock():
+    with patch(
+        "backend.batch.utilities.chat_history.conversation_titler.LLMHelper"
+    ) as mock:
+        yield mock.return_value
+
+
+def completion(content):
+    response = MagicMock()
+    response.choices = [MagicMock(message=MagicMock(content=content))]
+    return response
+
+
+def message(role, content):
+    return {"role": role, "content": content}
+
+
+def test_provisional_title_truncates_first_user_message():
+    # given
+    messages = [
+        message("system", "ignored"),
+        message("user", "Review   the acceptance criteria\nof the login specification please"),
+        message("user", "second"),
+    ]
+
+    # when
+    title = provisional_title(messages)
+
+    # then
+    assert title == "Review the acceptance criteria of the login speci…"
+    assert len(title) == 50
+
+
+def test_provisional_title_without_user_message():
+    assert provisional_title([message("assistant", "Hi!")]) == "Untitled"
+
+
+def test_generate_titles_in_one_completion(llm_helper_mock):
+    # given
+    llm_helper_mock.get_chat_completion.return_value = completion(
+        '```json\n["Login review", " Payment flow "]\n```'
+    )
+
+    # when
+    titles = ConversationTitler().generate_titles(["login", "payment"])
+
+    # then
+    assert titles == ["Login review", "Payment flow"]
+    llm_helper_mock.get_chat_completion.assert_called_once()
+    messages = llm_helper_mock.get_chat_completion.call_args.args[0]
+    assert messages[1]["content"] == "Conversation 1:\nlogin\n\nConversation 2:\npayment"
+    assert (
+        llm_helper_mock.get_chat_completion.call_args.kwargs["call_site"]
+        == LLMCallSite.TITLE
+    )
+
+
+def test_generate_titles_rejects_missing_titles(llm_helper_mock):
+    # given
+    llm_helper_mock.get_chat_completion.return_value = completion('["Only one"]')
+
+    # when / then
+    with pytest.raises(ValueError):
+        ConversationTitler().generate_titles(["login", "payment"])
+
+
+def test_schedule_batches_pending_conversations():
+    # given
+    titler = ConversationTitler()
+
+    with patch.object(ConversationTitler, "_executor") as executor_mock:
+        # when
+        titler.schedule("user-id", "first", [message("user", "login")], "login")
+        titler.schedule("user-id", "second", [message("user", "payment")], "payment")
+        titler.schedule("user-id", "third", [message("user", "search")], "search")
+
+    # then
+    executor_mock.submit.assert_called_once_with(titler._drain)
+    with patch.object(titler, "_run") as run_mock:
+        titler._drain()
+    assert [call.args[0] for call in run_mock.call_args_list] == [
+        [
+            (("user-id", "first"), ("login", "login")),
+            (("user-id", "second"), ("payment", "payment")),
+        ],
+        [(("user-id", "third"), ("search", "search"))],
+    ]
+    assert not ConversationTitler._draining.is_set()
+
+
+def test_run_replaces_provisional_titles(llm_helper_mock, conversation_client_mock):
+    # given
+    llm_helper_mock.get_chat_completion.return_value = completion('["Login review", ""]')
+    conversation_client_mock.update_conversation_title.return_value = True
+    batch = [
+        (("user-id", "first"), ("login", "login")),
+        (("user-id", "second"), ("payment", "payment")),
+    ]
+
+    # when
+    with patch(
+        "backend.batch.utilities.chat_history.conversation_titler.AsyncRuntime.current",
+        return_value=None,
+    ):
+        ConversationTitler()._run(batch)
+
+    # then
+    assert [
+        call.args
+        for call in conversation_client_mock.update_conversation_title.await_args_list
+    ] == [
+        ("user-id", "first", "Login review", "login"),
+        # Keeps the provisional title, and clears its pending flag
+        ("user-id", "second", "payment", "payment"),
+    ]
+    conversation_client_mock.close.assert_awaited_once()
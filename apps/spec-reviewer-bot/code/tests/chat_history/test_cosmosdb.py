@@ -1,7 +1,43 @@
 import pytest
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 from azure.cosmos import exceptions
 from backend.batch.utilities.chat_history.cosmosdb import CosmosConversationClient
+from backend.batch.utilities.chat_history.database_client_base import (
+    InvalidCursorError,
+    decode_cursor,
+    encode_cursor,
+)
+
+
+class FakePages:
+    """The pages of a query, as iterated by by_page, with their continuation token."""
+
+    def __init__(self, pages, continuation_token):
+        self._pages = iter(pages)
+        self.continuation_token = continuation_token
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return FakeItems(next(self._pages))
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class FakeItems:
+    def __init__(self, items):
+        self._items = iter(items)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._items)
+        except StopIteration:
+            raise StopAsyncIteration
 
 
 @pytest.fixture
@@ -115,6 +151,43 @@ async def test_upsert_conversation_success(cosmos_client):
     assert response["id"] == "500e77bd-26b9-441a-8fe3-cd0e02993671"
 
 
+@pytest.mark.asyncio
+async def test_update_conversation_title_patches_provisional_title(cosmos_client):
+    client = cosmos_client
+    client.container_client.patch_item = AsyncMock(return_value={})
+
+    result = await client.update_conversation_title(
+        "user_id", "conversation_id", "Generated", 'Review "login"'
+    )
+
+    assert result is True
+    client.container_client.patch_item.assert_awaited_once_with(
+        item="conversation_id",
+        partition_key="user_id",
+        patch_operations=[
+            {"op": "set", "path": "/title", "value": "Generated"},
+            {"op": "set", "path": "/titlePending", "value": False},
+        ],
+        filter_predicate='FROM c WHERE c.title = "Review \\"login\\""',
+    )
+
+
+@pytest.mark.asyncio
+async def test_update_conversation_title_of_renamed_conversation(cosmos_client):
+    client = cosmos_client
+    client.container_client.patch_item = AsyncMock(
+        side_effect=exceptions.CosmosAccessConditionFailedError(
+            status_code=412, message="Precondition failed"
+        )
+    )
+
+    result = await client.update_conversation_title(
+        "user_id", "conversation_id", "Generated", "Provisional"
+    )
+
+    assert result is False
+
+
 @pytest.mark.asyncio
 async def test_delete_conversation_success(cosmos_client):
     client = cosmos_client
@@ -160,6 +233,67 @@ async def test_delete_messages_success(cosmos_client):
     )
 
 
+@pytest.mark.asyncio
+async def test_save_turn_touches_conversation_in_one_batch(cosmos_client):
+    client = cosmos_client
+    conversation = {"id": "conversation_id", "updatedAt": "2024-01-01T00:00:00"}
+    client.container_client.execute_item_batch = AsyncMock(
+        return_value=[{"resourceBody": conversation}, {}, {}]
+    )
+    messages = [
+        {"role": "user", "content": "question"},
+        {"role": "assistant", "content": "answer"},
+    ]
+
+    result = await client.save_turn("user_id", "conversation_id", messages, "title")
+
+    assert result == conversation
+    client.container_client.execute_item_batch.assert_awaited_once()
+    call = client.container_client.execute_item_batch.await_args
+    assert call.kwargs["partition_key"] == "user_id"
+    patch_operation, *create_operations = call.kwargs["batch_operations"]
+    assert patch_operation[0] == "patch"
+    item_id, [operation] = patch_operation[1]
+    assert item_id == "conversation_id"
+    assert operation["path"] == "/updatedAt"
+    created = [operation[1][0] for operation in create_operations]
+    assert [item["role"] for item in created] == ["user", "assistant"]
+    assert created[0]["createdAt"] < created[1]["createdAt"] == operation["value"]
+    assert all(item["conversationId"] == "conversation_id" for item in created)
+
+
+@pytest.mark.asyncio
+async def test_save_turn_creates_missing_conversation(cosmos_client):
+    client = cosmos_client
+    missing = exceptions.CosmosBatchOperationError(
+        error_index=0,
+        headers={},
+        status_code=404,
+        message="Not found",
+        operation_responses=[{"statusCode": 404}, {"statusCode": 424}],
+    )
+    conversation = {"id": "conversation_id", "title": "title"}
+    client.container_client.execute_item_batch = AsyncMock(
+        side_effect=[missing, [{"resourceBody": conversation}, {}]]
+    )
+
+    result = await client.save_turn(
+        "user_id",
+        "conversation_id",
+        [{"role": "assistant", "content": "answer"}],
+        "title",
+    )
+
+    assert result == conversation
+    retry = client.container_client.execute_item_batch.await_args_list[1]
+    operation, (created,) = retry.kwargs["batch_operations"][0]
+    assert operation == "create"
+    assert created["type"] == "conversation"
+    assert created["title"] == "title"
+    assert created["titlePending"] is True
+    assert created["userId"] == "user_id"
+
+
 @pytest.mark.asyncio
 async def test_update_message_feedback_success(cosmos_client):
     client = cosmos_client
@@ -179,3 +313,86 @@ async def test_update_message_feedback_success(cosmos_client):
 
     assert response["feedback"] == "positive"
     client.container_client.upsert_item.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_get_conversation_summary_not_found(cosmos_client):
+    client = cosmos_client
+    client.container_client.read_item = AsyncMock(
+        side_effect=exceptions.CosmosResourceNotFoundError()
+    )
+
+    response = await client.get_conversation_summary("user-123", "conversation-123")
+
+    assert response is None
+    client.container_client.read_item.assert_called_once_with(
+        item="conversation-123-summary", partition_key="user-123"
+    )
+
+
+@pytest.mark.asyncio
+async def test_upsert_conversation_summary_success(cosmos_client):
+    client = cosmos_client
+    client.container_client.upsert_item = AsyncMock(return_value={"id": "summary"})
+
+    response = await client.upsert_conversation_summary(
+        "user-123", "conversation-123", "Summary", 4
+    )
+
+    assert response == {"id": "summary"}
+    item = client.container_client.upsert_item.call_args[0][0]
+    assert item["id"] == "conversation-123-summary"
+    assert item["type"] == "summary"
+    assert item["userId"] == "user-123"
+    assert item["summary"] == "Summary"
+    assert item["summarized_message_count"] == 4
+
+
+@pytest.mark.asyncio
+async def test_get_conversations_page_resumes_from_continuation_token(cosmos_client):
+    # given
+    client = cosmos_client
+    query_iterable = MagicMock()
+    query_iterable.by_page.return_value = FakePages(
+        [[{"id": "conversation-2"}, {"id": "conversation-1"}], [{"id": "other"}]],
+        "next-token",
+    )
+    client.container_client.query_items = MagicMock(return_value=query_iterable)
+
+    # when
+    conversations, cursor = await client.get_conversations_page(
+        "user-id", 2, encode_cursor({"continuation": "token"})
+    )
+
+    # then
+    assert [c["id"] for c in conversations] == ["conversation-2", "conversation-1"]
+    assert decode_cursor(cursor) == {"continuation": "next-token"}
+    query_iterable.by_page.assert_called_once_with("token")
+    kwargs = client.container_client.query_items.call_args.kwargs
+    assert kwargs["partition_key"] == "user-id"
+    assert kwargs["max_item_count"] == 2
+
+
+@pytest.mark.asyncio
+async def test_get_conversations_page_last_page_has_no_cursor(cosmos_client):
+    # given
+    client = cosmos_client
+    query_iterable = MagicMock()
+    query_iterable.by_page.return_value = FakePages([[{"id": "conversation-1"}]], None)
+    client.container_client.query_items = MagicMock(return_value=query_iterable)
+
+    # when
+    conversations, cursor = await client.get_conversations_page("user-id", 2)
+
+    # then
+    assert len(conversations) == 1
+    assert cursor is None
+    query_iterable.by_page.assert_called_once_with(None)
+
+
+@pytest.mark.asyncio
+async def test_get_conversations_page_rejects_invalid_cursor(cosmos_client):
+    with pytest.raises(InvalidCursorError):
+        await cosmos_client.get_conversations_page(
+            "user-id", 2, encode_cursor({"updatedAt": "2024-01-01"})
+        )
@@ -1,8 +1,26 @@
+from datetime import datetime, timezone
+
 import pytest
 from unittest.mock import AsyncMock, patch
+from backend.batch.utilities.chat_history.database_client_base import (
+    InvalidCursorError,
+    encode_cursor,
+)
 from backend.batch.utilities.chat_history.postgresdbservice import (
+    GET_CONVERSATIONS_FIRST_PAGE_QUERY,
+    GET_CONVERSATIONS_NEXT_PAGE_QUERY,
+    GET_MESSAGES_QUERY,
+    SAVE_TURN_QUERY,
     PostgresConversationClient,
 )
+from backend.batch.utilities.helpers.postgres_pool import PostgresTokenProvider
+
+
+@pytest.fixture(autouse=True)
+def clear_token_providers():
+    PostgresTokenProvider.clear()
+    yield
+    PostgresTokenProvider.clear()
 
 
 @pytest.fixture
@@ -21,11 +39,12 @@ def mock_connection():
 
 
 @patch("backend.batch.utilities.chat_history.postgresdbservice.asyncpg.connect")
-@patch("backend.batch.utilities.chat_history.postgresdbservice.get_azure_credential")
+@patch("backend.batch.utilities.helpers.postgres_pool.get_azure_credential")
 @pytest.mark.asyncio
 async def test_connect(mock_credential, mock_connect, postgres_client, mock_connection):
     # Mock get_azure_credential
     mock_credential.return_value.get_token.return_value.token = "mock_token"
+    mock_credential.return_value.get_token.return_value.expires_on = 2**40
 
     # Mock asyncpg connection
     mock_connect.return_value = mock_connection
@@ -40,6 +59,8 @@ async def test_connect(mock_credential, mock_connect, postgres_client, mock_conn
         password="mock_token",
         port=5432,
         ssl=True,
+        command_timeout=10.0,
+        server_settings={"statement_timeout": "10000"},
     )
     assert postgres_client.conn == mock_connection
 
@@ -120,6 +141,38 @@ async def test_upsert_conversation(postgres_client, mock_connection):
 
     assert result["id"] == "500e77bd-26b9-441a-8fe3-cd0e02993671"
     assert result["title"] == "updated_title"
+    args = mock_connection.fetchrow.call_args.args
+    assert args[4:6] == (
+        datetime(2024, 1, 1, tzinfo=timezone.utc),
+        datetime(2024, 1, 2, tzinfo=timezone.utc),
+    )
+    # A renamed conversation no longer waits for its generated title
+    assert args[8] is False
+
+
+@pytest.mark.asyncio
+async def test_update_conversation_title_only_replaces_previous_title(
+    postgres_client, mock_connection
+):
+    # given
+    postgres_client.conn = mock_connection
+    mock_connection.fetchval.side_effect = ["conversation_id", None]
+
+    # when
+    replaced = await postgres_client.update_conversation_title(
+        "user_id", "conversation_id", "Generated", "Provisional"
+    )
+    renamed = await postgres_client.update_conversation_title(
+        "user_id", "conversation_id", "Generated", "Provisional"
+    )
+
+    # then
+    assert replaced is True
+    assert renamed is False
+    query, *params = mock_connection.fetchval.await_args.args
+    assert "title = $4" in query
+    assert '"titlePending" = FALSE' in query
+    assert params == ["Generated", "conversation_id", "user_id", "Provisional"]
 
 
 @pytest.mark.asyncio
@@ -204,6 +257,85 @@ async def test_get_conversations(postgres_client, mock_connection):
     assert len(result) == 2
     assert result[0]["title"] == "title1"
     assert result[1]["title"] == "title2"
+    query, *args = mock_connection.fetch.await_args.args
+    assert args == [user_id, 2, 0]
+    assert 'ORDER BY "updatedAt" ASC' in query
+
+
+def conversation_record(index: int) -> dict:
+    return {
+        "id": f"conversation-{index}",
+        "type": "conversation",
+        "createdAt": datetime(2024, 1, index, tzinfo=timezone.utc),
+        "updatedAt": datetime(2024, 1, index, 12, 30, 0, 123000, tzinfo=timezone.utc),
+        "user_id": "user_id",
+        "title": f"title{index}",
+    }
+
+
+@pytest.mark.asyncio
+async def test_get_conversations_page_returns_cursor_of_next_page(
+    postgres_client, mock_connection
+):
+    # given
+    postgres_client.conn = mock_connection
+    mock_connection.fetch.return_value = [conversation_record(i) for i in (3, 2, 1)]
+
+    # when
+    conversations, cursor = await postgres_client.get_conversations_page(
+        "user_id", limit=2
+    )
+
+    # then
+    mock_connection.fetch.assert_awaited_once_with(
+        GET_CONVERSATIONS_FIRST_PAGE_QUERY, "user_id", 3
+    )
+    assert [c["id"] for c in conversations] == ["conversation-3", "conversation-2"]
+    assert conversations[0]["updatedAt"] == "2024-01-03T12:30:00.123Z"
+    assert cursor == encode_cursor(
+        {"updatedAt": "2024-01-02T12:30:00.123000+00:00", "id": "conversation-2"}
+    )
+
+
+@pytest.mark.asyncio
+async def test_get_conversations_page_continues_after_cursor(
+    postgres_client, mock_connection
+):
+    # given
+    postgres_client.conn = mock_connection
+    mock_connection.fetch.return_value = [conversation_record(1)]
+    cursor = encode_cursor(
+        {"updatedAt": "2024-01-02T12:30:00.123000+00:00", "id": "conversation-2"}
+    )
+
+    # when
+    conversations, next_cursor = await postgres_client.get_conversations_page(
+        "user_id", limit=2, cursor=cursor
+    )
+
+    # then
+    mock_connection.fetch.assert_awaited_once_with(
+        GET_CONVERSATIONS_NEXT_PAGE_QUERY,
+        "user_id",
+        datetime(2024, 1, 2, 12, 30, 0, 123000, tzinfo=timezone.utc),
+        "conversation-2",
+        3,
+    )
+    assert [c["id"] for c in conversations] == ["conversation-1"]
+    assert next_cursor is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "cursor", ["not a cursor", encode_cursor({"id": "conversation-2"})]
+)
+async def test_get_conversations_page_rejects_invalid_cursor(
+    postgres_client, mock_connection, cursor
+):
+    postgres_client.conn = mock_connection
+
+    with pytest.raises(InvalidCursorError):
+        await postgres_client.get_conversations_page("user_id", 2, cursor)
 
 
 @pytest.mark.asyncio
@@ -257,7 +389,74 @@ async def test_create_message(postgres_client, mock_connection):
 
     assert result["id"] == "39c395da-e2f7-49c9-bca5-c9511d3c5172"
     assert result["content"] == "Test content"
-    mock_connection.execute.assert_called_once()
+    mock_connection.fetchrow.assert_awaited_once()
+    mock_connection.execute.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_save_turn_writes_conversation_and_messages_in_one_statement(
+    postgres_client, mock_connection
+):
+    # given
+    postgres_client.conn = mock_connection
+    mock_connection.fetchrow.return_value = {
+        "id": "conversation_id",
+        "title": "title",
+        "updatedAt": datetime(2024, 1, 1, tzinfo=timezone.utc),
+    }
+    messages = [
+        {"role": "user", "content": "question"},
+        {"role": "tool", "content": "citations"},
+        {"role": "assistant", "content": "answer"},
+    ]
+
+    # when
+    result = await postgres_client.save_turn(
+        "user_id", "conversation_id", messages, "title"
+    )
+
+    # then
+    assert result == {
+        "id": "conversation_id",
+        "title": "title",
+        "updatedAt": "2024-01-01T00:00:00.000Z",
+    }
+    (
+        query,
+        conversation_id,
+        created_at,
+        updated_at,
+        user_id,
+        title,
+        ids,
+        timestamps,
+        roles,
+        contents,
+        feedback,
+    ) = mock_connection.fetchrow.await_args.args
+    assert query == SAVE_TURN_QUERY
+    assert (conversation_id, user_id, title) == ("conversation_id", "user_id", "title")
+    assert len(set(ids)) == 3
+    assert timestamps[0] == created_at and timestamps[-1] == updated_at
+    assert timestamps == sorted(set(timestamps))
+    assert roles == ["user", "tool", "assistant"]
+    assert contents == ["question", "citations", "answer"]
+    assert feedback == ""
+
+
+@pytest.mark.asyncio
+async def test_save_turn_conversation_of_another_user(postgres_client, mock_connection):
+    # given
+    postgres_client.conn = mock_connection
+    mock_connection.fetchrow.return_value = None
+
+    # when
+    result = await postgres_client.save_turn(
+        "user_id", "conversation_id", [{"role": "assistant", "content": "answer"}]
+    )
+
+    # then
+    assert result is None
 
 
 @pytest.mark.asyncio
@@ -314,3 +513,105 @@ async def test_get_messages(postgres_client, mock_connection):
     assert len(result) == 2
     assert result[0]["id"] == "39c395da-e2f7-49c9-bca5-c9511d3c5172"
     assert result[1]["id"] == "39c395da-e2f7-49c9-bca5-c9511d3c5173"
+    mock_connection.fetch.assert_awaited_once_with(
+        GET_MESSAGES_QUERY, conversation_id, user_id
+    )
+
+
+@pytest.mark.asyncio
+async def test_get_conversation_summary(postgres_client, mock_connection):
+    postgres_client.conn = mock_connection
+
+    mock_connection.fetchrow.return_value = {
+        "conversation_id": "500e77bd-26b9-441a-8fe3-cd0e02993671",
+        "user_id": "user_id",
+        "summary": "Summary",
+        "summarized_message_count": 4,
+    }
+
+    result = await postgres_client.get_conversation_summary(
+        "user_id", "500e77bd-26b9-441a-8fe3-cd0e02993671"
+    )
+
+    assert result["summary"] == "Summary"
+    assert result["summarized_message_count"] == 4
+    mock_connection.fetchrow.assert_called_once_with(
+        "SELECT * FROM conversation_summaries WHERE conversation_id = $1 AND user_id = $2",
+        "500e77bd-26b9-441a-8fe3-cd0e02993671",
+        "user_id",
+    )
+
+
+@pytest.mark.asyncio
+async def test_upsert_conversation_summary(postgres_client, mock_connection):
+    postgres_client.conn = mock_connection
+
+    mock_connection.fetchrow.return_value = {
+        "conversation_id": "500e77bd-26b9-441a-8fe3-cd0e02993671",
+        "summary": "Summary",
+        "summarized_message_count": 4,
+    }
+
+    result = await postgres_client.upsert_conversation_summary(
+        "user_id", "500e77bd-26b9-441a-8fe3-cd0e02993671", "Summary", 4
+    )
+
+    assert result["summarized_message_count"] == 4
+    args = mock_connection.fetchrow.call_args[0]
+    assert "ON CONFLICT (conversation_id) DO UPDATE" in args[0]
+    assert args[1:5] == (
+        "500e77bd-26b9-441a-8fe3-cd0e02993671",
+        "user_id",
+        "Summary",
+        4,
+    )
+
+
+@patch("backend.batch.utilities.chat_history.postgresdbservice.asyncpg.create_pool")
+@patch("backend.batch.utilities.chat_history.postgresdbservice.AsyncRuntime")
+@pytest.mark.asyncio
+async def test_connect_acquires_from_shared_pool_on_shared_loop(
+    mock_runtime, mock_create_pool, postgres_client, mock_connection
+):
+    # given
+    pool = AsyncMock()
+    pool.acquire.return_value = mock_connection
+    mock_runtime.current_in_loop.return_value.async_resource = AsyncMock(
+        return_value=pool
+    )
+
+    # when
+    await postgres_client.connect()
+    await postgres_client.close()
+
+    # then
+    pool.acquire.assert_awaited_once()
+    pool.release.assert_awaited_once_with(mock_connection)
+    mock_connection.close.assert_not_called()
+    assert postgres_client.conn is None
+
+
+@patch(
+    "backend.batch.utilities.chat_history.postgresdbservice.asyncpg.create_pool",
+    new_callable=AsyncMock,
+)
+@patch("backend.batch.utilities.helpers.postgres_pool.get_azure_credential")
+@pytest.mark.asyncio
+async def test_pool_rotates_tokens_and_sets_statement_timeout(
+    mock_credential, mock_create_pool, postgres_client
+):
+    # given
+    mock_credential.return_value.get_token.return_value.token = "mock_token"
+    mock_credential.return_value.get_token.return_value.expires_on = 2**40
+
+    # when
+    await postgres_client._create_pool()
+    password = mock_create_pool.call_args.kwargs["password"]
+    tokens = [await password(), await password()]
+
+    # then
+    assert tokens == ["mock_token", "mock_token"]
+    mock_credential.return_value.get_token.assert_called_once()
+    kwargs = mock_create_pool.call_args.kwargs
+    assert kwargs["command_timeout"] == 10.0
+    assert kwargs["server_settings"] == {"statement_timeout": "10000"}
@@ -1,3 +1,5 @@
+import threading
+
 import pytest
 from unittest.mock import MagicMock, Mock, patch
 from backend.batch.utilities.search.azure_search_handler import AzureSearchHandler
@@ -5,6 +7,14 @@ import json
 from azure.search.documents.models import VectorizedQuery
 from azure.search.documents import SearchItemPaged
 from backend.batch.utilities.common.source_document import SourceDocument
+from backend.batch.utilities.helpers.query_vector_cache import QueryVectorCache
+
+
+@pytest.fixture(autouse=True)
+def query_vector_cache():
+    QueryVectorCache.clear_instance()
+    yield QueryVectorCache.get_instance()
+    QueryVectorCache.clear_instance()
 
 
 @pytest.fixture(autouse=True)
@@ -365,6 +375,56 @@ def test_semantic_search_with_advanced_image_processing(
     )
 
 
+@patch("backend.batch.utilities.search.azure_search_handler.tiktoken")
+def test_query_search_reuses_cached_embeddings(
+    mock_tiktoken, handler, mock_llm_helper, mock_azure_computer_vision_client
+):
+    # given
+    handler.env_helper.USE_ADVANCED_IMAGE_PROCESSING = True
+    mock_llm_helper.generate_embeddings.return_value = [1, 2, 3]
+
+    # when
+    handler.query_search("What is the answer?")
+    handler.query_search("  What is   the answer? ")
+
+    # then
+    mock_llm_helper.generate_embeddings.assert_called_once()
+    mock_azure_computer_vision_client.vectorize_text.assert_called_once_with(
+        "What is the answer?"
+    )
+    first_call, second_call = handler.search_client.search.call_args_list
+    assert first_call.kwargs["vector_queries"] == second_call.kwargs["vector_queries"]
+
+
+@patch("backend.batch.utilities.search.azure_search_handler.tiktoken")
+def test_query_search_vectorizes_text_and_image_concurrently(
+    mock_tiktoken, handler, mock_llm_helper, mock_azure_computer_vision_client
+):
+    # given
+    handler.env_helper.USE_ADVANCED_IMAGE_PROCESSING = True
+    both_started = threading.Barrier(2, timeout=5)
+
+    def generate_embeddings(_):
+        both_started.wait()
+        return [1, 2, 3]
+
+    def vectorize_text(_):
+        both_started.wait()
+        return [3, 2, 1]
+
+    mock_llm_helper.generate_embeddings.side_effect = generate_embeddings
+    mock_azure_computer_vision_client.vectorize_text.side_effect = vectorize_text
+
+    # when
+    embedded_question, vectorized_question = handler._vectorize_question(
+        "What is the answer?"
+    )
+
+    # then
+    assert embedded_question == [1, 2, 3]
+    assert vectorized_question == [3, 2, 1]
+
+
 @pytest.fixture
 def search_handler():
     env_helper = Mock()
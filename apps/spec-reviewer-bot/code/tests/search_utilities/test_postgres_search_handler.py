@@ -66,7 +66,9 @@ def test_query_search(handler, mock_search_client):
     result = handler.query_search("Sample question")
 
     mock_llm_helper.generate_embeddings.assert_called_once_with("Sample question")
-    mock_search_client.get_vector_store.assert_called_once()
+    mock_search_client.get_vector_store.assert_called_once_with(
+        [1, 2, 3], "Sample question"
+    )
     assert len(result) == 2
     assert isinstance(result[0], SourceDocument)
     assert result[0].id == "1"
@@ -2,13 +2,18 @@
 This module tests the entry point for the application.
 """
 
+import asyncio
+import io
+import json
 from unittest.mock import AsyncMock, MagicMock, Mock, patch
 
 from azure.core.exceptions import ClientAuthenticationError, ResourceNotFoundError, ServiceRequestError
 from openai import RateLimitError, BadRequestError, InternalServerError
 import pytest
 from flask.testing import FlaskClient
+from backend.batch.utilities.helpers.async_runtime import AsyncRuntime
 from backend.batch.utilities.helpers.config.conversation_flow import ConversationFlow
+import create_app as create_app_module
 from create_app import create_app
 
 AZURE_SPEECH_KEY = "mock-speech-key"
@@ -90,6 +95,10 @@ def env_helper_mock():
             AZURE_SEARCH_SEMANTIC_SEARCH_CONFIG
         )
         env_helper.SHOULD_STREAM = True
+        env_helper.CUSTOM_FLOW_STREAMING_ENABLED = False
+        env_helper.SHARED_EVENT_LOOP_ENABLED = False
+        env_helper.CONFIG_CACHE_TTL_SECONDS = 60
+        env_helper.ADMISSION_CONTROL_ENABLED = False
         env_helper.is_auth_type_keys.return_value = True
         env_helper.CONVERSATION_FLOW = ConversationFlow.CUSTOM.value
 
@@ -212,6 +221,145 @@ class TestConfig:
         assert response.text == "OK"
 
 
+class TestSharedEventLoop:
+    """Test the async views on the process-wide event loop."""
+
+    def test_async_views_run_on_the_shared_loop(self, env_helper_mock):
+        # given
+        env_helper_mock.SHARED_EVENT_LOOP_ENABLED = True
+        app = create_app()
+        runtime = AsyncRuntime.current()
+
+        @app.route("/test/loop")
+        async def loop_id():
+            return str(id(asyncio.get_running_loop()))
+
+        try:
+            # when
+            responses = [app.test_client().get("/test/loop") for _ in range(2)]
+
+            # then
+            assert [response.text for response in responses] == [
+                str(id(runtime.loop))
+            ] * 2
+        finally:
+            runtime.shutdown()
+
+
+class TestAdmissionControl:
+    """Test the admission control of the endpoints using Azure OpenAI."""
+
+    @patch("create_app.AdmissionController")
+    def test_conversation_rejected_when_not_admitted(
+        self, admission_controller_mock, env_helper_mock
+    ):
+        # given
+        env_helper_mock.ADMISSION_CONTROL_ENABLED = True
+        admission_controller_mock.return_value.admit.return_value = MagicMock(
+            admitted=False, retry_after=3
+        )
+        client = create_app().test_client()
+
+        # when
+        response = client.post("/api/conversation", json={"messages": []})
+        health = client.get("/api/health")
+
+        # then
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "3"
+        assert response.json == {
+            "error": "We're currently experiencing a high number of requests for the service you're trying to access. Please wait a moment and try again."
+        }
+        assert health.status_code == 200
+        admission_controller_mock.assert_called_once_with(env_helper_mock)
+
+
+class TestSpecReview:
+    """Test the whole specification review endpoint."""
+
+    @patch("create_app.SpecReviewTool")
+    def test_review_streams_section_reviews(self, spec_review_tool_mock, client):
+        # given
+        spec_review_tool = spec_review_tool_mock.return_value
+        spec_review_tool.supports.return_value = True
+        events = [
+            {"sections": 1},
+            {"section": {"index": 0, "score": 7, "findings": []}},
+            {"summary": {"score": 7.0, "sections": 1}},
+        ]
+        spec_review_tool.review_document.return_value = iter(events)
+
+        # when
+        response = client.post(
+            "/api/review",
+            data={"file": (io.BytesIO(b"spec"), "my spec.pdf")},
+            content_type="multipart/form-data",
+        )
+
+        # then
+        assert response.status_code == 200
+        assert response.mimetype == "application/json-lines"
+        lines = [json.loads(line) for line in response.data.decode().splitlines()]
+        assert lines == events
+        spec_review_tool.review_document.assert_called_once_with(
+            "my_spec.pdf", b"spec"
+        )
+
+    def test_review_requires_a_file(self, client):
+        # when
+        response = client.post(
+            "/api/review", data={}, content_type="multipart/form-data"
+        )
+
+        # then
+        assert response.status_code == 400
+
+    @patch("create_app.SpecReviewTool")
+    def test_review_rejects_unsupported_file_type(self, spec_review_tool_mock, client):
+        # given
+        spec_review_tool_mock.return_value.supports.return_value = False
+
+        # when
+        response = client.post(
+            "/api/review",
+            data={"file": (io.BytesIO(b"spec"), "spec.exe")},
+            content_type="multipart/form-data",
+        )
+
+        # then
+        assert response.status_code == 400
+        spec_review_tool_mock.return_value.review_document.assert_not_called()
+
+    @patch("create_app.SpecReviewTool")
+    def test_review_stream_returns_error_line_on_exception(
+        self, spec_review_tool_mock, client
+    ):
+        # given
+        def review_document(file_name, content):
+            yield {"sections": 2}
+            raise Exception("An error occurred")
+
+        spec_review_tool = spec_review_tool_mock.return_value
+        spec_review_tool.supports.return_value = True
+        spec_review_tool.review_document.side_effect = review_document
+
+        # when
+        response = client.post(
+            "/api/review",
+            data={"file": (io.BytesIO(b"spec"), "spec.pdf")},
+            content_type="multipart/form-data",
+        )
+
+        # then
+        lines = [json.loads(line) for line in response.data.decode().splitlines()]
+        assert lines == [
+            {"sections": 2},
+            {
+                "error": "An error occurred. Please try again. If the problem persists, please contact the site administrator."
+            },
+        ]
+
+
 class TestConversationCustom:
     """Test the custom conversation endpoint."""
 
@@ -476,6 +624,158 @@ class TestConversationCustom:
             orchestrator=self.orchestrator_config,
         )
 
+    @patch("create_app.ConversationSummarizer")
+    @patch("create_app.get_message_orchestrator")
+    @patch("create_app.get_orchestrator_config")
+    @patch(
+        "backend.batch.utilities.helpers.config.config_helper.ConfigHelper.get_active_config_or_default"
+    )
+    def test_conversation_custom_uses_summarized_chat_history(
+        self,
+        get_active_config_or_default_mock,
+        get_orchestrator_config_mock,
+        get_message_orchestrator_mock,
+        conversation_summarizer_mock,
+        client,
+    ):
+        # given
+        get_active_config_or_default_mock.return_value.prompts.conversational_flow = (
+            "custom"
+        )
+        get_orchestrator_config_mock.return_value = self.orchestrator_config
+
+        message_orchestrator_mock = AsyncMock()
+        message_orchestrator_mock.handle_message.return_value = self.messages
+        get_message_orchestrator_mock.return_value = message_orchestrator_mock
+
+        compacted_history = [
+            {"role": "system", "content": "Summary of the earlier conversation"},
+            {"role": "assistant", "content": "Hi, how can I help?"},
+        ]
+        conversation_summarizer_mock.return_value.compact_chat_history = AsyncMock(
+            return_value=compacted_history
+        )
+
+        # when
+        response = client.post(
+            "/api/conversation",
+            headers={"content-type": "application/json"},
+            json=self.body,
+        )
+
+        # then
+        assert response.status_code == 200
+        conversation_summarizer_mock.return_value.compact_chat_history.assert_awaited_once_with(
+            "00000000-0000-0000-0000-000000000000",
+            self.body["conversation_id"],
+            self.body["messages"][:-1],
+        )
+        message_orchestrator_mock.handle_message.assert_called_once_with(
+            user_message=self.body["messages"][-1]["content"],
+            chat_history=compacted_history,
+            conversation_id=self.body["conversation_id"],
+            orchestrator=self.orchestrator_config,
+        )
+
+    @patch("create_app.get_message_orchestrator")
+    @patch("create_app.get_orchestrator_config")
+    @patch(
+        "backend.batch.utilities.helpers.config.config_helper.ConfigHelper.get_active_config_or_default"
+    )
+    def test_conversation_custom_streams_messages(
+        self,
+        get_active_config_or_default_mock,
+        get_orchestrator_config_mock,
+        get_message_orchestrator_mock,
+        env_helper_mock,
+        client,
+    ):
+        # given
+        get_active_config_or_default_mock.return_value.prompts.conversational_flow = (
+            "custom"
+        )
+        get_orchestrator_config_mock.return_value = self.orchestrator_config
+        env_helper_mock.CUSTOM_FLOW_STREAMING_ENABLED = True
+        env_helper_mock.AZURE_OPENAI_MODEL = self.openai_model
+
+        partial_messages = [
+            self.messages[0],
+            {"content": "An", "end_turn": False, "role": "assistant"},
+        ]
+
+        async def handle_message_stream(**kwargs):
+            yield partial_messages
+            yield self.messages
+
+        message_orchestrator_mock = MagicMock()
+        message_orchestrator_mock.handle_message_stream.side_effect = (
+            handle_message_stream
+        )
+        get_message_orchestrator_mock.return_value = message_orchestrator_mock
+
+        # when
+        response = client.post(
+            "/api/conversation",
+            headers={"content-type": "application/json"},
+            json=self.body,
+        )
+
+        # then
+        assert response.status_code == 200
+        assert response.mimetype == "application/json-lines"
+        lines = [json.loads(line) for line in response.data.decode().splitlines()]
+        assert [line["choices"][0]["messages"] for line in lines] == [
+            partial_messages,
+            self.messages,
+        ]
+        assert lines[-1]["model"] == self.openai_model
+        message_orchestrator_mock.handle_message_stream.assert_called_once_with(
+            user_message=self.body["messages"][-1]["content"],
+            chat_history=self.body["messages"][:-1],
+            conversation_id=self.body["conversation_id"],
+            orchestrator=self.orchestrator_config,
+        )
+
+    @patch("create_app.get_message_orchestrator")
+    @patch(
+        "backend.batch.utilities.helpers.config.config_helper.ConfigHelper.get_active_config_or_default"
+    )
+    def test_conversation_custom_stream_returns_error_line_on_exception(
+        self,
+        get_active_config_or_default_mock,
+        get_message_orchestrator_mock,
+        env_helper_mock,
+        client,
+    ):
+        # given
+        get_active_config_or_default_mock.return_value.prompts.conversational_flow = (
+            "custom"
+        )
+        env_helper_mock.CUSTOM_FLOW_STREAMING_ENABLED = True
+
+        async def handle_message_stream(**kwargs):
+            yield self.messages
+            raise Exception("An error occurred")
+
+        message_orchestrator_mock = MagicMock()
+        message_orchestrator_mock.handle_message_stream.side_effect = (
+            handle_message_stream
+        )
+        get_message_orchestrator_mock.return_value = message_orchestrator_mock
+
+        # when
+        response = client.post(
+            "/api/conversation",
+            headers={"content-type": "application/json"},
+            json=self.body,
+        )
+
+        # then
+        lines = [json.loads(line) for line in response.data.decode().splitlines()]
+        assert lines[-1] == {
+            "error": "An error occurred. Please try again. If the problem persists, please contact the site administrator."
+        }
+
     @patch(
         "backend.batch.utilities.helpers.config.config_helper.ConfigHelper.get_active_config_or_default"
     )
@@ -925,6 +1225,108 @@ class TestConversationAzureByod:
             == '{"id": "response.id", "model": "mock-openai-model", "created": 0, "object": "response.object", "choices": [{"messages": [{"role": "assistant", "content": "mock content"}]}]}\n'
         )
 
+    @patch("create_app.AzureSearchHelper._index_not_exists")
+    @patch("create_app.AzureOpenAI")
+    @patch(
+        "backend.batch.utilities.helpers.config.config_helper.ConfigHelper.get_active_config_or_default"
+    )
+    def test_conversation_azure_byod_streams_deltas_without_data_when_v2_requested(
+        self,
+        get_active_config_or_default_mock,
+        azure_openai_mock,
+        index_not_exists_mock,
+        env_helper_mock,
+        client,
+    ):
+        # given
+        get_active_config_or_default_mock.return_value.prompts.conversational_flow = (
+            "byod"
+        )
+        index_not_exists_mock.return_value = True
+        openai_client_mock = MagicMock()
+        azure_openai_mock.return_value = openai_client_mock
+
+        chunks = []
+        for content in ["mock ", "content", None]:
+            chunk = MagicMock(
+                id="response.id",
+                model=AZURE_OPENAI_MODEL,
+                created=0,
+                object="response.object",
+            )
+            chunk.choices[0].delta.content = content
+            chunks.append(chunk)
+        openai_client_mock.chat.completions.create.return_value = chunks
+
+        # when
+        response = client.post(
+            "/api/conversation",
+            headers={"content-type": "application/json", "X-Stream-Format": "v2"},
+            json=self.body,
+        )
+
+        # then
+        assert response.status_code == 200
+        assert response.headers["X-Stream-Format"] == "v2"
+        assert str(response.data, "utf-8") == (
+            '{"id": "response.id", "model": "mock-openai-model", "created": 0, "object": "response.object", "choices": [{"messages": [{"role": "assistant", "content": "mock "}]}]}\n'
+            '{"delta": {"index": 0, "content": "content"}}\n'
+        )
+
+    @patch("create_app.AzureBlobStorageClient")
+    def test_stream_with_data_v2_sends_citations_once_then_deltas(
+        self, azure_blob_storage_client_mock
+    ):
+        # given
+        azure_blob_storage_client_mock.return_value.get_container_sas.return_value = (
+            "?sas"
+        )
+
+        # when
+        lines = list(
+            create_app_module.stream_with_data(self.mock_streamed_response, "v2")
+        )
+
+        # then
+        snapshot = json.loads(lines[0])
+        assert snapshot["choices"][0]["messages"][0]["role"] == "tool"
+        assert json.loads(snapshot["choices"][0]["messages"][0]["content"])[
+            "citations"
+        ]
+        assert lines[1:] == [
+            '{"delta": {"index": 1, "content": "A question\\n?"}}\n',
+            '{"end_turn": true}\n',
+        ]
+
+    @patch("create_app.AzureBlobStorageClient")
+    def test_stream_with_data_v1_and_v2_describe_the_same_answer(
+        self, azure_blob_storage_client_mock
+    ):
+        # given
+        azure_blob_storage_client_mock.return_value.get_container_sas.return_value = (
+            "?sas"
+        )
+
+        v1_lines = list(create_app_module.stream_with_data(self.mock_streamed_response))
+        v2_lines = list(
+            create_app_module.stream_with_data(self.mock_streamed_response, "v2")
+        )
+
+        # when
+        rebuilt = json.loads(v2_lines[0])
+        for line in v2_lines[1:]:
+            event = json.loads(line)
+            messages = rebuilt["choices"][0]["messages"]
+            if "delta" in event:
+                messages[event["delta"]["index"]]["content"] += event["delta"][
+                    "content"
+                ]
+            elif event.get("end_turn"):
+                messages[-1]["end_turn"] = True
+
+        # then
+        assert rebuilt == json.loads(v1_lines[-1])
+
 
 class TestGetFile:
     """Test the get_file endpoint for downloading files from blob storage."""
@@ -2,9 +2,12 @@
 This module tests the entry point for the application.
 """
 
-from unittest.mock import AsyncMock, MagicMock, patch
+from unittest.mock import AsyncMock, patch
 
 import pytest
+from backend.batch.utilities.chat_history.database_client_base import (
+    InvalidCursorError,
+)
 from create_app import create_app
 
 
@@ -27,6 +30,20 @@ def mock_conversation_client():
         yield mock_conversation_client
 
 
+@pytest.fixture(autouse=True)
+def conversation_summarizer_mock():
+    """Mock the background conversation summarizer."""
+    with patch("backend.api.chat_history.ConversationSummarizer") as mock:
+        yield mock.return_value
+
+
+@pytest.fixture(autouse=True)
+def conversation_titler_mock():
+    """Mock the background conversation titler."""
+    with patch("backend.api.chat_history.ConversationTitler") as mock:
+        yield mock.return_value
+
+
 class TestListConversations:
     @patch(
         "backend.batch.utilities.helpers.config.config_helper.ConfigHelper.get_active_config_or_default"
@@ -40,8 +57,11 @@ class TestListConversations:
             "custom"
         )
         get_active_config_or_default_mock.enable_chat_history = True
-        mock_conversation_client.get_conversations = AsyncMock(
-            return_value=[{"conversation_id": "1", "content": "Hello, world!"}]
+        mock_conversation_client.get_conversations_page = AsyncMock(
+            return_value=(
+                [{"conversation_id": "1", "content": "Hello, world!"}],
+                "next-cursor",
+            )
         )
 
         # When
@@ -50,6 +70,90 @@ class TestListConversations:
         # Then
         assert response.status_code == 200
         assert response.json == [{"conversation_id": "1", "content": "Hello, world!"}]
+        assert response.headers["X-Next-Cursor"] == "next-cursor"
+        mock_conversation_client.get_conversations_page.assert_awaited_once_with(
+            "00000000-0000-0000-0000-000000000000", limit=25, cursor=None
+        )
+
+    @patch(
+        "backend.batch.utilities.helpers.config.config_helper.ConfigHelper.get_active_config_or_default"
+    )
+    def test_list_conversations_continues_from_cursor(
+        self, get_active_config_or_default_mock, mock_conversation_client, client
+    ):
+        # Given
+        get_active_config_or_default_mock.return_value.enable_chat_history = True
+        mock_conversation_client.get_conversations_page = AsyncMock(
+            return_value=([{"conversation_id": "2"}], None)
+        )
+
+        # When
+        response = client.get("/api/history/list?cursor=abc")
+
+        # Then
+        assert response.status_code == 200
+        assert "X-Next-Cursor" not in response.headers
+        mock_conversation_client.get_conversations_page.assert_awaited_once_with(
+            "00000000-0000-0000-0000-000000000000", limit=25, cursor="abc"
+        )
+
+    @patch(
+        "backend.batch.utilities.helpers.config.config_helper.ConfigHelper.get_active_config_or_default"
+    )
+    def test_list_conversations_pages_by_offset(
+        self, get_active_config_or_default_mock, mock_conversation_client, client
+    ):
+        # Given
+        get_active_config_or_default_mock.return_value.enable_chat_history = True
+        mock_conversation_client.get_conversations = AsyncMock(
+            return_value=[{"conversation_id": "26"}]
+        )
+
+        # When
+        response = client.get("/api/history/list?offset=25")
+
+        # Then
+        assert response.status_code == 200
+        assert response.json == [{"conversation_id": "26"}]
+        mock_conversation_client.get_conversations.assert_awaited_once_with(
+            "00000000-0000-0000-0000-000000000000", offset=25, limit=25
+        )
+
+    @pytest.mark.parametrize("query", ["offset=abc", "offset=-1"])
+    @patch(
+        "backend.batch.utilities.helpers.config.config_helper.ConfigHelper.get_active_config_or_default"
+    )
+    def test_list_conversations_invalid_offset(
+        self, get_active_config_or_default_mock, query, mock_conversation_client, client
+    ):
+        # Given
+        get_active_config_or_default_mock.return_value.enable_chat_history = True
+
+        # When
+        response = client.get(f"/api/history/list?{query}")
+
+        # Then
+        assert response.status_code == 400
+        assert response.json == {"error": "offset must be a non-negative integer"}
+
+    @patch(
+        "backend.batch.utilities.helpers.config.config_helper.ConfigHelper.get_active_config_or_default"
+    )
+    def test_list_conversations_invalid_cursor(
+        self, get_active_config_or_default_mock, mock_conversation_client, client
+    ):
+        # Given
+        get_active_config_or_default_mock.return_value.enable_chat_history = True
+        mock_conversation_client.get_conversations_page = AsyncMock(
+            side_effect=InvalidCursorError("Invalid cursor")
+        )
+
+        # When
+        response = client.get("/api/history/list?cursor=abc")
+
+        # Then
+        assert response.status_code == 400
+        assert response.json == {"error": "Invalid cursor"}
 
     @patch(
         "backend.batch.utilities.helpers.config.config_helper.ConfigHelper.get_active_config_or_default"
@@ -77,7 +181,7 @@ class TestListConversations:
         """Test that the list_conversations endpoint returns an error if the database is not available."""
         # Given
         get_active_config_or_default_mock.return_value.enable_chat_history = True
-        mock_conversation_client.get_conversations = AsyncMock(
+        mock_conversation_client.get_conversations_page = AsyncMock(
             side_effect=Exception("Database error")
         )
 
@@ -99,8 +203,8 @@ class TestListConversations:
         """Test that the list_conversations endpoint returns an error if no conversations are found."""
         # Given
         get_active_config_or_default_mock.return_value.enable_chat_history = True
-        mock_conversation_client.get_conversations = AsyncMock(
-            return_value="invalid response"
+        mock_conversation_client.get_conversations_page = AsyncMock(
+            return_value=("invalid response", None)
         )
 
         # When
@@ -493,6 +597,30 @@ class TestListConversations:
         assert response.status_code == 500
         assert response.json == {"error": "Error while deleting conversation history"}
 
+    @patch(
+        "backend.batch.utilities.helpers.config.config_helper.ConfigHelper.get_active_config_or_default"
+    )
+    def test_delete_conversation_keeps_messages_when_summary_delete_fails(
+        self, get_active_config_or_default_mock, mock_conversation_client, client
+    ):
+        """Test that a failed summary deletion leaves the conversation whole."""
+
+        # Setup mocks
+        get_active_config_or_default_mock.return_value.enable_chat_history = True
+        mock_conversation_client.delete_conversation_summary.side_effect = Exception(
+            "relation conversation_summaries does not exist"
+        )
+
+        # Make DELETE request to delete the conversation
+        response = client.delete(
+            "/api/history/delete", json={"conversation_id": "conv123"}
+        )
+
+        # Assert the messages were kept
+        assert response.status_code == 500
+        mock_conversation_client.delete_messages.assert_not_called()
+        mock_conversation_client.delete_conversation.assert_not_called()
+
     @patch(
         "backend.batch.utilities.helpers.config.config_helper.ConfigHelper.get_active_config_or_default"
     )
@@ -525,7 +653,11 @@ class TestListConversations:
         "backend.batch.utilities.helpers.config.config_helper.ConfigHelper.get_active_config_or_default"
     )
     def test_update_conversation_success(
-        self, get_active_config_or_default_mock, mock_conversation_client, client
+        self,
+        get_active_config_or_default_mock,
+        mock_conversation_client,
+        conversation_titler_mock,
+        client,
     ):
         get_active_config_or_default_mock.return_value.enable_chat_history = True
         mock_conversation_client.get_conversation.return_value = {
@@ -533,7 +665,11 @@ class TestListConversations:
             "updatedAt": "2024-12-01",
             "id": "conv1",
         }
-        mock_conversation_client.create_message.return_value = "success"
+        mock_conversation_client.save_turn.return_value = {
+            "title": "Test Title",
+            "updatedAt": "2024-12-02",
+            "id": "conv1",
+        }
         request_json = {
             "conversation_id": "conv1",
             "messages": [
@@ -549,27 +685,118 @@ class TestListConversations:
         assert response.json == {
             "data": {
                 "conversation_id": "conv1",
-                "date": "2024-12-01",
+                "date": "2024-12-02",
                 "title": "Test Title",
             },
             "success": True,
         }
+        mock_conversation_client.save_turn.assert_awaited_once_with(
+            "00000000-0000-0000-0000-000000000000",
+            "conv1",
+            [
+                {"role": "user", "content": "Hello"},
+                {"role": "assistant", "content": "Hi!"},
+            ],
+            "Hello",
+        )
+        mock_conversation_client.create_message.assert_not_called()
+        conversation_titler_mock.schedule.assert_not_called()
+
+    @patch(
+        "backend.batch.utilities.helpers.config.config_helper.ConfigHelper.get_active_config_or_default"
+    )
+    def test_update_conversation_saves_tool_message_before_assistant(
+        self, get_active_config_or_default_mock, mock_conversation_client, client
+    ):
+        get_active_config_or_default_mock.return_value.enable_chat_history = True
+        mock_conversation_client.save_turn.return_value = {
+            "title": "Test Title",
+            "updatedAt": "2024-12-02",
+            "id": "conv1",
+        }
+        request_json = {
+            "conversation_id": "conv1",
+            "messages": [
+                {"role": "user", "content": "First"},
+                {"role": "assistant", "content": "Answer"},
+                {"role": "user", "content": "Second"},
+                {"role": "tool", "content": "Citations"},
+                {"role": "assistant", "content": "Second answer"},
+            ],
+        }
+
+        # When
+        response = client.post("/api/history/update", json=request_json)
+
+        # Then
+        assert response.status_code == 200
+        turn_messages = mock_conversation_client.save_turn.await_args.args[2]
+        assert turn_messages == [
+            {"role": "user", "content": "Second"},
+            {"role": "tool", "content": "Citations"},
+            {"role": "assistant", "content": "Second answer"},
+        ]
+
+    @patch(
+        "backend.batch.utilities.helpers.config.config_helper.ConfigHelper.get_active_config_or_default"
+    )
+    def test_update_conversation_without_assistant_message_saves_nothing(
+        self, get_active_config_or_default_mock, mock_conversation_client, client
+    ):
+        get_active_config_or_default_mock.return_value.enable_chat_history = True
+        request_json = {
+            "conversation_id": "conv1",
+            "messages": [{"role": "user", "content": "Hello"}],
+        }
+
+        # When
+        response = client.post("/api/history/update", json=request_json)
+
+        # Then
+        assert response.status_code == 400
+        assert response.json == {"error": "No assistant message found"}
+        mock_conversation_client.save_turn.assert_not_called()
+
+    @patch(
+        "backend.batch.utilities.helpers.config.config_helper.ConfigHelper.get_active_config_or_default"
+    )
+    def test_update_conversation_of_another_user(
+        self, get_active_config_or_default_mock, mock_conversation_client, client
+    ):
+        get_active_config_or_default_mock.return_value.enable_chat_history = True
+        mock_conversation_client.save_turn.return_value = None
+        request_json = {
+            "conversation_id": "conv1",
+            "messages": [
+                {"role": "user", "content": "Hello"},
+                {"role": "assistant", "content": "Hi!"},
+            ],
+        }
+
+        # When
+        response = client.post("/api/history/update", json=request_json)
+
+        # Then
+        assert response.status_code == 400
+        assert response.json == {"error": "Conversation not found"}
 
-    @patch("backend.api.chat_history.AsyncAzureOpenAI")
     @patch(
         "backend.batch.utilities.helpers.config.config_helper.ConfigHelper.get_active_config_or_default"
     )
-    def test_update_conversation_new_success(
+    def test_update_conversation_schedules_summary(
         self,
         get_active_config_or_default_mock,
-        azure_openai_mock: MagicMock,
         mock_conversation_client,
+        conversation_summarizer_mock,
         client,
     ):
         get_active_config_or_default_mock.return_value.enable_chat_history = True
-        mock_conversation_client.get_conversation.return_value = []
-        mock_conversation_client.create_message.return_value = "success"
-        mock_conversation_client.create_conversation.return_value = {
+        mock_conversation_client.get_conversation.return_value = {
+            "title": "Test Title",
+            "updatedAt": "2024-12-01",
+            "id": "conv1",
+        }
+        mock_conversation_client.save_turn.return_value = {
             "title": "Test Title",
             "updatedAt": "2024-12-01",
             "id": "conv1",
@@ -582,15 +809,37 @@ class TestListConversations:
             ],
         }
 
-        openai_client_mock = azure_openai_mock.return_value
-
-        mock_response = MagicMock()
-        mock_response.choices = [MagicMock(message=MagicMock(content="Test Title"))]
+        # When
+        response = client.post("/api/history/update", json=request_json)
 
-        openai_client_mock.chat.completions.create = AsyncMock(
-            return_value=mock_response
+        assert response.status_code == 200
+        conversation_summarizer_mock.schedule.assert_called_once_with(
+            "00000000-0000-0000-0000-000000000000", "conv1"
         )
 
+    @patch(
+        "backend.batch.utilities.helpers.config.config_helper.ConfigHelper.get_active_config_or_default"
+    )
+    def test_update_conversation_new_titled_in_background(
+        self,
+        get_active_config_or_default_mock,
+        mock_conversation_client,
+        conversation_titler_mock,
+        client,
+    ):
+        get_active_config_or_default_mock.return_value.enable_chat_history = True
+        mock_conversation_client.save_turn.return_value = {
+            "title": "Hello",
+            "updatedAt": "2024-12-01",
+            "id": "conv1",
+            "titlePending": True,
+        }
+        messages = [
+            {"role": "user", "content": "Hello"},
+            {"role": "assistant", "content": "Hi!"},
+        ]
+        request_json = {"conversation_id": "conv1", "messages": messages}
+
         response = client.post("/api/history/update", json=request_json)
 
         assert response.status_code == 200
@@ -598,10 +847,46 @@ class TestListConversations:
             "data": {
                 "conversation_id": "conv1",
                 "date": "2024-12-01",
-                "title": "Test Title",
+                "title": "Hello",
             },
             "success": True,
         }
+        assert mock_conversation_client.save_turn.await_args.args[3] == "Hello"
+        mock_conversation_client.get_conversation.assert_not_called()
+        conversation_titler_mock.schedule.assert_called_once_with(
+            "00000000-0000-0000-0000-000000000000", "conv1", messages, "Hello"
+        )
+
+    @patch(
+        "backend.batch.utilities.helpers.config.config_helper.ConfigHelper.get_active_config_or_default"
+    )
+    def test_update_conversation_titled_like_provisional_title_not_titled_again(
+        self,
+        get_active_config_or_default_mock,
+        mock_conversation_client,
+        conversation_titler_mock,
+        client,
+    ):
+        get_active_config_or_default_mock.return_value.enable_chat_history = True
+        # The generated title of a short first message can equal the provisional one
+        mock_conversation_client.save_turn.return_value = {
+            "title": "Hello",
+            "updatedAt": "2024-12-01",
+            "id": "conv1",
+            "titlePending": False,
+        }
+        request_json = {
+            "conversation_id": "conv1",
+            "messages": [
+                {"role": "user", "content": "Hello"},
+                {"role": "assistant", "content": "Hi!"},
+            ],
+        }
+
+        response = client.post("/api/history/update", json=request_json)
+
+        assert response.status_code == 200
+        conversation_titler_mock.schedule.assert_not_called()
 
     @patch(
         "backend.batch.utilities.helpers.config.config_helper.ConfigHelper.get_active_config_or_default"
@@ -657,9 +942,7 @@ class TestListConversations:
         self, get_active_config_or_default_mock, mock_conversation_client, client
     ):
         get_active_config_or_default_mock.return_value.enable_chat_history = True
-        mock_conversation_client.create_message.side_effect = Exception(
-            "Unexpected error"
-        )
+        mock_conversation_client.save_turn.side_effect = Exception("Unexpected error")
         mock_conversation_client.get_conversation.return_value = {
             "title": "Test Title",
             "updatedAt": "2024-12-01",
@@ -205,6 +205,62 @@ def test_returns_chunk_number():
     assert expected["citations"][0]["chunk_id"] == "2"
 
 
+def test_parse_sources_cites_all_retrieved_documents():
+    # Given
+    output_parser = OutputParserTool()
+    question = "A question?"
+    source_documents = [
+        SourceDocument(
+            id="1",
+            content="Some content",
+            title="A title",
+            source="A source",
+            chunk=1,
+            offset=0,
+        ),
+        SourceDocument(
+            id="2",
+            content="Some more content",
+            title="Another title",
+            source="Another source",
+            chunk=2,
+            offset=10,
+        ),
+    ]
+
+    # When
+    messages = output_parser.parse_sources(question, source_documents)
+
+    # Then
+    assert messages == [
+        {
+            "role": "tool",
+            "content": json.dumps(
+                _convert_source_documents_to_content(question, source_documents)
+            ),
+            "end_turn": False,
+        },
+        {"role": "assistant", "content": "", "end_turn": False},
+    ]
+
+
+def test_parse_keeps_turn_open_when_requested():
+    # Given
+    output_parser = OutputParserTool()
+
+    # When
+    messages = output_parser.parse(
+        question="A question?", answer="A partial", end_turn=False
+    )
+
+    # Then
+    assert messages[1] == {
+        "role": "assistant",
+        "content": "A partial",
+        "end_turn": False,
+    }
+
+
 def _convert_source_documents_to_content(
     question: str, source_documents: List[SourceDocument]
 ) -> dict:
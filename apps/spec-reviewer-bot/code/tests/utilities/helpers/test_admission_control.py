@@ -0,0 +1,197 @@
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+from werkzeug.test import Client
+from werkzeug.wrappers import Response
+
+from backend.batch.utilities.helpers.admission_control import (
+    AdmissionController,
+    AdmissionMiddleware,
+)
+
+
+@pytest.fixture
+def env_helper():
+    env_helper = MagicMock()
+    env_helper.ADMISSION_MAX_IN_FLIGHT = 1
+    env_helper.ADMISSION_QUEUE_SIZE = 1
+    env_helper.ADMISSION_QUEUE_TIMEOUT_SECONDS = 5.0
+    env_helper.ADMISSION_USER_REQUESTS_PER_MINUTE = 0
+    env_helper.ADMISSION_USER_BURST = 10
+    return env_helper
+
+
+def test_user_rejected_once_bucket_empty(env_helper: MagicMock):
+    # given
+    env_helper.ADMISSION_MAX_IN_FLIGHT = 0
+    env_helper.ADMISSION_USER_REQUESTS_PER_MINUTE = 6
+    env_helper.ADMISSION_USER_BURST = 2
+    controller = AdmissionController(env_helper)
+
+    with patch(
+        "backend.batch.utilities.helpers.admission_control.time.monotonic",
+        return_value=100.0,
+    ):
+        # when
+        admissions = [controller.admit("user") for _ in range(3)]
+        other_user = controller.admit("other user")
+
+    # then
+    assert [admission.admitted for admission in admissions] == [True, True, False]
+    assert admissions[-1].reason == "rejected_user_rate"
+    assert admissions[-1].retry_after == 10
+    assert other_user.admitted
+    assert controller.metrics["rejected_user_rate"] == 1
+
+
+def test_user_bucket_refills(env_helper: MagicMock):
+    # given
+    env_helper.ADMISSION_MAX_IN_FLIGHT = 0
+    env_helper.ADMISSION_USER_REQUESTS_PER_MINUTE = 60
+    env_helper.ADMISSION_USER_BURST = 1
+    controller = AdmissionController(env_helper)
+
+    with patch(
+        "backend.batch.utilities.helpers.admission_control.time.monotonic"
+    ) as monotonic_mock:
+        monotonic_mock.return_value = 100.0
+        controller.admit("user")
+
+        # when
+        monotonic_mock.return_value = 101.0
+        admission = controller.admit("user")
+
+    # then
+    assert admission.admitted
+
+
+def test_rejected_when_queue_full(env_helper: MagicMock):
+    # given
+    env_helper.ADMISSION_QUEUE_SIZE = 0
+    controller = AdmissionController(env_helper)
+    controller.admit("user")
+
+    # when
+    admission = controller.admit("user")
+
+    # then
+    assert not admission.admitted
+    assert admission.reason == "rejected_queue_full"
+    assert admission.retry_after >= 1
+
+
+def test_rejected_after_queue_timeout(env_helper: MagicMock):
+    # given
+    env_helper.ADMISSION_QUEUE_TIMEOUT_SECONDS = 0.05
+    controller = AdmissionController(env_helper)
+    controller.admit("user")
+
+    # when
+    admission = controller.admit("user")
+
+    # then
+    assert not admission.admitted
+    assert admission.reason == "rejected_timeout"
+    assert admission.wait_seconds >= 0.05
+    assert controller.queue_depth == 0
+
+
+def test_queued_request_admitted_on_release(env_helper: MagicMock):
+    # given
+    controller = AdmissionController(env_helper)
+    controller.admit("user")
+    admissions = []
+    waiter = threading.Thread(target=lambda: admissions.append(controller.admit("user")))
+    waiter.start()
+    while controller.queue_depth == 0:
+        time.sleep(0.01)
+
+    # when
+    controller.release(0.5)
+    waiter.join(5)
+
+    # then
+    assert admissions[0].admitted
+    assert controller.in_flight == 1
+    assert controller.metrics["queued"] == 1
+    assert controller.metrics["admitted"] == 2
+
+
+def streaming_app(environ, start_response):
+    def body():
+        yield b"first"
+        yield b"second"
+
+    return Response(body())(environ, start_response)
+
+
+def test_middleware_rejects_with_retry_after(env_helper: MagicMock):
+    # given
+    env_helper.ADMISSION_QUEUE_SIZE = 0
+    controller = AdmissionController(env_helper)
+    client = Client(
+        AdmissionMiddleware(streaming_app, controller, ["/api/conversation"], "busy")
+    )
+    held = client.get("/api/conversation", buffered=False)
+
+    # when
+    response = client.get("/api/conversation")
+
+    # then
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
+    assert response.json == {"error": "busy"}
+    held.close()
+
+
+def test_middleware_holds_slot_until_stream_closed(env_helper: MagicMock):
+    # given
+    controller = AdmissionController(env_helper)
+    client = Client(
+        AdmissionMiddleware(streaming_app, controller, ["/api/conversation"], "busy")
+    )
+
+    # when
+    response = client.get("/api/conversation", buffered=False)
+    in_flight_while_streaming = controller.in_flight
+    assert b"".join(response.response) == b"firstsecond"
+    response.close()
+
+    # then
+    assert in_flight_while_streaming == 1
+    assert controller.in_flight == 0
+
+
+def test_middleware_ignores_other_paths(env_helper: MagicMock):
+    # given
+    controller = MagicMock()
+    client = Client(
+        AdmissionMiddleware(streaming_app, controller, ["/api/conversation"], "busy")
+    )
+
+    # when
+    response = client.get("/api/health")
+
+    # then
+    assert response.status_code == 200
+    controller.admit.assert_not_called()
+
+
+def test_middleware_uses_authenticated_user(env_helper: MagicMock):
+    # given
+    controller = MagicMock()
+    controller.admit.return_value.admitted = True
+    client = Client(
+        AdmissionMiddleware(streaming_app, controller, ["/api/history/"], "busy")
+    )
+
+    # when
+    client.get(
+        "/api/history/list", headers={"X-Ms-Client-Principal-Id": "user-id"}
+    ).close()
+
+    # then
+    controller.admit.assert_called_once_with("user-id")
+    controller.release.assert_called_once()
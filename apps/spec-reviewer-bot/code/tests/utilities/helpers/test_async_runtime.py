@@ -0,0 +1,108 @@
+import asyncio
+import threading
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from backend.batch.utilities.helpers.async_runtime import AsyncRuntime
+
+
+@pytest.fixture
+def runtime():
+    runtime = AsyncRuntime.start()
+    yield runtime
+    runtime.shutdown()
+
+
+def test_start_returns_the_same_runtime(runtime: AsyncRuntime):
+    # then
+    assert AsyncRuntime.start() is runtime
+    assert AsyncRuntime.current() is runtime
+
+
+def test_run_executes_coroutines_on_the_shared_loop(runtime: AsyncRuntime):
+    # given
+    async def get_loop():
+        return asyncio.get_running_loop()
+
+    # when
+    loops = [runtime.run(get_loop()) for _ in range(2)]
+
+    # then
+    assert loops == [runtime.loop, runtime.loop]
+
+
+def test_run_interleaves_coroutines_from_several_threads(runtime: AsyncRuntime):
+    # given
+    both_started = asyncio.Event()
+    started = []
+
+    async def wait_for_each_other():
+        started.append(True)
+        if len(started) == 2:
+            both_started.set()
+        await asyncio.wait_for(both_started.wait(), timeout=5)
+
+    # when
+    threads = [
+        threading.Thread(target=runtime.run, args=(wait_for_each_other(),))
+        for _ in range(2)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+
+    # then
+    assert both_started.is_set()
+
+
+def test_current_in_loop_only_inside_the_shared_loop(runtime: AsyncRuntime):
+    # given
+    async def current_in_loop():
+        return AsyncRuntime.current_in_loop()
+
+    # then
+    assert runtime.run(current_in_loop()) is runtime
+    assert asyncio.run(current_in_loop()) is None
+    assert AsyncRuntime.current_in_loop() is None
+
+
+def test_resource_is_created_once_and_closed_on_shutdown():
+    # given
+    runtime = AsyncRuntime.start()
+    factory = MagicMock()
+    close = MagicMock()
+
+    # when
+    first = runtime.resource("client", factory, close=close)
+    second = runtime.resource("client", factory, close=close)
+    runtime.shutdown()
+
+    # then
+    assert first is second
+    factory.assert_called_once_with()
+    close.assert_called_once_with(factory.return_value)
+    assert AsyncRuntime.current() is None
+
+
+def test_async_resource_is_created_once_and_closed_on_shutdown():
+    # given
+    runtime = AsyncRuntime.start()
+    client = MagicMock()
+    factory = AsyncMock(return_value=client)
+    close = AsyncMock()
+
+    async def get_resource():
+        return await asyncio.gather(
+            runtime.async_resource("pool", factory, close=close),
+            runtime.async_resource("pool", factory, close=close),
+        )
+
+    # when
+    resources = runtime.run(get_resource())
+    runtime.shutdown()
+
+    # then
+    assert resources == [client, client]
+    factory.assert_awaited_once()
+    close.assert_awaited_once_with(client)
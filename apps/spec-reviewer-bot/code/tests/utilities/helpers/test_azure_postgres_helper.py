@@ -1,19 +1,37 @@
+import hashlib
+import time
 import unittest
 from unittest.mock import MagicMock, patch
 import psycopg2
 from backend.batch.utilities.helpers.azure_postgres_helper import AzurePostgresHelper
+from backend.batch.utilities.helpers.postgres_pool import (
+    PostgresConnectionPool,
+    PostgresTokenProvider,
+)
 
 
 class TestAzurePostgresHelper(unittest.TestCase):
-    @patch("backend.batch.utilities.helpers.azure_postgres_helper.get_azure_credential")
+    def setUp(self):
+        PostgresConnectionPool.close_all()
+        PostgresTokenProvider.clear()
+
+    def tearDown(self):
+        PostgresConnectionPool.close_all()
+        PostgresTokenProvider.clear()
+
+    @patch("backend.batch.utilities.helpers.postgres_pool.get_azure_credential")
     @patch("backend.batch.utilities.helpers.azure_postgres_helper.psycopg2.connect")
-    def test_create_search_client_success(self, mock_connect, mock_credential):
+    def test_get_search_client_connects_with_access_token(
+        self, mock_connect, mock_credential
+    ):
         # Arrange
         mock_access_token = MagicMock()
         mock_access_token.token = "mock-access-token"
+        mock_access_token.expires_on = time.time() + 3600
         mock_credential.return_value.get_token.return_value = mock_access_token
 
         mock_connection = MagicMock()
+        mock_connection.closed = 0
         mock_connect.return_value = mock_connection
 
         helper = AzurePostgresHelper()
@@ -22,7 +40,8 @@ class TestAzurePostgresHelper(unittest.TestCase):
         helper.env_helper.POSTGRESQL_DATABASE = "mock_database"
 
         # Act
-        connection = helper._create_search_client()
+        with helper.get_search_client().connection() as connection:
+            pass
 
         # Assert
         self.assertEqual(connection, mock_connection)
@@ -33,24 +52,30 @@ class TestAzurePostgresHelper(unittest.TestCase):
             "host=mock_host user=mock_user dbname=mock_database password=mock-access-token sslmode=require"
         )
 
+    @patch("backend.batch.utilities.helpers.postgres_pool.get_azure_credential")
     @patch("backend.batch.utilities.helpers.azure_postgres_helper.psycopg2.connect")
-    def test_get_search_client_reuses_connection(self, mock_connect):
+    def test_get_search_client_reuses_connection(self, mock_connect, mock_credential):
         # Arrange
+        mock_access_token = MagicMock()
+        mock_access_token.expires_on = time.time() + 3600
+        mock_credential.return_value.get_token.return_value = mock_access_token
         mock_connection = MagicMock()
         mock_connection.closed = 0  # Simulate an open connection
         mock_connect.return_value = mock_connection
 
-        helper = AzurePostgresHelper()
-        helper.conn = mock_connection
-
         # Act
-        connection = helper.get_search_client()
+        with AzurePostgresHelper().get_search_client().connection():
+            pass
+        with AzurePostgresHelper().get_search_client().connection() as connection:
+            pass
 
         # Assert
         self.assertEqual(connection, mock_connection)
-        mock_connect.assert_not_called()  # Ensure no new connection is created
+        mock_connect.assert_called_once()  # Ensure no new connection is created
+        mock_credential.return_value.get_token.assert_called_once()
+        mock_connection.close.assert_not_called()
 
-    @patch("backend.batch.utilities.helpers.azure_postgres_helper.get_azure_credential")
+    @patch("backend.batch.utilities.helpers.postgres_pool.get_azure_credential")
     @patch("backend.batch.utilities.helpers.azure_postgres_helper.psycopg2.connect")
     @patch("backend.batch.utilities.helpers.azure_postgres_helper.RealDictCursor")
     def test_get_vector_store_success(self, mock_cursor, mock_connect, mock_credential):
@@ -61,6 +86,11 @@ class TestAzurePostgresHelper(unittest.TestCase):
         mock_env_helper.POSTGRESQL_HOST = "mock_host"
         mock_env_helper.POSTGRESQL_DATABASE = "mock_database"
         mock_env_helper.AZURE_POSTGRES_SEARCH_TOP_K = 5
+        mock_env_helper.AZURE_SEARCH_FILTER = ""
+        mock_env_helper.AZURE_POSTGRES_HYBRID_SEARCH = False
+        mock_env_helper.AZURE_POSTGRES_HNSW_EF_SEARCH = 40
+        mock_env_helper.AZURE_POSTGRES_HNSW_ITERATIVE_SCAN = "relaxed_order"
+        mock_env_helper.AZURE_POSTGRES_VECTOR_STORAGE = "vector"
 
         # Mock access token retrieval
         mock_access_token = MagicMock()
@@ -69,6 +99,7 @@ class TestAzurePostgresHelper(unittest.TestCase):
 
         # Mock the database connection and cursor
         mock_connection = MagicMock()
+        mock_connection.closed = 0
         mock_connect.return_value = mock_connection
         mock_cursor_instance = MagicMock()
         mock_cursor.return_value = mock_cursor_instance
@@ -95,7 +126,7 @@ class TestAzurePostgresHelper(unittest.TestCase):
             "host=mock_host user=mock_user dbname=mock_database password=mock-access-token sslmode=require"
         )
 
-    @patch("backend.batch.utilities.helpers.azure_postgres_helper.get_azure_credential")
+    @patch("backend.batch.utilities.helpers.postgres_pool.get_azure_credential")
     @patch("backend.batch.utilities.helpers.azure_postgres_helper.psycopg2.connect")
     def test_get_vector_store_query_error(self, mock_connect, mock_credential):
         # Arrange
@@ -105,6 +136,11 @@ class TestAzurePostgresHelper(unittest.TestCase):
         mock_env_helper.POSTGRESQL_HOST = "mock_host"
         mock_env_helper.POSTGRESQL_DATABASE = "mock_database"
         mock_env_helper.AZURE_POSTGRES_SEARCH_TOP_K = 5
+        mock_env_helper.AZURE_SEARCH_FILTER = ""
+        mock_env_helper.AZURE_POSTGRES_HYBRID_SEARCH = False
+        mock_env_helper.AZURE_POSTGRES_HNSW_EF_SEARCH = 40
+        mock_env_helper.AZURE_POSTGRES_HNSW_ITERATIVE_SCAN = "relaxed_order"
+        mock_env_helper.AZURE_POSTGRES_VECTOR_STORAGE = "vector"
 
         # Mock access token retrieval
         mock_access_token = MagicMock()
@@ -112,6 +148,7 @@ class TestAzurePostgresHelper(unittest.TestCase):
         mock_credential.return_value.get_token.return_value = mock_access_token
 
         mock_connection = MagicMock()
+        mock_connection.closed = 0
         mock_connect.return_value = mock_connection
 
         def raise_exception(*args, **kwargs):
@@ -134,9 +171,301 @@ class TestAzurePostgresHelper(unittest.TestCase):
 
         self.assertEqual(str(context.exception), "Query execution error")
 
-    @patch("backend.batch.utilities.helpers.azure_postgres_helper.get_azure_credential")
+    @patch("backend.batch.utilities.helpers.azure_postgres_helper.PostgresConnectionPool")
+    def test_get_vector_store_pushes_filter_down(self, mock_pool):
+        # Arrange
+        mock_env_helper = MagicMock()
+        mock_env_helper.AZURE_POSTGRES_SEARCH_TOP_K = 5
+        mock_env_helper.AZURE_SEARCH_FILTER = "title eq 'Spec A'"
+        mock_env_helper.AZURE_POSTGRES_HYBRID_SEARCH = False
+        mock_env_helper.AZURE_POSTGRES_HNSW_EF_SEARCH = 40
+        mock_env_helper.AZURE_POSTGRES_HNSW_ITERATIVE_SCAN = "relaxed_order"
+        mock_env_helper.AZURE_POSTGRES_VECTOR_STORAGE = "vector"
+        mock_cursor = MagicMock()
+        mock_connection = mock_pool.shared.return_value.connection.return_value
+        mock_connection.__enter__.return_value.cursor.return_value.__enter__.return_value = (
+            mock_cursor
+        )
+
+        helper = AzurePostgresHelper()
+        helper.env_helper = mock_env_helper
+
+        # Act
+        helper.get_vector_store([1, 2, 3], "What does REQ-4711 require?")
+
+        # Assert
+        query, params = mock_cursor.execute.call_args.args
+        self.assertIn("WHERE title = %s", query)
+        self.assertNotIn("content_tsv", query)
+        self.assertTrue(
+            query.startswith(
+                "SELECT set_config('hnsw.ef_search', %s, true), set_config('hnsw.iterative_scan', %s, true);"
+            )
+        )
+        self.assertEqual(
+            params, ("40", "relaxed_order", "Spec A", [1, 2, 3], 5, [1, 2, 3], 5)
+        )
+
+    @patch("backend.batch.utilities.helpers.azure_postgres_helper.PostgresConnectionPool")
+    def test_get_vector_store_sets_ef_search_without_iterative_scan_when_unfiltered(
+        self, mock_pool
+    ):
+        # Arrange
+        mock_env_helper = MagicMock()
+        mock_env_helper.AZURE_POSTGRES_SEARCH_TOP_K = 5
+        mock_env_helper.AZURE_SEARCH_FILTER = ""
+        mock_env_helper.AZURE_POSTGRES_HYBRID_SEARCH = False
+        mock_env_helper.AZURE_POSTGRES_HNSW_EF_SEARCH = 100
+        mock_env_helper.AZURE_POSTGRES_HNSW_ITERATIVE_SCAN = "relaxed_order"
+        mock_env_helper.AZURE_POSTGRES_VECTOR_STORAGE = "vector"
+        mock_cursor = MagicMock()
+        mock_connection = mock_pool.shared.return_value.connection.return_value
+        mock_connection.__enter__.return_value.cursor.return_value.__enter__.return_value = (
+            mock_cursor
+        )
+
+        helper = AzurePostgresHelper()
+        helper.env_helper = mock_env_helper
+
+        # Act
+        helper.get_vector_store([1, 2, 3])
+
+        # Assert
+        query, params = mock_cursor.execute.call_args.args
+        self.assertTrue(
+            query.startswith("SELECT set_config('hnsw.ef_search', %s, true);")
+        )
+        self.assertEqual(params, ("100", [1, 2, 3], 5, [1, 2, 3], 5))
+
+    @patch("backend.batch.utilities.helpers.azure_postgres_helper.PostgresConnectionPool")
+    def test_get_vector_store_caps_ef_search_at_pgvector_maximum(self, mock_pool):
+        # Arrange
+        mock_env_helper = MagicMock()
+        mock_env_helper.AZURE_POSTGRES_SEARCH_TOP_K = 5
+        mock_env_helper.AZURE_SEARCH_FILTER = ""
+        mock_env_helper.AZURE_POSTGRES_HYBRID_SEARCH = False
+        mock_env_helper.AZURE_POSTGRES_HNSW_EF_SEARCH = 5000
+        mock_env_helper.AZURE_POSTGRES_HNSW_ITERATIVE_SCAN = "relaxed_order"
+        mock_env_helper.AZURE_POSTGRES_VECTOR_STORAGE = "vector"
+        mock_cursor = MagicMock()
+        mock_connection = mock_pool.shared.return_value.connection.return_value
+        mock_connection.__enter__.return_value.cursor.return_value.__enter__.return_value = (
+            mock_cursor
+        )
+
+        helper = AzurePostgresHelper()
+        helper.env_helper = mock_env_helper
+
+        # Act
+        with self.assertLogs(
+            "backend.batch.utilities.helpers.azure_postgres_helper", level="WARNING"
+        ) as logs:
+            helper.get_vector_store([1, 2, 3])
+
+        # Assert
+        query, params = mock_cursor.execute.call_args.args
+        self.assertEqual(params[0], "1000")
+        self.assertIn("Capping hnsw.ef_search at 1000", logs.output[0])
+
+    @patch("backend.batch.utilities.helpers.azure_postgres_helper.PostgresConnectionPool")
+    def test_get_vector_store_fuses_vector_and_keyword_ranks(self, mock_pool):
+        # Arrange
+        mock_env_helper = MagicMock()
+        mock_env_helper.AZURE_POSTGRES_SEARCH_TOP_K = 5
+        mock_env_helper.AZURE_SEARCH_FILTER = "page_number gt 2"
+        mock_env_helper.AZURE_POSTGRES_HYBRID_SEARCH = True
+        mock_env_helper.AZURE_POSTGRES_HNSW_EF_SEARCH = 40
+        mock_env_helper.AZURE_POSTGRES_HNSW_ITERATIVE_SCAN = "relaxed_order"
+        mock_env_helper.AZURE_POSTGRES_VECTOR_STORAGE = "vector"
+        mock_env_helper.AZURE_POSTGRES_HYBRID_CANDIDATES = 50
+        mock_env_helper.AZURE_POSTGRES_RRF_K = 60
+        mock_cursor = MagicMock()
+        mock_cursor.fetchall.return_value = [{"id": "1"}]
+        mock_connection = mock_pool.shared.return_value.connection.return_value
+        mock_connection.__enter__.return_value.cursor.return_value.__enter__.return_value = (
+            mock_cursor
+        )
+
+        helper = AzurePostgresHelper()
+        helper.env_helper = mock_env_helper
+
+        # Act
+        results = helper.get_vector_store([1, 2, 3], "REQ-4711")
+
+        # Assert
+        self.assertEqual(results, [{"id": "1"}])
+        query, params = mock_cursor.execute.call_args.args
+        self.assertIn("content_tsv @@ keywords.query AND page_number > %s", query)
+        self.assertIn("FULL OUTER JOIN text_matches", query)
+        self.assertEqual(query.count("%s"), len(params))
+        self.assertEqual(
+            params,
+            (
+                "50",
+                "relaxed_order",
+                "english",
+                "REQ-4711",
+                [1, 2, 3],
+                2,
+                [1, 2, 3],
+                50,
+                [1, 2, 3],
+                50,
+                2,
+                50,
+                60,
+                60,
+                5,
+            ),
+        )
+
+    @patch("backend.batch.utilities.helpers.azure_postgres_helper.PostgresConnectionPool")
+    def test_get_vector_store_reranks_quantized_candidates(self, mock_pool):
+        for storage, distance in [
+            ("halfvec", "content_vector::halfvec(1536) <=> %s::vector::halfvec(1536)"),
+            (
+                "binary",
+                "binary_quantize(content_vector)::bit(1536) <~> binary_quantize(%s::vector)",
+            ),
+        ]:
+            with self.subTest(storage=storage):
+                # Arrange
+                mock_env_helper = MagicMock()
+                mock_env_helper.AZURE_POSTGRES_SEARCH_TOP_K = 5
+                mock_env_helper.AZURE_SEARCH_FILTER = ""
+                mock_env_helper.AZURE_POSTGRES_HYBRID_SEARCH = False
+                mock_env_helper.AZURE_POSTGRES_HNSW_EF_SEARCH = 40
+                mock_env_helper.AZURE_POSTGRES_HNSW_ITERATIVE_SCAN = "off"
+                mock_env_helper.AZURE_POSTGRES_VECTOR_STORAGE = storage
+                mock_env_helper.AZURE_POSTGRES_RERANK_FACTOR = 10
+                mock_cursor = MagicMock()
+                mock_connection = mock_pool.shared.return_value.connection.return_value
+                mock_connection.__enter__.return_value.cursor.return_value.__enter__.return_value = (
+                    mock_cursor
+                )
+
+                helper = AzurePostgresHelper()
+                helper.env_helper = mock_env_helper
+
+                # Act
+                helper.get_vector_store([1, 2, 3])
+
+                # Assert
+                query, params = mock_cursor.execute.call_args.args
+                self.assertIn(f"ORDER BY {distance}", query)
+                self.assertIn("ORDER BY content_vector <=> %s::vector", query)
+                # ef_search is raised to the 50 candidates to re-rank
+                self.assertEqual(params, ("50", [1, 2, 3], 50, [1, 2, 3], 5))
+
+    def test_get_vector_store_rejects_unknown_storage(self):
+        # Arrange
+        mock_env_helper = MagicMock()
+        mock_env_helper.AZURE_SEARCH_FILTER = ""
+        mock_env_helper.AZURE_POSTGRES_HYBRID_SEARCH = False
+        mock_env_helper.AZURE_POSTGRES_SEARCH_TOP_K = 5
+        mock_env_helper.AZURE_POSTGRES_VECTOR_STORAGE = "pq"
+        helper = AzurePostgresHelper()
+        helper.env_helper = mock_env_helper
+
+        # Act & Assert
+        with self.assertRaises(ValueError):
+            helper.get_vector_store([1, 2, 3])
+
+    @patch("backend.batch.utilities.helpers.azure_postgres_helper.PostgresConnectionPool")
+    def test_create_vector_store_copies_and_merges_chunks(self, mock_pool):
+        # Arrange
+        mock_cursor = MagicMock()
+        mock_cursor.rowcount = 2
+        copied = []
+        mock_cursor.copy_expert.side_effect = lambda sql, stream: copied.append(
+            stream.read()
+        )
+        mock_connection = mock_pool.shared.return_value.connection.return_value
+        mock_connection = mock_connection.__enter__.return_value
+        mock_connection.cursor.return_value.__enter__.return_value = mock_cursor
+        documents = [
+            {
+                "id": f"doc_{chunk}",
+                "title": "spec.pdf",
+                "chunk": chunk,
+                "chunk_id": None,
+                "offset": chunk * 100,
+                "page_number": 1,
+                "content": "Content é",
+                "source": "https://blob/spec.pdf_SAS_TOKEN_PLACEHOLDER_",
+                "metadata": "{}",
+                "content_vector": [0.5, -1.0],
+            }
+            for chunk in range(2)
+        ]
+        helper = AzurePostgresHelper()
+        helper.env_helper = MagicMock()
+
+        # Act
+        helper.create_vector_store(documents, etag="0x8DC")
+
+        # Assert
+        file_id = hashlib.sha1(b"https://blob/spec.pdf").hexdigest()
+        query, rows = mock_cursor.executemany.call_args.args
+        self.assertIn("INSERT INTO documents", query)
+        self.assertEqual(
+            rows, [(file_id, "https://blob/spec.pdf", "spec.pdf", "0x8DC", 2)]
+        )
+        statements = [call.args[0] for call in mock_cursor.execute.call_args_list]
+        self.assertIn("CREATE TEMPORARY TABLE vector_store_staging", statements[0])
+        self.assertIn("ON CONFLICT (id) DO UPDATE", statements[1])
+        self.assertIn("DELETE FROM vector_store", statements[2])
+        self.assertEqual(mock_cursor.execute.call_args_list[2].args[1], ([file_id],))
+        self.assertIn("FORMAT binary", mock_cursor.copy_expert.call_args.args[0])
+        data = copied[0]
+        self.assertTrue(data.startswith(b"PGCOPY\n\xff\r\n\x00"))
+        self.assertTrue(data.endswith(b"\xff\xff"))
+        # A NULL chunk_id, and the vector as its dimensions, an unused int16 and float4 values
+        self.assertIn(b"\xff\xff\xff\xff", data)
+        self.assertIn(
+            b"\x00\x00\x00\x0c\x00\x02\x00\x00\x3f\x00\x00\x00\xbf\x80\x00\x00",
+            data,
+        )
+        self.assertIn("Content é".encode("utf-8"), data)
+        self.assertIn(file_id.encode("utf-8"), data)
+        mock_connection.commit.assert_called_once()
+        mock_connection.rollback.assert_not_called()
+
+    @patch("backend.batch.utilities.helpers.azure_postgres_helper.PostgresConnectionPool")
+    def test_create_vector_store_rolls_back_on_error(self, mock_pool):
+        # Arrange
+        mock_cursor = MagicMock()
+        mock_cursor.copy_expert.side_effect = psycopg2.DataError("bad vector")
+        mock_connection = mock_pool.shared.return_value.connection.return_value
+        mock_connection = mock_connection.__enter__.return_value
+        mock_connection.cursor.return_value.__enter__.return_value = mock_cursor
+        helper = AzurePostgresHelper()
+        helper.env_helper = MagicMock()
+
+        # Act & Assert
+        with self.assertRaises(psycopg2.DataError):
+            helper.create_vector_store(
+                [
+                    {
+                        "id": "doc_0",
+                        "title": "spec.pdf",
+                        "chunk": 0,
+                        "chunk_id": "0",
+                        "offset": 0,
+                        "page_number": 1,
+                        "content": "Content",
+                        "source": "source",
+                        "metadata": "{}",
+                        "content_vector": [0.5],
+                    }
+                ]
+            )
+        mock_connection.commit.assert_not_called()
+        mock_connection.rollback.assert_called_once()
+
+    @patch("backend.batch.utilities.helpers.postgres_pool.get_azure_credential")
     @patch("backend.batch.utilities.helpers.azure_postgres_helper.psycopg2.connect")
-    def test_create_search_client_connection_error(self, mock_connect, mock_credential):
+    def test_get_search_client_connection_error(self, mock_connect, mock_credential):
         # Arrange
         # Mock the EnvHelper and set required attributes
         mock_env_helper = MagicMock()
@@ -160,11 +489,12 @@ class TestAzurePostgresHelper(unittest.TestCase):
 
         # Act & Assert
         with self.assertRaises(Exception) as context:
-            helper._create_search_client()
+            with helper.get_search_client().connection():
+                pass
 
         self.assertEqual(str(context.exception), "Connection error")
 
-    @patch("backend.batch.utilities.helpers.azure_postgres_helper.get_azure_credential")
+    @patch("backend.batch.utilities.helpers.postgres_pool.get_azure_credential")
     @patch("backend.batch.utilities.helpers.azure_postgres_helper.psycopg2.connect")
     @patch("backend.batch.utilities.helpers.azure_postgres_helper.EnvHelper")
     def test_get_files_success(self, mock_env_helper, mock_connect, mock_credential):
@@ -181,6 +511,7 @@ class TestAzurePostgresHelper(unittest.TestCase):
 
         # Arrange: Mock the connection and cursor
         mock_connection = MagicMock()
+        mock_connection.closed = 0
         mock_cursor = MagicMock()
         mock_connection.cursor.return_value.__enter__.return_value = mock_cursor
         mock_connect.return_value = mock_connection
@@ -201,9 +532,10 @@ class TestAzurePostgresHelper(unittest.TestCase):
         self.assertEqual(
             result, [{"id": 1, "title": "Title 1"}, {"id": 2, "title": "Title 2"}]
         )
-        mock_connection.close.assert_called_once()
+        mock_connection.rollback.assert_called()
+        mock_connection.close.assert_not_called()
 
-    @patch("backend.batch.utilities.helpers.azure_postgres_helper.get_azure_credential")
+    @patch("backend.batch.utilities.helpers.postgres_pool.get_azure_credential")
     @patch("backend.batch.utilities.helpers.azure_postgres_helper.psycopg2.connect")
     @patch("backend.batch.utilities.helpers.azure_postgres_helper.EnvHelper")
     def test_get_files_no_results(self, mock_env_helper, mock_connect, mock_credential):
@@ -220,6 +552,7 @@ class TestAzurePostgresHelper(unittest.TestCase):
 
         # Arrange: Mock the connection and cursor
         mock_connection = MagicMock()
+        mock_connection.closed = 0
         mock_cursor = MagicMock()
         mock_connection.cursor.return_value.__enter__.return_value = mock_cursor
         mock_connect.return_value = mock_connection
@@ -235,9 +568,10 @@ class TestAzurePostgresHelper(unittest.TestCase):
 
         # Assert: Check that the result is None
         self.assertIsNone(result)
-        mock_connection.close.assert_called_once()
+        mock_connection.rollback.assert_called()
+        mock_connection.close.assert_not_called()
 
-    @patch("backend.batch.utilities.helpers.azure_postgres_helper.get_azure_credential")
+    @patch("backend.batch.utilities.helpers.postgres_pool.get_azure_credential")
     @patch("backend.batch.utilities.helpers.azure_postgres_helper.psycopg2.connect")
     @patch("backend.batch.utilities.helpers.azure_postgres_helper.EnvHelper")
     @patch("backend.batch.utilities.helpers.azure_postgres_helper.logger")
@@ -257,6 +591,7 @@ class TestAzurePostgresHelper(unittest.TestCase):
 
         # Arrange: Mock the connection and cursor
         mock_connection = MagicMock()
+        mock_connection.closed = 0
         mock_cursor = MagicMock()
         mock_connection.cursor.return_value.__enter__.return_value = mock_cursor
         mock_connect.return_value = mock_connection
@@ -274,9 +609,10 @@ class TestAzurePostgresHelper(unittest.TestCase):
         mock_logger.error.assert_called_with(
             "Database error while fetching titles: Database error"
         )
-        mock_connection.close.assert_called_once()
+        mock_connection.rollback.assert_called()
+        mock_connection.close.assert_not_called()
 
-    @patch("backend.batch.utilities.helpers.azure_postgres_helper.get_azure_credential")
+    @patch("backend.batch.utilities.helpers.postgres_pool.get_azure_credential")
     @patch("backend.batch.utilities.helpers.azure_postgres_helper.psycopg2.connect")
     @patch("backend.batch.utilities.helpers.azure_postgres_helper.EnvHelper")
     @patch("backend.batch.utilities.helpers.azure_postgres_helper.logger")
@@ -296,6 +632,7 @@ class TestAzurePostgresHelper(unittest.TestCase):
 
         # Arrange: Mock the connection and cursor
         mock_connection = MagicMock()
+        mock_connection.closed = 0
         mock_cursor = MagicMock()
         mock_connection.cursor.return_value.__enter__.return_value = mock_cursor
         mock_connect.return_value = mock_connection
@@ -313,9 +650,10 @@ class TestAzurePostgresHelper(unittest.TestCase):
         mock_logger.error.assert_called_with(
             "Unexpected error while fetching titles: Unexpected error"
         )
-        mock_connection.close.assert_called_once()
+        mock_connection.rollback.assert_called()
+        mock_connection.close.assert_not_called()
 
-    @patch("backend.batch.utilities.helpers.azure_postgres_helper.get_azure_credential")
+    @patch("backend.batch.utilities.helpers.postgres_pool.get_azure_credential")
     @patch("backend.batch.utilities.helpers.azure_postgres_helper.psycopg2.connect")
     @patch("backend.batch.utilities.helpers.azure_postgres_helper.logger")
     @patch("backend.batch.utilities.helpers.azure_postgres_helper.EnvHelper")
@@ -335,6 +673,7 @@ class TestAzurePostgresHelper(unittest.TestCase):
 
         # Mock the connection and cursor
         mock_connection = MagicMock()
+        mock_connection.closed = 0
         mock_cursor = MagicMock()
         mock_connection.cursor.return_value.__enter__.return_value = mock_cursor
         mock_connect.return_value = mock_connection
@@ -354,10 +693,11 @@ class TestAzurePostgresHelper(unittest.TestCase):
         # Assert: Check that the correct number of rows were deleted
         self.assertEqual(result, 3)
         mock_connection.commit.assert_called_once()
-        mock_connection.close.assert_called_once()
+        mock_connection.rollback.assert_called()
+        mock_connection.close.assert_not_called()
         mock_logger.info.assert_called_with("Deleted 3 documents.")
 
-    @patch("backend.batch.utilities.helpers.azure_postgres_helper.get_azure_credential")
+    @patch("backend.batch.utilities.helpers.postgres_pool.get_azure_credential")
     @patch("backend.batch.utilities.helpers.azure_postgres_helper.psycopg2.connect")
     @patch("backend.batch.utilities.helpers.azure_postgres_helper.logger")
     @patch("backend.batch.utilities.helpers.azure_postgres_helper.EnvHelper")
@@ -377,6 +717,7 @@ class TestAzurePostgresHelper(unittest.TestCase):
 
         # Mock the connection and cursor
         mock_connection = MagicMock()
+        mock_connection.closed = 0
         mock_cursor = MagicMock()
         mock_connection.cursor.return_value.__enter__.return_value = mock_cursor
         mock_connect.return_value = mock_connection
@@ -393,9 +734,10 @@ class TestAzurePostgresHelper(unittest.TestCase):
         # Assert: Check that no rows were deleted and a warning was logged
         self.assertEqual(result, 0)
         mock_logger.warning.assert_called_with("No IDs provided for deletion.")
-        mock_connection.close.assert_called_once()
+        mock_connection.rollback.assert_called()
+        mock_connection.close.assert_not_called()
 
-    @patch("backend.batch.utilities.helpers.azure_postgres_helper.get_azure_credential")
+    @patch("backend.batch.utilities.helpers.postgres_pool.get_azure_credential")
     @patch("backend.batch.utilities.helpers.azure_postgres_helper.psycopg2.connect")
     @patch("backend.batch.utilities.helpers.azure_postgres_helper.logger")
     @patch("backend.batch.utilities.helpers.azure_postgres_helper.EnvHelper")
@@ -415,6 +757,7 @@ class TestAzurePostgresHelper(unittest.TestCase):
 
         # Mock the connection and cursor
         mock_connection = MagicMock()
+        mock_connection.closed = 0
         mock_cursor = MagicMock()
         mock_connection.cursor.return_value.__enter__.return_value = mock_cursor
         mock_connect.return_value = mock_connection
@@ -434,10 +777,10 @@ class TestAzurePostgresHelper(unittest.TestCase):
         mock_logger.error.assert_called_with(
             "Database error while deleting documents: Database error"
         )
-        mock_connection.rollback.assert_called_once()
-        mock_connection.close.assert_called_once()
+        mock_connection.rollback.assert_called()
+        mock_connection.close.assert_not_called()
 
-    @patch("backend.batch.utilities.helpers.azure_postgres_helper.get_azure_credential")
+    @patch("backend.batch.utilities.helpers.postgres_pool.get_azure_credential")
     @patch("backend.batch.utilities.helpers.azure_postgres_helper.psycopg2.connect")
     @patch("backend.batch.utilities.helpers.azure_postgres_helper.logger")
     @patch("backend.batch.utilities.helpers.azure_postgres_helper.EnvHelper")
@@ -457,6 +800,7 @@ class TestAzurePostgresHelper(unittest.TestCase):
 
         # Mock the connection and cursor
         mock_connection = MagicMock()
+        mock_connection.closed = 0
         mock_cursor = MagicMock()
         mock_connection.cursor.return_value.__enter__.return_value = mock_cursor
         mock_connect.return_value = mock_connection
@@ -476,10 +820,10 @@ class TestAzurePostgresHelper(unittest.TestCase):
         mock_logger.error.assert_called_with(
             "Unexpected error while deleting documents: Unexpected error"
         )
-        mock_connection.rollback.assert_called_once()
-        mock_connection.close.assert_called_once()
+        mock_connection.rollback.assert_called()
+        mock_connection.close.assert_not_called()
 
-    @patch("backend.batch.utilities.helpers.azure_postgres_helper.get_azure_credential")
+    @patch("backend.batch.utilities.helpers.postgres_pool.get_azure_credential")
     @patch("backend.batch.utilities.helpers.azure_postgres_helper.psycopg2.connect")
     @patch("backend.batch.utilities.helpers.azure_postgres_helper.logger")
     @patch("backend.batch.utilities.helpers.azure_postgres_helper.EnvHelper")
@@ -499,6 +843,7 @@ class TestAzurePostgresHelper(unittest.TestCase):
 
         # Mock the connection and cursor
         mock_connection = MagicMock()
+        mock_connection.closed = 0
         mock_cursor = MagicMock()
         mock_connection.cursor.return_value.__enter__.return_value = mock_cursor
         mock_connect.return_value = mock_connection
@@ -526,11 +871,12 @@ class TestAzurePostgresHelper(unittest.TestCase):
         self.assertEqual(result[0]["content"], "Test Content")
         self.assertEqual(result[0]["metadata"], "Test Metadata")
 
-        # Ensure the connection was closed
-        mock_connection.close.assert_called_once()
+        # Ensure the connection went back to the pool
+        mock_connection.rollback.assert_called()
+        mock_connection.close.assert_not_called()
         mock_logger.info.assert_called_with("Retrieved 1 search result(s).")
 
-    @patch("backend.batch.utilities.helpers.azure_postgres_helper.get_azure_credential")
+    @patch("backend.batch.utilities.helpers.postgres_pool.get_azure_credential")
     @patch("backend.batch.utilities.helpers.azure_postgres_helper.psycopg2.connect")
     @patch("backend.batch.utilities.helpers.azure_postgres_helper.logger")
     @patch("backend.batch.utilities.helpers.azure_postgres_helper.EnvHelper")
@@ -550,6 +896,7 @@ class TestAzurePostgresHelper(unittest.TestCase):
 
         # Mock the connection and cursor
         mock_connection = MagicMock()
+        mock_connection.closed = 0
         mock_cursor = MagicMock()
         mock_connection.cursor.return_value.__enter__.return_value = mock_cursor
         mock_connect.return_value = mock_connection
@@ -568,11 +915,12 @@ class TestAzurePostgresHelper(unittest.TestCase):
         # Assert: Check that no results were returned
         self.assertEqual(result, [])  # Empty list returned for no results
 
-        # Ensure the connection was closed
-        mock_connection.close.assert_called_once()
+        # Ensure the connection went back to the pool
+        mock_connection.rollback.assert_called()
+        mock_connection.close.assert_not_called()
         mock_logger.info.assert_called_with("Retrieved 0 search result(s).")
 
-    @patch("backend.batch.utilities.helpers.azure_postgres_helper.get_azure_credential")
+    @patch("backend.batch.utilities.helpers.postgres_pool.get_azure_credential")
     @patch("backend.batch.utilities.helpers.azure_postgres_helper.psycopg2.connect")
     @patch("backend.batch.utilities.helpers.azure_postgres_helper.logger")
     @patch("backend.batch.utilities.helpers.azure_postgres_helper.EnvHelper")
@@ -592,6 +940,7 @@ class TestAzurePostgresHelper(unittest.TestCase):
 
         # Mock the connection and cursor
         mock_connection = MagicMock()
+        mock_connection.closed = 0
         mock_cursor = MagicMock()
         mock_connection.cursor.return_value.__enter__.return_value = mock_cursor
         mock_connect.return_value = mock_connection
@@ -611,9 +960,10 @@ class TestAzurePostgresHelper(unittest.TestCase):
         mock_logger.error.assert_called_with(
             "Error executing search query: Database error"
         )
-        mock_connection.close.assert_called_once()
+        mock_connection.rollback.assert_called()
+        mock_connection.close.assert_not_called()
 
-    @patch("backend.batch.utilities.helpers.azure_postgres_helper.get_azure_credential")
+    @patch("backend.batch.utilities.helpers.postgres_pool.get_azure_credential")
     @patch("backend.batch.utilities.helpers.azure_postgres_helper.psycopg2.connect")
     @patch("backend.batch.utilities.helpers.azure_postgres_helper.logger")
     @patch("backend.batch.utilities.helpers.azure_postgres_helper.EnvHelper")
@@ -633,6 +983,7 @@ class TestAzurePostgresHelper(unittest.TestCase):
 
         # Mock the connection and cursor
         mock_connection = MagicMock()
+        mock_connection.closed = 0
         mock_cursor = MagicMock()
         mock_connection.cursor.return_value.__enter__.return_value = mock_cursor
         mock_connect.return_value = mock_connection
@@ -654,11 +1005,12 @@ class TestAzurePostgresHelper(unittest.TestCase):
         self.assertEqual(result[0]["title"], "Unique Title 1")
         self.assertEqual(result[1]["title"], "Unique Title 2")
 
-        # Ensure the connection was closed
-        mock_connection.close.assert_called_once()
+        # Ensure the connection went back to the pool
+        mock_connection.rollback.assert_called()
+        mock_connection.close.assert_not_called()
         mock_logger.info.assert_called_with("Retrieved 2 unique title(s).")
 
-    @patch("backend.batch.utilities.helpers.azure_postgres_helper.get_azure_credential")
+    @patch("backend.batch.utilities.helpers.postgres_pool.get_azure_credential")
     @patch("backend.batch.utilities.helpers.azure_postgres_helper.psycopg2.connect")
     @patch("backend.batch.utilities.helpers.azure_postgres_helper.logger")
     @patch("backend.batch.utilities.helpers.azure_postgres_helper.EnvHelper")
@@ -678,6 +1030,7 @@ class TestAzurePostgresHelper(unittest.TestCase):
 
         # Mock the connection and cursor
         mock_connection = MagicMock()
+        mock_connection.closed = 0
         mock_cursor = MagicMock()
         mock_connection.cursor.return_value.__enter__.return_value = mock_cursor
         mock_connect.return_value = mock_connection
@@ -694,11 +1047,12 @@ class TestAzurePostgresHelper(unittest.TestCase):
         # Assert: Check that no results were returned
         self.assertEqual(result, [])  # Empty list returned for no results
 
-        # Ensure the connection was closed
-        mock_connection.close.assert_called_once()
+        # Ensure the connection went back to the pool
+        mock_connection.rollback.assert_called()
+        mock_connection.close.assert_not_called()
         mock_logger.info.assert_called_with("Retrieved 0 unique title(s).")
 
-    @patch("backend.batch.utilities.helpers.azure_postgres_helper.get_azure_credential")
+    @patch("backend.batch.utilities.helpers.postgres_pool.get_azure_credential")
     @patch("backend.batch.utilities.helpers.azure_postgres_helper.psycopg2.connect")
     @patch("backend.batch.utilities.helpers.azure_postgres_helper.logger")
     @patch("backend.batch.utilities.helpers.azure_postgres_helper.EnvHelper")
@@ -718,6 +1072,7 @@ class TestAzurePostgresHelper(unittest.TestCase):
 
         # Mock the connection and cursor
         mock_connection = MagicMock()
+        mock_connection.closed = 0
         mock_cursor = MagicMock()
         mock_connection.cursor.return_value.__enter__.return_value = mock_cursor
         mock_connect.return_value = mock_connection
@@ -735,9 +1090,10 @@ class TestAzurePostgresHelper(unittest.TestCase):
         mock_logger.error.assert_called_with(
             "Error executing search query: Database error"
         )
-        mock_connection.close.assert_called_once()
+        mock_connection.rollback.assert_called()
+        mock_connection.close.assert_not_called()
 
-    @patch("backend.batch.utilities.helpers.azure_postgres_helper.get_azure_credential")
+    @patch("backend.batch.utilities.helpers.postgres_pool.get_azure_credential")
     @patch("backend.batch.utilities.helpers.azure_postgres_helper.psycopg2.connect")
     @patch("backend.batch.utilities.helpers.azure_postgres_helper.logger")
     @patch("backend.batch.utilities.helpers.azure_postgres_helper.EnvHelper")
@@ -757,6 +1113,7 @@ class TestAzurePostgresHelper(unittest.TestCase):
 
         # Mock the connection and cursor
         mock_connection = MagicMock()
+        mock_connection.closed = 0
         mock_cursor = MagicMock()
         mock_connection.cursor.return_value.__enter__.return_value = mock_cursor
         mock_connect.return_value = mock_connection
@@ -778,12 +1135,16 @@ class TestAzurePostgresHelper(unittest.TestCase):
         self.assertEqual(len(result), 2)  # Two titles returned
         self.assertEqual(result[0]["title"], "Title 1")
         self.assertEqual(result[1]["title"], "Title 2")
+        query, params = mock_cursor.execute.call_args.args
+        self.assertIn("FROM documents", query)
+        self.assertEqual(params, ("mock_blob_url",))
 
-        # Ensure the connection was closed
-        mock_connection.close.assert_called_once()
+        # Ensure the connection went back to the pool
+        mock_connection.rollback.assert_called()
+        mock_connection.close.assert_not_called()
         mock_logger.info.assert_called_with("Retrieved 2 unique title(s).")
 
-    @patch("backend.batch.utilities.helpers.azure_postgres_helper.get_azure_credential")
+    @patch("backend.batch.utilities.helpers.postgres_pool.get_azure_credential")
     @patch("backend.batch.utilities.helpers.azure_postgres_helper.psycopg2.connect")
     @patch("backend.batch.utilities.helpers.azure_postgres_helper.logger")
     @patch("backend.batch.utilities.helpers.azure_postgres_helper.EnvHelper")
@@ -803,6 +1164,7 @@ class TestAzurePostgresHelper(unittest.TestCase):
 
         # Mock the connection and cursor
         mock_connection = MagicMock()
+        mock_connection.closed = 0
         mock_cursor = MagicMock()
         mock_connection.cursor.return_value.__enter__.return_value = mock_cursor
         mock_connect.return_value = mock_connection
@@ -820,11 +1182,12 @@ class TestAzurePostgresHelper(unittest.TestCase):
         # Assert: Check that no results were returned
         self.assertEqual(result, [])  # Empty list returned for no results
 
-        # Ensure the connection was closed
-        mock_connection.close.assert_called_once()
+        # Ensure the connection went back to the pool
+        mock_connection.rollback.assert_called()
+        mock_connection.close.assert_not_called()
         mock_logger.info.assert_called_with("Retrieved 0 unique title(s).")
 
-    @patch("backend.batch.utilities.helpers.azure_postgres_helper.get_azure_credential")
+    @patch("backend.batch.utilities.helpers.postgres_pool.get_azure_credential")
     @patch("backend.batch.utilities.helpers.azure_postgres_helper.psycopg2.connect")
     @patch("backend.batch.utilities.helpers.azure_postgres_helper.logger")
     @patch("backend.batch.utilities.helpers.azure_postgres_helper.EnvHelper")
@@ -844,6 +1207,7 @@ class TestAzurePostgresHelper(unittest.TestCase):
 
         # Mock the connection and cursor
         mock_connection = MagicMock()
+        mock_connection.closed = 0
         mock_cursor = MagicMock()
         mock_connection.cursor.return_value.__enter__.return_value = mock_cursor
         mock_connect.return_value = mock_connection
@@ -862,4 +1226,5 @@ class TestAzurePostgresHelper(unittest.TestCase):
         mock_logger.error.assert_called_with(
             "Error executing search query: Database error"
         )
-        mock_connection.close.assert_called_once()
+        mock_connection.rollback.assert_called()
+        mock_connection.close.assert_not_called()
@@ -0,0 +1,95 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from backend.batch.utilities.helpers.chat_history_budget_helper import (
+    ChatHistoryBudget,
+)
+
+
+@pytest.fixture(autouse=True)
+def word_token_counter():
+    # One token per word of role and content, no framing overhead
+    def count_message_tokens(message, model_name=None):
+        return len(message.get("role", "").split()) + len(
+            message.get("content", "").split()
+        )
+
+    with patch(
+        "backend.batch.utilities.helpers.chat_history_budget_helper.count_message_tokens",
+        side_effect=count_message_tokens,
+    ), patch(
+        "backend.batch.utilities.helpers.chat_history_budget_helper.truncate_to_tokens",
+        side_effect=lambda text, max_tokens, model_name=None: " ".join(
+            text.split()[:max_tokens]
+        ),
+    ):
+        yield
+
+
+@pytest.fixture
+def env_helper_mock():
+    env_helper = MagicMock()
+    env_helper.CHAT_HISTORY_TOKEN_BUDGET = 100
+    env_helper.AZURE_OPENAI_MODEL_NAME = "gpt-4.1"
+    return env_helper
+
+
+def message(role: str, words: int):
+    return {"role": role, "content": " ".join(["word"] * words)}
+
+
+def test_fit_returns_history_within_budget(env_helper_mock):
+    # given
+    chat_history = [message("user", 10), message("assistant", 20)]
+
+    # when
+    result = ChatHistoryBudget(env_helper_mock).fit(chat_history)
+
+    # then
+    assert result is chat_history
+
+
+def test_fit_keeps_latest_turns(env_helper_mock):
+    # given
+    chat_history = [
+        message("user", 60),
+        message("assistant", 60),
+        message("user", 40),
+        message("assistant", 40),
+    ]
+
+    # when
+    result = ChatHistoryBudget(env_helper_mock).fit(chat_history)
+
+    # then
+    assert result == chat_history[2:]
+
+
+def test_fit_truncates_oldest_kept_turn(env_helper_mock):
+    # given
+    chat_history = [
+        message("user", 200),
+        message("user", 10),
+        message("assistant", 10),
+    ]
+
+    # when
+    result = ChatHistoryBudget(env_helper_mock).fit(chat_history)
+
+    # then
+    assert len(result) == 3
+    assert result[0] == message("user", 77)
+    assert result[1:] == chat_history[1:]
+    assert chat_history[0] == message("user", 200)
+
+
+def test_fit_is_disabled_without_budget(env_helper_mock):
+    # given
+    env_helper_mock.CHAT_HISTORY_TOKEN_BUDGET = 0
+    chat_history = [message("user", 500)]
+
+    # when
+    result = ChatHistoryBudget(env_helper_mock).fit(chat_history)
+
+    # then
+    assert result is chat_history
@@ -3,6 +3,7 @@ import pytest
 from unittest.mock import patch, MagicMock
 from backend.batch.utilities.helpers.config.config_helper import ConfigHelper, Config
 from backend.batch.utilities.helpers.config.embedding_config import EmbeddingConfig
+from backend.batch.utilities.helpers.config.llm_call_site import LLMCallSite
 from backend.batch.utilities.document_chunking.chunking_strategy import ChunkingSettings
 from backend.batch.utilities.document_loading import LoadingSettings
 
@@ -160,6 +161,28 @@ def test_active_config_or_default_is_cached(env_helper_mock: MagicMock):
     assert env_helper_mock.call_count == 3
 
 
+def test_expire_active_config_keeps_recent_config():
+    # given
+    active_config = ConfigHelper.get_active_config_or_default()
+
+    # when
+    ConfigHelper.expire_active_config(60)
+
+    # then
+    assert ConfigHelper.get_active_config_or_default() is active_config
+
+
+def test_expire_active_config_reloads_old_config():
+    # given
+    active_config = ConfigHelper.get_active_config_or_default()
+
+    # when
+    ConfigHelper.expire_active_config(0)
+
+    # then
+    assert ConfigHelper.get_active_config_or_default() is not active_config
+
+
 def test_default_config(env_helper_mock: MagicMock):
     # when
     env_helper_mock.return_value.ORCHESTRATION_STRATEGY = "mock-strategy"
@@ -488,6 +511,22 @@ def test_get_available_orchestration_strategies(config: Config):
     )
 
 
+def test_model_routing_defaults_to_no_deployment(config: Config):
+    # then
+    assert config.model_routing.get_deployment(LLMCallSite.TITLE) is None
+
+
+def test_model_routing_returns_configured_deployment(config_dict: dict):
+    # given
+    config_dict["model_routing"] = {"title": "gpt-4.1-mini", "detection": ""}
+    config = Config(config_dict)
+
+    # then
+    assert config.model_routing.get_deployment(LLMCallSite.TITLE) == "gpt-4.1-mini"
+    assert config.model_routing.get_deployment(LLMCallSite.DETECTION) is None
+    assert config.model_routing.get_deployment(LLMCallSite.ANSWER) is None
+
+
 @patch(
     "backend.batch.utilities.helpers.config.config_helper.ConfigHelper.get_default_config"
 )
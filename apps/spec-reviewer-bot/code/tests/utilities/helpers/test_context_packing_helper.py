@@ -0,0 +1,147 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from backend.batch.utilities.common.source_document import SourceDocument
+from backend.batch.utilities.helpers.context_packing_helper import ContextPacking
+
+
+@pytest.fixture(autouse=True)
+def word_token_counter():
+    # Count one token per word so budgets are easy to reason about
+    with patch(
+        "backend.batch.utilities.helpers.context_packing_helper.count_tokens",
+        side_effect=lambda text, model_name=None: len(text.split()),
+    ), patch(
+        "backend.batch.utilities.helpers.context_packing_helper.truncate_to_tokens",
+        side_effect=lambda text, max_tokens, model_name=None: " ".join(
+            text.split()[:max_tokens]
+        ),
+    ):
+        yield
+
+
+@pytest.fixture
+def env_helper_mock():
+    env_helper = MagicMock()
+    env_helper.CONTEXT_PACKING_TOKEN_BUDGET = 1000
+    env_helper.CONTEXT_PACKING_SIMILARITY_THRESHOLD = 0.8
+    env_helper.AZURE_OPENAI_MODEL_NAME = "gpt-4.1"
+    return env_helper
+
+
+def document(id: str, content: str, source: str = "source", chunk=None):
+    return SourceDocument(
+        id=id, content=content, source=source, title="title", chunk=chunk, offset=0
+    )
+
+
+def test_pack_keeps_distinct_documents_in_rank_order(env_helper_mock):
+    # given
+    documents = [
+        document("1", "alpha beta gamma delta epsilon", chunk=4),
+        document("2", "zeta eta theta iota kappa", source="other", chunk=4),
+    ]
+
+    # when
+    packed = ContextPacking(env_helper_mock).pack(documents)
+
+    # then
+    assert packed == documents
+
+
+def test_pack_merges_adjacent_chunks_of_same_source(env_helper_mock):
+    # given
+    documents = [
+        document("2", "chunk two text. shared overlap text", chunk=2),
+        document("other", "unrelated text from elsewhere", source="other", chunk=7),
+        document("1", "chunk one text. shared", chunk=1),
+        document("3", "shared overlap text and chunk three text.", chunk=3),
+    ]
+
+    # when
+    packed = ContextPacking(env_helper_mock).pack(documents)
+
+    # then
+    assert [doc.id for doc in packed] == ["1", "other"]
+    assert packed[0].chunk == 1
+    assert packed[0].content == (
+        "chunk one text. shared\nchunk two text. shared overlap text and chunk three text."
+    )
+
+
+def test_pack_drops_repeated_chunk(env_helper_mock):
+    # given
+    documents = [
+        document("1", "first chunk", chunk=1),
+        document("1 again", "first chunk", chunk=1),
+    ]
+
+    # when
+    packed = ContextPacking(env_helper_mock).pack(documents)
+
+    # then
+    assert [doc.id for doc in packed] == ["1"]
+
+
+def test_pack_drops_near_duplicates_from_other_sources(env_helper_mock):
+    # given
+    text = "the quick brown fox jumps over the lazy dog near the river bank today"
+    documents = [
+        document("1", text, source="a.pdf"),
+        document("2", text + " again", source="copy of a.pdf"),
+        document("3", "a completely different paragraph about specifications", "b"),
+    ]
+
+    # when
+    packed = ContextPacking(env_helper_mock).pack(documents)
+
+    # then
+    assert [doc.id for doc in packed] == ["1", "3"]
+
+
+def test_pack_respects_token_budget(env_helper_mock):
+    # given
+    env_helper_mock.CONTEXT_PACKING_TOKEN_BUDGET = 6
+    documents = [
+        document("1", "one two three four", source="a"),
+        document("2", "five six seven", source="b"),
+        document("3", "eight nine", source="c"),
+    ]
+
+    # when
+    packed = ContextPacking(env_helper_mock).pack(documents)
+
+    # then
+    assert [doc.id for doc in packed] == ["1", "3"]
+
+
+def test_pack_truncates_best_match_larger_than_budget(env_helper_mock):
+    # given
+    env_helper_mock.CONTEXT_PACKING_TOKEN_BUDGET = 2
+    documents = [
+        document("1", "one two three four", source="a"),
+        document("2", "five six seven", source="b"),
+    ]
+
+    # when
+    packed = ContextPacking(env_helper_mock).pack(documents)
+
+    # then
+    assert [doc.id for doc in packed] == ["1"]
+    assert packed[0].content == "one two"
+    assert documents[0].content == "one two three four"
+
+
+def test_pack_without_budget_keeps_everything(env_helper_mock):
+    # given
+    env_helper_mock.CONTEXT_PACKING_TOKEN_BUDGET = 0
+    documents = [
+        document("1", "one two three four", source="a"),
+        document("2", "five six seven", source="b"),
+    ]
+
+    # when
+    packed = ContextPacking(env_helper_mock).pack(documents)
+
+    # then
+    assert packed == documents
@@ -203,3 +203,15 @@ def test_use_integrated_vectorization_postgresql(monkeypatch: MonkeyPatch):
 
     # then
     assert not actual_use_integrated_vectorization
+
+
+def test_lowercases_postgres_vector_storage(monkeypatch: MonkeyPatch):
+    # given
+    monkeypatch.setenv("DATABASE_TYPE", "PostgreSQL")
+    monkeypatch.setenv("AZURE_POSTGRES_VECTOR_STORAGE", "HalfVec")
+
+    # when
+    env_helper = EnvHelper()
+
+    # then
+    assert env_helper.AZURE_POSTGRES_VECTOR_STORAGE == "halfvec"
@@ -1,6 +1,7 @@
 from unittest.mock import MagicMock, patch
 
 import pytest
+from backend.batch.utilities.helpers.config.llm_call_site import LLMCallSite
 from backend.batch.utilities.helpers.llm_helper import LLMHelper
 from semantic_kernel.connectors.ai.open_ai import AzureChatCompletion
 from openai.types.create_embedding_response import CreateEmbeddingResponse
@@ -139,6 +140,125 @@ def test_generate_embeddings_returns_embeddings(azure_openai_mock):
     assert actual_embeddings == expected_embeddings
 
 
+@patch("backend.batch.utilities.helpers.llm_helper.ConfigHelper")
+def test_get_chat_completion_uses_default_model(config_helper_mock, azure_openai_mock):
+    # given
+    llm_helper = LLMHelper()
+    messages = [{"role": "user", "content": "Hello"}]
+
+    # when
+    llm_helper.get_chat_completion(messages, temperature=0)
+
+    # then
+    config_helper_mock.get_active_config_or_default.assert_not_called()
+    azure_openai_mock.return_value.chat.completions.create.assert_called_once_with(
+        model=AZURE_OPENAI_MODEL,
+        messages=messages,
+        max_tokens=int(AZURE_OPENAI_MAX_TOKENS),
+        temperature=0,
+    )
+
+
+@patch("backend.batch.utilities.helpers.llm_helper.ConfigHelper")
+def test_get_chat_completion_uses_routed_model(config_helper_mock, azure_openai_mock):
+    # given
+    model_routing = config_helper_mock.get_active_config_or_default.return_value.model_routing
+    model_routing.get_deployment.return_value = "mock-small-model"
+    llm_helper = LLMHelper()
+    messages = [{"role": "user", "content": "Hello"}]
+
+    # when
+    llm_helper.get_chat_completion(messages, call_site=LLMCallSite.DETECTION)
+
+    # then
+    model_routing.get_deployment.assert_called_once_with(LLMCallSite.DETECTION)
+    azure_openai_mock.return_value.chat.completions.create.assert_called_once_with(
+        model="mock-small-model",
+        messages=messages,
+        max_tokens=int(AZURE_OPENAI_MAX_TOKENS),
+    )
+
+
+@patch("backend.batch.utilities.helpers.llm_helper.ConfigHelper")
+def test_get_chat_completion_keeps_vision_model_for_images(
+    config_helper_mock, azure_openai_mock
+):
+    # given
+    model_routing = config_helper_mock.get_active_config_or_default.return_value.model_routing
+    model_routing.get_deployment.return_value = "mock-small-model"
+    llm_helper = LLMHelper()
+    messages = [
+        {
+            "role": "user",
+            "content": [
+                {"type": "text", "text": "What does the diagram show?"},
+                {"type": "image_url", "image_url": {"url": "https://image"}},
+            ],
+        }
+    ]
+
+    # when
+    llm_helper.get_chat_completion(
+        messages, model="mock-vision-model", call_site=LLMCallSite.ANSWER
+    )
+
+    # then
+    azure_openai_mock.return_value.chat.completions.create.assert_called_once_with(
+        model="mock-vision-model",
+        messages=messages,
+        max_tokens=int(AZURE_OPENAI_MAX_TOKENS),
+    )
+
+
+@patch("backend.batch.utilities.helpers.llm_helper.ConfigHelper")
+def test_get_chat_completion_falls_back_when_call_site_not_routed(
+    config_helper_mock, azure_openai_mock
+):
+    # given
+    model_routing = config_helper_mock.get_active_config_or_default.return_value.model_routing
+    model_routing.get_deployment.return_value = None
+    llm_helper = LLMHelper()
+    messages = [{"role": "user", "content": "Hello"}]
+
+    # when
+    llm_helper.get_chat_completion(
+        messages, model="mock-vision-model", call_site=LLMCallSite.ANSWER
+    )
+
+    # then
+    azure_openai_mock.return_value.chat.completions.create.assert_called_once_with(
+        model="mock-vision-model",
+        messages=messages,
+        max_tokens=int(AZURE_OPENAI_MAX_TOKENS),
+    )
+
+
+@patch("backend.batch.utilities.helpers.llm_helper.logger")
+@patch("backend.batch.utilities.helpers.llm_helper.ConfigHelper")
+def test_get_chat_completion_logs_call_metrics(
+    config_helper_mock, logger_mock, azure_openai_mock
+):
+    # given
+    model_routing = config_helper_mock.get_active_config_or_default.return_value.model_routing
+    model_routing.get_deployment.return_value = None
+    response = azure_openai_mock.return_value.chat.completions.create.return_value
+    response.usage.prompt_tokens = 10
+    response.usage.completion_tokens = 5
+    llm_helper = LLMHelper()
+
+    # when
+    llm_helper.get_chat_completion([], call_site=LLMCallSite.TITLE)
+
+    # then
+    custom_dimensions = logger_mock.info.call_args.kwargs["extra"]
+    assert logger_mock.info.call_args.args == ("LLM Call",)
+    assert custom_dimensions["call_site"] == "title"
+    assert custom_dimensions["model"] == AZURE_OPENAI_MODEL
+    assert custom_dimensions["prompt_tokens"] == 10
+    assert custom_dimensions["completion_tokens"] == 5
+    assert custom_dimensions["latency_ms"] >= 0
+
+
 @patch("backend.batch.utilities.helpers.llm_helper.get_azure_credential")
 @patch("backend.batch.utilities.helpers.llm_helper.MLClient")
 def test_get_ml_client_initializes_with_expected_parameters(
@@ -0,0 +1,67 @@
+import pytest
+from backend.batch.utilities.helpers.odata_filter import ODataFilterError, odata_to_sql
+
+
+@pytest.mark.parametrize("filter_expression", [None, "", "  "])
+def test_empty_filter_matches_everything(filter_expression):
+    assert odata_to_sql(filter_expression) == ("TRUE", [])
+
+
+def test_comparisons_on_columns():
+    # when
+    condition, params = odata_to_sql(
+        "title eq 'O''Brien' and (page_number ge 2 or offset lt 10.5)"
+    )
+
+    # then
+    assert condition == '(title = %s AND (page_number >= %s OR "offset" < %s))'
+    assert params == ["O'Brien", 2, 10.5]
+
+
+def test_null_comparisons_and_not():
+    # when
+    condition, params = odata_to_sql("not (source eq null) and title ne null")
+
+    # then
+    assert condition == "((NOT source IS NULL) AND title IS NOT NULL)"
+    assert params == []
+
+
+def test_metadata_fields():
+    # when
+    condition, params = odata_to_sql("category eq 'api' and version/major gt 1")
+
+    # then
+    assert condition == (
+        "((metadata::jsonb #>> %s) = %s AND (metadata::jsonb #>> %s)::numeric > %s)"
+    )
+    assert params == [["category"], "api", ["version", "major"], 1]
+
+
+def test_search_in():
+    # when
+    condition, params = odata_to_sql(
+        "search.in(title, 'a, b c') or search.in(id, 'x|y z', '|')"
+    )
+
+    # then
+    assert condition == "(title = ANY(%s) OR id = ANY(%s))"
+    assert params == [["a", "b", "c"], ["x", "y z"]]
+
+
+@pytest.mark.parametrize(
+    "filter_expression",
+    [
+        "title eq",
+        "title like 'a'",
+        "title eq 'a' and",
+        "(title eq 'a'",
+        "title eq 'a' title",
+        "page_number gt null",
+        "search.in(title, 1)",
+        "title eq \"a\"",
+    ],
+)
+def test_unsupported_filters_raise(filter_expression):
+    with pytest.raises(ODataFilterError):
+        odata_to_sql(filter_expression)
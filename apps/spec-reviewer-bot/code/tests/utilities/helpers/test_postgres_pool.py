@@ -0,0 +1,181 @@
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import psycopg2
+import pytest
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_INTRANS
+from backend.batch.utilities.helpers.postgres_pool import (
+    POSTGRES_TOKEN_SCOPE,
+    PostgresConnectionPool,
+    PostgresTokenProvider,
+)
+
+
+def access_token(token: str, expires_in: float) -> MagicMock:
+    return MagicMock(token=token, expires_on=time.time() + expires_in)
+
+
+def new_connection() -> MagicMock:
+    connection = MagicMock()
+    connection.closed = 0
+    connection.info.transaction_status = TRANSACTION_STATUS_IDLE
+
+    def rollback():
+        connection.info.transaction_status = TRANSACTION_STATUS_IDLE
+
+    connection.rollback.side_effect = rollback
+    return connection
+
+
+@pytest.fixture
+def token_provider():
+    provider = MagicMock()
+    provider.get_token.return_value = "token"
+    return provider
+
+
+@pytest.fixture
+def connect_mock():
+    with patch(
+        "backend.batch.utilities.helpers.postgres_pool.psycopg2.connect",
+        side_effect=lambda *args, **kwargs: new_connection(),
+    ) as connect_mock:
+        yield connect_mock
+
+
+def create_pool(token_provider, max_size=2, health_check_after=30.0):
+    return PostgresConnectionPool(
+        "host", "user", "db", token_provider, 0, max_size, health_check_after
+    )
+
+
+@patch("backend.batch.utilities.helpers.postgres_pool.get_azure_credential")
+def test_token_provider_reuses_token_until_close_to_expiry(credential_mock: MagicMock):
+    # given
+    credential_mock.return_value.get_token.side_effect = [
+        access_token("first", 600),
+        access_token("second", 3600),
+    ]
+    provider = PostgresTokenProvider("client-id")
+
+    # when
+    tokens = [provider.get_token(), provider.get_token()]
+    provider._token.expires_on = time.time() + 60
+    tokens.append(provider.get_token())
+
+    # then
+    assert tokens == ["first", "first", "second"]
+    credential_mock.assert_called_once_with("client-id")
+    credential_mock.return_value.get_token.assert_called_with(POSTGRES_TOKEN_SCOPE)
+
+
+def test_token_provider_shared_per_client_id():
+    try:
+        assert PostgresTokenProvider.shared("a") is PostgresTokenProvider.shared("a")
+        assert PostgresTokenProvider.shared("a") is not PostgresTokenProvider.shared(
+            "b"
+        )
+    finally:
+        PostgresTokenProvider.clear()
+
+
+def test_connection_logs_in_with_current_token(token_provider, connect_mock):
+    # given
+    pool = create_pool(token_provider)
+    token_provider.get_token.return_value = "refreshed"
+
+    # when
+    with pool.connection():
+        pass
+
+    # then
+    connect_mock.assert_called_once_with(
+        "host=host user=user dbname=db password=refreshed sslmode=require"
+    )
+
+
+def test_connection_reused_and_rolled_back(token_provider, connect_mock):
+    # given
+    pool = create_pool(token_provider)
+
+    # when
+    with pool.connection() as first:
+        first.info.transaction_status = TRANSACTION_STATUS_INTRANS
+    with pool.connection() as second:
+        pass
+
+    # then
+    assert first is second
+    first.rollback.assert_called_once()
+    connect_mock.assert_called_once()
+    assert pool.stats() | {"wait_ms": 0, "max_wait_ms": 0} == {
+        "opened": 1,
+        "discarded": 0,
+        "checkouts": 2,
+        "health_checks": 0,
+        "wait_ms": 0,
+        "max_wait_ms": 0,
+        "in_use": 0,
+        "idle": 1,
+    }
+
+
+def test_closed_connection_discarded_on_checkout(token_provider, connect_mock):
+    # given
+    pool = create_pool(token_provider)
+    with pool.connection() as first:
+        pass
+    first.closed = 1
+
+    # when
+    with pool.connection() as second:
+        pass
+
+    # then
+    assert second is not first
+    assert pool.metrics["discarded"] == 1
+    assert connect_mock.call_count == 2
+
+
+def test_idle_connection_health_checked(token_provider, connect_mock):
+    # given
+    pool = create_pool(token_provider, health_check_after=0)
+    with pool.connection() as first:
+        pass
+    first.cursor.return_value.__enter__.return_value.execute.side_effect = (
+        psycopg2.OperationalError("server closed the connection")
+    )
+
+    # when
+    with pool.connection() as second:
+        pass
+
+    # then
+    assert second is not first
+    assert pool.metrics["health_checks"] == 1
+    assert pool.metrics["discarded"] == 1
+    first.close.assert_called_once()
+
+
+def test_connection_waits_when_pool_exhausted(token_provider, connect_mock):
+    # given
+    pool = create_pool(token_provider, max_size=1)
+    waiter_done = threading.Event()
+
+    def wait_for_connection():
+        with pool.connection():
+            waiter_done.set()
+
+    # when
+    with pool.connection():
+        waiter = threading.Thread(target=wait_for_connection)
+        waiter.start()
+        time.sleep(0.1)
+        assert not waiter_done.is_set()
+    waiter.join(5)
+
+    # then
+    assert waiter_done.is_set()
+    assert connect_mock.call_count == 1
+    assert pool.metrics["max_wait_ms"] >= 100
@@ -152,6 +152,52 @@ def test_embed_file(
     )
 
 
+def test_embed_file_records_blob_etag(
+    document_chunking_mock,
+    document_loading_mock,
+    llm_helper_mock,
+    azure_postgres_helper_mock,
+):
+    # given
+    blob_client = MagicMock()
+    blob_client.get_blob_etag.return_value = '"0x8DC"'
+    postgres_embedder = PostgresEmbedder(blob_client, MagicMock())
+    postgres_embedder.embedding_configs["pdf"] = MagicMock()
+    llm_helper_mock.generate_embeddings.return_value = [0.1, 0.2, 0.3]
+
+    # when
+    postgres_embedder.embed_file("https://example.com/document.pdf", "document.pdf")
+
+    # then
+    blob_client.get_blob_etag.assert_called_once_with("document.pdf")
+    documents, etag = (
+        azure_postgres_helper_mock.return_value.create_vector_store.call_args.args
+    )
+    assert len(documents) == 2
+    assert etag == '"0x8DC"'
+
+
+def test_embed_file_rejects_embeddings_not_fitting_quantized_storage(
+    document_chunking_mock,
+    document_loading_mock,
+    llm_helper_mock,
+    azure_postgres_helper_mock,
+):
+    # given
+    env_helper = MagicMock()
+    env_helper.AZURE_POSTGRES_VECTOR_STORAGE = "halfvec"
+    postgres_embedder = PostgresEmbedder(MagicMock(), env_helper)
+    postgres_embedder.embedding_configs["pdf"] = MagicMock()
+    llm_helper_mock.generate_embeddings.return_value = [0.1] * 3072
+
+    # when
+    with pytest.raises(ValueError, match="1536 dimensions, got 3072"):
+        postgres_embedder.embed_file("https://example.com/document.pdf", "document.pdf")
+
+    # then
+    azure_postgres_helper_mock.return_value.create_vector_store.assert_not_called()
+
+
 def test_advanced_image_processing_not_implemented():
     postgres_embedder = PostgresEmbedder(MagicMock(), MagicMock())
     # Test for unsupported advanced image processing
@@ -39,6 +39,7 @@ def llm_helper_mock():
         llm_helper.get_embedding_model.return_value.embed_query.return_value = [
             0
         ] * 1536
+        llm_helper.get_routed_model.return_value = None
         mock_completion = llm_helper.get_chat_completion.return_value
         choice = MagicMock()
         choice.message.content = "This is a caption for an image"
@@ -0,0 +1,105 @@
+from unittest.mock import patch
+
+import pytest
+from backend.batch.utilities.helpers.query_vector_cache import QueryVectorCache
+
+
+@pytest.fixture(autouse=True)
+def cleanup():
+    QueryVectorCache.clear_instance()
+    yield
+    QueryVectorCache.clear_instance()
+
+
+def test_get_returns_none_when_missing():
+    # given
+    cache = QueryVectorCache(max_size=10, ttl_seconds=60)
+
+    # when
+    vector = cache.get("model", "question")
+
+    # then
+    assert vector is None
+
+
+def test_put_and_get_normalizes_whitespace():
+    # given
+    cache = QueryVectorCache(max_size=10, ttl_seconds=60)
+    cache.put("model", "What is  the\nanswer?", [1, 2, 3])
+
+    # when
+    vector = cache.get("model", " What is the answer? ")
+
+    # then
+    assert vector == [1, 2, 3]
+
+
+def test_entries_are_keyed_by_model():
+    # given
+    cache = QueryVectorCache(max_size=10, ttl_seconds=60)
+    cache.put("model-a", "question", [1, 2, 3])
+
+    # when
+    vector = cache.get("model-b", "question")
+
+    # then
+    assert vector is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    # given
+    cache = QueryVectorCache(max_size=2, ttl_seconds=60)
+    cache.put("model", "first", [1])
+    cache.put("model", "second", [2])
+    cache.get("model", "first")
+
+    # when
+    cache.put("model", "third", [3])
+
+    # then
+    assert len(cache) == 2
+    assert cache.get("model", "first") == [1]
+    assert cache.get("model", "second") is None
+    assert cache.get("model", "third") == [3]
+
+
+@patch("backend.batch.utilities.helpers.query_vector_cache.time")
+def test_expired_entries_are_not_returned(mock_time):
+    # given
+    cache = QueryVectorCache(max_size=10, ttl_seconds=60)
+    mock_time.monotonic.return_value = 100
+    cache.put("model", "question", [1, 2, 3])
+
+    # when
+    mock_time.monotonic.return_value = 161
+    vector = cache.get("model", "question")
+
+    # then
+    assert vector is None
+    assert len(cache) == 0
+
+
+def test_zero_max_size_disables_cache():
+    # given
+    cache = QueryVectorCache(max_size=0, ttl_seconds=60)
+
+    # when
+    cache.put("model", "question", [1, 2, 3])
+
+    # then
+    assert cache.get("model", "question") is None
+
+
+@patch("backend.batch.utilities.helpers.query_vector_cache.EnvHelper")
+def test_get_instance_is_shared_and_uses_env_settings(mock_env_helper):
+    # given
+    mock_env_helper.return_value.QUERY_VECTOR_CACHE_MAX_SIZE = 5
+    mock_env_helper.return_value.QUERY_VECTOR_CACHE_TTL_SECONDS = 30
+
+    # when
+    cache = QueryVectorCache.get_instance()
+
+    # then
+    assert cache is QueryVectorCache.get_instance()
+    assert cache.max_size == 5
+    assert cache.ttl_seconds == 30
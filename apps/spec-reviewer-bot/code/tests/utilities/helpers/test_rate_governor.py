@@ -0,0 +1,78 @@
+from unittest.mock import MagicMock, patch
+
+import httpx
+import pytest
+from openai import RateLimitError
+from backend.batch.utilities.helpers.rate_governor import RateGovernor
+
+
+def rate_limit_error(headers: dict) -> RateLimitError:
+    response = httpx.Response(
+        429, headers=headers, request=httpx.Request("POST", "https://openai")
+    )
+    return RateLimitError("rate limited", response=response, body=None)
+
+
+def test_call_returns_result():
+    # when
+    result = RateGovernor(2, 0).call(lambda a, b: a + b, 1, b=2)
+
+    # then
+    assert result == 3
+
+
+@patch("backend.batch.utilities.helpers.rate_governor.time.sleep")
+def test_calls_paced_to_requests_per_minute(sleep_mock: MagicMock):
+    # given
+    governor = RateGovernor(2, 60)
+
+    # when
+    with patch(
+        "backend.batch.utilities.helpers.rate_governor.time.monotonic",
+        return_value=100.0,
+    ):
+        for _ in range(3):
+            governor.call(lambda: None)
+
+    # then
+    assert [call.args[0] for call in sleep_mock.call_args_list] == [1.0, 2.0]
+
+
+@patch("backend.batch.utilities.helpers.rate_governor.time.sleep")
+def test_rate_limited_call_retried_after_requested_delay(sleep_mock: MagicMock):
+    # given
+    governor = RateGovernor(1, 0)
+    function = MagicMock(
+        side_effect=[rate_limit_error({"retry-after-ms": "1500"}), "result"]
+    )
+
+    # when
+    with patch(
+        "backend.batch.utilities.helpers.rate_governor.time.monotonic",
+        return_value=100.0,
+    ):
+        result = governor.call(function)
+
+    # then
+    assert result == "result"
+    assert function.call_count == 2
+    sleep_mock.assert_called_once_with(1.5)
+
+
+@patch("backend.batch.utilities.helpers.rate_governor.time.sleep")
+def test_rate_limit_error_raised_after_max_retries(sleep_mock: MagicMock):
+    # given
+    governor = RateGovernor(1, 0, max_retries=1)
+    function = MagicMock(side_effect=rate_limit_error({"retry-after": "2"}))
+
+    # when
+    with pytest.raises(RateLimitError):
+        governor.call(function)
+
+    # then
+    assert function.call_count == 2
+
+
+def test_shared_governor_registered_by_name():
+    # then
+    assert RateGovernor.shared("test", 1, 0) is RateGovernor.shared("test", 2, 10)
@@ -0,0 +1,62 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from backend.batch.utilities.helpers import token_counter
+
+
+@pytest.fixture(autouse=True)
+def tiktoken_mock():
+    token_counter.get_encoding.cache_clear()
+    with patch("backend.batch.utilities.helpers.token_counter.tiktoken") as mock:
+        encoding = MagicMock()
+        encoding.encode.side_effect = lambda text: text.split()
+        encoding.decode.side_effect = lambda tokens: " ".join(tokens)
+        mock.encoding_for_model.return_value = encoding
+        mock.get_encoding.return_value = encoding
+        yield mock
+    token_counter.get_encoding.cache_clear()
+
+
+def test_get_encoding_uses_model_encoding(tiktoken_mock: MagicMock):
+    # when
+    encoding = token_counter.get_encoding("gpt-4.1")
+
+    # then
+    tiktoken_mock.encoding_for_model.assert_called_once_with("gpt-4.1")
+    assert encoding == tiktoken_mock.encoding_for_model.return_value
+
+
+def test_get_encoding_falls_back_for_unknown_model(tiktoken_mock: MagicMock):
+    # given
+    tiktoken_mock.encoding_for_model.side_effect = KeyError("unknown")
+
+    # when
+    encoding = token_counter.get_encoding("unknown-model")
+
+    # then
+    tiktoken_mock.get_encoding.assert_called_once_with("cl100k_base")
+    assert encoding == tiktoken_mock.get_encoding.return_value
+
+
+def test_count_tokens():
+    # when
+    count = token_counter.count_tokens("one two three", "gpt-4.1")
+
+    # then
+    assert count == 3
+
+
+def test_truncate_to_tokens():
+    # then
+    assert token_counter.truncate_to_tokens("one two three", 2) == "one two"
+    assert token_counter.truncate_to_tokens("one two", 5) == "one two"
+
+
+def test_count_message_tokens():
+    # when
+    count = token_counter.count_message_tokens(
+        {"role": "user", "content": "one two three"}
+    )
+
+    # then
+    assert count == token_counter.TOKENS_PER_MESSAGE + 1 + 3
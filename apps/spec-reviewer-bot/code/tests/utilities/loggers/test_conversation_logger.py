@@ -0,0 +1,172 @@
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+from backend.batch.utilities.loggers.conversation_logger import ConversationLogger
+
+MESSAGES = [
+    {"role": "user", "content": "A question?", "conversation_id": "conversation-id"},
+    {
+        "role": "tool",
+        "content": '{"citations": [{"id": "doc-1"}], "intent": "A question?"}',
+        "end_turn": False,
+    },
+    {"role": "assistant", "content": "An answer.", "end_turn": True},
+]
+
+
+@pytest.fixture(autouse=True)
+def env_helper_mock():
+    with patch(
+        "backend.batch.utilities.loggers.conversation_logger.EnvHelper"
+    ) as mock:
+        env_helper = mock.return_value
+        env_helper.CONVERSATION_LOG_BATCH_SIZE = 16
+        env_helper.CONVERSATION_LOG_FLUSH_INTERVAL_SECONDS = 60
+        env_helper.CONVERSATION_LOG_QUEUE_SIZE = 100
+        yield env_helper
+
+
+@pytest.fixture(autouse=True)
+def vector_store_mock():
+    with patch(
+        "backend.batch.utilities.loggers.conversation_logger.AzureSearchHelper"
+    ) as mock:
+        yield mock.return_value.get_conversation_logger.return_value
+
+
+@pytest.fixture
+def conversation_logger():
+    conversation_logger = ConversationLogger()
+    yield conversation_logger
+    conversation_logger.close(timeout=1)
+
+
+def wait_for(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_log_does_not_write_on_the_caller_thread(
+    conversation_logger: ConversationLogger, vector_store_mock: MagicMock
+):
+    # when
+    conversation_logger.log(MESSAGES)
+
+    # then
+    vector_store_mock.add_texts.assert_not_called()
+    assert conversation_logger.metrics["queued"] == 2
+
+
+def test_flush_writes_queued_messages_in_one_batch(
+    conversation_logger: ConversationLogger, vector_store_mock: MagicMock
+):
+    # given
+    conversation_logger.log(MESSAGES)
+
+    # when
+    flushed = conversation_logger.flush()
+
+    # then
+    assert flushed
+    vector_store_mock.add_texts.assert_called_once()
+    kwargs = vector_store_mock.add_texts.call_args.kwargs
+    assert kwargs["texts"] == ["A question?", "An answer."]
+    assert kwargs["metadatas"][0]["type"] == "user"
+    assert kwargs["metadatas"][0]["conversation_id"] == "conversation-id"
+    assert kwargs["metadatas"][1]["type"] == "assistant"
+    assert kwargs["metadatas"][1]["conversation_id"] == "conversation-id"
+    assert kwargs["metadatas"][1]["sources"] == ["doc-1"]
+    assert conversation_logger.metrics["indexed"] == 2
+
+
+def test_full_batch_is_written_without_waiting(
+    env_helper_mock: MagicMock, vector_store_mock: MagicMock
+):
+    # given
+    env_helper_mock.CONVERSATION_LOG_BATCH_SIZE = 4
+    conversation_logger = ConversationLogger()
+
+    # when
+    conversation_logger.log(MESSAGES)
+    conversation_logger.log(MESSAGES)
+
+    # then
+    assert wait_for(lambda: vector_store_mock.add_texts.called)
+    assert len(vector_store_mock.add_texts.call_args.kwargs["texts"]) == 4
+    conversation_logger.close(timeout=1)
+
+
+def test_batch_is_written_after_flush_interval(
+    env_helper_mock: MagicMock, vector_store_mock: MagicMock
+):
+    # given
+    env_helper_mock.CONVERSATION_LOG_FLUSH_INTERVAL_SECONDS = 0.05
+    conversation_logger = ConversationLogger()
+
+    # when
+    conversation_logger.log(MESSAGES)
+
+    # then
+    assert wait_for(lambda: vector_store_mock.add_texts.called)
+    assert len(vector_store_mock.add_texts.call_args.kwargs["texts"]) == 2
+    conversation_logger.close(timeout=1)
+
+
+def test_messages_dropped_when_queue_is_full(
+    env_helper_mock: MagicMock, vector_store_mock: MagicMock
+):
+    # given
+    env_helper_mock.CONVERSATION_LOG_BATCH_SIZE = 1
+    env_helper_mock.CONVERSATION_LOG_QUEUE_SIZE = 1
+    release = threading.Event()
+    vector_store_mock.add_texts.side_effect = lambda **kwargs: release.wait(2)
+    conversation_logger = ConversationLogger()
+    conversation_logger.log_user_message(MESSAGES)
+    assert wait_for(lambda: vector_store_mock.add_texts.called)
+
+    # when
+    conversation_logger.log(MESSAGES)
+
+    # then
+    assert conversation_logger.metrics["queued"] == 2
+    assert conversation_logger.metrics["dropped"] == 1
+    release.set()
+    conversation_logger.close(timeout=1)
+
+
+def test_failed_batch_is_counted_and_logging_continues(
+    conversation_logger: ConversationLogger, vector_store_mock: MagicMock
+):
+    # given
+    vector_store_mock.add_texts.side_effect = [Exception("Search is down"), None]
+    conversation_logger.log(MESSAGES)
+    conversation_logger.flush()
+
+    # when
+    conversation_logger.log(MESSAGES)
+    conversation_logger.flush()
+
+    # then
+    assert conversation_logger.metrics["failed"] == 2
+    assert conversation_logger.metrics["indexed"] == 2
+
+
+def test_close_writes_queued_messages_and_drops_later_ones(
+    vector_store_mock: MagicMock,
+):
+    # given
+    conversation_logger = ConversationLogger()
+    conversation_logger.log(MESSAGES)
+
+    # when
+    conversation_logger.close(timeout=1)
+    conversation_logger.log(MESSAGES)
+
+    # then
+    vector_store_mock.add_texts.assert_called_once()
+    assert conversation_logger.metrics["dropped"] == 2
+    assert not conversation_logger._worker.is_alive()
@@ -0,0 +1,10 @@
+import pytest
+from backend.batch.utilities.orchestrator.orchestrator_base import OrchestratorBase
+
+
+@pytest.fixture(autouse=True)
+def clear_shared_resources():
+    """The shared resources would otherwise keep the mocks of a previous test."""
+    OrchestratorBase.clear_shared_resources()
+    yield
+    OrchestratorBase.clear_shared_resources()
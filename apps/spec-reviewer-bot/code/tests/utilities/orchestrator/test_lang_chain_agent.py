@@ -14,6 +14,7 @@ class LangChainAgentNoInit(LangChainAgent):
         self.output_parser = MagicMock()
         self.tools = MagicMock()
         self.llm_helper = MagicMock()
+        self.llm = MagicMock()
         self.tokens = {"prompt": 0, "completion": 0, "total": 0}
 
 
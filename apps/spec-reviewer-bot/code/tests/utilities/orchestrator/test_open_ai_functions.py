@@ -34,6 +34,8 @@ def orchestrator():
         orchestrator.call_content_safety_output = MagicMock(return_value=None)
 
         orchestrator.output_parser = OutputParserTool()
+        orchestrator.chat_history_budget = MagicMock()
+        orchestrator.chat_history_budget.fit.side_effect = lambda history: history
 
         yield orchestrator
 
@@ -62,3 +64,67 @@ async def test_content_safety_input(orchestrator: OpenAIFunctionsOrchestrator):
 
     # then
     assert response == content_safety_response
+
+
+@pytest.mark.asyncio
+async def test_orchestrate_fits_chat_history_to_budget(
+    orchestrator: OpenAIFunctionsOrchestrator,
+):
+    # given
+    chat_history = [{"role": "user", "content": "An old question"}]
+    orchestrator.call_content_safety_input = MagicMock(return_value=["blocked"])
+
+    # when
+    await orchestrator.orchestrate("A message", chat_history)
+    await orchestrator.orchestrate("Another message", chat_history)
+
+    # then
+    assert orchestrator.chat_history_budget.fit.call_count == 2
+    orchestrator.chat_history_budget.fit.assert_called_with(chat_history)
+
+
+@pytest.mark.asyncio
+async def test_orchestrate_stream_streams_search_documents_answer(
+    orchestrator: OpenAIFunctionsOrchestrator, llm_helper_mock: MagicMock
+):
+    # given
+    result = MagicMock()
+    result.choices[0].finish_reason = "function_call"
+    result.choices[0].message.function_call.name = "search_documents"
+    result.choices[0].message.function_call.arguments = '{"question": "A question?"}'
+    result.usage.prompt_tokens = 10
+    result.usage.completion_tokens = 2
+    llm_helper_mock.get_chat_completion_with_functions.return_value = result
+
+    streamed = [[{"role": "assistant", "content": "An answer", "end_turn": True}]]
+
+    async def stream_answer(*args):
+        for messages in streamed:
+            yield messages
+
+    orchestrator.stream_answer = MagicMock(side_effect=stream_answer)
+
+    with patch(
+        "backend.batch.utilities.orchestrator.open_ai_functions.QuestionAnswerTool"
+    ) as question_answer_tool_mock:
+        deltas = iter(["An answer"])
+        question_answer_tool_mock.return_value.stream_answer_question.return_value = (
+            [],
+            deltas,
+        )
+
+        # when
+        results = [
+            messages
+            async for messages in orchestrator.orchestrate_stream("A message", [])
+        ]
+
+    # then
+    assert results == streamed
+    question_answer_tool_mock.return_value.stream_answer_question.assert_called_once_with(
+        "A question?", []
+    )
+    orchestrator.stream_answer.assert_called_once_with(
+        "A message", "A question?", [], deltas
+    )
+    assert orchestrator.tokens["prompt"] == 10
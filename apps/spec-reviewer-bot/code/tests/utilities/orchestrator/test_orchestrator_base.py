@@ -1,7 +1,18 @@
+import asyncio
+import json
+import threading
+from concurrent.futures import Future
 from unittest.mock import MagicMock, patch
 
 import pytest
+from backend.batch.utilities.common.answer import Answer
+from backend.batch.utilities.common.source_document import SourceDocument
 from backend.batch.utilities.orchestrator.orchestrator_base import OrchestratorBase
+from backend.batch.utilities.tools.content_safety_checker import (
+    OUTPUT_RESPONSE_TEMPLATE,
+    RETRACTION_MESSAGE,
+    StreamScreener,
+)
 
 
 class MockOrchestrator(OrchestratorBase):
@@ -29,6 +40,26 @@ def conversation_logger_mock():
         yield conversation_logger
 
 
+@pytest.fixture(autouse=True)
+def env_helper_mock():
+    with patch(
+        "backend.batch.utilities.orchestrator.orchestrator_base.EnvHelper"
+    ) as mock:
+        env_helper = mock.return_value
+        env_helper.STREAMING_SAFETY_WINDOW_CHARACTERS = 10
+        env_helper.POST_ANSWERING_CONCURRENT = False
+        yield env_helper
+
+
+@pytest.fixture(autouse=True)
+def count_tokens_mock():
+    with patch(
+        "backend.batch.utilities.orchestrator.orchestrator_base.count_tokens",
+        side_effect=lambda text, model_name=None: len(text.split()),
+    ) as mock:
+        yield mock
+
+
 @pytest.fixture(autouse=True)
 def content_safety_checker_mock():
     with patch(
@@ -38,6 +69,70 @@ def content_safety_checker_mock():
         yield content_safety_checker
 
 
+def test_clients_shared_between_orchestrators(config_mock: MagicMock):
+    # given
+    config_mock.logging.log_user_interactions = True
+
+    with patch(
+        "backend.batch.utilities.orchestrator.orchestrator_base.ContentSafetyChecker"
+    ) as content_safety_checker_class, patch(
+        "backend.batch.utilities.orchestrator.orchestrator_base.ConversationLogger"
+    ) as conversation_logger_class:
+        # when
+        first = MockOrchestrator()
+        second = MockOrchestrator()
+
+    # then
+    content_safety_checker_class.assert_called_once_with()
+    conversation_logger_class.assert_called_once_with()
+    assert first.content_safety_checker is second.content_safety_checker
+    assert first.conversation_logger is second.conversation_logger
+    assert first.output_parser is second.output_parser
+    assert first.message_id != second.message_id
+    assert first.tokens is not second.tokens
+
+
+def test_shared_resources_rebuilt_when_environment_reloaded():
+    # given
+    factory = MagicMock(side_effect=lambda: object())
+    first = OrchestratorBase.shared_resource("resource", factory)
+
+    # when
+    with patch("backend.batch.utilities.orchestrator.orchestrator_base.EnvHelper"):
+        second = OrchestratorBase.shared_resource("resource", factory)
+
+    # then
+    assert factory.call_count == 2
+    assert first is not second
+
+
+def test_replaced_shared_resources_closed():
+    # given
+    closed = threading.Event()
+    old_resource = MagicMock()
+    old_resource.close.side_effect = closed.set
+    OrchestratorBase.shared_resource("resource", lambda: old_resource)
+
+    # when
+    with patch("backend.batch.utilities.orchestrator.orchestrator_base.EnvHelper"):
+        new_resource = OrchestratorBase.shared_resource("resource", MagicMock)
+
+    # then
+    assert closed.wait(5)
+    new_resource.close.assert_not_called()
+
+
+def test_clear_shared_resources_closes_them():
+    # given
+    resource = OrchestratorBase.shared_resource("resource", MagicMock)
+
+    # when
+    OrchestratorBase.clear_shared_resources()
+
+    # then
+    resource.close.assert_called_once_with()
+
+
 def test_call_content_safety_input_replace(content_safety_checker_mock: MagicMock):
     # given
     orchestrator = MockOrchestrator()
@@ -106,3 +201,328 @@ def test_call_content_safety_output_no_replace(content_safety_checker_mock: Magi
 
     # then
     assert result is None
+
+
+async def collect(stream):
+    return [messages async for messages in stream]
+
+
+@pytest.mark.asyncio
+async def test_stream_answer_sends_citations_then_deltas(config_mock: MagicMock):
+    # given
+    config_mock.prompts.enable_content_safety = False
+    config_mock.prompts.enable_post_answering_prompt = False
+    orchestrator = MockOrchestrator()
+    source_documents = [
+        SourceDocument(id="1", content="content", source="source", title="title")
+    ]
+
+    # when
+    results = await collect(
+        orchestrator.stream_answer(
+            "user message", "question", source_documents, iter(["An ", "answer [doc1]"])
+        )
+    )
+
+    # then
+    assert json.loads(results[0][0]["content"])["citations"][0]["id"] == "1"
+    assert [messages[1]["content"] for messages in results] == [
+        "",
+        "An ",
+        "An answer [doc1]",
+        "An answer [doc1]",
+    ]
+    assert [messages[1]["end_turn"] for messages in results] == [
+        False,
+        False,
+        False,
+        True,
+    ]
+    assert orchestrator.tokens["completion"] == 3
+
+
+def screen_with(content_safety_checker_mock: MagicMock, harmful: str) -> list[str]:
+    """Screens the streamed answers with a real screener flagging the windows containing harmful."""
+    screened = []
+
+    def submit_segments(segments):
+        verdicts = []
+        for segment in segments:
+            screened.append(segment)
+            verdict = Future()
+            verdict.set_result(harmful in segment)
+            verdicts.append(verdict)
+        return verdicts
+
+    checker = MagicMock(max_segment_characters=1000)
+    checker._submit_segments.side_effect = submit_segments
+    content_safety_checker_mock.stream_screener.side_effect = (
+        lambda window_characters: StreamScreener(checker, window_characters)
+    )
+    return screened
+
+
+@pytest.mark.asyncio
+async def test_stream_answer_releases_safe_windows(
+    config_mock: MagicMock, content_safety_checker_mock: MagicMock
+):
+    # given
+    config_mock.prompts.enable_content_safety = True
+    config_mock.prompts.enable_post_answering_prompt = False
+    screened = screen_with(content_safety_checker_mock, "harmful")
+    orchestrator = MockOrchestrator()
+
+    # when
+    results = await collect(
+        orchestrator.stream_answer(
+            "user message", "question", [], iter(["First ", "window. ", "Rest"])
+        )
+    )
+
+    # then
+    content_safety_checker_mock.stream_screener.assert_called_once_with(10)
+    assert [messages[1]["content"] for messages in results] == [
+        "",
+        "First window. ",
+        "First window. Rest",
+    ]
+    assert results[-1][1]["end_turn"] is True
+    assert screened == ["First window. ", "Rest"]
+
+
+@pytest.mark.asyncio
+async def test_stream_answer_replaces_harmful_first_window(
+    config_mock: MagicMock, content_safety_checker_mock: MagicMock
+):
+    # given
+    config_mock.prompts.enable_content_safety = True
+    screen_with(content_safety_checker_mock, "Harmful")
+    orchestrator = MockOrchestrator()
+
+    # when
+    results = await collect(
+        orchestrator.stream_answer(
+            "user message", "question", [], iter(["Harmful window. ", "more"])
+        )
+    )
+
+    # then
+    assert len(results) == 2
+    assert results[-1][1] == {
+        "role": "assistant",
+        "content": OUTPUT_RESPONSE_TEMPLATE,
+        "end_turn": True,
+    }
+
+
+@pytest.mark.asyncio
+async def test_stream_answer_retracts_released_text_and_stops_generation(
+    config_mock: MagicMock, content_safety_checker_mock: MagicMock
+):
+    # given
+    config_mock.prompts.enable_content_safety = True
+    screen_with(content_safety_checker_mock, "harmful")
+    generated = []
+
+    def deltas():
+        for delta in ["Safe window. ", "A harmful one. ", "Never generated. "]:
+            generated.append(delta)
+            yield delta
+
+    orchestrator = MockOrchestrator()
+
+    # when
+    results = await collect(
+        orchestrator.stream_answer("user message", "question", [], deltas())
+    )
+
+    # then
+    assert [messages[1]["content"] for messages in results] == [
+        "",
+        "Safe window. ",
+        RETRACTION_MESSAGE,
+    ]
+    assert results[-1][1]["end_turn"] is True
+    assert generated == ["Safe window. ", "A harmful one. "]
+
+
+@pytest.mark.asyncio
+@patch("backend.batch.utilities.orchestrator.orchestrator_base.PostPromptTool")
+async def test_stream_answer_runs_post_prompt_on_full_answer(
+    post_prompt_tool_mock: MagicMock, config_mock: MagicMock
+):
+    # given
+    config_mock.prompts.enable_content_safety = False
+    config_mock.prompts.enable_post_answering_prompt = True
+    post_prompt_tool_mock.return_value.validate_answer.return_value = Answer(
+        question="question", answer="post answering filter"
+    )
+    orchestrator = MockOrchestrator()
+
+    # when
+    results = await collect(
+        orchestrator.stream_answer("user message", "question", [], iter(["An answer"]))
+    )
+
+    # then
+    validated = post_prompt_tool_mock.return_value.validate_answer.call_args[0][0]
+    assert validated.answer == "An answer"
+    assert results[-1][1]["content"] == "post answering filter"
+    assert results[-1][1]["end_turn"] is True
+
+
+@pytest.mark.asyncio
+@patch("backend.batch.utilities.orchestrator.orchestrator_base.PostPromptTool")
+async def test_stream_answer_sends_answer_before_concurrent_post_prompt_verdict(
+    post_prompt_tool_mock: MagicMock,
+    config_mock: MagicMock,
+    env_helper_mock: MagicMock,
+    content_safety_checker_mock: MagicMock,
+):
+    # given
+    config_mock.prompts.enable_content_safety = True
+    config_mock.prompts.enable_post_answering_prompt = True
+    env_helper_mock.POST_ANSWERING_CONCURRENT = True
+    screen_with(content_safety_checker_mock, "harmful")
+    validating = threading.Event()
+    verdict = threading.Event()
+
+    def validate_answer(answer):
+        validating.set()
+        verdict.wait(5)
+        return Answer(question="question", answer="post answering filter")
+
+    post_prompt_tool_mock.return_value.validate_answer.side_effect = validate_answer
+    orchestrator = MockOrchestrator()
+    stream = orchestrator.stream_answer(
+        "user message", "question", [], iter(["A first window. ", "Tail"])
+    )
+
+    # when
+    results = [await stream.__anext__() for _ in range(3)]
+    validation_started = await asyncio.to_thread(validating.wait, 5)
+    verdict.set()
+    results += await collect(stream)
+
+    # then
+    assert validation_started
+    assert [messages[1]["content"] for messages in results] == [
+        "",
+        "A first window. ",
+        "A first window. Tail",
+        "post answering filter",
+    ]
+    assert [messages[1]["end_turn"] for messages in results] == [
+        False,
+        False,
+        False,
+        True,
+    ]
+    validated = post_prompt_tool_mock.return_value.validate_answer.call_args[0][0]
+    assert validated.answer == "A first window. Tail"
+
+
+@pytest.mark.asyncio
+async def test_handle_message_stream_logs_final_messages(
+    config_mock: MagicMock, conversation_logger_mock: MagicMock
+):
+    # given
+    config_mock.logging.log_user_interactions = True
+    config_mock.logging.log_tokens = False
+    orchestrator = MockOrchestrator()
+
+    # when
+    results = await collect(
+        orchestrator.handle_message_stream("user message", [], "conversation id")
+    )
+
+    # then
+    assert results == [[]]
+    conversation_logger_mock.log.assert_called_once_with(
+        messages=[
+            {
+                "role": "user",
+                "content": "user message",
+                "conversation_id": "conversation id",
+            }
+        ]
+    )
+
+
+@pytest.mark.asyncio
+async def test_screen_input_while_runs_check_concurrently(
+    config_mock: MagicMock, content_safety_checker_mock: MagicMock
+):
+    # given
+    config_mock.prompts.enable_content_safety = True
+    checking = threading.Event()
+    release = threading.Event()
+
+    def validate(text):
+        checking.set()
+        release.wait(2)
+        return text
+
+    content_safety_checker_mock.validate_input_and_replace_if_harmful.side_effect = (
+        validate
+    )
+
+    async def work():
+        # Runs while the check is still in progress
+        while not checking.is_set():
+            await asyncio.sleep(0.01)
+        release.set()
+        return "intent"
+
+    # when
+    response, result = await MockOrchestrator().screen_input_while(
+        "user message", work()
+    )
+
+    # then
+    assert response is None
+    assert result == "intent"
+
+
+@pytest.mark.asyncio
+async def test_screen_input_while_discards_work_when_flagged(
+    config_mock: MagicMock, content_safety_checker_mock: MagicMock
+):
+    # given
+    config_mock.prompts.enable_content_safety = True
+    content_safety_checker_mock.validate_input_and_replace_if_harmful.return_value = (
+        "filtered user message"
+    )
+
+    async def work():
+        return "intent"
+
+    # when
+    response, result = await MockOrchestrator().screen_input_while(
+        "user message", work()
+    )
+
+    # then
+    assert response[-1]["content"] == "filtered user message"
+    assert result is None
+
+
+@pytest.mark.asyncio
+async def test_screen_input_while_without_content_safety(
+    config_mock: MagicMock, content_safety_checker_mock: MagicMock
+):
+    # given
+    config_mock.prompts.enable_content_safety = False
+
+    async def work():
+        return "intent"
+
+    # when
+    response, result = await MockOrchestrator().screen_input_while(
+        "user message", work()
+    )
+
+    # then
+    assert response is None
+    assert result == "intent"
+    content_safety_checker_mock.validate_input_and_replace_if_harmful.assert_not_called()
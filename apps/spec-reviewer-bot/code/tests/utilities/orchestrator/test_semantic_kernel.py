@@ -62,6 +62,8 @@ def orchestrator():
         orchestrator = SemanticKernelOrchestrator()
 
         orchestrator.tokens = {"prompt": 0, "completion": 0, "total": 0}
+        orchestrator.chat_history_budget = MagicMock()
+        orchestrator.chat_history_budget.fit.side_effect = lambda history: history
 
         orchestrator.config = MagicMock()
         orchestrator.config.prompts.enable_content_safety = True
@@ -149,6 +151,54 @@ async def test_semantic_kernel_no_function_call(
     assert orchestrator.tokens == {"prompt": 10, "completion": 20, "total": 30}
 
 
+@pytest.fixture()
+def shared_loop_mock():
+    with patch(
+        "backend.batch.utilities.orchestrator.semantic_kernel.AsyncRuntime"
+    ) as mock:
+        yield mock
+
+
+def new_orchestrator() -> SemanticKernelOrchestrator:
+    with patch(
+        "backend.batch.utilities.orchestrator.semantic_kernel.OrchestratorBase.__init__"
+    ):
+        return SemanticKernelOrchestrator()
+
+
+def test_kernel_shared_between_orchestrators_on_shared_loop(shared_loop_mock):
+    # when
+    orchestrator = new_orchestrator()
+    other_orchestrator = new_orchestrator()
+
+    # then
+    assert other_orchestrator.kernel is orchestrator.kernel
+    assert other_orchestrator.orchestrate_function is orchestrator.orchestrate_function
+
+
+def test_kernel_per_routed_deployment(
+    shared_loop_mock, llm_helper_mock: MagicMock
+):
+    # given
+    orchestrator = new_orchestrator()
+    llm_helper_mock.get_routed_model.return_value = "small-deployment"
+
+    # when
+    other_orchestrator = new_orchestrator()
+
+    # then
+    assert other_orchestrator.kernel is not orchestrator.kernel
+
+
+def test_kernel_per_orchestrator_without_shared_loop():
+    # when
+    orchestrator = new_orchestrator()
+    other_orchestrator = new_orchestrator()
+
+    # then
+    assert other_orchestrator.kernel is not orchestrator.kernel
+
+
 @pytest.mark.asyncio
 async def test_chat_plugin_added(
     orchestrator: SemanticKernelOrchestrator,
@@ -165,24 +215,17 @@ async def test_chat_plugin_added(
     assert kernel_mock.plugins["Chat"] is not None
     assert kernel_mock.plugins["Chat"].functions["search_documents"] is not None
     assert kernel_mock.plugins["Chat"].functions["text_processing"] is not None
+    kernel_mock.add_plugin.assert_not_called()
+    kernel_mock.add_function.assert_not_called()
 
 
-@pytest.mark.asyncio
-async def test_kernel_function_call_behavior(
+def test_kernel_function_call_behavior(
     orchestrator: SemanticKernelOrchestrator,
 ):
-    # given
-    with patch.object(orchestrator, "kernel", wraps=orchestrator.kernel) as kernel_mock:
-        kernel_mock.invoke = AsyncMock()
-        kernel_mock.invoke.return_value.value = [chat_message_default_content]
-
-        # when
-        await orchestrator.orchestrate("question", [])
-
     # then
     function_choice_behavior: FunctionChoiceBehavior = (
-        kernel_mock.add_function.call_args.kwargs[
-            "prompt_execution_settings"
+        orchestrator.orchestrate_function.prompt_execution_settings[
+            "mock-service-id"
         ].function_choice_behavior
     )
 
@@ -251,6 +294,8 @@ async def test_semantic_kernel_text_processing(
 
     kernel_mock.invoke.assert_awaited_with(
         function=ANY,
+        user_question=question,
+        chat_history=[],
         text="mock-text",
         operation="mock-operation",
     )
@@ -326,6 +371,8 @@ async def test_semantic_kernel_search_documents_post_answering_prompt(
         [
             call(
                 function=ANY,
+                user_question="question",
+                chat_history=[],
                 question="mock-tool-question",
             ),
             call(
@@ -399,6 +446,8 @@ async def test_semantic_kernel_search_documents_without_post_answering_prompt(
 
     kernel_mock.invoke.assert_awaited_with(
         function=ANY,
+        user_question="question",
+        chat_history=[],
         question="mock-tool-question",
     )
 
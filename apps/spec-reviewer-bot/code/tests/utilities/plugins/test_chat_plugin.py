@@ -18,17 +18,16 @@ async def test_search_documents(QuestionAnswerToolMock: MagicMock):
     ]
     question = "mock-question"
 
-    plugin = kernel.add_plugin(
-        plugin=ChatPlugin(question=question, chat_history=chat_history),
-        plugin_name="Chat",
-    )
+    plugin = kernel.add_plugin(plugin=ChatPlugin(), plugin_name="Chat")
 
     mock_answer = Answer(question=question, answer="mock-answer")
 
     QuestionAnswerToolMock.return_value.answer_question.return_value = mock_answer
 
     # when
-    answer = await kernel.invoke(plugin["search_documents"], question=question)
+    answer = await kernel.invoke(
+        plugin["search_documents"], question=question, chat_history=chat_history
+    )
 
     # then
     assert answer is not None
@@ -52,10 +51,7 @@ async def test_text_processing(TextProcessingToolMock: MagicMock):
     ]
     question = "mock-question"
 
-    plugin = kernel.add_plugin(
-        plugin=ChatPlugin(question=question, chat_history=chat_history),
-        plugin_name="Chat",
-    )
+    plugin = kernel.add_plugin(plugin=ChatPlugin(), plugin_name="Chat")
 
     text = "mock-text"
     operation = "mock-operation"
@@ -68,6 +64,8 @@ async def test_text_processing(TextProcessingToolMock: MagicMock):
         plugin["text_processing"],
         text=text,
         operation=operation,
+        user_question=question,
+        chat_history=chat_history,
     )
 
     # then
@@ -80,3 +78,21 @@ async def test_text_processing(TextProcessingToolMock: MagicMock):
         text=text,
         operation=operation,
     )
+
+
+def test_conversation_arguments_hidden_from_model():
+    # given
+    kernel = Kernel()
+
+    # when
+    plugin = kernel.add_plugin(plugin=ChatPlugin(), plugin_name="Chat")
+
+    # then
+    for function in plugin.functions.values():
+        visible_parameters = [
+            parameter.name
+            for parameter in function.metadata.parameters
+            if parameter.include_in_function_choices
+        ]
+        assert "user_question" not in visible_parameters
+        assert "chat_history" not in visible_parameters
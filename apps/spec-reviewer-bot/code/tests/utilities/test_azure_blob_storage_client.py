@@ -145,6 +145,23 @@ def test_upsert_blob_metadata(BlobServiceClientMock: MagicMock):
     )
 
 
+def test_get_blob_etag(BlobServiceClientMock: MagicMock):
+    # given
+    client = AzureBlobStorageClient()
+    blob_service_client_mock = BlobServiceClientMock.return_value
+    blob_client_mock = blob_service_client_mock.get_blob_client.return_value
+    blob_client_mock.get_blob_properties.return_value.etag = '"0x8DC"'
+
+    # when
+    etag = client.get_blob_etag("mock-file")
+
+    # then
+    assert etag == '"0x8DC"'
+    blob_service_client_mock.get_blob_client.assert_called_once_with(
+        container="mock-container", blob="mock-file"
+    )
+
+
 @patch("backend.batch.utilities.helpers.azure_blob_storage_client.generate_blob_sas")
 def test_get_blob_sas(generate_blob_sas_mock: MagicMock):
     # given
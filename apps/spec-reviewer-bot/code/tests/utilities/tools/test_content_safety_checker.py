@@ -1,5 +1,12 @@
+from unittest.mock import MagicMock, patch
+
 import pytest
-from backend.batch.utilities.tools.content_safety_checker import ContentSafetyChecker
+from backend.batch.utilities.tools.content_safety_checker import (
+    OUTPUT_RESPONSE_TEMPLATE,
+    RETRACTION_MESSAGE,
+    ContentSafetyChecker,
+    split_into_segments,
+)
 
 
 @pytest.mark.azure("This test requires Azure Content Safety configured")
@@ -13,3 +20,209 @@ def test_document_chunking_layout():
     assert cut.validate_output_and_replace_if_harmful(safe_input) == safe_input
     assert cut.validate_input_and_replace_if_harmful(unsafe_input) != unsafe_input
     assert cut.validate_output_and_replace_if_harmful(unsafe_input) != unsafe_input
+
+
+@pytest.fixture
+def env_helper_mock():
+    with patch(
+        "backend.batch.utilities.tools.content_safety_checker.EnvHelper"
+    ) as mock:
+        env_helper = mock.return_value
+        env_helper.AZURE_AUTH_TYPE = "keys"
+        env_helper.AZURE_CONTENT_SAFETY_KEY = "mock-key"
+        env_helper.CONTENT_SAFETY_MAX_SEGMENT_CHARACTERS = 10000
+        env_helper.CONTENT_SAFETY_CACHE_TTL_SECONDS = 3600
+        yield env_helper
+
+
+@pytest.fixture
+def content_safety_client_mock():
+    with patch(
+        "backend.batch.utilities.tools.content_safety_checker.ContentSafetyClient"
+    ) as mock:
+        client = mock.return_value
+        client.analyze_text.side_effect = lambda request: analysis(
+            "hate" in request.text
+        )
+        yield client
+
+
+@pytest.fixture(autouse=True)
+def clear_verdicts():
+    ContentSafetyChecker.clear_cache()
+    yield
+    ContentSafetyChecker.clear_cache()
+
+
+def analysis(harmful: bool):
+    return MagicMock(categories_analysis=[MagicMock(severity=2 if harmful else 0)])
+
+
+def test_split_into_segments_keeps_short_text():
+    assert split_into_segments("A short text.", 100) == ["A short text."]
+
+
+def test_split_into_segments_cuts_between_sentences():
+    # given
+    text = "First sentence here. Second sentence. Third one is longer than that."
+
+    # when
+    segments = split_into_segments(text, 40)
+
+    # then
+    assert segments == [
+        "First sentence here. Second sentence. ",
+        "Third one is longer than that.",
+    ]
+    assert "".join(segments) == text
+
+
+def test_split_into_segments_cuts_words_or_characters_without_sentences():
+    assert split_into_segments("one two three four", 9) == ["one two ", "three ", "four"]
+    assert split_into_segments("abcdefghij", 4) == ["abcd", "efgh", "ij"]
+
+
+def test_long_text_analyzed_in_segments(
+    env_helper_mock: MagicMock, content_safety_client_mock: MagicMock
+):
+    # given
+    env_helper_mock.CONTENT_SAFETY_MAX_SEGMENT_CHARACTERS = 30
+    checker = ContentSafetyChecker()
+    text = "A harmless sentence. Another one. I hate this sentence. The end."
+
+    # when
+    result = checker.validate_output_and_replace_if_harmful(text)
+
+    # then
+    assert result != text
+    analyzed = [
+        call.args[0].text for call in content_safety_client_mock.analyze_text.call_args_list
+    ]
+    assert sorted(analyzed) == sorted(split_into_segments(text, 30))
+    assert len(analyzed) > 1
+
+
+def test_verdict_cached_by_text(
+    env_helper_mock: MagicMock, content_safety_client_mock: MagicMock
+):
+    # given
+    checker = ContentSafetyChecker()
+
+    # when
+    first = checker.validate_input_and_replace_if_harmful("A question?")
+    second = ContentSafetyChecker().validate_output_and_replace_if_harmful("A question?")
+
+    # then
+    assert first == second == "A question?"
+    content_safety_client_mock.analyze_text.assert_called_once()
+
+
+def test_verdict_cache_expires(
+    env_helper_mock: MagicMock, content_safety_client_mock: MagicMock
+):
+    # given
+    checker = ContentSafetyChecker()
+    with patch(
+        "backend.batch.utilities.tools.content_safety_checker.time.monotonic",
+        return_value=1000,
+    ):
+        checker.validate_input_and_replace_if_harmful("A question?")
+
+    # when
+    with patch(
+        "backend.batch.utilities.tools.content_safety_checker.time.monotonic",
+        return_value=1000 + 3601,
+    ):
+        checker.validate_input_and_replace_if_harmful("A question?")
+
+    # then
+    assert content_safety_client_mock.analyze_text.call_count == 2
+
+
+def test_verdict_cache_disabled(
+    env_helper_mock: MagicMock, content_safety_client_mock: MagicMock
+):
+    # given
+    env_helper_mock.CONTENT_SAFETY_CACHE_TTL_SECONDS = 0
+    checker = ContentSafetyChecker()
+
+    # when
+    checker.validate_input_and_replace_if_harmful("I hate it")
+    result = checker.validate_input_and_replace_if_harmful("I hate it")
+
+    # then
+    assert result != "I hate it"
+    assert content_safety_client_mock.analyze_text.call_count == 2
+
+
+def test_stream_screener_releases_sentence_aligned_windows(
+    env_helper_mock: MagicMock, content_safety_client_mock: MagicMock
+):
+    # given
+    screener = ContentSafetyChecker().stream_screener(10)
+
+    # when
+    for delta in ["A first ", "sentence. And", " a second ", "one. Tail"]:
+        screener.feed(delta)
+    screener.close()
+    released = screener.wait()
+
+    # then
+    assert released == "A first sentence. And a second one. Tail"
+    assert not screener.flagged
+    analyzed = [
+        call.args[0].text for call in content_safety_client_mock.analyze_text.call_args_list
+    ]
+    assert sorted(analyzed) == sorted(
+        ["A first sentence. ", "And a second one. ", "Tail"]
+    )
+
+
+def test_stream_screener_cuts_between_words_without_sentences(
+    env_helper_mock: MagicMock, content_safety_client_mock: MagicMock
+):
+    # given
+    screener = ContentSafetyChecker().stream_screener(5)
+
+    # when
+    screener.feed("one two three four")
+    released = screener.wait()
+
+    # then
+    assert released == "one two "
+    screener.close()
+    assert screener.wait() == "one two three four"
+
+
+def test_stream_screener_stops_releasing_at_harmful_window(
+    env_helper_mock: MagicMock, content_safety_client_mock: MagicMock
+):
+    # given
+    screener = ContentSafetyChecker().stream_screener(10)
+
+    # when
+    screener.feed("A safe sentence. I hate this sentence. A safe end.")
+    screener.close()
+    released = screener.wait()
+
+    # then
+    assert screener.flagged
+    assert released == "A safe sentence. "
+    assert screener.replacement == RETRACTION_MESSAGE
+
+
+def test_stream_screener_replaces_answer_flagged_before_release(
+    env_helper_mock: MagicMock, content_safety_client_mock: MagicMock
+):
+    # given
+    screener = ContentSafetyChecker().stream_screener(10)
+
+    # when
+    screener.feed("I hate this sentence.")
+    screener.close()
+    screener.wait()
+
+    # then
+    assert screener.flagged
+    assert screener.released_text == ""
+    assert screener.replacement == OUTPUT_RESPONSE_TEMPLATE
@@ -3,6 +3,7 @@ from unittest.mock import MagicMock, patch
 import pytest
 from backend.batch.utilities.common.answer import Answer
 from backend.batch.utilities.common.source_document import SourceDocument
+from backend.batch.utilities.helpers.config.llm_call_site import LLMCallSite
 from backend.batch.utilities.tools.post_prompt_tool import PostPromptTool
 
 
@@ -16,6 +17,16 @@ def config_mock():
         yield config
 
 
+@pytest.fixture(autouse=True)
+def env_helper_mock():
+    with patch("backend.batch.utilities.tools.post_prompt_tool.EnvHelper") as mock:
+        env_helper = mock.return_value
+        env_helper.POST_ANSWERING_SOURCE_TOKENS = 0
+        env_helper.AZURE_OPENAI_MODEL_NAME = "gpt-4.1"
+
+        yield env_helper
+
+
 @pytest.fixture(autouse=True)
 def llm_helper_mock():
     with patch("backend.batch.utilities.tools.post_prompt_tool.LLMHelper") as mock:
@@ -83,7 +94,8 @@ def test_validate_answer_without_filtering(llm_helper_mock: MagicMock, answer: A
                 "role": "user",
                 "content": "mock\nuser question\nanswer\n[doc1]: content",
             }
-        ]
+        ],
+        call_site=LLMCallSite.POST_VALIDATION,
     )
 
 
@@ -111,5 +123,58 @@ def test_validate_answer_with_filtering(llm_helper_mock: MagicMock, answer: Answ
                 "role": "user",
                 "content": "mock\nuser question\nanswer\n[doc1]: content",
             }
-        ]
+        ],
+        call_site=LLMCallSite.POST_VALIDATION,
+    )
+
+
+def source(content: str) -> SourceDocument:
+    return SourceDocument(id=content, content=content, source="source")
+
+
+def test_format_sources_keeps_cited_sources_truncated(env_helper_mock: MagicMock):
+    # given
+    env_helper_mock.POST_ANSWERING_SOURCE_TOKENS = 2
+    answer = Answer(
+        question="user question",
+        answer="first [doc1] and third [doc3]",
+        source_documents=[
+            source("one two three"),
+            source("four five six"),
+            source("seven eight"),
+        ],
+    )
+
+    # when
+    with patch(
+        "backend.batch.utilities.tools.post_prompt_tool.truncate_to_tokens",
+        side_effect=lambda text, max_tokens, model_name: " ".join(
+            text.split()[:max_tokens]
+        ),
+    ):
+        sources = PostPromptTool().format_sources(answer)
+
+    # then
+    assert sources == "[doc1]: one two\n[doc3]: seven eight"
+
+
+def test_format_sources_keeps_all_sources_of_uncited_answer(
+    env_helper_mock: MagicMock,
+):
+    # given
+    env_helper_mock.POST_ANSWERING_SOURCE_TOKENS = 100
+    answer = Answer(
+        question="user question",
+        answer="no citation",
+        source_documents=[source("one"), source("two")],
     )
+
+    # when
+    with patch(
+        "backend.batch.utilities.tools.post_prompt_tool.truncate_to_tokens",
+        side_effect=lambda text, max_tokens, model_name: text,
+    ):
+        sources = PostPromptTool().format_sources(answer)
+
+    # then
+    assert sources == "[doc1]: one\n[doc2]: two"
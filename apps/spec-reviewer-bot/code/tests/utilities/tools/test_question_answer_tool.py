@@ -43,6 +43,8 @@ def env_helper_mock():
         env_helper.USE_ADVANCED_IMAGE_PROCESSING = False
         env_helper.AZURE_OPENAI_VISION_MODEL = "mock vision model"
         env_helper.ADVANCED_IMAGE_PROCESSING_MAX_IMAGES = 1
+        env_helper.CONTEXT_PACKING_ENABLED = False
+        env_helper.CHAT_HISTORY_TOKEN_BUDGET = 0
 
         yield env_helper
 
@@ -425,3 +427,62 @@ def test_limit_number_of_images_passed_to_llm(
         model="mock vision model",
         temperature=0,
     )
+
+
+@patch("backend.batch.utilities.tools.question_answer_tool.ContextPacking")
+def test_answer_question_uses_packed_source_documents(
+    context_packing_mock: MagicMock,
+    env_helper_mock: MagicMock,
+    llm_helper_mock: MagicMock,
+    get_source_documents_mock: MagicMock,
+):
+    # given
+    env_helper_mock.CONTEXT_PACKING_ENABLED = True
+    packed_document = SourceDocument(
+        id="mock id",
+        content="mock packed content",
+        title="mock title",
+        source="mock source",
+    )
+    context_packing_mock.return_value.pack.return_value = [packed_document]
+    tool = QuestionAnswerTool()
+
+    # when
+    answer = tool.answer_question("mock question", [])
+
+    # then
+    context_packing_mock.return_value.pack.assert_called_once_with(
+        get_source_documents_mock.return_value
+    )
+    assert answer.source_documents == [packed_document]
+    messages = llm_helper_mock.get_chat_completion.call_args[0][0]
+    assert messages[-1]["content"][0]["text"] == (
+        'Sources: {"retrieved_documents":[{"[doc1]":{"content":"mock packed content"}}]}, '
+        "Question: mock question"
+    )
+
+
+def test_stream_answer_question_returns_sources_and_deltas(
+    llm_helper_mock: MagicMock, get_source_documents_mock: MagicMock
+):
+    # given
+    chunks = []
+    for content in [None, "mock ", "answer"]:
+        chunk = MagicMock()
+        chunk.choices[0].delta.content = content
+        chunks.append(chunk)
+    prompt_filter_chunk = MagicMock()
+    prompt_filter_chunk.choices = []
+    llm_helper_mock.get_chat_completion.side_effect = [
+        llm_helper_mock.get_chat_completion.return_value,
+        iter([prompt_filter_chunk, *chunks]),
+    ]
+    tool = QuestionAnswerTool()
+
+    # when
+    source_documents, deltas = tool.stream_answer_question("mock question", [])
+
+    # then
+    assert source_documents == get_source_documents_mock.return_value
+    assert list(deltas) == ["mock ", "answer"]
+    assert llm_helper_mock.get_chat_completion.call_args.kwargs["stream"] is True
@@ -0,0 +1,208 @@
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+from backend.batch.utilities.common.source_document import SourceDocument
+from backend.batch.utilities.helpers.config.llm_call_site import LLMCallSite
+from backend.batch.utilities.tools.spec_review_tool import SpecReviewTool
+
+
+@pytest.fixture(autouse=True)
+def env_helper_mock():
+    with patch("backend.batch.utilities.tools.spec_review_tool.EnvHelper") as mock:
+        env_helper = mock.return_value
+        env_helper.SPEC_REVIEW_CONTAINER_NAME = "spec-reviews"
+        env_helper.SPEC_REVIEW_MAX_SECTIONS = 300
+        env_helper.SPEC_REVIEW_MAX_CONCURRENCY = 4
+        env_helper.SPEC_REVIEW_REQUESTS_PER_MINUTE = 0
+        yield env_helper
+
+
+@pytest.fixture(autouse=True)
+def config_mock():
+    with patch(
+        "backend.batch.utilities.tools.spec_review_tool.ConfigHelper"
+    ) as mock:
+        config = mock.get_active_config_or_default.return_value
+        pdf = MagicMock(document_type="pdf", use_advanced_image_processing=False)
+        png = MagicMock(document_type="png", use_advanced_image_processing=True)
+        config.document_processors = [pdf, png]
+        yield config
+
+
+@pytest.fixture(autouse=True)
+def search_mock():
+    with patch("backend.batch.utilities.tools.spec_review_tool.Search") as mock:
+        mock.get_source_documents.side_effect = lambda handler, query: [
+            SourceDocument(
+                id="id", content=f"guideline for {query}", source="source", title="title"
+            )
+        ]
+        yield mock
+
+
+@pytest.fixture(autouse=True)
+def llm_helper_mock():
+    with patch("backend.batch.utilities.tools.spec_review_tool.LLMHelper") as mock:
+        llm_helper = mock.return_value
+
+        def get_chat_completion(messages, **kwargs):
+            section = messages[-1]["content"].split("Section to review:\n")[-1]
+            response = MagicMock()
+            response.choices[0].message.content = json.dumps(
+                {
+                    "score": 3 if "vague" in section else 9,
+                    "findings": (
+                        [{"severity": "high", "issue": "vague", "recommendation": "fix"}]
+                        if "vague" in section
+                        else []
+                    ),
+                }
+            )
+            return response
+
+        llm_helper.get_chat_completion.side_effect = get_chat_completion
+        yield llm_helper
+
+
+@pytest.fixture(autouse=True)
+def blob_client_mock():
+    with patch(
+        "backend.batch.utilities.tools.spec_review_tool.AzureBlobStorageClient"
+    ) as mock:
+        blob_client = mock.return_value
+        blob_client.upload_file.return_value = "https://blob/spec.pdf?sas"
+        yield blob_client
+    SpecReviewTool._container_ready = False
+
+
+@pytest.fixture(autouse=True)
+def document_loading_mock():
+    with patch(
+        "backend.batch.utilities.tools.spec_review_tool.DocumentLoading"
+    ) as loading, patch(
+        "backend.batch.utilities.tools.spec_review_tool.DocumentChunking"
+    ) as chunking:
+        chunking.return_value.chunk.return_value = [
+            SourceDocument(content="The system is vague.", source="s", page_number=1),
+            SourceDocument(content="   ", source="s", page_number=1),
+            SourceDocument(
+                content="Passwords are hashed with Argon2id and salted.",
+                source="s",
+                page_number=2,
+            ),
+        ]
+        yield loading, chunking
+
+
+def test_supports_configured_text_document_types():
+    # when
+    tool = SpecReviewTool()
+
+    # then
+    assert tool.supports("spec.PDF")
+    assert not tool.supports("diagram.png")
+    assert not tool.supports("spec.exe")
+
+
+def test_review_document_streams_section_reviews_and_summary(
+    blob_client_mock: MagicMock, llm_helper_mock: MagicMock
+):
+    # when
+    events = list(SpecReviewTool().review_document("spec.pdf", b"content"))
+
+    # then
+    assert events[0] == {"sections": 2}
+    reviews = sorted(
+        (event["section"] for event in events[1:-1]), key=lambda review: review["index"]
+    )
+    assert [review["score"] for review in reviews] == [3, 9]
+    assert reviews[0]["findings"][0]["severity"] == "high"
+    assert reviews[0]["sources"] == [{"id": "id", "title": "title", "source": "source"}]
+    summary = events[-1]["summary"]
+    assert summary["sections"] == 2
+    assert summary["failed_sections"] == 0
+    assert summary["findings"] == {"high": 1, "medium": 0, "low": 0}
+    assert 3 < summary["score"] < 9
+
+    blob_name = blob_client_mock.upload_file.call_args[0][1]
+    assert blob_name.endswith("/spec.pdf")
+    blob_client_mock.delete_file.assert_called_once_with(blob_name)
+    assert all(
+        call.kwargs["call_site"] == LLMCallSite.REVIEW
+        for call in llm_helper_mock.get_chat_completion.call_args_list
+    )
+
+
+def test_container_created_on_first_review(blob_client_mock: MagicMock):
+    # when
+    list(SpecReviewTool().review_document("spec.pdf", b"content"))
+    list(SpecReviewTool().review_document("spec.pdf", b"content"))
+
+    # then
+    blob_client_mock.ensure_container.assert_called_once()
+
+
+def test_llm_client_leaves_retries_to_the_governor():
+    with patch("backend.batch.utilities.tools.spec_review_tool.LLMHelper") as mock:
+        # when
+        SpecReviewTool()
+
+    # then
+    mock.assert_called_once_with(max_retries=0)
+
+
+def test_failed_section_reported_without_failing_the_review(
+    llm_helper_mock: MagicMock,
+):
+    # given
+    llm_helper_mock.get_chat_completion.side_effect = Exception("failure")
+
+    # when
+    events = list(SpecReviewTool().review_document("spec.pdf", b"content"))
+
+    # then
+    assert all("error" in event["section"] for event in events[1:-1])
+    assert events[-1]["summary"]["failed_sections"] == 2
+    assert events[-1]["summary"]["score"] is None
+
+
+def test_sections_limited_to_max_sections(env_helper_mock: MagicMock):
+    # given
+    env_helper_mock.SPEC_REVIEW_MAX_SECTIONS = 1
+
+    # when
+    sections = SpecReviewTool().load_sections("https://blob/spec.pdf", "spec.pdf")
+
+    # then
+    assert [section.content for section in sections] == ["The system is vague."]
+
+
+def test_unparsable_review_kept_as_finding():
+    # when
+    review = SpecReviewTool._parse_review("Not JSON")
+
+    # then
+    assert review == {
+        "findings": [{"severity": "low", "issue": "Not JSON", "recommendation": ""}]
+    }
+
+
+def test_aggregate_weights_scores_by_section_length():
+    # given
+    reviews = [
+        {"length": 300, "score": 8, "findings": []},
+        {"length": 100, "score": 4, "findings": [{"severity": "medium"}]},
+        {"length": 500, "score": None, "findings": [], "error": "failed"},
+    ]
+
+    # when
+    summary = SpecReviewTool.aggregate(reviews)
+
+    # then
+    assert summary == {
+        "score": 7.0,
+        "sections": 3,
+        "failed_sections": 1,
+        "findings": {"high": 0, "medium": 1, "low": 0},
+    }
@@ -0,0 +1,108 @@
+"""
+Sends requests to a running instance of the app with a fixed number of concurrent
+clients and reports the throughput and latency percentiles, to compare serving modes:
+
+    uwsgi --http :8080 --wsgi-file app.py --callable app --enable-threads --threads 16
+    uvicorn asgi:app --port 8081
+
+    python ../scripts/benchmarks/load_test.py http://localhost:8080/api/history/list
+    python ../scripts/benchmarks/load_test.py http://localhost:8081/api/history/list
+
+POST requests send the JSON body given with --body, e.g. a /api/conversation payload.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+
+
+def percentile(sorted_values: list[float], percent: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, round(percent / 100 * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+
+async def run_client(
+    client: httpx.AsyncClient,
+    args: argparse.Namespace,
+    body,
+    deadline: float,
+    latencies: list[float],
+    errors: list[str],
+):
+    while time.perf_counter() < deadline:
+        started_at = time.perf_counter()
+        try:
+            response = await client.request(args.method, args.url, json=body)
+            # Streamed answers only count once fully received
+            await response.aread()
+            if response.status_code >= 400:
+                errors.append(str(response.status_code))
+                continue
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+            continue
+        latencies.append((time.perf_counter() - started_at) * 1000)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("url")
+    parser.add_argument("--method", default="GET")
+    parser.add_argument("--body", help="Path to a JSON file sent as the request body")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30, help="Seconds")
+    parser.add_argument("--timeout", type=float, default=240, help="Seconds")
+    parser.add_argument(
+        "--header",
+        action="append",
+        default=[],
+        help="Extra header as 'Name: value', e.g. an x-ms-client-principal-id",
+    )
+    args = parser.parse_args()
+
+    body = None
+    if args.body:
+        with open(args.body, encoding="utf-8") as body_file:
+            body = json.load(body_file)
+    headers = dict(header.split(":", 1) for header in args.header)
+    headers = {name.strip(): value.strip() for name, value in headers.items()}
+
+    latencies: list[float] = []
+    errors: list[str] = []
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(
+        headers=headers, timeout=args.timeout, limits=limits
+    ) as client:
+        started_at = time.perf_counter()
+        deadline = started_at + args.duration
+        await asyncio.gather(
+            *(
+                run_client(client, args, body, deadline, latencies, errors)
+                for _ in range(args.concurrency)
+            )
+        )
+        elapsed = time.perf_counter() - started_at
+
+    latencies.sort()
+    print(f"{args.method} {args.url}, {args.concurrency} clients, {elapsed:.1f} s")
+    print(f"requests   {len(latencies)} ok, {len(errors)} failed")
+    print(f"throughput {len(latencies) / elapsed:.1f} req/s")
+    if latencies:
+        print(
+            f"latency    mean {statistics.mean(latencies):.0f} ms, "
+            f"p50 {percentile(latencies, 50):.0f} ms, "
+            f"p95 {percentile(latencies, 95):.0f} ms, "
+            f"p99 {percentile(latencies, 99):.0f} ms"
+        )
+    if errors:
+        print(f"errors     {dict((error, errors.count(error)) for error in set(errors))}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,69 @@
+"""
+Measures the time spent building an orchestrator for a message, with the shared
+clients and kernels warm (the default) and with them rebuilt for every message
+(--cold), which is what every request paid before they were shared.
+
+Uses the environment of the app, so run from the code folder with it configured:
+    python ../scripts/benchmarks/orchestrator_construction_benchmark.py --strategy semantic_kernel
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.getcwd())
+
+from backend.batch.utilities.orchestrator.orchestrator_base import (  # noqa: E402
+    OrchestratorBase,
+)
+from backend.batch.utilities.orchestrator.strategies import (  # noqa: E402
+    get_orchestrator,
+)
+
+
+def measure(strategy: str, requests: int, cold: bool) -> list[float]:
+    durations_ms = []
+    for _ in range(requests):
+        if cold:
+            OrchestratorBase.clear_shared_resources()
+        started_at = time.perf_counter()
+        get_orchestrator(strategy)
+        durations_ms.append((time.perf_counter() - started_at) * 1000)
+    return durations_ms
+
+
+def report(label: str, durations_ms: list[float]) -> None:
+    durations_ms = sorted(durations_ms)
+    p95 = durations_ms[max(0, round(len(durations_ms) * 0.95) - 1)]
+    print(
+        f"{label:<6} mean {statistics.mean(durations_ms):8.2f} ms"
+        f"  p50 {statistics.median(durations_ms):8.2f} ms"
+        f"  p95 {p95:8.2f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--strategy", default="openai_function")
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument(
+        "--cold",
+        action="store_true",
+        help="Also measure with the shared resources rebuilt for every message",
+    )
+    args = parser.parse_args()
+
+    print(f"{args.requests} orchestrators of strategy {args.strategy}")
+    if args.cold:
+        report("cold", measure(args.strategy, args.requests, cold=True))
+
+    # The first message builds the shared resources
+    OrchestratorBase.clear_shared_resources()
+    report("first", measure(args.strategy, 1, cold=False))
+    report("warm", measure(args.strategy, args.requests, cold=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Compares the bytes sent and the CPU time spent by the v1 (cumulative) and v2 (delta)
+stream formats of /api/conversation for a simulated answer.
+
+Run from the code folder:
+    python ../scripts/benchmarks/stream_format_benchmark.py --tokens 2000
+"""
+
+import argparse
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.getcwd())
+
+from create_app import (  # noqa: E402
+    STREAM_FORMAT_V1,
+    STREAM_FORMAT_V2,
+    stream_with_data,
+    stream_without_data,
+)
+
+
+def make_chunk(content, end_turn=False):
+    return SimpleNamespace(
+        id="chatcmpl-benchmark",
+        model="benchmark-model",
+        created=0,
+        object="chat.completion.chunk",
+        choices=[
+            SimpleNamespace(
+                delta=SimpleNamespace(role=None, content=content),
+                model_extra={"end_turn": end_turn},
+            )
+        ],
+    )
+
+
+def make_response(tokens: int, with_data: bool):
+    # Roughly one word per token, as the service streams them
+    chunks = [make_chunk(f" word{i % 100}") for i in range(tokens)]
+    chunks.append(make_chunk(None, end_turn=with_data))
+    return chunks
+
+
+def measure(stream_function, response, stream_format: str, repeat: int):
+    sent_bytes = 0
+    lines = 0
+    started_at = time.process_time()
+    for _ in range(repeat):
+        sent_bytes = 0
+        lines = 0
+        for line in stream_function(response, stream_format):
+            sent_bytes += len(line.encode("utf-8"))
+            lines += 1
+    cpu_ms = (time.process_time() - started_at) * 1000 / repeat
+    return sent_bytes, lines, cpu_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--tokens", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"Simulated answer of {args.tokens} tokens, {args.repeat} runs each")
+    print(f"{'stream':<22}{'format':<8}{'lines':>8}{'bytes':>14}{'cpu ms':>10}")
+    for name, stream_function, with_data in [
+        ("stream_with_data", stream_with_data, True),
+        ("stream_without_data", stream_without_data, False),
+    ]:
+        response = make_response(args.tokens, with_data)
+        for stream_format in (STREAM_FORMAT_V1, STREAM_FORMAT_V2):
+            sent_bytes, lines, cpu_ms = measure(
+                stream_function, response, stream_format, args.repeat
+            )
+            print(
+                f"{name:<22}{stream_format:<8}{lines:>8}{sent_bytes:>14,}{cpu_ms:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
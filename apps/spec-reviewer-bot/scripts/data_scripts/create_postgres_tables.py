@@ -1,3 +1,5 @@
+import os
+
 from azure_credential_utils import get_azure_credential
 import psycopg2
 
@@ -5,6 +7,22 @@ user = "managedIdentityName"
 host = "serverName"
 dbname = "postgres"
 
+# HNSW build parameters: higher values give a better recall for a slower build and a larger index
+hnsw_m = int(os.getenv("AZURE_POSTGRES_HNSW_M", "16"))
+hnsw_ef_construction = int(os.getenv("AZURE_POSTGRES_HNSW_EF_CONSTRUCTION", "64"))
+
+# The vectors the HNSW index is built on: full precision (vector), half precision (halfvec)
+# or binary quantized (binary). The table always keeps the full precision vectors, which
+# re-rank the chunks found through a quantized index.
+vector_storage = os.getenv("AZURE_POSTGRES_VECTOR_STORAGE", "vector").lower()
+index_expressions = {
+    "vector": "content_vector vector_cosine_ops",
+    "halfvec": "(content_vector::halfvec(1536)) halfvec_cosine_ops",
+    "binary": "(binary_quantize(content_vector)::bit(1536)) bit_hamming_ops",
+}
+if vector_storage not in index_expressions:
+    raise ValueError(f"Unsupported AZURE_POSTGRES_VECTOR_STORAGE: {vector_storage}")
+
 
 # Acquire the access token
 cred = get_azure_credential()
@@ -25,12 +43,17 @@ create_cs_sql = """CREATE TABLE conversations (
                     id TEXT PRIMARY KEY,
                     conversation_id TEXT NOT NULL,
                     type TEXT NOT NULL,
-                    "createdAt" TEXT,
-                    "updatedAt" TEXT,
+                    "createdAt" TIMESTAMPTZ,
+                    "updatedAt" TIMESTAMPTZ,
                     user_id TEXT NOT NULL,
-                    title TEXT
+                    title TEXT,
+                    "titlePending" BOOLEAN NOT NULL DEFAULT FALSE
                 );"""
 cursor.execute(create_cs_sql)
+# Keyset pagination of the conversations of a user, most recently updated first
+cursor.execute(
+    'CREATE INDEX conversations_user_id_updated_at_idx ON conversations (user_id, "updatedAt", id);'
+)
 conn.commit()
 
 # Drop and recreate the messages table
@@ -40,8 +63,8 @@ conn.commit()
 create_ms_sql = """CREATE TABLE messages (
                     id TEXT PRIMARY KEY,
                     type VARCHAR(50) NOT NULL,
-                    "createdAt" TEXT,
-                    "updatedAt" TEXT,
+                    "createdAt" TIMESTAMPTZ,
+                    "updatedAt" TIMESTAMPTZ,
                     user_id TEXT NOT NULL,
                     conversation_id TEXT NOT NULL,
                     role VARCHAR(50),
@@ -49,6 +72,23 @@ create_ms_sql = """CREATE TABLE messages (
                     feedback TEXT
                 );"""
 cursor.execute(create_ms_sql)
+cursor.execute(
+    'CREATE INDEX messages_conversation_id_created_at_idx ON messages (conversation_id, user_id, "createdAt");'
+)
+conn.commit()
+
+# Drop and recreate the conversation summaries table
+cursor.execute("DROP TABLE IF EXISTS conversation_summaries")
+conn.commit()
+
+create_summaries_sql = """CREATE TABLE conversation_summaries (
+                    conversation_id TEXT PRIMARY KEY,
+                    user_id TEXT NOT NULL,
+                    summary TEXT NOT NULL,
+                    summarized_message_count INTEGER NOT NULL,
+                    "updatedAt" TIMESTAMPTZ
+                );"""
+cursor.execute(create_summaries_sql)
 conn.commit()
 
 
@@ -59,8 +99,25 @@ conn.commit()
 cursor.execute("DROP TABLE IF EXISTS vector_store;")
 conn.commit()
 
+# Catalog of the ingested files, id is the SHA-1 of source, the file URL without SAS token
+cursor.execute("DROP TABLE IF EXISTS documents;")
+conn.commit()
+
+create_documents_sql = """CREATE TABLE documents (
+                    id TEXT PRIMARY KEY,
+                    source TEXT NOT NULL UNIQUE,
+                    title TEXT NOT NULL,
+                    etag TEXT,
+                    chunk_count INTEGER NOT NULL,
+                    ingested_at TIMESTAMPTZ NOT NULL DEFAULT now()
+                );"""
+cursor.execute(create_documents_sql)
+cursor.execute("CREATE INDEX documents_title_idx ON documents (title);")
+conn.commit()
+
 table_create_command = """CREATE TABLE IF NOT EXISTS vector_store(
-    id text,
+    id text PRIMARY KEY,
+    document_id text REFERENCES documents (id) ON DELETE CASCADE,
     title text,
     chunk integer,
     chunk_id text,
@@ -69,7 +126,10 @@ table_create_command = """CREATE TABLE IF NOT EXISTS vector_store(
     content text,
     source text,
     metadata text,
-    content_vector public.vector(1536)
+    content_vector public.vector(1536),
+    content_tsv tsvector GENERATED ALWAYS AS (
+        to_tsvector('english', coalesce(title, '') || ' ' || coalesce(content, ''))
+    ) STORED
 );"""
 
 cursor.execute(table_create_command)
@@ -77,13 +137,28 @@ conn.commit()
 
 
 cursor.execute(
-    "CREATE INDEX vector_store_content_vector_idx ON vector_store USING hnsw (content_vector vector_cosine_ops);"
+    f"CREATE INDEX vector_store_content_vector_idx ON vector_store USING hnsw ({index_expressions[vector_storage]}) "
+    f"WITH (m = {hnsw_m}, ef_construction = {hnsw_ef_construction});"
+)
+conn.commit()
+
+# Chunks of a file, in order, for the admin pages, re-ingestion and the cascading deletes
+cursor.execute(
+    "CREATE INDEX vector_store_document_id_idx ON vector_store (document_id, chunk);"
+)
+conn.commit()
+
+# Keyword side of the hybrid search
+cursor.execute(
+    "CREATE INDEX vector_store_content_tsv_idx ON vector_store USING gin (content_tsv);"
 )
 conn.commit()
 
 
 cursor.execute("ALTER TABLE public.conversations OWNER TO azure_pg_admin;")
 cursor.execute("ALTER TABLE public.messages OWNER TO azure_pg_admin;")
+cursor.execute("ALTER TABLE public.conversation_summaries OWNER TO azure_pg_admin;")
+cursor.execute("ALTER TABLE public.documents OWNER TO azure_pg_admin;")
 cursor.execute("ALTER TABLE public.vector_store OWNER TO azure_pg_admin;")
 conn.commit()
 
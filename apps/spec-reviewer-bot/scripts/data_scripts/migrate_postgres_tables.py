@@ -0,0 +1,221 @@
+"""
+Upgrades the tables of an existing database in place to the schema of
+create_postgres_tables.py, without re-ingesting the documents. Every migration checks
+whether it is needed, so the script can be run again.
+"""
+
+import os
+
+from azure_credential_utils import get_azure_credential
+import psycopg2
+
+user = "managedIdentityName"
+host = "serverName"
+dbname = "postgres"
+
+# The catalog id of a file is the SHA-1 of its source without the SAS token placeholder
+CATALOG_SOURCE = "replace(source, '_SAS_TOKEN_PLACEHOLDER_', '')"
+DOCUMENT_ID = f"encode(sha1(convert_to({CATALOG_SOURCE}, 'UTF8')), 'hex')"
+
+# Same settings as create_postgres_tables.py, the HNSW index is rebuilt when they differ
+hnsw_m = int(os.getenv("AZURE_POSTGRES_HNSW_M", "16"))
+hnsw_ef_construction = int(os.getenv("AZURE_POSTGRES_HNSW_EF_CONSTRUCTION", "64"))
+vector_storage = os.getenv("AZURE_POSTGRES_VECTOR_STORAGE", "vector").lower()
+index_expressions = {
+    "vector": "content_vector vector_cosine_ops",
+    "halfvec": "(content_vector::halfvec(1536)) halfvec_cosine_ops",
+    "binary": "(binary_quantize(content_vector)::bit(1536)) bit_hamming_ops",
+}
+if vector_storage not in index_expressions:
+    raise ValueError(f"Unsupported AZURE_POSTGRES_VECTOR_STORAGE: {vector_storage}")
+
+
+def has_constraint(cursor, table, constraint_type):
+    cursor.execute(
+        "SELECT 1 FROM pg_constraint WHERE conrelid = %s::regclass AND contype = %s;",
+        (f"public.{table}", constraint_type),
+    )
+    return cursor.fetchone() is not None
+
+
+def add_vector_store_primary_key(cursor):
+    if has_constraint(cursor, "vector_store", "p"):
+        return
+    # Re-ingested files left duplicated chunks, keep the most recently inserted row of each id
+    cursor.execute(
+        """DELETE FROM vector_store
+        WHERE ctid IN (
+            SELECT ctid FROM (
+                SELECT ctid, ROW_NUMBER() OVER (PARTITION BY id ORDER BY ctid DESC) AS position
+                FROM vector_store
+            ) AS rows
+            WHERE position > 1
+        );"""
+    )
+    print(f"Deleted {cursor.rowcount} duplicated chunks")
+    cursor.execute("DELETE FROM vector_store WHERE id IS NULL;")
+    cursor.execute("ALTER TABLE vector_store ADD PRIMARY KEY (id);")
+    print("Added the primary key of vector_store")
+
+
+def add_documents_catalog(cursor):
+    cursor.execute(
+        """CREATE TABLE IF NOT EXISTS documents (
+            id TEXT PRIMARY KEY,
+            source TEXT NOT NULL UNIQUE,
+            title TEXT NOT NULL,
+            etag TEXT,
+            chunk_count INTEGER NOT NULL,
+            ingested_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        );"""
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS documents_title_idx ON documents (title);"
+    )
+    cursor.execute("ALTER TABLE vector_store ADD COLUMN IF NOT EXISTS document_id TEXT;")
+
+    # Files ingested before the catalog existed, their etag is unknown until re-ingested
+    cursor.execute(
+        f"""INSERT INTO documents (id, source, title, chunk_count)
+        SELECT {DOCUMENT_ID}, {CATALOG_SOURCE}, coalesce(min(title), {CATALOG_SOURCE}), count(*)
+        FROM vector_store
+        WHERE document_id IS NULL AND source IS NOT NULL
+        GROUP BY {CATALOG_SOURCE}
+        ON CONFLICT (id) DO NOTHING;"""
+    )
+    print(f"Cataloged {cursor.rowcount} files")
+    cursor.execute(
+        f"""UPDATE vector_store SET document_id = {DOCUMENT_ID}
+        WHERE document_id IS NULL AND source IS NOT NULL;"""
+    )
+    print(f"Linked {cursor.rowcount} chunks to their file")
+
+    if not has_constraint(cursor, "vector_store", "f"):
+        cursor.execute(
+            """ALTER TABLE vector_store ADD CONSTRAINT vector_store_document_id_fkey
+            FOREIGN KEY (document_id) REFERENCES documents (id) ON DELETE CASCADE;"""
+        )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS vector_store_document_id_idx ON vector_store (document_id, chunk);"
+    )
+    # Looked up by document_id instead since the catalog
+    cursor.execute("DROP INDEX IF EXISTS vector_store_source_idx;")
+    cursor.execute("ALTER TABLE public.documents OWNER TO azure_pg_admin;")
+
+
+def add_conversation_summaries(cursor):
+    cursor.execute(
+        """CREATE TABLE IF NOT EXISTS conversation_summaries (
+            conversation_id TEXT PRIMARY KEY,
+            user_id TEXT NOT NULL,
+            summary TEXT NOT NULL,
+            summarized_message_count INTEGER NOT NULL,
+            "updatedAt" TIMESTAMPTZ
+        );"""
+    )
+    cursor.execute("ALTER TABLE public.conversation_summaries OWNER TO azure_pg_admin;")
+
+
+def add_conversation_title_pending(cursor):
+    # The conversations created before were titled when they were saved
+    cursor.execute(
+        'ALTER TABLE conversations ADD COLUMN IF NOT EXISTS "titlePending" BOOLEAN NOT NULL DEFAULT FALSE;'
+    )
+
+
+CHAT_HISTORY_TIMESTAMPS = [
+    ("conversations", "createdAt"),
+    ("conversations", "updatedAt"),
+    ("messages", "createdAt"),
+    ("messages", "updatedAt"),
+    ("conversation_summaries", "updatedAt"),
+]
+
+
+def convert_chat_history_timestamps(cursor):
+    for table, column in CHAT_HISTORY_TIMESTAMPS:
+        cursor.execute(
+            """SELECT data_type FROM information_schema.columns
+            WHERE table_schema = 'public' AND table_name = %s AND column_name = %s;""",
+            (table, column),
+        )
+        row = cursor.fetchone()
+        if row and row[0] == "text":
+            # The TEXT columns hold ISO 8601 timestamps, in UTC when they end with Z
+            cursor.execute(
+                f"""ALTER TABLE {table} ALTER COLUMN "{column}" TYPE TIMESTAMPTZ
+                USING NULLIF("{column}", '')::timestamptz;"""
+            )
+            print(f"Converted {table}.{column} to timestamptz")
+    cursor.execute(
+        'CREATE INDEX IF NOT EXISTS conversations_user_id_updated_at_idx ON conversations (user_id, "updatedAt", id);'
+    )
+    cursor.execute(
+        'CREATE INDEX IF NOT EXISTS messages_conversation_id_created_at_idx ON messages (conversation_id, user_id, "createdAt");'
+    )
+
+
+def add_content_tsv(cursor):
+    # Rewrites the table once to compute the column of the existing chunks
+    cursor.execute(
+        """ALTER TABLE vector_store ADD COLUMN IF NOT EXISTS content_tsv tsvector
+        GENERATED ALWAYS AS (
+            to_tsvector('english', coalesce(title, '') || ' ' || coalesce(content, ''))
+        ) STORED;"""
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS vector_store_content_tsv_idx ON vector_store USING gin (content_tsv);"
+    )
+
+
+def rebuild_vector_index(cursor):
+    cursor.execute(
+        """SELECT pg_get_indexdef(oid), reloptions FROM pg_class
+        WHERE oid = to_regclass('public.vector_store_content_vector_idx');"""
+    )
+    row = cursor.fetchone()
+    operator_class = index_expressions[vector_storage].split()[-1]
+    options = {f"m={hnsw_m}", f"ef_construction={hnsw_ef_construction}"}
+    if row and operator_class in row[0] and set(row[1] or []) == options:
+        return
+    # The build reads every vector, it can take a while on large tables
+    cursor.execute("DROP INDEX IF EXISTS vector_store_content_vector_idx;")
+    cursor.execute(
+        f"CREATE INDEX vector_store_content_vector_idx ON vector_store USING hnsw ({index_expressions[vector_storage]}) "
+        f"WITH (m = {hnsw_m}, ef_construction = {hnsw_ef_construction});"
+    )
+    print(
+        f"Rebuilt the HNSW index on {vector_storage} with m = {hnsw_m}, ef_construction = {hnsw_ef_construction}"
+    )
+
+
+MIGRATIONS = [
+    add_vector_store_primary_key,
+    add_documents_catalog,
+    add_conversation_summaries,
+    add_conversation_title_pending,
+    convert_chat_history_timestamps,
+    add_content_tsv,
+    rebuild_vector_index,
+]
+
+
+# Acquire the access token
+cred = get_azure_credential()
+access_token = cred.get_token("https://ossrdbms-aad.database.windows.net/.default")
+
+# Combine the token with the connection string to establish the connection.
+conn_string = "host={0} user={1} dbname={2} password={3} sslmode=require".format(
+    host, user, dbname, access_token.token
+)
+conn = psycopg2.connect(conn_string)
+cursor = conn.cursor()
+
+# Each migration is committed on its own, a failed one is rolled back as a whole
+for migration in MIGRATIONS:
+    print(f"Running {migration.__name__}")
+    migration(cursor)
+    conn.commit()
+
+cursor.close()
+conn.close()